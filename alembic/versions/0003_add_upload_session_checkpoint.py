@@ -0,0 +1,34 @@
+"""add_upload_session_checkpoint_columns
+
+Revision ID: 0003
+Revises: 0002, 3a017431437a, fd23333a9d9a
+Create Date: 2026-10-16 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+# Also merges the three heads that all branched from 0001.
+revision: str = '0003'
+down_revision: Union[str, Sequence[str], None] = ('0002', '3a017431437a', 'fd23333a9d9a')
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Streaming-load checkpoint for resumable upload tasks
+    op.add_column('upload_sessions', sa.Column('last_committed_row', sa.Integer(), server_default='0', nullable=False), schema=PUBLIC_SCHEMA)
+    op.add_column('upload_sessions', sa.Column('inserted_count', sa.Integer(), server_default='0', nullable=False), schema=PUBLIC_SCHEMA)
+    op.add_column('upload_sessions', sa.Column('updated_count', sa.Integer(), server_default='0', nullable=False), schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'updated_count', schema=PUBLIC_SCHEMA)
+    op.drop_column('upload_sessions', 'inserted_count', schema=PUBLIC_SCHEMA)
+    op.drop_column('upload_sessions', 'last_committed_row', schema=PUBLIC_SCHEMA)
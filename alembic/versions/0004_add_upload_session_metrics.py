@@ -0,0 +1,29 @@
+"""add_upload_session_metrics_column
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-16 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-phase timing/throughput summary of the load, stored as JSON text
+    op.add_column('upload_sessions', sa.Column('metrics', sa.Text(), nullable=True), schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'metrics', schema=PUBLIC_SCHEMA)
@@ -0,0 +1,45 @@
+"""add_upload_session_errors_table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-16 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Row errors of an upload, written in batches while it loads instead of into upload_sessions.details
+    op.create_table('upload_session_errors',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('row_number', sa.Integer(), nullable=True),
+        sa.Column('field_name', sa.String(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=False),
+        sa.Column('error_type', sa.String(), nullable=False),
+        sa.Column('offending_value', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], [f'{PUBLIC_SCHEMA}.upload_sessions.session_id'],
+                                name=op.f('fk_upload_session_errors_session_id_upload_sessions'), ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_upload_session_errors')),
+        schema=PUBLIC_SCHEMA
+    )
+    op.create_index('idx_upload_session_errors_session_row', 'upload_session_errors',
+                    ['session_id', 'row_number', 'id'], unique=False, schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_upload_session_errors_session_row', table_name='upload_session_errors', schema=PUBLIC_SCHEMA)
+    op.drop_table('upload_session_errors', schema=PUBLIC_SCHEMA)
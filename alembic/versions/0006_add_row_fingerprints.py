@@ -0,0 +1,41 @@
+"""add_row_fingerprints_table
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-16 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-business hash of each loaded row, keyed by load type and natural key, for delta uploads
+    op.create_table('row_fingerprints',
+        sa.Column('id', sa.BigInteger(), autoincrement=True, nullable=False),
+        sa.Column('business_details_id', sa.BigInteger(), nullable=False),
+        sa.Column('load_type', sa.String(), nullable=False),
+        sa.Column('natural_key', sa.Text(), nullable=False),
+        sa.Column('fingerprint', sa.String(length=32), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_row_fingerprints')),
+        sa.UniqueConstraint('business_details_id', 'load_type', 'natural_key', name='uq_row_fingerprint_business_type_key'),
+        schema=PUBLIC_SCHEMA
+    )
+    op.add_column('upload_sessions', sa.Column('unchanged_count', sa.Integer(), server_default='0', nullable=False), schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'unchanged_count', schema=PUBLIC_SCHEMA)
+    op.drop_table('row_fingerprints', schema=PUBLIC_SCHEMA)
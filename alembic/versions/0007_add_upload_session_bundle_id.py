@@ -0,0 +1,31 @@
+"""add_upload_session_bundle_id
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-16 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Links the per-file sessions of a bundle upload to its aggregate session
+    op.add_column('upload_sessions', sa.Column('bundle_id', sa.String(), nullable=True), schema=PUBLIC_SCHEMA)
+    op.create_index(op.f('ix_public_upload_sessions_bundle_id'), 'upload_sessions', ['bundle_id'], unique=False, schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_public_upload_sessions_bundle_id'), table_name='upload_sessions', schema=PUBLIC_SCHEMA)
+    op.drop_column('upload_sessions', 'bundle_id', schema=PUBLIC_SCHEMA)
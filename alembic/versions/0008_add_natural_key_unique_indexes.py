@@ -0,0 +1,47 @@
+"""add_natural_key_unique_indexes
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-16 14:00:00.000000
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+
+# Schema constants
+PUBLIC_SCHEMA = os.getenv("PUBLIC_SCHEMA_NAME", "public")
+CATALOG_SCHEMA = os.getenv("CATALOG_SCHEMA_NAME", "public")
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Natural keys the loaders upsert on (INSERT ... ON CONFLICT). 0001 declares the
+# first four as constraints, but skips tables that already existed, so they are
+# ensured here under the same names (a constraint's index carries its name).
+NATURAL_KEY_INDEXES = [
+    ('uq_brand_business_name', CATALOG_SCHEMA, 'brands', 'business_details_id, name', None),
+    ('uq_attribute_business_name', CATALOG_SCHEMA, 'attribute', 'business_details_id, name', None),
+    ('uq_attribute_value_attribute_id_name', CATALOG_SCHEMA, 'attribute_value', 'attribute_id, name', None),
+    ('uq_category_business_name_parent', PUBLIC_SCHEMA, 'categories', 'business_details_id, name, parent_id', None),
+    # NULL parent_ids never conflict above, so root categories need their own index.
+    ('uq_category_business_root_name', PUBLIC_SCHEMA, 'categories', 'business_details_id, name', 'parent_id IS NULL'),
+]
+
+
+def upgrade() -> None:
+    # Fails if duplicates already exist; they have to be merged by hand first.
+    for name, schema, table, columns, where in NATURAL_KEY_INDEXES:
+        op.execute(
+            f'CREATE UNIQUE INDEX IF NOT EXISTS {name} ON "{schema}"."{table}" ({columns})'
+            + (f' WHERE {where}' if where else '')
+        )
+
+
+def downgrade() -> None:
+    # Only the root-category index is new in every database; the others may predate this revision.
+    op.drop_index('uq_category_business_root_name', table_name='categories', schema=PUBLIC_SCHEMA)
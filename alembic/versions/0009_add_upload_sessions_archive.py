@@ -0,0 +1,51 @@
+"""add_upload_sessions_archive
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-16 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Sessions past retention move here, their full row and errors compressed into payload
+    op.create_table('upload_sessions_archive',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('business_details_id', sa.BigInteger(), nullable=False),
+        sa.Column('load_type', sa.String(), nullable=False),
+        sa.Column('status', sa.String(), nullable=False),
+        sa.Column('record_count', sa.Integer(), nullable=True),
+        sa.Column('error_count', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+        sa.Column('payload', sa.LargeBinary(), nullable=False),
+        sa.PrimaryKeyConstraint('id', name=op.f('pk_upload_sessions_archive')),
+        sa.UniqueConstraint('session_id', name=op.f('uq_upload_sessions_archive_session_id')),
+        schema=PUBLIC_SCHEMA
+    )
+    op.create_index('idx_upload_sessions_archive_business_created_at', 'upload_sessions_archive',
+                    ['business_details_id', 'created_at'], unique=False, schema=PUBLIC_SCHEMA)
+    # Lets the retention job walk sessions oldest first
+    op.create_index('idx_upload_session_updated_at_id', 'upload_sessions',
+                    ['updated_at', 'id'], unique=False, schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_index('idx_upload_session_updated_at_id', table_name='upload_sessions', schema=PUBLIC_SCHEMA)
+    op.drop_index('idx_upload_sessions_archive_business_created_at', table_name='upload_sessions_archive', schema=PUBLIC_SCHEMA)
+    op.drop_table('upload_sessions_archive', schema=PUBLIC_SCHEMA)
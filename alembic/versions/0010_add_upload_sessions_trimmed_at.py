@@ -0,0 +1,29 @@
+"""add_upload_sessions_trimmed_at
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-16 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Set when the retention job trims a session in place, so later runs skip it
+    op.add_column('upload_sessions', sa.Column('trimmed_at', sa.DateTime(), nullable=True), schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'trimmed_at', schema=PUBLIC_SCHEMA)
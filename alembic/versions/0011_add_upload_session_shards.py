@@ -0,0 +1,41 @@
+"""add_upload_session_shards_table
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-16 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Per-shard checkpoint of a sharded upload, so a retried shard resumes after its last committed chunk
+    op.create_table('upload_session_shards',
+        sa.Column('session_id', sa.String(), nullable=False),
+        sa.Column('start_row', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('last_committed_row', sa.Integer(), nullable=False),
+        sa.Column('inserted_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('updated_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('unchanged_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('error_count', sa.Integer(), server_default='0', nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], [f'{PUBLIC_SCHEMA}.upload_sessions.session_id'],
+                                name=op.f('fk_upload_session_shards_session_id_upload_sessions'), ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'start_row', name=op.f('pk_upload_session_shards')),
+        schema=PUBLIC_SCHEMA
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('upload_session_shards', schema=PUBLIC_SCHEMA)
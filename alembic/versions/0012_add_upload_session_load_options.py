@@ -0,0 +1,31 @@
+"""add_upload_session_load_options
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-16 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# Schema constants
+PUBLIC_SCHEMA = "public"
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The delta and shards options of the upload, passed again when the session is resumed
+    op.add_column('upload_sessions', sa.Column('delta', sa.Boolean(), server_default=sa.false(), nullable=False), schema=PUBLIC_SCHEMA)
+    op.add_column('upload_sessions', sa.Column('shards', sa.Integer(), nullable=True), schema=PUBLIC_SCHEMA)
+
+
+def downgrade() -> None:
+    op.drop_column('upload_sessions', 'shards', schema=PUBLIC_SCHEMA)
+    op.drop_column('upload_sessions', 'delta', schema=PUBLIC_SCHEMA)
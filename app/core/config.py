@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pydantic import PostgresDsn, RedisDsn, HttpUrl, Field, model_validator, field_validator
-from typing import Optional, Dict
+from typing import Literal, Optional, Dict
 
 
 @field_validator('WASABI_ACCESS_KEY', 'WASABI_SECRET_KEY', mode='before')
@@ -42,6 +42,22 @@ class Settings(BaseSettings):
     DB_NAME2: Optional[str] = None
     DATABASE_URL_DB2: Optional[PostgresDsn] = None
 
+    # --- Optional streaming replica of the primary, for staleness-tolerant reads ---
+    DATABASE_URL_REPLICA: Optional[PostgresDsn] = None
+    REPLICA_MAX_LAG_SECONDS: float = 5.0  # reads go back to the primary while the replica lags more
+    REPLICA_LAG_CHECK_SECONDS: float = 5.0  # how long a lag measurement is trusted
+
+    # --- Connection pools (per engine and process) ---
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 5
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # below typical server/LB idle timeouts
+    DB_POOL_TIMEOUT_SECONDS: int = 30
+    # Per-engine overrides, e.g. {"DB2": {"pool_size": 2, "max_overflow": 2}}
+    DB_POOL_OVERRIDES: Dict[str, Dict[str, int]] = {}
+    ASYNC_DB_DRIVER: str = "postgresql+asyncpg"  # driver of the API process's async engine (same host/db)
+    # A normalized statement sent more often than this in one task is reported as a likely N+1
+    QUERY_REPEAT_THRESHOLD: int = 50
+
     # --- Schemas ---
     CATALOG_SERVICE_SCHEMA: str = "public"
     BUSINESS_SERVICE_SCHEMA: str = "public"
@@ -65,6 +81,7 @@ class Settings(BaseSettings):
     REDIS_DB_ID_MAPPING: int = 1
     REDIS_PASSWORD: str = Field(..., env="REDIS_PASSWORD")
     REDIS_SESSION_TTL_SECONDS: int = 86400
+    PROGRESS_FLUSH_INTERVAL_SECONDS: float = 5.0
 
     # --- Celery Redis ---
     CELERY_BROKER_DB_NUMBER: int = 0
@@ -77,6 +94,29 @@ class Settings(BaseSettings):
         "return_policies": "DB2"
     }
 
+    # --- CSV ingestion ---
+    CSV_STREAMING_ENABLED: bool = True
+    CSV_CHUNK_SIZE: int = 2000
+    CSV_MAX_SHARDS: int = 16
+    DRY_RUN_INLINE_MAX_BYTES: int = 2_000_000  # larger dry runs are checked by a worker
+    BUNDLE_MAX_UNCOMPRESSED_BYTES: int = 500_000_000  # total CSV size a bundle zip may expand to
+    SESSION_ERRORS_INSERT_BATCH_SIZE: int = 1000  # rows per multi-row INSERT into upload_session_errors
+    UPSERT_BATCH_SIZE: int = 1000  # rows per INSERT ... ON CONFLICT statement in the loaders
+    # Also hash and upsert row fingerprints on non-delta loads. Off, a full load only
+    # deletes the stored fingerprints of the keys it loads (one DELETE per chunk), so a
+    # later delta upload reloads those rows once instead of skipping them on a stale hash.
+    DELTA_FINGERPRINT_FULL_LOADS: bool = False
+
+    # --- Upload session retention (Celery beat job) ---
+    SESSION_RETENTION_DAYS: int = 90  # terminal sessions untouched this long are retained; 0 disables the job
+    SESSION_RETENTION_MODE: Literal["archive", "trim"] = "archive"  # move to upload_sessions_archive, or drop details/errors in place
+    SESSION_RETENTION_BATCH_SIZE: int = 500  # sessions per transaction
+    SESSION_RETENTION_MAX_BATCHES: int = 200  # per run; the next run continues
+    SESSION_RETENTION_INTERVAL_SECONDS: int = 3600
+
+    # --- Metrics ---
+    WORKER_METRICS_PORT: int = 0  # 0 disables the worker's /metrics HTTP endpoint
+
     @model_validator(mode='after')
     def _construct_derived_urls(self) -> 'Settings':
         # 1) Primary DATABASE_URL
@@ -1,9 +1,8 @@
 import logging
-from typing import List, Dict, Any, Optional,Tuple
+from typing import List, Dict, Any, FrozenSet, Iterable, Optional, Sequence, Set, Tuple
 
 from sqlalchemy.orm import Session
-from sqlalchemy.exc import IntegrityError, NoResultFound, DataError
-from sqlalchemy import func # Added for func.lower
+from sqlalchemy.exc import IntegrityError, NoResultFound, DataError, SQLAlchemyError
 
 
 # ORM Models
@@ -15,27 +14,27 @@ from app.db.models import (
     ProductImageOrm,
     AttributeOrm,
     AttributeValueOrm,
-    MainSkuOrm # Ensure MainSkuOrm is imported if not already
 )
+from app.db.lookups import (
+    ATTRIBUTE_IDS_BY_NAMES,
+    ATTRIBUTE_VALUE_IDS_BY_NAMES,
+    DEFAULT_MAIN_SKU_IDS,
+    PRODUCT_ID_BY_NAME,
+    PRODUCT_IDS_BY_NAMES,
+    SKU_VARIANTS_BY_PRODUCT,
+)
+from app.db.batch_isolation import load_isolating_failures
+from app.db.bulk_update import BulkUpdates
 # Pydantic CSV Model
 from app.dataload.models.item_csv import ItemCsvModel
 
 # Parsing Utilities
-# Need to import sql_func for sqlalchemy.sql.func
-from sqlalchemy import and_, func as sql_func
 
 from app.dataload.parsers.item_parser import (
     parse_attributes_string,
     parse_attribute_combination_string,
     generate_sku_variants,
-    get_price_for_combination,
-    get_quantity_for_combination,
-    get_status_for_combination,
-    get_order_limit_for_combination,
-    get_package_size_length_for_combination,
-    get_package_size_width_for_combination,
-    get_package_size_height_for_combination,
-    get_package_weight_for_combination,
+    CompiledItemRow,
     ItemParserError # For handling parsing errors
 )
 # Product Image parsing (similar to product_loader)
@@ -44,7 +43,7 @@ from app.dataload.product_loader import parse_images as parse_product_level_imag
 
 # General Utilities / Exceptions
 from app.exceptions import DataLoaderError
-from app.models.schemas import ErrorType # Assuming ErrorType is used in DataLoaderError
+from app.models.schemas import ErrorDetailModel, ErrorType # Assuming ErrorType is used in DataLoaderError
 try:
     from app.utils.date_utils import now_epoch_ms
 except ImportError: # Fallback if not available, for basic compilation
@@ -53,6 +52,7 @@ except ImportError: # Fallback if not available, for basic compilation
         return int(time.time() * 1000)
 
 from app.utils import barcode_helper # For barcode generation
+from app.services.metrics import phase
 
 logger = logging.getLogger(__name__)
 
@@ -62,43 +62,69 @@ logger = logging.getLogger(__name__)
 # def load_items_to_db(...)
 # pass # Removed pass
 
-def _lookup_attribute_ids(db: Session, business_details_id: int, attribute_names: List[str]) -> Dict[str, int]:
-    """Helper to look up attribute IDs by name for a business."""
+class AttributeMaps:
+    """
+    Attribute and attribute value IDs of one business, matched case-insensitively.
+    Names are resolved in sets, one query per load_* call for the names not asked
+    before, and misses are remembered too, so rows sharing a map never query a
+    name twice. load_items_to_db fills one for the whole batch up front.
+    """
+
+    def __init__(self):
+        self._attribute_ids: Dict[str, Optional[int]] = {}  # lower(name) -> id; None: not found
+        self._value_ids: Dict[Tuple[int, str], List[int]] = {}  # (attribute_id, lower(name)) -> ids found
+
+    def load_attributes(self, db: Session, business_details_id: int, attribute_names: Iterable[str]) -> "AttributeMaps":
+        new_names = sorted({name.lower() for name in attribute_names} - self._attribute_ids.keys())
+        if new_names:
+            self._attribute_ids.update(dict.fromkeys(new_names))
+            params = {"names": new_names, "business_details_id": business_details_id}
+            for row in db.execute(ATTRIBUTE_IDS_BY_NAMES, params):
+                if self._attribute_ids.get(row.name_key) is None:  # lowest id wins, as .first() did
+                    self._attribute_ids[row.name_key] = row.id
+        return self
+
+    def load_values(self, db: Session, keys: Iterable[Tuple[int, str]]) -> "AttributeMaps":
+        """Resolve (attribute_id, value name) keys."""
+        new_keys = {(attr_id, name.lower()) for attr_id, name in keys} - self._value_ids.keys()
+        if new_keys:
+            for key in new_keys:
+                self._value_ids[key] = []
+            params = {
+                "attribute_ids": sorted({attr_id for attr_id, _ in new_keys}),
+                "names": sorted({name for _, name in new_keys}),
+            }
+            for row in db.execute(ATTRIBUTE_VALUE_IDS_BY_NAMES, params):
+                key = (row.attribute_id, row.name_key)
+                if key in new_keys:
+                    self._value_ids[key].append(row.id)
+        return self
+
+    def attribute_id(self, name: str) -> Optional[int]:
+        return self._attribute_ids.get(name.lower())
+
+    def value_ids(self, attribute_id: int, name: str) -> List[int]:
+        return self._value_ids.get((attribute_id, name.lower()), [])
+
+
+def _lookup_attribute_ids(
+    db: Session,
+    business_details_id: int,
+    attribute_names: List[str],
+    attribute_maps: Optional[AttributeMaps] = None,
+) -> Dict[str, int]:
+    """Helper to look up attribute IDs by name for a business (from attribute_maps when given)."""
+    attribute_maps = (attribute_maps or AttributeMaps()).load_attributes(db, business_details_id, attribute_names)
     attr_id_map: Dict[str, int] = {}
     missing_attrs = []
-    # Ensure unique names for lookup to avoid redundant DB calls, though list(set()) already does this.
-    for name in sorted(list(set(attribute_names))):
-        try:
-            # Use func.lower for case-insensitive comparison on name
-            attr_orm_result = db.query(AttributeOrm.id).filter(
-                func.lower(AttributeOrm.name) == func.lower(name), 
-                AttributeOrm.business_details_id == business_details_id
-            ).first() # Changed to .first()
-
-            if attr_orm_result:
-                attr_id_map[name] = attr_orm_result.id
-            else: # attr_orm_result is None, meaning not found
-                missing_attrs.append(name)
-        except Exception as e: # Catch other potential DB errors or unexpected issues
-            logger.error(f"Error looking up attribute '{name}' for business {business_details_id}: {e}", exc_info=True)
-            # Ensure name is added to missing_attrs if an error occurred, to signify lookup failure.
-            # Avoid adding duplicates if already added by a NoResultFound-like path (though .first() doesn't raise NoResultFound for empty results)
-            if name not in missing_attrs and f"{name} (DB error)" not in missing_attrs:
-                 missing_attrs.append(f"{name} (DB error)")
-            
+    for name in sorted(set(attribute_names)):
+        attr_id = attribute_maps.attribute_id(name)
+        if attr_id is not None:
+            attr_id_map[name] = attr_id
+        else:
+            missing_attrs.append(name)
+
     if missing_attrs:
-        # Consolidate error reporting for missing attributes or DB errors during lookup
-        # The "(DB error)" suffix helps distinguish.
-        # If any item contains "(DB error)", it implies a more critical issue than just "not found".
-        is_critical_error = any("(DB error)" in ma for ma in missing_attrs)
-        error_message_intro = "Critical error during attribute lookup or some attributes not found" if is_critical_error else "Attributes not found"
-        
-        raise DataLoaderError(
-            message=f"{error_message_intro} for business {business_details_id}: {', '.join(missing_attrs)}",
-                error_type=ErrorType.LOOKUP,
-                field_name="attributes (derived names)",
-                offending_value=str(missing_attrs)
-            )
         raise DataLoaderError(
             message=f"Attributes not found for business {business_details_id}: {', '.join(missing_attrs)}",
             error_type=ErrorType.LOOKUP,
@@ -110,60 +136,44 @@ def _lookup_attribute_ids(db: Session, business_details_id: int, attribute_names
 def _lookup_attribute_value_ids(
     db: Session, 
     attr_id_map: Dict[str, int], 
-    attr_value_pairs_to_lookup: List[tuple[str, str]]
+    attr_value_pairs_to_lookup: List[tuple[str, str]],
+    attribute_maps: Optional[AttributeMaps] = None,
 ) -> Dict[tuple[str, str], int]:
-    """Helper to look up attribute value IDs."""
+    """Helper to look up attribute value IDs (from attribute_maps when given)."""
     attr_val_id_map: Dict[tuple[str, str], int] = {}
     missing_vals = []
     unique_pairs = sorted(list(set(attr_value_pairs_to_lookup)))
+    attribute_maps = (attribute_maps or AttributeMaps()).load_values(
+        db, [(attr_id_map[attr], val) for attr, val in unique_pairs if attr in attr_id_map]
+    )
 
     for attr_name, val_name in unique_pairs:
         attr_id = attr_id_map.get(attr_name)
         if attr_id is None: # attr_name itself was not found in the previous step.
-            # This indicates a problem if _lookup_attribute_ids didn't raise an error for attr_name.
-            # Or, if attr_value_pairs_to_lookup contains attr_names not in attr_id_map (should not happen if logic is correct).
             logger.error(f"Internal inconsistency: Attribute ID for '{attr_name}' not present in attr_id_map during value lookup for '{val_name}'.")
             missing_vals.append(f"{attr_name} -> {val_name} (Attribute '{attr_name}' missing its ID)")
             continue 
-        
-        logger.debug(
-            f"Looking up AttributeValue: attr_name='{attr_name}', attr_id='{attr_id}', val_name_from_csv='{val_name}'"
-        )
-        try:
-            # Compare CSV value (val_name) against AttributeValueOrm.name column, case-insensitively
-            attr_val_orm_result = db.query(AttributeValueOrm.id).filter(
-                AttributeValueOrm.attribute_id == attr_id,
-                func.lower(AttributeValueOrm.name) == func.lower(val_name)
-            ).one() # Expect exactly one match
-            
-            attr_val_id_map[(attr_name, val_name)] = attr_val_orm_result.id
-        except NoResultFound:
+
+        # CSV value (val_name) matched against AttributeValueOrm.name, case-insensitively
+        value_ids = attribute_maps.value_ids(attr_id, val_name)
+        if len(value_ids) == 1:
+            attr_val_id_map[(attr_name, val_name)] = value_ids[0]
+        elif not value_ids:
             missing_vals.append(f"{attr_name} -> {val_name}")
-        except MultipleResultsFound:
+        else:
             logger.error(
                 f"Multiple attribute values found for attr_id='{attr_id}', "
                 f"val_name='{val_name}' (case-insensitive). This indicates a data integrity issue "
                 f"where (attribute_id, LOWER(name)) is not unique in attribute_value table."
             )
             missing_vals.append(f"{attr_name} -> {val_name} (Multiple results found in DB)")
-        except Exception as e:
-            logger.error(f"Error looking up attribute value '{val_name}' for attribute '{attr_name}' (ID: {attr_id}): {e}", exc_info=True)
-            missing_vals.append(f"{attr_name} -> {val_name} (DB error)")
-
 
     if missing_vals:
-        # Check if any missing_val contains specific error indicators to modify message
-        is_critical_error = any("(DB error)" in mv or "(Attribute" in mv or "(Multiple results found in DB)" in mv for mv in missing_vals)
+        is_critical_error = any("(Attribute" in mv or "(Multiple results found in DB)" in mv for mv in missing_vals)
         error_message_intro = "Critical error during attribute value lookup or some values not found/unique" if is_critical_error else "Attribute values not found"
         
         raise DataLoaderError(
             message=f"{error_message_intro}: {', '.join(missing_vals)}",
-                error_type=ErrorType.LOOKUP,
-                field_name="attribute_combination (derived values)",
-                offending_value=str(missing_vals)
-            )
-        raise DataLoaderError(
-            message=f"Attribute values not found: {', '.join(missing_vals)}",
             error_type=ErrorType.LOOKUP,
             field_name="attribute_combination (derived values)",
             offending_value=str(missing_vals)
@@ -171,77 +181,54 @@ def _lookup_attribute_value_ids(
     return attr_val_id_map
 
 
-def find_existing_sku_by_attributes(
-    db: Session, 
-    product_id: int, 
-    target_attribute_value_ids: List[int],
-    log_prefix: str = "" 
-) -> Optional[Tuple[SkuOrm, MainSkuOrm]]:
-    """
-    Finds an existing SkuOrm and its corresponding MainSkuOrm based on product_id 
-    and a specific combination of attribute_value_ids.
-    A SKU is considered a match if it's linked to all target_attribute_value_ids 
-    and no other attribute_value_ids.
-    """
-    if not target_attribute_value_ids:
-        logger.debug(f"{log_prefix} No target attribute value IDs provided for SKU lookup.")
-        return None
-
-    num_target_attributes = len(target_attribute_value_ids)
-
-    # Subquery to find sku_ids that are linked to *all* target_attribute_value_ids
-    # It counts, for each sku_id, how many of the target_attribute_value_ids it is linked to.
-    # We are interested in sku_ids where this count equals num_target_attributes.
-    subquery_matching_attributes = (
-        db.query(
-            ProductVariantOrm.sku_id,
-            sql_func.count(ProductVariantOrm.attribute_value_id).label("matching_attributes_count")
-        )
-        .filter(ProductVariantOrm.attribute_value_id.in_(target_attribute_value_ids))
-        .group_by(ProductVariantOrm.sku_id)
-        .having(sql_func.count(ProductVariantOrm.attribute_value_id) == num_target_attributes)
-        .subquery("sq_matching_skus")
-    )
+def _collect_attribute_names(item_records_data: List[Dict[str, Any]]) -> Tuple[Set[str], Set[Tuple[str, str]]]:
+    """Every attribute name and (attribute name, value name) pair the rows use."""
+    attribute_names: Set[str] = set()
+    value_pairs: Set[Tuple[str, str]] = set()
+    for raw_record_dict in item_records_data:
+        try:
+            parsed_attributes = parse_attributes_string(raw_record_dict.get('attributes'))
+            parsed_values = parse_attribute_combination_string(raw_record_dict.get('attribute_combination'), parsed_attributes)
+        except Exception:
+            continue  # The row's own load reports it.
+        for attr_def, values in zip(parsed_attributes, parsed_values):
+            attribute_names.add(attr_def['name'])
+            value_pairs.update((attr_def['name'], value['value']) for value in values)
+    return attribute_names, value_pairs
 
-    # Subquery to count the *total* number of attributes linked to each sku_id.
-    # This is to ensure the SKU doesn't have additional attributes beyond the target ones.
-    subquery_total_attributes_for_sku = (
-        db.query(
-            ProductVariantOrm.sku_id,
-            sql_func.count(ProductVariantOrm.attribute_value_id).label("total_attributes_count")
-        )
-        .group_by(ProductVariantOrm.sku_id)
-        .subquery("sq_total_attributes_for_sku")
-    )
 
-    # Main query to find the SkuOrm
-    # It must:
-    # 1. Belong to the given product_id.
-    # 2. Be present in subquery_matching_attributes (has all target attributes).
-    # 3. Its total number of attributes (from subquery_total_attributes_for_sku) must also be num_target_attributes.
-    existing_sku_orm = (
-        db.query(SkuOrm)
-        .join(subquery_matching_attributes, SkuOrm.id == subquery_matching_attributes.c.sku_id)
-        .join(subquery_total_attributes_for_sku, SkuOrm.id == subquery_total_attributes_for_sku.c.sku_id)
-        .filter(SkuOrm.product_id == product_id)
-        .filter(subquery_total_attributes_for_sku.c.total_attributes_count == num_target_attributes)
-        .first() # Expect at most one such SKU
-    )
+# A product's SKUs keyed by the set of attribute_value_ids each is linked to: (sku_id, main_sku_id).
+SkuSignatureIndex = Dict[FrozenSet[int], Tuple[int, int]]
 
-    if existing_sku_orm:
-        logger.debug(f"{log_prefix} Found existing SkuOrm ID: {existing_sku_orm.id} by attribute combination.")
-        # Fetch the corresponding MainSkuOrm
-        # Assuming existing_sku_orm.main_sku_id correctly links SkuOrm to MainSkuOrm
-        main_sku_orm = db.query(MainSkuOrm).filter(MainSkuOrm.id == existing_sku_orm.main_sku_id).one_or_none()
-        if main_sku_orm:
-            logger.debug(f"{log_prefix} Found corresponding MainSkuOrm ID: {main_sku_orm.id}.")
-            return existing_sku_orm, main_sku_orm
-        else:
-            logger.error(f"{log_prefix} Data integrity issue: SkuOrm ID {existing_sku_orm.id} found, but its MainSkuOrm (ID: {existing_sku_orm.main_sku_id}) is missing for product {product_id}.")
-            return None # Or raise an error indicating data inconsistency
-    
-    logger.debug(f"{log_prefix} No existing SKU found for product_id {product_id} with attributes {target_attribute_value_ids}.")
-    return None
+
+def load_sku_signature_index(db: Session, product_ids: Iterable[int]) -> Dict[int, SkuSignatureIndex]:
+    """
+    SKU signature index of each product, from one query for all of them.
+    A variant matches an existing SKU when its attribute value IDs are exactly
+    the SKU's signature; products without SKUs get an empty index.
+    """
+    product_ids = sorted(set(product_ids))
+    if not product_ids:
+        return {}
+    value_ids_by_sku: Dict[int, set] = {}
+    owner_by_sku: Dict[int, Tuple[int, int]] = {}  # sku_id -> (product_id, main_sku_id)
+    for row in db.execute(SKU_VARIANTS_BY_PRODUCT, {"product_ids": product_ids}):
+        value_ids_by_sku.setdefault(row.sku_id, set()).add(row.attribute_value_id)
+        owner_by_sku[row.sku_id] = (row.product_id, row.main_sku_id)
+
+    indexes: Dict[int, SkuSignatureIndex] = {product_id: {} for product_id in product_ids}
+    for sku_id, value_ids in value_ids_by_sku.items():
+        product_id, main_sku_id = owner_by_sku[sku_id]
+        indexes[product_id][frozenset(value_ids)] = (sku_id, main_sku_id)
+    return indexes
+
+
+def _default_main_sku_ids(db: Session, main_sku_ids: Iterable[int]) -> Set[int]:
+    """Which of main_sku_ids are default (is_default) MainSKUs, in one query."""
+    main_sku_ids = sorted(set(main_sku_ids))
+    if not main_sku_ids:
+        return set()
+    return set(db.execute(DEFAULT_MAIN_SKU_IDS, {"ids": main_sku_ids}).scalars())
 
 
 def load_item_record_to_db(
@@ -249,10 +236,24 @@ def load_item_record_to_db(
     business_details_id: int, 
     item_csv_row: ItemCsvModel, 
     user_id: int,
+    sku_index: Optional[SkuSignatureIndex] = None,
+    attribute_maps: Optional[AttributeMaps] = None,
+    sku_updates: Optional[BulkUpdates] = None,
+    product_ids_by_name: Optional[Dict[str, int]] = None,
 ) -> List[int]:
     """
     Processes a single item CSV row. If SKUs exist, updates them. If not, skips creation.
     Returns a list of processed (created/updated) main_sku_ids for this row.
+    Row errors (lookups, parsing) are raised as DataLoaderError before anything is
+    written for the row; database errors are raised as they are.
+    sku_index is the product's SKU signature index when the caller loaded it
+    for a whole batch; otherwise it is loaded here for this product. Likewise
+    attribute_maps, the batch's resolved attribute and value IDs.
+    MainSku/Sku changes are not made on ORM objects: they are handed to
+    sku_updates, which the caller writes for the whole batch, once the row has
+    succeeded (without sku_updates they are written before returning).
+    product_ids_by_name, the batch's product IDs by name, replaces the row's own
+    product lookup; a name missing from it is a product that does not exist.
     """
     log_prefix = f"[ItemCSV Product: {item_csv_row.product_name}]"
     logger.info(f"{log_prefix} Starting processing of item CSV row.")
@@ -261,19 +262,21 @@ def load_item_record_to_db(
 
     try:
         # 1. Product Lookup
-        product_orm_result = db.query(ProductOrm.id).filter(
-            ProductOrm.name == item_csv_row.product_name,
-            ProductOrm.business_details_id == business_details_id
-        ).one_or_none() # Use one_or_none for explicit handling
+        if product_ids_by_name is not None:
+            product_id: Optional[int] = product_ids_by_name.get(item_csv_row.product_name)
+        else:
+            product_orm_result = db.execute(
+                PRODUCT_ID_BY_NAME, {"name": item_csv_row.product_name, "business_details_id": business_details_id}
+            ).one_or_none() # Use one_or_none for explicit handling
+            product_id = product_orm_result.id if product_orm_result else None
 
-        if not product_orm_result:
+        if product_id is None:
             raise DataLoaderError(
                 message=f"Product '{item_csv_row.product_name}' not found for business ID {business_details_id}.",
                 error_type=ErrorType.LOOKUP,
                 field_name="product_name",
                 offending_value=item_csv_row.product_name
             )
-        product_id: int = product_orm_result.id
         logger.debug(f"{log_prefix} Found product_id: {product_id}")
 
         # 2. Parse Attributes and Combinations from CSV strings
@@ -296,6 +299,20 @@ def load_item_record_to_db(
             logger.warning(f"{log_prefix} No SKU variants were generated based on CSV input. Skipping SKU creation for this row.")
             return [] # Return empty list, no SKUs created
 
+        # The row's per-combination strings, split once for all of its variants.
+        compiled_row = CompiledItemRow(
+            parsed_attributes,
+            parsed_attribute_values_by_type,
+            price=item_csv_row.price,
+            quantity=item_csv_row.quantity,
+            status=item_csv_row.status,
+            order_limit=item_csv_row.order_limit,
+            package_size_length=item_csv_row.package_size_length,
+            package_size_width=item_csv_row.package_size_width,
+            package_size_height=item_csv_row.package_size_height,
+            package_weight=item_csv_row.package_weight,
+        )
+
         # 3. Initialize for image assignment
         first_main_sku_orm_id_for_images: Optional[int] = None
         
@@ -313,14 +330,29 @@ def load_item_record_to_db(
         
         attr_id_map = {}
         if unique_attr_names_to_lookup:
-            attr_id_map = _lookup_attribute_ids(db, business_details_id, unique_attr_names_to_lookup)
+            attr_id_map = _lookup_attribute_ids(db, business_details_id, unique_attr_names_to_lookup, attribute_maps)
             logger.debug(f"{log_prefix} Fetched attribute IDs: {attr_id_map}")
         
         attr_val_id_map = {}
         if unique_attr_value_pairs_to_lookup and attr_id_map : # Ensure pairs and map exist
-            attr_val_id_map = _lookup_attribute_value_ids(db, attr_id_map, unique_attr_value_pairs_to_lookup)
+            attr_val_id_map = _lookup_attribute_value_ids(db, attr_id_map, unique_attr_value_pairs_to_lookup, attribute_maps)
             logger.debug(f"{log_prefix} Fetched attribute value IDs: {attr_val_id_map}")
 
+        # 5. Match variants to existing SKUs by attribute value signature.
+        if sku_index is None:
+            sku_index = load_sku_signature_index(db, [product_id]).get(product_id, {})
+        variant_matches = [
+            sku_index.get(frozenset(
+                attr_val_id_map[(attr_detail['attribute_name'], attr_detail['value'])]
+                for attr_detail in variant_combination
+            ))
+            for variant_combination in all_sku_variants
+        ]
+        default_main_sku_ids: Set[int] = set()
+        if item_csv_row.images and item_csv_row.images.strip():
+            default_main_sku_ids = _default_main_sku_ids(db, (m[1] for m in variant_matches if m))
+        row_updates = BulkUpdates()
+
         # --- Part 2: SKU Variant Loop will start here (next plan step) ---
         logger.debug(f"{log_prefix} Starting SKU variant processing loop for {len(all_sku_variants)} variants.")
         current_time_epoch_ms = now_epoch_ms() # For created_date / updated_date
@@ -330,50 +362,16 @@ def load_item_record_to_db(
             # Example current_sku_variant: [{'attribute_name': 'color', 'value': 'Black', 'is_default_sku_value': True}, ...]
             
             try:
-                # 1. Extract Per-Combination Data
-                price = get_price_for_combination(
-                    item_csv_row.price, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                quantity = get_quantity_for_combination(
-                    item_csv_row.quantity, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                status_str = get_status_for_combination( # This is per main attribute value group
-                    item_csv_row.status, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                active_db_val = status_str.upper() # Should be "ACTIVE" or "INACTIVE"
-
-                order_limit = get_order_limit_for_combination(
-                    item_csv_row.order_limit, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                pkg_length = get_package_size_length_for_combination(
-                    item_csv_row.package_size_length, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                pkg_width = get_package_size_width_for_combination(
-                    item_csv_row.package_size_width, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                pkg_height = get_package_size_height_for_combination(
-                    item_csv_row.package_size_height, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                pkg_weight = get_package_weight_for_combination(
-                    item_csv_row.package_weight, parsed_attributes, parsed_attribute_values_by_type, current_sku_variant
-                )
-                
+                # 1. Extract Per-Combination Data (status and the optional fields are per main attribute value)
+                fields = compiled_row.fields_for_variant(current_sku_variant)
+                price = fields["price"]
+                quantity = fields["quantity"]
+                active_db_val = fields["status"] # "ACTIVE" or "INACTIVE"
                 discount_price = None # Placeholder for now
 
                 logger.debug(f"{variant_log_prefix}Data extracted: Price={price}, Qty={quantity}, Active={active_db_val}")
-
-                # 2. Determine is_default_sku_for_main_skus_table
-                is_default_sku = False
-                main_attribute_def = next((attr for attr in parsed_attributes if attr['is_main']), None)
-                # main_attribute_def should exist due to validation in parse_attributes_string
-                if main_attribute_def: # Should always be true
-                    main_attr_name_for_variant = main_attribute_def['name']
-                    variant_main_attr_detail = next(
-                        (vad for vad in current_sku_variant if vad['attribute_name'] == main_attr_name_for_variant), None
-                    )
-                    if variant_main_attr_detail and variant_main_attr_detail.get('is_default_sku_value', False):
-                        is_default_sku = True
-                logger.debug(f"{variant_log_prefix}Is Default SKU: {is_default_sku}")
+                # 2. is_default_sku: the variant's main attribute value is flagged main_sku:true
+                logger.debug(f"{variant_log_prefix}Is Default SKU: {fields['is_default_sku']}")
                 
                 # --- SKU Lookup and Update/Skip Logic ---
                 current_target_attr_value_ids = sorted([
@@ -381,70 +379,35 @@ def load_item_record_to_db(
                     for attr_detail in current_sku_variant
                 ])
 
-                existing_sku_tuple = find_existing_sku_by_attributes(
-                    db, product_id, current_target_attr_value_ids, variant_log_prefix
-                )
+                match = variant_matches[sku_variant_idx]
+                if match:
+                    sku_id, main_sku_id = match
+                    logger.info(f"{variant_log_prefix}Found existing MainSKU ID: {main_sku_id}, SKU ID: {sku_id}. Updating.")
+
+                    # The same columns change on the MainSku and its Sku. is_default, barcodes and
+                    # part numbers are structural and stable after creation, so they are not updated.
+                    # ProductVariantOrm entries define the SKU structure and are left as they are.
+                    changes = dict(
+                        price=price,
+                        discount_price=discount_price,
+                        quantity=quantity,
+                        active=active_db_val,
+                        order_limit=fields["order_limit"],
+                        package_size_length=fields["package_size_length"],
+                        package_size_width=fields["package_size_width"],
+                        package_size_height=fields["package_size_height"],
+                        package_weight=fields["package_weight"],
+                        updated_by=user_id,
+                        updated_date=current_time_epoch_ms,
+                    )
+                    row_updates.add(MainSkuOrm, main_sku_id, **changes)
+                    row_updates.add(SkuOrm, sku_id, **changes)
+                    logger.debug(f"{variant_log_prefix}Queued updates for MainSkuOrm ID: {main_sku_id} and SkuOrm ID: {sku_id}")
+
+                    if main_sku_id in default_main_sku_ids and first_main_sku_orm_id_for_images is None:
+                         first_main_sku_orm_id_for_images = main_sku_id
 
-                main_sku_orm_instance: Optional[MainSkuOrm] = None
-                sku_orm_instance: Optional[SkuOrm] = None
-
-                if existing_sku_tuple:
-                    sku_orm_instance, main_sku_orm_instance = existing_sku_tuple
-                    logger.info(f"{variant_log_prefix}Found existing MainSKU ID: {main_sku_orm_instance.id}, SKU ID: {sku_orm_instance.id}. Updating.")
-
-                    # Update existing MainSkuOrm
-                    main_sku_orm_instance.price = price
-                    main_sku_orm_instance.discount_price = discount_price
-                    main_sku_orm_instance.quantity = quantity
-                    main_sku_orm_instance.active = active_db_val
-                    # main_sku_orm_instance.is_default = is_default_sku # is_default is structural, generally not updated unless explicitly required.
-                                                                    # If it needs to change, it implies a change in which variant is "main",
-                                                                    # which might have other side effects (e.g. image assignment).
-                                                                    # For now, assume is_default is not changed on simple data updates.
-                    main_sku_orm_instance.order_limit = order_limit
-                    main_sku_orm_instance.package_size_length = pkg_length
-                    main_sku_orm_instance.package_size_width = pkg_width
-                    main_sku_orm_instance.package_size_height = pkg_height
-                    main_sku_orm_instance.package_weight = pkg_weight
-                    main_sku_orm_instance.updated_by = user_id
-                    main_sku_orm_instance.updated_date = current_time_epoch_ms
-                    
-                    # Barcodes and part numbers are usually stable after creation.
-                    # Regenerate if business logic dictates they can change on update.
-                    # For now, assuming they are stable.
-
-                    # Update existing SkuOrm
-                    sku_orm_instance.price = price
-                    sku_orm_instance.discount_price = discount_price
-                    sku_orm_instance.quantity = quantity
-                    sku_orm_instance.active = active_db_val
-                    sku_orm_instance.order_limit = order_limit
-                    sku_orm_instance.package_size_length = pkg_length
-                    sku_orm_instance.package_size_width = pkg_width
-                    sku_orm_instance.package_size_height = pkg_height
-                    sku_orm_instance.package_weight = pkg_weight
-                    sku_orm_instance.updated_by = user_id
-                    sku_orm_instance.updated_date = current_time_epoch_ms
-
-                    # ProductVariantOrm entries define the SKU structure.
-                    # Their attribute_id/attribute_value_id links are not "updated".
-                    # If these change, it implies a different SKU.
-                    # We might update their 'active' status if it can vary independently of SkuOrm/MainSkuOrm.
-                    # For now, assuming ProductVariantOrm `active` status is tied to SkuOrm/MainSkuOrm `active` status.
-                    # If ProductVariantOrm records need individual status updates, that logic would go here.
-                    # Example:
-                    # existing_pvs = db.query(ProductVariantOrm).filter(ProductVariantOrm.sku_id == sku_orm_instance.id).all()
-                    # for pv in existing_pvs:
-                    #    pv.active = active_db_val # Or some other logic
-                    #    pv.updated_by = user_id
-                    #    pv.updated_date = current_time_epoch_ms
-                    
-                    logger.debug(f"{variant_log_prefix}Updated MainSkuOrm ID: {main_sku_orm_instance.id} and SkuOrm ID: {sku_orm_instance.id}")
-                    
-                    if main_sku_orm_instance.is_default and first_main_sku_orm_id_for_images is None:
-                         first_main_sku_orm_id_for_images = main_sku_orm_instance.id
-
-                    processed_main_sku_ids_for_row.append(main_sku_orm_instance.id)
+                    processed_main_sku_ids_for_row.append(main_sku_id)
 
                 else: # SKU not found, skip creation as per requirement
                     logger.warning(f"{variant_log_prefix}SKU with attributes {current_target_attr_value_ids} (Product ID: {product_id}) not found. Skipping creation.")
@@ -464,7 +427,7 @@ def load_item_record_to_db(
                  raise DataLoaderError(message=f"Unexpected error for variant {sku_variant_idx}: {e}", error_type=ErrorType.UNEXPECTED_ROW_ERROR, offending_value=item_csv_row.product_name)
 
 
-        logger.info(f"{log_prefix} SKU variant loop completed. {len(created_main_sku_ids_for_row)} MainSKUs processed for creation.")
+        logger.info(f"{log_prefix} SKU variant loop completed. {len(processed_main_sku_ids_for_row)} MainSKUs matched for update.")
         # --- Part 2 ends ---
 
         # --- Part 3: Image Processing starts here ---
@@ -515,7 +478,11 @@ def load_item_record_to_db(
             logger.info(f"{log_prefix} No images provided in CSV for this product row.")
         # --- Part 3 ends ---
         
-        logger.info(f"{log_prefix} Successfully processed item CSV row. Returning {len(created_main_sku_ids_for_row)} main SKU IDs.")
+        if sku_updates is not None:
+            sku_updates.merge(row_updates)
+        else:
+            row_updates.flush(db)
+        logger.info(f"{log_prefix} Successfully processed item CSV row. Returning {len(processed_main_sku_ids_for_row)} main SKU IDs.")
 
     except ItemParserError as e: # Errors from initial parsing or propagated from loop
         logger.error(f"{log_prefix} Item parsing error: {e}", exc_info=True)
@@ -528,6 +495,8 @@ def load_item_record_to_db(
     except DataLoaderError: # Re-raise if it's already a DataLoaderError (e.g. from lookups)
         # logger.error(f"{log_prefix} DataLoaderError encountered: {e}", exc_info=True) # Already logged by caller or lookup
         raise
+    except SQLAlchemyError: # Left as is so the batch's savepoint isolates it (see load_items_to_db)
+        raise
     except Exception as e:
         logger.error(f"{log_prefix} Unexpected error during item record processing setup: {e}", exc_info=True)
         raise DataLoaderError(
@@ -536,20 +505,39 @@ def load_item_record_to_db(
             offending_value=item_csv_row.product_name
         ) from e
     
-    return created_main_sku_ids_for_row
+    return processed_main_sku_ids_for_row
 
 
 # Batch loader function
+def _row_error_detail(row_number: int, e: Exception) -> ErrorDetailModel:
+    """The ErrorDetailModel reported for an item CSV row that failed to load."""
+    if isinstance(e, DataLoaderError):
+        return ErrorDetailModel(
+            row_number=row_number, field_name=e.field_name, error_message=e.message,
+            error_type=e.error_type, offending_value=e.offending_value,
+        )
+    if isinstance(e, ItemParserError):
+        return ErrorDetailModel(row_number=row_number, error_message=str(e), error_type=ErrorType.VALIDATION)
+    if isinstance(e, (IntegrityError, DataError)):
+        return ErrorDetailModel(row_number=row_number, error_message=str(e.orig), error_type=ErrorType.DATABASE)
+    return ErrorDetailModel(row_number=row_number, error_message=f"Unexpected error: {e}", error_type=ErrorType.UNEXPECTED_ROW_ERROR)
+
+
 def load_items_to_db(
     db: Session,
     business_details_id: int,
     item_records_data: List[Dict[str, Any]], # List of raw dicts from CSV parser
     session_id: str, # Upload session ID, for context/logging
-    user_id: int
-) -> Dict[str, int]:
+    user_id: int,
+    row_numbers: Optional[List[int]] = None, # CSV line of each record; data rows from line 2 by default
+) -> Dict[str, Any]:
     """
     Loads a batch of item records (parsed from CSV) into the database.
-    Each record corresponds to one product and its variants.
+    Each record corresponds to one product and its variants. Rows are written
+    together rather than one savepoint each; rows failing their lookups are skipped
+    and rows the database rejects are isolated by bisection (see
+    app.db.batch_isolation). Both are counted in csv_rows_with_errors and
+    reported in errors_list, one ErrorDetailModel per failed row.
     """
     log_prefix = f"[ItemBatchLoader SID:{session_id} BID:{business_details_id}]"
     logger.info(f"{log_prefix} Starting batch load of {len(item_records_data)} item CSV rows.")
@@ -558,65 +546,110 @@ def load_items_to_db(
     summary = {
         "csv_rows_processed": 0, # Number of CSV rows attempted
         "csv_rows_with_errors": 0,
-        "total_main_skus_created_or_updated": 0 # Sum of len(created_main_sku_ids_for_row)
+        "total_main_skus_created_or_updated": 0, # Sum of len(created_main_sku_ids_for_row)
+        "errors_list": [], # ErrorDetailModel per failed CSV row
     }
+    if row_numbers is None:
+        row_numbers = [idx + 2 for idx in range(len(item_records_data))] # +1 for 1-indexing, +1 for header
     # Pydantic import for validating each raw_record_dict
     from pydantic import ValidationError
 
-    for idx, raw_record_dict in enumerate(item_records_data):
+    # SKU signature indexes for every product in the batch, from one query,
+    # instead of a grouped SKU lookup per generated variant.
+    with phase("items.resolve_skus"):
+        product_names = sorted({r.get('product_name') for r in item_records_data if r.get('product_name')})
+        product_ids_by_name: Dict[str, int] = {}
+        if product_names:
+            product_ids_by_name = {
+                row.name: row.id
+                for row in db.execute(
+                    PRODUCT_IDS_BY_NAMES, {"names": product_names, "business_details_id": business_details_id}
+                )
+            }
+        sku_indexes = load_sku_signature_index(db, product_ids_by_name.values())
+
+    # Every attribute name and value the batch uses, resolved with two set-based
+    # queries and shared by all rows, instead of a query per name per row.
+    with phase("items.resolve_attributes"):
+        attribute_names, value_pairs = _collect_attribute_names(item_records_data)
+        attribute_maps = AttributeMaps().load_attributes(db, business_details_id, attribute_names)
+        attribute_maps.load_values(db, [
+            (attribute_maps.attribute_id(attr_name), value_name)
+            for attr_name, value_name in value_pairs
+            if attribute_maps.attribute_id(attr_name) is not None
+        ])
+
+    # Rows whose structure validates, with their CSV line and log prefix.
+    valid_rows: List[Tuple[int, str, ItemCsvModel]] = []
+    for idx, (row_number, raw_record_dict) in enumerate(zip(row_numbers, item_records_data)):
         # Using product_name for logging if available, otherwise fallback.
         product_name_for_log = raw_record_dict.get('product_name', f"CSV_Row_Idx_{idx}")
-        row_log_prefix = f"{log_prefix} Row:{idx+2} Product:'{product_name_for_log}'" # CSV rows are typically 1-indexed, +1 for header
+        row_log_prefix = f"{log_prefix} Row:{row_number} Product:'{product_name_for_log}'"
         
         summary["csv_rows_processed"] += 1
         
         try:
             # Validate the raw dict against the Pydantic model for the CSV row structure
-            item_csv_model = ItemCsvModel(**raw_record_dict)
-            logger.info(f"{row_log_prefix} Successfully validated CSV row structure. Proceeding to load item record.")
-
-            # Each call to load_item_record_to_db processes one product line from CSV.
-            # It's responsible for creating all its SKUs and related entities.
-            # We use a nested transaction (savepoint) for each CSV row.
-            # This allows us to commit changes for successful rows or rollback for failed rows
-            # without affecting the entire batch transaction (which is managed by the Celery task).
-            
-            savepoint = db.begin_nested()
-            try:
-                created_main_sku_ids_for_this_row = load_item_record_to_db(
-                    db=db,
-                    business_details_id=business_details_id,
-                    item_csv_row=item_csv_model,
-                    user_id=user_id
-                )
-                
-                savepoint.commit() # Commit changes for this successful CSV row
-                summary["total_main_skus_created_or_updated"] += len(created_main_sku_ids_for_this_row)
-                logger.info(f"{row_log_prefix} Successfully processed, created/updated {len(created_main_sku_ids_for_this_row)} MainSKUs.")
-
-            except (DataLoaderError, ItemParserError, IntegrityError, DataError) as e:
-                savepoint.rollback() # Rollback changes for this specific failed CSV row
-                # Detailed error already logged within load_item_record_to_db or its helpers
-                # Log a summary error here for the batch context.
-                error_message = e.message if isinstance(e, DataLoaderError) else str(e)
-                logger.error(f"{row_log_prefix} Error processing row: {error_message}", exc_info=False) # exc_info=False if already logged deeply
-                summary["csv_rows_with_errors"] += 1
-                # TODO: Persist detailed error for this row (e.g., to UploadSessionOrm.details or a related error table)
-                # For now, the error is logged.
-            except Exception as e_gen:
-                savepoint.rollback()
-                logger.error(f"{row_log_prefix} Unexpected critical error processing row: {e_gen}", exc_info=True)
-                summary["csv_rows_with_errors"] += 1
-                # TODO: Persist detailed error
-
+            valid_rows.append((row_number, row_log_prefix, ItemCsvModel(**raw_record_dict)))
         except ValidationError as pve: # Pydantic validation error for the row structure itself
             logger.error(f"{row_log_prefix} Pydantic validation error for raw data. Errors: {pve.errors()}", exc_info=False) # exc_info=False as pve.errors() is detailed
             summary["csv_rows_with_errors"] += 1
-            # TODO: Persist detailed error (pve.errors())
+            summary["errors_list"].append(ErrorDetailModel(
+                row_number=row_number,
+                field_name=".".join(str(f) for f in pve.errors()[0]['loc']) if pve.errors() else None,
+                error_message="; ".join(err['msg'] for err in pve.errors()) or str(pve),
+                error_type=ErrorType.VALIDATION,
+            ))
         except Exception as e_outer: # Catch-all for unexpected errors before individual row processing could even start
             logger.error(f"{row_log_prefix} Critical error before processing row: {e_outer}", exc_info=True)
             summary["csv_rows_with_errors"] += 1
-            # TODO: Persist detailed error
+            summary["errors_list"].append(_row_error_detail(row_number, e_outer))
+
+    def write(segment: Sequence[Tuple[int, str, ItemCsvModel]], reject) -> int:
+        """
+        Load a run of rows and their MainSku/Sku updates; returns the MainSKUs updated.
+        A row failing its lookups or parsing is rejected without failing the run.
+        """
+        sku_updates = BulkUpdates()
+        main_skus_updated = 0
+        for index, (_, row_log_prefix, item_csv_model) in enumerate(segment):
+            try:
+                with phase("items.upsert"):
+                    main_sku_ids = load_item_record_to_db(
+                        db=db,
+                        business_details_id=business_details_id,
+                        item_csv_row=item_csv_model,
+                        user_id=user_id,
+                        sku_index=sku_indexes.get(product_ids_by_name.get(item_csv_model.product_name)),
+                        attribute_maps=attribute_maps,
+                        sku_updates=sku_updates,
+                        product_ids_by_name=product_ids_by_name,
+                    )
+            except DataLoaderError as e:
+                reject(index, e)
+                continue
+            logger.debug(f"{row_log_prefix} Loaded, {len(main_sku_ids)} MainSKUs to update.")
+            main_skus_updated += len(main_sku_ids)
+        with phase("items.sku_updates"):
+            sku_updates.flush(db)
+        return main_skus_updated
+
+    # All valid rows in one savepoint. Rows failing their lookups are rejected as they
+    # come; a database failure is bisected down to the rows that caused it, which are
+    # rolled back and counted while the rest are written.
+    written, failures = load_isolating_failures(db, valid_rows, write)
+    summary["total_main_skus_created_or_updated"] += sum(written)
+    for index, e in failures:
+        row_number, row_log_prefix, _ = valid_rows[index]
+        if isinstance(e, (DataLoaderError, ItemParserError, IntegrityError, DataError)):
+            # Detailed error already logged within load_item_record_to_db or its helpers
+            error_message = e.message if isinstance(e, DataLoaderError) else str(e)
+            logger.error(f"{row_log_prefix} Error processing row: {error_message}", exc_info=False)
+        else:
+            logger.error(f"{row_log_prefix} Unexpected critical error processing row: {e}", exc_info=e)
+        summary["csv_rows_with_errors"] += 1
+        summary["errors_list"].append(_row_error_detail(row_number, e))
+    summary["errors_list"].sort(key=lambda err: err.row_number)
 
     logger.info(f"{log_prefix} Item batch load finished. Summary: {summary}")
     return summary
@@ -5,6 +5,15 @@ from pydantic import BaseModel, ValidationError
 
 from app.db.models import ProductOrm, CategoryOrm
 from app.dataload.models.meta_tags_csv import MetaTagCsvRow, MetaTypeEnum
+from app.models.schemas import ErrorDetailModel, ErrorType, LoaderResult
+from app.services.metrics import phase
+
+# (ProductOrm column, upload field) pairs written by load_meta_tags_batch
+PRODUCT_META_COLUMNS = (
+    ("seo_title", "meta_title"),
+    ("seo_description", "meta_description"),
+    ("keywords", "meta_keywords"),
+)
 
 
 class DataloadErrorDetail(BaseModel):
@@ -158,3 +167,51 @@ def load_meta_tags_from_csv(db: Session, csv_file_path: str) -> DataloadSummary:
         ))
 
     return summary
+
+
+def load_meta_tags_batch(
+    db: Session,
+    business_details_id: int,
+    records_data: List[Dict[str, Any]],
+    session_id: str,
+    row_numbers: List[int],
+) -> LoaderResult:
+    """
+    Apply validated ``meta_tags`` upload rows (product_name plus optional meta_title,
+    meta_description, meta_keywords) to the business's products.
+    All target products are fetched in one query; rows naming an unknown product are
+    LOOKUP errors, and rows that change nothing are not counted. Does not commit.
+    """
+    result = LoaderResult()
+    names = {r["product_name"].strip() for r in records_data if r.get("product_name")}
+    products: Dict[str, ProductOrm] = {}
+    if names:
+        with phase("meta_tags.lookup"):
+            products = {
+                p.name: p for p in db.query(ProductOrm).filter(
+                    ProductOrm.business_details_id == business_details_id,
+                    ProductOrm.name.in_(names)
+                ).all()
+            }
+
+    for row_number, record in zip(row_numbers, records_data):
+        name = (record.get("product_name") or "").strip()
+        product = products.get(name)
+        if product is None:
+            result.errors.append(ErrorDetailModel(
+                row_number=row_number,
+                field_name="product_name",
+                error_message=f"PRODUCT with name '{name}' and business_details_id '{business_details_id}' not found.",
+                error_type=ErrorType.LOOKUP,
+                offending_value=name,
+            ))
+            continue
+        changed = False
+        for column, field in PRODUCT_META_COLUMNS:
+            value = record.get(field)
+            if value is not None and getattr(product, column) != value:
+                setattr(product, column, value)
+                changed = True
+        if changed:
+            result.updated += 1
+    return result
@@ -599,3 +599,201 @@ def get_package_weight_for_combination( # Corrected: package_weight is per main_
 
 # Image parsing is handled separately as it's one string for the whole product row,
 # not per combination in the CSV.
+
+
+# --- Compiled per-row extraction ---
+
+# Optional fields given once per main attribute value ("10|10|..."), with their types.
+PER_MAIN_VALUE_FIELDS = (
+    ("order_limit", int),
+    ("package_size_length", float),
+    ("package_size_width", float),
+    ("package_size_height", float),
+    ("package_weight", float),
+)
+
+
+def _variant_description(current_sku_variant: List[Dict[str, Any]]) -> str:
+    return ", ".join(f"{v['attribute_name']}:{v['value']}" for v in current_sku_variant)
+
+
+def _convert(raw_value_str: str, expected_type: type) -> Any:
+    if expected_type == int:
+        return int(raw_value_str)
+    if expected_type == float:
+        return float(raw_value_str)
+    return raw_value_str
+
+
+class CompiledItemRow:
+    """
+    The per-combination strings of one CSV row, split once, with an
+    (attribute name, value) -> position index over the attribute values.
+
+    ``fields_for_variant`` reads every per-combination field of a variant in
+    one O(attributes) pass: the variant's positions are looked up once, then
+    each field is an index into its pre-split values. It returns the same
+    values and raises the same errors as the ``get_*_for_combination``
+    helpers, which rescan the value lists and re-split the strings per field,
+    except that a per-combination field of a row with more than two
+    attributes is an ItemParserError (a row error) rather than NotImplementedError.
+    """
+
+    def __init__(
+        self,
+        parsed_attributes: List[Dict[str, Any]],
+        parsed_attribute_values: List[List[Dict[str, Any]]],
+        price: Optional[str],
+        quantity: Optional[str],
+        status: str,
+        **per_main_value_strings: Optional[str], # order_limit, package_size_length, ... (PER_MAIN_VALUE_FIELDS)
+    ):
+        self.parsed_attributes = parsed_attributes
+        self.parsed_attribute_values = parsed_attribute_values
+
+        # Attribute position by name and value position by (name, value); the first one wins,
+        # as with the linear scans.
+        self._attribute_positions: Dict[str, int] = {}
+        self._value_positions: Dict[tuple, int] = {}
+        for i, attr_def in enumerate(parsed_attributes):
+            self._attribute_positions.setdefault(attr_def['name'], i)
+        for name, i in self._attribute_positions.items():
+            for j, val_dict in enumerate(parsed_attribute_values[i] if i < len(parsed_attribute_values) else []):
+                self._value_positions.setdefault((name, val_dict['value']), j)
+        self._main_index: Optional[int] = next(
+            (i for i, attr_def in enumerate(parsed_attributes) if attr_def['is_main']), None
+        )
+
+        self._price = self._split_per_combination(price)
+        self._quantity = self._split_per_combination(quantity)
+        self._status_groups = status.split('|')
+        self._per_main_value = {
+            field: (data_str.split('|') if data_str is not None and data_str.strip() else None)
+            for field, data_str in ((f, per_main_value_strings.get(f)) for f, _ in PER_MAIN_VALUE_FIELDS)
+        }
+
+    def _split_per_combination(self, data_str: Optional[str]) -> Optional[tuple]:
+        """(data_str, values) with values split by ':' for one attribute, by '|' then ':' for two."""
+        if data_str is None or not data_str.strip():
+            return None
+        if len(self.parsed_attributes) == 1:
+            return data_str, data_str.split(':')
+        if len(self.parsed_attributes) == 2:
+            return data_str, [(group, group.split(':')) for group in data_str.split('|')]
+        return data_str, None
+
+    def _positions(self, current_sku_variant: List[Dict[str, Any]]) -> List[int]:
+        """The position of the variant's value in each attribute's value list, in attribute order."""
+        details_by_name: Dict[str, Dict[str, Any]] = {}
+        for vad in current_sku_variant:
+            details_by_name.setdefault(vad['attribute_name'], vad)
+        positions = []
+        for attr_def in self.parsed_attributes:
+            name = attr_def['name']
+            variant_attr_detail = details_by_name.get(name)
+            if variant_attr_detail is None:
+                raise ItemParserError(f"Internal error: Attribute '{name}' not found in current_sku_variant.")
+            position = self._value_positions.get((name, variant_attr_detail['value']))
+            if position is None:
+                raise ItemParserError(
+                    f"Internal error: Value '{variant_attr_detail['value']}' for attribute '{name}' "
+                    "not found in its definition list."
+                )
+            positions.append(position)
+        return positions
+
+    def _combination_value(
+        self,
+        split: Optional[tuple],
+        positions: List[int],
+        current_sku_variant: List[Dict[str, Any]],
+        expected_type: type,
+        field_name: str,
+    ) -> Any:
+        """A required per-combination value, as get_value_for_combination(is_optional=False)."""
+        if split is None:
+            raise ItemParserError(
+                f"Required field '{field_name}' is missing or empty in CSV data "
+                f"for SKU variant ({_variant_description(current_sku_variant)})."
+            )
+        data_str, values = split
+        num_attributes = len(self.parsed_attributes)
+        if num_attributes == 0:
+            raise ItemParserError(f"Cannot get value for '{field_name}': No attributes defined for variant construction.")
+        if num_attributes == 1:
+            if len(values) != len(self.parsed_attribute_values[0]):
+                raise ItemParserError(
+                    f"Field '{field_name}': Expected {len(self.parsed_attribute_values[0])} values for attribute "
+                    f"'{self.parsed_attributes[0]['name']}', got {len(values)} from data '{data_str}'."
+                )
+            raw_value_str = values[positions[0]]
+        elif num_attributes == 2:
+            if len(values) != len(self.parsed_attribute_values[0]):
+                raise ItemParserError(
+                    f"Field '{field_name}': Expected {len(self.parsed_attribute_values[0])} primary groups for attribute "
+                    f"'{self.parsed_attributes[0]['name']}', got {len(values)} from data '{data_str}'."
+                )
+            secondary_group_str, secondary_values = values[positions[0]]
+            if len(secondary_values) != len(self.parsed_attribute_values[1]):
+                raise ItemParserError(
+                    f"Field '{field_name}': Expected {len(self.parsed_attribute_values[1])} secondary values for attribute "
+                    f"'{self.parsed_attributes[1]['name']}' in group '{secondary_group_str}', got {len(secondary_values)}."
+                )
+            raw_value_str = secondary_values[positions[1]]
+        else:
+            # The CSV format only defines delimiters for one ('v:v') or two ('v:v|v:v') attributes.
+            raise ItemParserError(
+                f"Field '{field_name}': per-combination values are supported for 1 or 2 attributes, "
+                f"got {num_attributes} ({', '.join(a['name'] for a in self.parsed_attributes)}) "
+                f"for data '{data_str}'."
+            )
+
+        raw_value_str = raw_value_str.strip()
+        if not raw_value_str and expected_type != str:
+            raise ItemParserError(
+                f"Empty value found for required field '{field_name}' for SKU variant "
+                f"({_variant_description(current_sku_variant)})."
+            )
+        try:
+            return _convert(raw_value_str, expected_type)
+        except ValueError as e:
+            raise ItemParserError(
+                f"Cannot convert value '{raw_value_str}' to type '{expected_type.__name__}' "
+                f"for field '{field_name}' for SKU variant ({_variant_description(current_sku_variant)}). Original error: {e}"
+            )
+
+    def fields_for_variant(self, current_sku_variant: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        price, quantity, status, is_default_sku and the PER_MAIN_VALUE_FIELDS of
+        one variant (an element of generate_sku_variants' output).
+        """
+        positions = self._positions(current_sku_variant)
+        fields: Dict[str, Any] = {
+            "price": self._combination_value(self._price, positions, current_sku_variant, float, "price"),
+            "quantity": self._combination_value(self._quantity, positions, current_sku_variant, int, "quantity"),
+        }
+
+        # Status and the optional fields are given once per value of the main attribute.
+        if self._main_index is None:
+            raise ItemParserError("Internal: Could not find main attribute definition for status parsing.")
+        group_index = positions[self._main_index]
+
+        status_val = self._status_groups[group_index].strip().upper() if group_index < len(self._status_groups) else ""
+        if status_val and status_val not in ["ACTIVE", "INACTIVE"]:
+            raise ItemParserError(
+                f"Invalid status value '{self._status_groups[group_index]}' found for variant. Expected 'ACTIVE' or 'INACTIVE'."
+            )
+        fields["status"] = status_val or "ACTIVE"
+
+        main_name = self.parsed_attributes[self._main_index]['name']
+        main_detail = next(vad for vad in current_sku_variant if vad['attribute_name'] == main_name)
+        fields["is_default_sku"] = bool(main_detail.get('is_default_sku_value', False))
+
+        for field, expected_type in PER_MAIN_VALUE_FIELDS:
+            value_groups = self._per_main_value[field]
+            raw_value_str = value_groups[group_index].strip() if value_groups and group_index < len(value_groups) else ""
+            try:
+                fields[field] = _convert(raw_value_str, expected_type) if raw_value_str else None
+            except ValueError:
+                fields[field] = None # Optional: an unparsable value is treated as absent
+        return fields
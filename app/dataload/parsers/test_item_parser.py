@@ -3,6 +3,13 @@ from app.dataload.parsers.item_parser import (
     parse_attributes_string,
     parse_attribute_combination_string,
     generate_sku_variants,
+    get_price_for_combination,
+    get_quantity_for_combination,
+    get_status_for_combination,
+    get_order_limit_for_combination,
+    get_package_size_length_for_combination,
+    get_package_weight_for_combination,
+    CompiledItemRow,
     ItemParserError
 )
 
@@ -449,4 +456,70 @@ def test_get_value_for_3_attrs_not_implemented(common_test_data_for_extractors):
     
     data_str = "val1|val2" # Dummy string
     with pytest.raises(NotImplementedError, match="Parsing for 3 attributes for field 'test_field' is not implemented"):
-        parse_attributes_string.get_value_for_combination(data_str, three_attrs, three_attr_vals, three_attr_variant, str, False, "test_field")
\ No newline at end of file
+        parse_attributes_string.get_value_for_combination(data_str, three_attrs, three_attr_vals, three_attr_variant, str, False, "test_field")
+
+# --- Tests for CompiledItemRow ---
+
+def _compiled_row(data, **strings):
+    row_strings = dict(
+        price="10.00:12.00|20.00:22.00", quantity="100:110|200:210", status="ACTIVE|INACTIVE",
+        order_limit="10|5", package_size_length="30|31", package_size_width=None,
+        package_size_height="", package_weight="0.5|x",
+    )
+    row_strings.update(strings)
+    return CompiledItemRow(data["parsed_attributes"], data["parsed_attribute_values"], **row_strings), row_strings
+
+def test_compiled_row_matches_per_field_helpers_for_every_variant(common_test_data_for_extractors):
+    data = common_test_data_for_extractors
+    compiled, strings = _compiled_row(data)
+    args = (data["parsed_attributes"], data["parsed_attribute_values"])
+
+    for variant in data["all_sku_variants"]:
+        fields = compiled.fields_for_variant(variant)
+        assert fields == {
+            "price": get_price_for_combination(strings["price"], *args, variant),
+            "quantity": get_quantity_for_combination(strings["quantity"], *args, variant),
+            "status": get_status_for_combination(strings["status"], *args, variant),
+            "is_default_sku": variant[0]["is_default_sku_value"],
+            "order_limit": get_order_limit_for_combination(strings["order_limit"], *args, variant),
+            "package_size_length": get_package_size_length_for_combination(strings["package_size_length"], *args, variant),
+            "package_size_width": None,
+            "package_size_height": None,
+            "package_weight": get_package_weight_for_combination(strings["package_weight"], *args, variant),
+        }
+    assert compiled.fields_for_variant(data["all_sku_variants"][3])["price"] == 22.00
+    assert compiled.fields_for_variant(data["all_sku_variants"][3])["package_weight"] is None # "x" is not a float
+
+def test_compiled_row_single_attribute(common_test_data_for_extractors):
+    data = {
+        "parsed_attributes": [{'name': 'color', 'is_main': True}],
+        "parsed_attribute_values": [[{'value': 'Black', 'is_default_sku_value': True}, {'value': 'White', 'is_default_sku_value': False}]],
+    }
+    compiled, _ = _compiled_row(data, price="5.5:6.5", quantity="50:60")
+    fields = compiled.fields_for_variant([{'attribute_name': 'color', 'value': 'White', 'is_default_sku_value': False}])
+    assert (fields["price"], fields["quantity"], fields["status"], fields["is_default_sku"]) == (6.5, 60, "INACTIVE", False)
+
+@pytest.mark.parametrize("strings, variant_idx, match", [
+    ({"price": "10.00:12.00"}, 3, "Expected 2 primary groups for attribute 'color'"),
+    ({"quantity": "100:110|200"}, 3, "Expected 2 secondary values for attribute 'size' in group '200'"),
+    ({"price": "10.00:abc|20.00:22.00"}, 1, "Cannot convert value 'abc' to type 'float' for field 'price'"),
+    ({"price": ""}, 0, "Required field 'price' is missing or empty"),
+    ({"status": "ACTIVE|PAUSED"}, 3, "Invalid status value 'PAUSED'"),
+])
+def test_compiled_row_raises_the_per_field_helper_errors(common_test_data_for_extractors, strings, variant_idx, match):
+    data = common_test_data_for_extractors
+    compiled, _ = _compiled_row(data, **strings)
+    with pytest.raises(ItemParserError, match=match):
+        compiled.fields_for_variant(data["all_sku_variants"][variant_idx])
+
+def test_compiled_row_with_three_attributes_raises_a_row_error(common_test_data_for_extractors):
+    data = common_test_data_for_extractors
+    three = {
+        "parsed_attributes": data["parsed_attributes"] + [{'name': 'material', 'is_main': False}],
+        "parsed_attribute_values": data["parsed_attribute_values"] + [[{'value': 'Cotton'}]],
+    }
+    compiled, _ = _compiled_row(three, price="10:12|20:22")
+    variant = data["all_sku_variants"][0] + [{'attribute_name': 'material', 'value': 'Cotton'}]
+
+    with pytest.raises(ItemParserError, match=r"Field 'price'.*got 3 \(color, size, material\) for data '10:12\|20:22'"):
+        compiled.fields_for_variant(variant)
@@ -1,10 +1,11 @@
 import logging
 import uuid # Added for temporary placeholder
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
 from datetime import datetime
 
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, NoResultFound, DataError
+from pydantic import ValidationError
 
 # from app.utils.slug import generate_slug # Replaced by barcode generation for prod.barcode
 from app.utils import barcode_helper # Added barcode helper
@@ -23,12 +24,16 @@ from app.db.models import (
     CategoryOrm,
     ReturnPolicyOrm,
 )
+from app.db.batch_isolation import load_isolating_failures
+from app.db.bulk_copy import BulkRows
 from app.db.connection import get_session
+from app.db.lookups import BRAND_BY_NAME, PRODUCT_BY_NAME
 from app.models.shopping_category import ShoppingCategoryOrm
 from app.dataload.models.product_csv import ProductCsvModel
 from app.exceptions import DataLoaderError
-from app.models.schemas import ErrorType
+from app.models.schemas import ErrorDetailModel, ErrorType
 from app.utils.redis_utils import add_to_id_map, DB_PK_MAP_SUFFIX, get_from_id_map
+from app.services.metrics import phase
 
 logger = logging.getLogger(__name__)
 
@@ -70,6 +75,26 @@ def get_category_by_full_path_from_db(
     return resolved_category
 
 
+def get_return_policies_by_name_from_db2(
+    business_details_id: int,
+    policy_names: Set[str],
+    log_prefix: str = "[ReturnPolicyLookup]"
+) -> Dict[str, ReturnPolicyOrm]:
+    """Resolve ``policy_names`` with one IN query on a single DB2 session. Names not found are absent."""
+    if not policy_names:
+        return {}
+    db2_session = get_session(business_id=business_details_id, db_key="DB2")
+    try:
+        policies = db2_session.query(ReturnPolicyOrm).filter(
+            ReturnPolicyOrm.business_details_id == business_details_id,
+            ReturnPolicyOrm.policy_name.in_(policy_names)
+        ).all()
+    finally:
+        db2_session.close()
+    logger.debug(f"{log_prefix} Resolved {len(policies)} of {len(policy_names)} return policies from DB2.")
+    return {policy.policy_name: policy for policy in policies}
+
+
 def parse_specifications(spec_str: Optional[str]) -> List[Dict[str, str]]:
     specs: List[Dict[str, str]] = []
     if not spec_str: return specs
@@ -103,6 +128,26 @@ def parse_images(image_str: Optional[str]) -> List[Dict[str, Any]]:
     return images
 
 
+def _row_error_detail(row_number: int, e: Exception) -> ErrorDetailModel:
+    """The ErrorDetailModel reported for a product CSV row that failed to load."""
+    if isinstance(e, DataLoaderError):
+        return ErrorDetailModel(
+            row_number=row_number, field_name=e.field_name, error_message=e.message,
+            error_type=e.error_type, offending_value=e.offending_value,
+        )
+    if isinstance(e, ValidationError):
+        errors = e.errors()
+        return ErrorDetailModel(
+            row_number=row_number,
+            field_name=".".join(str(f) for f in errors[0]['loc']) if errors else None,
+            error_message="; ".join(err['msg'] for err in errors) or str(e),
+            error_type=ErrorType.VALIDATION,
+        )
+    if isinstance(e, (IntegrityError, DataError)):
+        return ErrorDetailModel(row_number=row_number, error_message=str(e.orig), error_type=ErrorType.DATABASE)
+    return ErrorDetailModel(row_number=row_number, error_message=f"Unexpected error: {e}", error_type=ErrorType.UNEXPECTED_ROW_ERROR)
+
+
 def load_products_to_db(
     db_session: Session,
     business_details_id: int,
@@ -110,7 +155,13 @@ def load_products_to_db(
     session_id: str, # session_id is still used for product ID mapping to Redis
     db_pk_redis_pipeline: Any = None,
     user_id: int = None,
-) -> Dict[str, int]:
+    row_numbers: Optional[List[int]] = None, # CSV line of each record; data rows from line 2 by default
+) -> Dict[str, Any]:
+    """
+    Upsert a batch of product rows. Returns {"inserted", "updated", "errors",
+    "errors_list"}: errors counts the failed rows and errors_list holds one
+    ErrorDetailModel per failed row, with its CSV line.
+    """
     logger.info(f"Starting load_products_to_db for {len(records_data)} records for business_id {business_details_id}, session_id {session_id}.")
     
     # --- Pre-resolve all unique category paths from the input data using DB lookup ---
@@ -127,91 +178,243 @@ def load_products_to_db(
     
     # This map will store resolved CategoryOrm objects (or None if not found)
     resolved_categories_map: Dict[str, Optional[CategoryOrm]] = {}
-    if unique_category_paths:
-        for path_to_resolve in unique_category_paths:
-            # Using a distinct log prefix for these batch-level lookups
-            category_obj = get_category_by_full_path_from_db(
-                db_session, 
-                business_details_id, 
-                path_to_resolve, 
-                log_prefix=f"[ProductBatchCatLookup SID:{session_id}]"
-            )
-            resolved_categories_map[path_to_resolve] = category_obj # Store CategoryOrm or None
-            if category_obj:
-                logger.info(f"[ProductBatch SID:{session_id}] Successfully resolved DB category for path '{path_to_resolve}' to ID {category_obj.id} ('{category_obj.name}').")
-            else:
-                # Log warning here. Individual product processing will raise DataLoaderError if its category wasn't resolved.
-                logger.warning(f"[ProductBatch SID:{session_id}] Failed to resolve DB category for path '{path_to_resolve}'. Products using this path will fail validation.")
+    with phase("products.resolve_categories"):
+        if unique_category_paths:
+            for path_to_resolve in unique_category_paths:
+                # Using a distinct log prefix for these batch-level lookups
+                category_obj = get_category_by_full_path_from_db(
+                    db_session, 
+                    business_details_id, 
+                    path_to_resolve, 
+                    log_prefix=f"[ProductBatchCatLookup SID:{session_id}]"
+                )
+                resolved_categories_map[path_to_resolve] = category_obj # Store CategoryOrm or None
+                if category_obj:
+                    logger.info(f"[ProductBatch SID:{session_id}] Successfully resolved DB category for path '{path_to_resolve}' to ID {category_obj.id} ('{category_obj.name}').")
+                else:
+                    # Log warning here. Individual product processing will raise DataLoaderError if its category wasn't resolved.
+                    logger.warning(f"[ProductBatch SID:{session_id}] Failed to resolve DB category for path '{path_to_resolve}'. Products using this path will fail validation.")
     logger.info(f"[ProductBatch SID:{session_id}] Finished pre-resolving category paths from DB. {len(resolved_categories_map)} unique paths processed.")
     # --- End of category pre-resolution ---
 
-    summary = {"inserted": 0, "updated": 0, "errors": 0}
-
-    for idx, raw in enumerate(records_data, start=2): 
+    # --- Pre-resolve all distinct return policy names against DB2, in one query ---
+    unique_return_policies = {
+        raw['return_policy'].strip() for raw in records_data
+        if isinstance(raw.get('return_policy'), str) and raw['return_policy'].strip()
+    }
+    with phase("products.resolve_return_policies"):
+        resolved_return_policies_map = get_return_policies_by_name_from_db2(
+            business_details_id,
+            unique_return_policies,
+            log_prefix=f"[ProductBatchReturnPolicyLookup SID:{session_id}]"
+        )
+    # --- End of return policy pre-resolution ---
+
+    summary = {"inserted": 0, "updated": 0, "errors": 0, "errors_list": []}
+    if row_numbers is None:
+        row_numbers = [idx + 2 for idx in range(len(records_data))]
+
+    models: List[ProductCsvModel] = []
+    model_row_numbers: List[int] = []
+    for idx, raw in zip(row_numbers, records_data): 
         # Use product_name for logging as it's the new lookup key.
         product_identifier_for_log = raw.get('product_name', f"CSV_row_{idx}") 
         try:
             logger.debug(f"[Product Name: {product_identifier_for_log}] Processing raw data: {raw}") # Log updated
-            model = ProductCsvModel(**raw) 
-            # Log with model.product_name after successful parsing, as product_identifier_for_log is from raw data.
-            logger.debug(f"[Parsed Product Name: {model.product_name}] Pydantic model created.") 
-            
+            models.append(ProductCsvModel(**raw))
+            model_row_numbers.append(idx)
+        except Exception as e: 
+            logger.error(f"[Product Name: {product_identifier_for_log}] Unexpected exception during row processing. Raw data: {raw}. Error: {e}", exc_info=True)
+            summary["errors"] += 1
+            summary["errors_list"].append(_row_error_detail(idx, e))
+
+    def write(segment: Sequence[ProductCsvModel], reject) -> List[Tuple[str, int]]:
+        """
+        Upsert a run of products, then their children with one COPY per table.
+        A product whose brand, category or return policy does not resolve is
+        rejected before anything is written for it, without failing the run.
+        """
+        # Specifications, images and price history of the segment.
+        child_rows = BulkRows()
+        written = []
+        for index, model in enumerate(segment):
             # Get the pre-resolved category for this product's path
             # ProductCsvModel's category_path validator already cleans the path.
-            current_product_category_path = model.category_path
-            
-            # Fetch the CategoryOrm object (or None if not resolved) from our map
-            pre_resolved_category_obj = resolved_categories_map.get(current_product_category_path)
-
-            prod_id = load_product_record_to_db_refactored( 
-                db_session,
-                business_details_id,
-                model,
-                session_id, 
-                user_id,
-                pre_resolved_category_obj # Pass the pre-fetched CategoryOrm object (or None)
-            )
-            # Check if product was already in this session's Redis map to count for summary.
-            # This reflects Redis state for the session, not necessarily DB state (is_new).
-            prev_redis_val = get_from_id_map(
-                session_id,
-                f"products{DB_PK_MAP_SUFFIX}",
-                model.product_name, # Use product_name for Redis mapping key
-                pipeline=db_pk_redis_pipeline
+            pre_resolved_category_obj = resolved_categories_map.get(model.category_path)
+            pre_resolved_return_policy_obj = (
+                resolved_return_policies_map.get(model.return_policy) if model.return_policy else None
             )
 
-            if prev_redis_val is None: 
-                summary["inserted"] += 1
-            else:
-                summary["updated"] += 1
-            
-            add_to_id_map(
-                session_id,
-                f"products{DB_PK_MAP_SUFFIX}",
-                model.product_name, # Use product_name for Redis mapping key
-                prod_id,
-                pipeline=db_pk_redis_pipeline
-            )
-        except DataLoaderError as e:
-            # product_identifier_for_log is already based on product_name from raw data
-            logger.error(f"[Product Name: {product_identifier_for_log}] DataLoaderError during row processing: {e}", exc_info=True)
-            summary["errors"] += 1
-        except Exception as e: 
-            logger.error(f"[Product Name: {product_identifier_for_log}] Unexpected exception during row processing. Raw data: {raw}. Error: {e}", exc_info=True)
-            summary["errors"] += 1
-            
+            with phase("products.upsert"):
+                try:
+                    references = resolve_product_references(
+                        db_session, business_details_id, model, pre_resolved_category_obj, pre_resolved_return_policy_obj
+                    )
+                except DataLoaderError as e:
+                    reject(index, e)
+                    continue
+                prod_id = load_product_record_to_db_refactored( 
+                    db_session,
+                    business_details_id,
+                    model,
+                    session_id, 
+                    user_id,
+                    pre_resolved_category_obj, # Pass the pre-fetched CategoryOrm object (or None)
+                    pre_resolved_return_policy_obj, # Pass the pre-fetched ReturnPolicyOrm object (or None)
+                    child_rows=child_rows,
+                    references=references,
+                )
+            written.append((model.product_name, prod_id))
+        with phase("products.children"):
+            child_rows.flush(db_session)
+        return written
+
+    # All rows in one savepoint. Rows failing their lookups are rejected as they come;
+    # a database failure is bisected down to the rows that caused it, which are
+    # rolled back and counted while the rest are written.
+    written_segments, failures = load_isolating_failures(db_session, models, write)
+    for product_name, prod_id in (item for segment in written_segments for item in segment):
+        # Check if product was already in this session's Redis map to count for summary.
+        # This reflects Redis state for the session, not necessarily DB state (is_new).
+        prev_redis_val = get_from_id_map(
+            session_id,
+            f"products{DB_PK_MAP_SUFFIX}",
+            product_name, # Use product_name for Redis mapping key
+            pipeline=db_pk_redis_pipeline
+        )
+
+        if prev_redis_val is None: 
+            summary["inserted"] += 1
+        else:
+            summary["updated"] += 1
+        
+        add_to_id_map(
+            session_id,
+            f"products{DB_PK_MAP_SUFFIX}",
+            product_name, # Use product_name for Redis mapping key
+            prod_id,
+            pipeline=db_pk_redis_pipeline
+        )
+    for index, e in failures:
+        product_identifier_for_log = models[index].product_name
+        if isinstance(e, DataLoaderError):
+            # Write errors were already logged with their traceback by load_product_record_to_db_refactored
+            logger.error(f"[Product Name: {product_identifier_for_log}] DataLoaderError during row processing: {e.message}")
+        else:
+            logger.error(f"[Product Name: {product_identifier_for_log}] Unexpected exception during row processing. Error: {e}", exc_info=e)
+        summary["errors"] += 1
+        summary["errors_list"].append(_row_error_detail(model_row_numbers[index], e))
+    summary["errors_list"].sort(key=lambda err: err.row_number)
+
     logger.info(f"Finished load_products_to_db for business_id {business_details_id}, session_id {session_id}. Summary: {summary}")
     return summary
 
 
+class ProductReferences(NamedTuple):
+    """What a product row refers to, resolved before anything is written for it."""
+    brand: BrandOrm
+    category: CategoryOrm
+    shopping_category_id: Optional[int]
+    return_policy: Optional[ReturnPolicyOrm]
+
+
+def resolve_product_references(
+    db: Session,
+    business_details_id: int,
+    product_data: ProductCsvModel,
+    pre_resolved_category: Optional[CategoryOrm],
+    pre_resolved_return_policy: Optional[ReturnPolicyOrm],
+) -> ProductReferences:
+    """
+    Step 1 of loading a product: look up and validate its brand, category,
+    shopping category and return policy. Writes nothing, so a row failing here
+    (DataLoaderError) can be skipped without undoing the rest of its batch.
+    """
+    log_prefix = f"[ProductName: {product_data.product_name}]"
+
+    # 1a. Brand lookup
+    logger.debug(f"{log_prefix} Looking up brand: {product_data.brand_name}")
+    brand = db.execute(
+        BRAND_BY_NAME, {"name": product_data.brand_name, "business_details_id": business_details_id}
+    ).scalar_one_or_none()
+    if not brand:
+        raise DataLoaderError(
+            message=f"Brand '{product_data.brand_name}' not found.",
+            error_type=ErrorType.LOOKUP, field_name="brand_name", offending_value=product_data.brand_name
+        )
+    logger.debug(f"{log_prefix} Brand found: ID {brand.id}")
+
+    # 1b. Category validation (object is now passed in)
+    logger.debug(f"{log_prefix} Validating pre-resolved category for path '{product_data.category_path}'.")
+    category = pre_resolved_category # Use the passed-in object/None
+    if not category:
+        # This means get_category_by_full_path_from_db failed for this path during the batch pre-resolution.
+        raise DataLoaderError(
+            message=f"Category for path '{product_data.category_path}' could not be resolved from DB.",
+            error_type=ErrorType.LOOKUP, field_name="category_path", offending_value=product_data.category_path
+        )
+    logger.debug(f"{log_prefix} Pre-resolved CategoryOrm object available: ID {category.id}, Name: {category.name}")
+
+    # Leaf node check for category (already implemented, remains valid)
+    logger.debug(f"{log_prefix} Checking if category '{category.name}' (ID: {category.id}) is a leaf node.")
+    is_parent_category = db.query(CategoryOrm.id).filter(CategoryOrm.parent_id == category.id, CategoryOrm.business_details_id == business_details_id).first()
+    if is_parent_category:
+        raise DataLoaderError(
+            message=f"Category '{category.name}' (Path: '{product_data.category_path}') is not a leaf node. Products can only be assigned to leaf categories.",
+            error_type=ErrorType.VALIDATION, field_name="category_path", offending_value=product_data.category_path
+        )
+    logger.debug(f"{log_prefix} Category '{category.name}' is a leaf node.")
+
+    # 1c. Shopping category lookup (optional)
+    shopping_cat_id: Optional[int] = None
+    if product_data.shopping_category_name:
+        logger.debug(f"{log_prefix} Looking up shopping category: {product_data.shopping_category_name}")
+        sc = db.query(ShoppingCategoryOrm).filter_by(name=product_data.shopping_category_name).one_or_none()
+        if sc:
+            shopping_cat_id = sc.id
+            logger.debug(f"{log_prefix} Shopping category found: {sc.id}")
+        else:
+            logger.warning(f"{log_prefix} ShoppingCategory '{product_data.shopping_category_name}' not found.")
+    else:
+        logger.debug(f"{log_prefix} No shopping category provided.")
+
+    # 1d. Return policy validation (object from DB2 is now passed in)
+    return_policy_orm_from_db2: Optional[ReturnPolicyOrm] = None
+    if product_data.return_policy:
+        return_policy_orm_from_db2 = pre_resolved_return_policy
+        if not return_policy_orm_from_db2:
+            raise DataLoaderError(
+                message=f"Return policy '{product_data.return_policy}' not found in secondary database for business ID {business_details_id}.",
+                error_type=ErrorType.LOOKUP, field_name="return_policy", offending_value=product_data.return_policy
+            )
+        logger.debug(f"{log_prefix} Pre-resolved return policy available: ID {return_policy_orm_from_db2.id}")
+    else:
+        logger.info(f"{log_prefix} No return_policy name provided in CSV. Product will not have a return policy linked.")
+
+    return ProductReferences(brand, category, shopping_cat_id, return_policy_orm_from_db2)
+
+
 def load_product_record_to_db_refactored(
     db: Session,
     business_details_id: int,
     product_data: ProductCsvModel,
     session_id: str, # Retained for potential other uses, though category now comes via pre_resolved_category
     user_id: int,
-    pre_resolved_category: Optional[CategoryOrm] 
+    pre_resolved_category: Optional[CategoryOrm],
+    pre_resolved_return_policy: Optional[ReturnPolicyOrm],
+    child_rows: Optional[BulkRows] = None,
+    references: Optional[ProductReferences] = None,
 ) -> int:
+    """
+    Upsert one product. Its specifications, images and price history are added
+    to the session, or to ``child_rows`` when the caller writes them in bulk.
+    The category and the return policy (from DB2) are resolved by the caller for
+    the whole batch; None for a name the row gives means it was not found.
+    ``references`` skips step 1 when the caller already resolved the row with
+    resolve_product_references.
+    Errors are raised as DataLoaderError without rolling the session back: the
+    caller's savepoint (see load_products_to_db) undoes the failed row.
+    """
     log_prefix = f"[ProductName: {product_data.product_name}]" # Changed identifier for logging
     logger.info(f"{log_prefix} Starting processing for business_id {business_details_id}.")
     now_ms = now_epoch_ms()
@@ -220,78 +423,13 @@ def load_product_record_to_db_refactored(
     try:
         logger.debug(f"{log_prefix} Step 1: Performing lookups and validations.")
 
-        # 1a. Brand lookup
-        logger.debug(f"{log_prefix} Looking up brand: {product_data.brand_name}")
-        brand = db.query(BrandOrm).filter_by(
-            name=product_data.brand_name,
-            business_details_id=business_details_id
-        ).one_or_none()
-        if not brand:
-            raise DataLoaderError(
-                message=f"Brand '{product_data.brand_name}' not found.",
-                error_type=ErrorType.LOOKUP, field_name="brand_name", offending_value=product_data.brand_name
+        if references is None:
+            references = resolve_product_references(
+                db, business_details_id, product_data, pre_resolved_category, pre_resolved_return_policy
             )
-        logger.debug(f"{log_prefix} Brand found: ID {brand.id}")
-
-        # 1b. Category validation (object is now passed in)
-        logger.debug(f"{log_prefix} Validating pre-resolved category for path '{product_data.category_path}'.")
-        category = pre_resolved_category # Use the passed-in object/None
-        if not category:
-            # This means get_category_by_full_path_from_db failed for this path during the batch pre-resolution.
-            raise DataLoaderError(
-                message=f"Category for path '{product_data.category_path}' could not be resolved from DB.",
-                error_type=ErrorType.LOOKUP, field_name="category_path", offending_value=product_data.category_path
-            )
-        logger.debug(f"{log_prefix} Pre-resolved CategoryOrm object available: ID {category.id}, Name: {category.name}")
-
-        # Leaf node check for category (already implemented, remains valid)
-        logger.debug(f"{log_prefix} Checking if category '{category.name}' (ID: {category.id}) is a leaf node.")
-        is_parent_category = db.query(CategoryOrm.id).filter(CategoryOrm.parent_id == category.id, CategoryOrm.business_details_id == business_details_id).first()
-        if is_parent_category:
-            raise DataLoaderError(
-                message=f"Category '{category.name}' (Path: '{product_data.category_path}') is not a leaf node. Products can only be assigned to leaf categories.",
-                error_type=ErrorType.VALIDATION, field_name="category_path", offending_value=product_data.category_path
-            )
-        logger.debug(f"{log_prefix} Category '{category.name}' is a leaf node.")
-
-        # 1c. Shopping category lookup (optional)
-        shopping_cat_id: Optional[int] = None
-        if product_data.shopping_category_name:
-            logger.debug(f"{log_prefix} Looking up shopping category: {product_data.shopping_category_name}")
-            sc = db.query(ShoppingCategoryOrm).filter_by(name=product_data.shopping_category_name).one_or_none()
-            if sc:
-                shopping_cat_id = sc.id
-                logger.debug(f"{log_prefix} Shopping category found: {sc.id}")
-            else:
-                logger.warning(f"{log_prefix} ShoppingCategory '{product_data.shopping_category_name}' not found.")
-        else:
-            logger.debug(f"{log_prefix} No shopping category provided.")
-
-        # 1d. Return policy lookup (from DB2)
-        return_policy_orm_from_db2: Optional[ReturnPolicyOrm] = None
-        if product_data.return_policy:
-            logger.debug(f"{log_prefix} Looking up return policy '{product_data.return_policy}' in DB2.")
-            db2_session = None
-            try:
-                db2_session = get_session(business_id=business_details_id, db_key="DB2")
-                logger.debug(f"{log_prefix} Obtained DB2 session for return policy lookup.")
-                return_policy_orm_from_db2 = db2_session.query(ReturnPolicyOrm).filter(
-                    ReturnPolicyOrm.business_details_id == business_details_id,
-                    ReturnPolicyOrm.policy_name == product_data.return_policy
-                ).one_or_none()
-                logger.debug(f"{log_prefix} Return policy query executed. Found: {return_policy_orm_from_db2.id if return_policy_orm_from_db2 else 'None'}")
-                if not return_policy_orm_from_db2:
-                    raise DataLoaderError(
-                        message=f"Return policy '{product_data.return_policy}' not found in secondary database for business ID {business_details_id}.",
-                        error_type=ErrorType.LOOKUP, field_name="return_policy", offending_value=product_data.return_policy
-                    )
-            finally:
-                if db2_session:
-                    logger.debug(f"{log_prefix} Closing DB2 session for return policy lookup.")
-                    db2_session.close()
-        else:
-            logger.info(f"{log_prefix} No return_policy name provided in CSV. Product will not have a return policy linked.")
-        
+        category = references.category
+        shopping_cat_id = references.shopping_category_id
+        return_policy_orm_from_db2 = references.return_policy
         logger.debug(f"{log_prefix} Step 1 completed successfully.")
 
         # --- Step 2: Product Core Data Load ---
@@ -299,10 +437,9 @@ def load_product_record_to_db_refactored(
         
         # --- Product Lookup ---
         # Product lookup now uses product_name from the CSV model
-        prod = db.query(ProductOrm).filter_by(
-            name=product_data.product_name, # Changed lookup field to product_name
-            business_details_id=business_details_id
-        ).one_or_none()
+        prod = db.execute(
+            PRODUCT_BY_NAME, {"name": product_data.product_name, "business_details_id": business_details_id}
+        ).scalar_one_or_none()
         logger.debug(f"{log_prefix} Existing product by product_name: {prod.id if prod else 'None'}")
 
         is_new = prod is None
@@ -465,17 +602,25 @@ def load_product_record_to_db_refactored(
         if not is_new: 
             logger.debug(f"{log_prefix} Deleting existing specifications for updated product.")
             db.query(ProductSpecificationOrm).filter_by(product_id=prod.id).delete()
-        
+            if child_rows is not None: # Same product earlier in this batch
+                child_rows.discard(ProductSpecificationOrm, product_id=prod.id)
+
+        def add_child(orm_cls, **values):
+            if child_rows is not None:
+                child_rows.add(orm_cls, **values)
+            else:
+                db.add(orm_cls(**values))
+
         if product_data.warehouse_location is not None:
-            db.add(ProductSpecificationOrm(product_id=prod.id, name="Warehouse Location", value=product_data.warehouse_location, active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms))
+            add_child(ProductSpecificationOrm, product_id=prod.id, name="Warehouse Location", value=product_data.warehouse_location, active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms)
             logger.debug(f"{log_prefix} Added Warehouse Location spec: {product_data.warehouse_location}")
         if product_data.store_location is not None:
-            db.add(ProductSpecificationOrm(product_id=prod.id, name="Store Location", value=product_data.store_location, active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms))
+            add_child(ProductSpecificationOrm, product_id=prod.id, name="Store Location", value=product_data.store_location, active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms)
             logger.debug(f"{log_prefix} Added Store Location spec: {product_data.store_location}")
         parsed_csv_specs = parse_specifications(product_data.specifications)
         logger.debug(f"{log_prefix} Parsed {len(parsed_csv_specs)} specs from CSV column.")
         for spec in parsed_csv_specs:
-            db.add(ProductSpecificationOrm(product_id=prod.id, name=spec["name"], value=spec["value"], active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms))
+            add_child(ProductSpecificationOrm, product_id=prod.id, name=spec["name"], value=spec["value"], active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms)
             logger.debug(f"{log_prefix} Added CSV spec: {spec['name']} = {spec['value']}")
 
         # ProductImages
@@ -483,12 +628,14 @@ def load_product_record_to_db_refactored(
         if not is_new: 
             logger.debug(f"{log_prefix} Deleting existing images for updated product.")
             db.query(ProductImageOrm).filter_by(product_id=prod.id).delete()
+            if child_rows is not None:
+                child_rows.discard(ProductImageOrm, product_id=prod.id)
         
         main_img_url: Optional[str] = None
         parsed_imgs = parse_images(product_data.images)
         logger.debug(f"{log_prefix} Parsed {len(parsed_imgs)} images from CSV column.")
         for img_data in parsed_imgs:
-            db.add(ProductImageOrm(product_id=prod.id, name=img_data["url"], main_image=img_data["main_image"], active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms))
+            add_child(ProductImageOrm, product_id=prod.id, name=img_data["url"], main_image=img_data["main_image"], active='ACTIVE', created_by=user_id, created_date=now_ms, updated_by=user_id, updated_date=now_ms)
             if img_data["main_image"]:
                 main_img_url = img_data["url"]
             logger.debug(f"{log_prefix} Added image: {img_data['url']}, main: {img_data['main_image']}")
@@ -511,13 +658,13 @@ def load_product_record_to_db_refactored(
         
         if needs_price_history_entry:
             current_time = datetime.utcnow()
-            price_history_entry = ProductsPriceHistoryOrm(
+            price_history_values = dict(
                 product_id=prod.id, price=prod.price, sale_price=prod.sale_price,
                 old_price=final_old_price_for_history,
                 month=current_time.strftime("%B"), year=current_time.year
             )
-            logger.debug(f"{log_prefix} Adding price history entry: {price_history_entry.__dict__}")
-            db.add(price_history_entry)
+            logger.debug(f"{log_prefix} Adding price history entry: {price_history_values}")
+            add_child(ProductsPriceHistoryOrm, **price_history_values)
         else:
             logger.debug(f"{log_prefix} No price change detected or not applicable, skipping price history.")
         
@@ -527,17 +674,13 @@ def load_product_record_to_db_refactored(
 
     except (IntegrityError, DataError) as e:
         logger.error(f"{log_prefix} Database integrity or data error: {e}", exc_info=True)
-        db.rollback()
         raise DataLoaderError(message=str(e.orig), error_type=ErrorType.DATABASE, offending_value=product_data.product_name, original_exception=e)
     except NoResultFound as e:
         logger.error(f"{log_prefix} Lookup error (NoResultFound): {e}", exc_info=True)
-        db.rollback()
         raise DataLoaderError(message=str(e), error_type=ErrorType.LOOKUP, offending_value=product_data.product_name, original_exception=e)
     except DataLoaderError as e: # This includes the re-raised BarcodeGenerationError if it's wrapped in DataLoaderError
         logger.error(f"{log_prefix} DataLoaderError occurred: {e.message}", exc_info=True) 
-        db.rollback()
         raise
     except Exception as e:
         logger.error(f"{log_prefix} Unexpected error: {e}", exc_info=True)
-        db.rollback()
         raise DataLoaderError(message=f"Unexpected error for product {product_data.product_name}: {str(e)}", error_type=ErrorType.UNEXPECTED_ROW_ERROR, offending_value=product_data.product_name, original_exception=e)
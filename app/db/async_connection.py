@@ -0,0 +1,70 @@
+"""
+Async database access for the API process.
+
+The FastAPI routes query through an asyncpg engine, so polling and upload
+requests wait on Postgres without holding a threadpool thread. The sync engine
+in app.db.connection remains for the Celery workers. Pool sizes follow the same
+DB_POOL_* settings, and the search_path is sent as a server setting in the
+connection startup packet, so it costs no round trip at all.
+"""
+import logging
+from typing import AsyncIterator, Dict, Optional
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.config import settings
+from app.db.connection import database_url, pool_options, search_path
+
+logger = logging.getLogger(__name__)
+
+_async_engines: Dict[str, AsyncEngine] = {}
+_async_session_factories: Dict[str, async_sessionmaker] = {}
+
+
+def _async_url(db_key: str):
+    return make_url(str(database_url(db_key))).set(drivername=settings.ASYNC_DB_DRIVER)
+
+
+def get_async_engine(db_key: Optional[str] = None) -> AsyncEngine:
+    """The cached async engine for db_key (see app.db.connection.database_url)."""
+    key = db_key or "default"
+    engine = _async_engines.get(key)
+    if engine is None:
+        url = _async_url(key)
+        options = pool_options(key)
+        logger.info("Creating async %s engine (ending): ...%s with pool %s", key, str(url)[-20:], options)
+        engine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            connect_args={"server_settings": {"search_path": search_path()}},
+            **options,
+        )
+        _async_engines[key] = engine
+    return engine
+
+
+def get_async_sessionmaker(db_key: Optional[str] = None) -> async_sessionmaker:
+    key = db_key or "default"
+    factory = _async_session_factories.get(key)
+    if factory is None:
+        # expire_on_commit=False: routes build responses from rows after committing.
+        factory = async_sessionmaker(
+            get_async_engine(db_key), autoflush=False, expire_on_commit=False, info={"db_key": key}
+        )
+        _async_session_factories[key] = factory
+    return factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency: one AsyncSession per request, rolled back if left open and closed afterwards."""
+    async with get_async_sessionmaker()() as session:
+        yield session
+
+
+async def dispose_async_engines() -> None:
+    for key, engine in _async_engines.items():
+        await engine.dispose()
+        logger.info("Disposed async %s engine", key)
+    _async_engines.clear()
+    _async_session_factories.clear()
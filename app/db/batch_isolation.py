@@ -0,0 +1,73 @@
+"""
+Optimistic batch writes with bisecting failure isolation.
+
+``load_isolating_failures`` writes a whole chunk of rows inside one SAVEPOINT.
+Rows that ``write`` can reject before writing anything for them (a lookup or
+validation failure: missing brand, product, attribute value...) are handed to
+its ``reject`` callback and reported without failing the chunk. If the chunk
+fails anyway (an exception escaping ``write``, typically the database rejecting
+a statement or a flush), the savepoint is rolled back and each half of the
+chunk is retried the same way, down to single rows. The failing rows are
+isolated and reported one by one, and every other row is still written. A clean
+chunk costs one savepoint instead of one per row and lets the writer batch
+statements across rows; each row failing in the database costs about
+2·log2(chunk size) extra segment attempts, while rejected rows cost nothing extra.
+
+Because a failed segment is retried, ``write`` must keep all of a segment's
+effects in the database or in its return value (never in state shared across
+calls), and the caller applies them only for segments that succeeded. Rows
+rejected in a failed segment are forgotten and rejected again by its retries.
+"""
+import logging
+from typing import Callable, List, Sequence, Tuple, TypeVar
+
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+Reject = Callable[[int, Exception], None]
+
+
+def load_isolating_failures(
+    db: Session,
+    rows: Sequence[T],
+    write: Callable[[Sequence[T], Reject], R],
+) -> Tuple[List[R], List[Tuple[int, Exception]]]:
+    """
+    Run ``write(segment, reject)`` on all of ``rows`` in one savepoint, bisecting
+    when it raises. ``write`` calls ``reject(index into segment, exception)`` for a
+    row it skips before writing anything for it.
+    Returns the results of the segments written, in row order, and the
+    (index into ``rows``, exception) of each row rejected or failing on its own,
+    in row order. Does not commit.
+    """
+    results: List[R] = []
+    failures: List[Tuple[int, Exception]] = []
+
+    def attempt(start: int, stop: int) -> None:
+        rejected: List[Tuple[int, Exception]] = []
+        savepoint = db.begin_nested()
+        try:
+            result = write(rows[start:stop], lambda index, exc: rejected.append((start + index, exc)))
+            db.flush()
+        except Exception as exc:
+            savepoint.rollback()
+            if stop - start == 1:
+                failures.append((start, exc))
+                return
+            logger.debug("Rows %d-%d failed (%s); bisecting.", start, stop - 1, exc)
+            middle = (start + stop) // 2
+            attempt(start, middle)
+            attempt(middle, stop)
+            return
+        savepoint.commit()
+        results.append(result)
+        failures.extend(rejected)
+
+    if rows:
+        attempt(0, len(rows))
+    failures.sort(key=lambda failure: failure[0])
+    return results, failures
@@ -0,0 +1,84 @@
+"""
+Set-based ``UPDATE ... FROM (VALUES ...)`` by primary key.
+
+``update_rows`` applies column changes to rows known by id without loading
+them as ORM objects: on PostgreSQL one statement per UPSERT_BATCH_SIZE rows
+joins the table to a VALUES list of (id, new values); elsewhere (SQLite in
+tests) it falls back to the ORM's executemany bulk UPDATE by primary key.
+Objects of these rows already in the session are not refreshed.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import cast, column, update, values
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def update_rows(
+    db: Session,
+    model: type,
+    rows: Iterable[Dict[str, Any]],
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Update ``rows`` of ``model`` (dicts that share keys and include the primary
+    key, unique on it) in the session's transaction. Does not commit. Returns
+    the row count.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    table = model.__table__
+    (key_column,) = table.primary_key.columns
+    key = key_column.key
+    columns = [key] + [c.key for c in table.columns if c.key in rows[0] and c.key != key]
+
+    if db.get_bind().dialect.name != "postgresql":
+        db.execute(update(model), rows)
+        return len(rows)
+
+    batch_size = batch_size or settings.UPSERT_BATCH_SIZE
+    for start in range(0, len(rows), batch_size):
+        data = values(*[column(c, table.c[c].type) for c in columns], name="v").data(
+            [tuple(row[c] for c in columns) for row in rows[start:start + batch_size]]
+        )
+        # Casts: a VALUES column that is NULL in every row would otherwise be typed text.
+        db.execute(
+            update(table)
+            .where(table.c[key] == cast(data.c[key], key_column.type))
+            .values({c: cast(data.c[c], table.c[c].type) for c in columns[1:]})
+        )
+    return len(rows)
+
+
+class BulkUpdates:
+    """
+    Row updates collected per model across a batch, keyed by primary key (a
+    later update of the same row replaces the earlier one), and written with
+    one ``update_rows`` per model on ``flush``.
+    """
+
+    def __init__(self):
+        self._rows: Dict[type, Dict[Any, Dict[str, Any]]] = {}
+
+    def add(self, model: type, id: Any, **values: Any) -> None:
+        self._rows.setdefault(model, {})[id] = {"id": id, **values}
+
+    def merge(self, other: "BulkUpdates") -> None:
+        for model, rows in other._rows.items():
+            self._rows.setdefault(model, {}).update(rows)
+
+    def rows(self, model: type) -> List[Dict[str, Any]]:
+        return list(self._rows.get(model, {}).values())
+
+    def clear(self) -> None:
+        self._rows.clear()
+
+    def __len__(self) -> int:
+        return sum(len(rows) for rows in self._rows.values())
+
+    def flush(self, db: Session) -> int:
+        written = sum(update_rows(db, model, rows.values()) for model, rows in self._rows.items())
+        self._rows.clear()
+        return written
@@ -1,7 +1,8 @@
 import logging
-from typing import Optional
+from typing import Dict, Optional
 
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
 
 from app.core.config import settings  # centralized settings
@@ -12,37 +13,89 @@ logger = logging.getLogger(__name__)
 CATALOG_SCHEMA = settings.CATALOG_SERVICE_SCHEMA
 BUSINESS_SCHEMA = settings.BUSINESS_SERVICE_SCHEMA
 
-# --- Engine cache ---
-_engine_default: Optional = None
-_engine_db2: Optional    = None
+# --- Engine and session factory caches, keyed by db_key ("default", "DB2" or "REPLICA") ---
+_engines: Dict[str, Engine] = {}
+_session_factories: Dict[str, sessionmaker] = {}
 
-def get_engine(db_key: Optional[str] = None):
+
+def search_path() -> str:
+    """The schemas every connection resolves names in, comma-separated."""
+    schemas = [CATALOG_SCHEMA, BUSINESS_SCHEMA, "public"]
+    return ", ".join(s.strip() for s in schemas if s and s.strip())
+
+
+def _set_search_path(dbapi_connection, connection_record):
+    """
+    Apply the search_path once per physical connection, when the pool opens it,
+    rather than with a round trip per session. Run in autocommit so that a later
+    rollback of the first transaction cannot undo it.
+    """
+    autocommit = dbapi_connection.autocommit
+    dbapi_connection.autocommit = True
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute(f"SET SESSION search_path TO {search_path()}")
+    finally:
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+
+
+def pool_options(db_key: str) -> Dict[str, int]:
+    """create_engine pool arguments for db_key: the DB_POOL_* defaults, overridden by DB_POOL_OVERRIDES[db_key]."""
+    options = {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+    }
+    options.update(settings.DB_POOL_OVERRIDES.get(db_key, {}))
+    return options
+
+
+def database_url(db_key: Optional[str] = None):
     """
-    Return a SQLAlchemy engine for the given db_key:
+    The configured URL for db_key:
       - None or "default" → settings.DATABASE_URL
       - "DB2"           → settings.DATABASE_URL_DB2
+      - "REPLICA"       → settings.DATABASE_URL_REPLICA
     """
-    global _engine_default, _engine_db2
-
-    if db_key == "DB2":
-        url = settings.DATABASE_URL_DB2
+    if db_key in ("DB2", "REPLICA"):
+        url = getattr(settings, f"DATABASE_URL_{db_key}")
         if url is None:
-            logger.critical("DATABASE_URL_DB2 is not configured but 'DB2' was requested.")
-            raise RuntimeError("Missing DATABASE_URL_DB2 for db_key='DB2'")
-        if _engine_db2 is None:
-            logger.info("Creating DB2 engine (ending): ...%s", str(url)[-20:])
-            _engine_db2 = create_engine(str(url), pool_pre_ping=True)
-        return _engine_db2
-
-    # default
+            logger.critical("DATABASE_URL_%s is not configured but '%s' was requested.", db_key, db_key)
+            raise RuntimeError(f"Missing DATABASE_URL_{db_key} for db_key='{db_key}'")
+        return url
     url = settings.DATABASE_URL
     if url is None:
         logger.critical("DATABASE_URL is not configured. Cannot create default engine.")
         raise RuntimeError("Missing DATABASE_URL for default database")
-    if _engine_default is None:
-        logger.info("Creating default engine (ending): ...%s", str(url)[-20:])
-        _engine_default = create_engine(str(url), pool_pre_ping=True)
-    return _engine_default
+    return url
+
+
+def get_engine(db_key: Optional[str] = None) -> Engine:
+    """Return the cached SQLAlchemy engine for db_key (see database_url)."""
+    url = database_url(db_key)
+    if db_key not in ("DB2", "REPLICA"):
+        db_key = "default"
+
+    engine = _engines.get(db_key)
+    if engine is None:
+        options = pool_options(db_key)
+        logger.info("Creating %s engine (ending): ...%s with pool %s", db_key, str(url)[-20:], options)
+        engine = create_engine(str(url), pool_pre_ping=True, **options)
+        event.listen(engine, "connect", _set_search_path)
+        _engines[db_key] = engine
+    return engine
+
+
+def get_sessionmaker(db_key: Optional[str] = None) -> sessionmaker:
+    """The cached session factory bound to the engine selected by db_key."""
+    key = db_key or "default"
+    factory = _session_factories.get(key)
+    if factory is None:
+        factory = sessionmaker(bind=get_engine(db_key), autoflush=False, autocommit=False)
+        _session_factories[key] = factory
+    return factory
 
 
 def get_session(
@@ -52,28 +105,24 @@ def get_session(
     """
     Return a SQLAlchemy Session bound to the engine selected by db_key.
     - business_id is logged for context.
-    - We set a fixed search_path to include CATALOG_SCHEMA, BUSINESS_SCHEMA, and public.
+    - The search_path (CATALOG_SCHEMA, BUSINESS_SCHEMA, public) is already set on
+      every pooled connection, so creating a session costs no round trip.
     """
-    engine = get_engine(db_key)
-    SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
-    session = SessionLocal()
-
-    logger.info(
+    session = get_sessionmaker(db_key)()
+    logger.debug(
         "Session created (db_key=%s). Intended business_id: %s",
         db_key or "default",
         business_id,
     )
+    return session
 
-    # Build and apply search_path
-    schemas = [CATALOG_SCHEMA, BUSINESS_SCHEMA, "public"]
-    valid = [s.strip() for s in schemas if s and s.strip()]
-    search_path_sql = f"SET search_path TO {', '.join(valid)};"
-    try:
-        session.execute(text(search_path_sql))
-        logger.info("search_path set to '%s'", ", ".join(valid))
-    except Exception as e:
-        logger.error("Failed to set search_path %s: %s", valid, e, exc_info=True)
-        session.rollback()
-        raise
 
-    return session
+def dispose_engines() -> None:
+    """
+    Drop the pooled connections inherited from a parent process (call in each
+    forked Celery worker child). close=False leaves the parent's sockets alone;
+    the child opens its own connections on first use.
+    """
+    for db_key, engine in _engines.items():
+        engine.dispose(close=False)
+        logger.info("Disposed %s engine pool after fork", db_key)
@@ -0,0 +1,86 @@
+"""
+Prebuilt statements for the loaders' per-row lookups.
+
+Each statement is built once at import with named bind parameters and run as
+``db.execute(STATEMENT, {...})``. Rebuilding the equivalent ``db.query(...)
+.filter(...)`` per row costs more than the round trip on a fast connection:
+the construct, its cache key and the ORM query context are recreated every
+time even when the compiled SQL comes from the cache. A prebuilt statement
+keeps the same cache key, so every call after the first is a compiled-cache
+hit and only the parameters change. IN lists use expanding parameters so one
+statement serves lists of any length.
+"""
+from sqlalchemy import bindparam, func, select
+
+from app.db.models import (
+    AttributeOrm,
+    AttributeValueOrm,
+    BrandOrm,
+    MainSkuOrm,
+    ProductOrm,
+    ProductVariantOrm,
+    SkuOrm,
+)
+
+# Params: name, business_details_id
+PRODUCT_BY_NAME = select(ProductOrm).where(
+    ProductOrm.name == bindparam("name"),
+    ProductOrm.business_details_id == bindparam("business_details_id"),
+)
+
+PRODUCT_ID_BY_NAME = select(ProductOrm.id).where(
+    ProductOrm.name == bindparam("name"),
+    ProductOrm.business_details_id == bindparam("business_details_id"),
+)
+
+BRAND_BY_NAME = select(BrandOrm).where(
+    BrandOrm.name == bindparam("name"),
+    BrandOrm.business_details_id == bindparam("business_details_id"),
+)
+
+# Attributes whose lower(name) is in names (lowercased), lowest id first.
+# Params: names (list), business_details_id
+ATTRIBUTE_IDS_BY_NAMES = (
+    select(AttributeOrm.id, func.lower(AttributeOrm.name).label("name_key"))
+    .where(
+        func.lower(AttributeOrm.name).in_(bindparam("names", expanding=True)),
+        AttributeOrm.business_details_id == bindparam("business_details_id"),
+    )
+    .order_by(AttributeOrm.id)
+)
+
+# Values of the given attributes whose lower(name) is in names (lowercased); a
+# superset of the wanted (attribute_id, name) pairs. Params: attribute_ids, names
+ATTRIBUTE_VALUE_IDS_BY_NAMES = select(
+    AttributeValueOrm.id,
+    AttributeValueOrm.attribute_id,
+    func.lower(AttributeValueOrm.name).label("name_key"),
+).where(
+    AttributeValueOrm.attribute_id.in_(bindparam("attribute_ids", expanding=True)),
+    func.lower(AttributeValueOrm.name).in_(bindparam("names", expanding=True)),
+)
+
+# Params: names (list), business_details_id
+PRODUCT_IDS_BY_NAMES = select(ProductOrm.name, ProductOrm.id).where(
+    ProductOrm.name.in_(bindparam("names", expanding=True)),
+    ProductOrm.business_details_id == bindparam("business_details_id"),
+)
+
+# One row per (SKU, attribute value) link of the given products, for building
+# SKU signature indexes. Params: product_ids (list)
+SKU_VARIANTS_BY_PRODUCT = (
+    select(
+        SkuOrm.product_id,
+        SkuOrm.id.label("sku_id"),
+        SkuOrm.main_sku_id,
+        ProductVariantOrm.attribute_value_id,
+    )
+    .join(ProductVariantOrm, ProductVariantOrm.sku_id == SkuOrm.id)
+    .where(SkuOrm.product_id.in_(bindparam("product_ids", expanding=True)))
+)
+
+# The default (is_default) MainSKUs among ids. Params: ids (list)
+DEFAULT_MAIN_SKU_IDS = select(MainSkuOrm.id).where(
+    MainSkuOrm.id.in_(bindparam("ids", expanding=True)),
+    MainSkuOrm.is_default.is_(True),
+)
@@ -1,7 +1,7 @@
 import sqlalchemy as sa # Added for sa.false()
 from sqlalchemy import (
     Column, Integer, String, DateTime, Float, Boolean, ForeignKey,
-    UniqueConstraint, Index, Text, BigInteger # Added BigInteger
+    UniqueConstraint, Index, Text, BigInteger, LargeBinary # Added BigInteger
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func # For server-side default timestamps
@@ -31,16 +31,125 @@ class UploadSessionOrm(Base):
     record_count = Column(Integer, nullable=True)
     error_count = Column(Integer, nullable=True)
 
+    # Streaming-load checkpoint: data rows committed so far and the running counts,
+    # so a retried or resumed task can continue after the last committed chunk.
+    last_committed_row = Column(Integer, nullable=False, default=0, server_default="0")
+    inserted_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # Rows a delta upload skipped because they matched their stored fingerprint
+    unchanged_count = Column(Integer, nullable=False, default=0, server_default="0")
+    # session_id of the aggregate "bundle" session this file was uploaded with, if any
+    bundle_id = Column(String, nullable=True, index=True)
+    # JSON summary of per-phase wall/CPU time, rows/sec and DB round trips (see app.services.metrics)
+    metrics = Column(Text, nullable=True)
+    # When the retention job trimmed details and errors in place (mode "trim"); NULL if never
+    trimmed_at = Column(DateTime, nullable=True)
+    # Load options the file was uploaded with, so a resume runs the load the same way
+    delta = Column(Boolean, nullable=False, default=False, server_default=sa.false())
+    shards = Column(Integer, nullable=True)  # row ranges loaded in parallel; NULL when not sharded
+
     created_at = Column(DateTime, server_default=func.now(), nullable=False) # Changed to server_default
     updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False) # Changed to server_default
 
     __table_args__ = (
         Index('idx_upload_session_business_status', "business_details_id", "status"),
         Index('idx_upload_session_business_created_at', "business_details_id", "created_at"),
+        # Serves the retention job's walk over sessions by age (see app.services.retention).
+        Index('idx_upload_session_updated_at_id', "updated_at", "id"),
         {"schema": PUBLIC_SCHEMA} # Assuming operational data like this goes to public or a dedicated ops schema
     )
 
 
+class UploadSessionArchiveOrm(Base):
+    """
+    An upload session past its retention period: the summary columns, plus the
+    full session row and its errors as zlib-compressed JSON (see app.services.retention).
+    """
+    __tablename__ = "upload_sessions_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)  # id the session had in upload_sessions
+    session_id = Column(String, unique=True, nullable=False)
+    business_details_id = Column(BigInteger, nullable=False)
+    load_type = Column(String, nullable=False)
+    status = Column(String, nullable=False)
+    record_count = Column(Integer, nullable=True)
+    error_count = Column(Integer, nullable=True)
+    created_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+    archived_at = Column(DateTime, server_default=func.now(), nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+
+    __table_args__ = (
+        Index('idx_upload_sessions_archive_business_created_at', "business_details_id", "created_at"),
+        {"schema": PUBLIC_SCHEMA}
+    )
+
+
+class UploadSessionErrorOrm(Base):
+    """One row/file error of an upload session, kept out of the session row so it stays small."""
+    __tablename__ = "upload_session_errors"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    session_id = Column(
+        String,
+        ForeignKey(f"{PUBLIC_SCHEMA}.upload_sessions.session_id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    row_number = Column(Integer, nullable=True)  # CSV line; NULL for file/batch-level errors
+    field_name = Column(String, nullable=True)
+    error_message = Column(Text, nullable=False)
+    error_type = Column(String, nullable=False)
+    offending_value = Column(Text, nullable=True)
+    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Serves the paged GET /sessions/{id}/errors read in CSV line order.
+        Index('idx_upload_session_errors_session_row', "session_id", "row_number", "id"),
+        {"schema": PUBLIC_SCHEMA}
+    )
+
+
+class UploadSessionShardOrm(Base):
+    """
+    Checkpoint of one shard of a sharded upload: data rows committed so far and the
+    shard's running counts, so a retried shard continues after its last committed chunk.
+    """
+    __tablename__ = "upload_session_shards"
+
+    session_id = Column(
+        String,
+        ForeignKey(f"{PUBLIC_SCHEMA}.upload_sessions.session_id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    start_row = Column(Integer, primary_key=True, autoincrement=False)  # first data row of the shard
+    last_committed_row = Column(Integer, nullable=False)
+    inserted_count = Column(Integer, nullable=False, default=0, server_default="0")
+    updated_count = Column(Integer, nullable=False, default=0, server_default="0")
+    unchanged_count = Column(Integer, nullable=False, default=0, server_default="0")
+    error_count = Column(Integer, nullable=False, default=0, server_default="0")
+
+    __table_args__ = (
+        {"schema": PUBLIC_SCHEMA},
+    )
+
+
+class RowFingerprintOrm(Base):
+    """Hash of the last successfully loaded version of a CSV row (see app.services.fingerprints)."""
+    __tablename__ = "row_fingerprints"
+
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
+    business_details_id = Column(BigInteger, nullable=False)
+    load_type = Column(String, nullable=False)
+    natural_key = Column(Text, nullable=False)
+    fingerprint = Column(String(32), nullable=False)
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('business_details_id', 'load_type', 'natural_key', name='uq_row_fingerprint_business_type_key'),
+        {"schema": PUBLIC_SCHEMA}
+    )
+
+
 # --- Business Details Model ---
 class BusinessDetailsOrm(Base):
     __tablename__ = "business_details"
@@ -102,6 +211,9 @@ class CategoryOrm(Base):
 
     __table_args__ = (
         UniqueConstraint('business_details_id', 'name', 'parent_id', name='uq_category_business_name_parent'),
+        # Root categories (parent_id NULL) are not covered by the constraint above
+        Index('uq_category_business_root_name', "business_details_id", "name", unique=True,
+              postgresql_where=sa.text("parent_id IS NULL")),
         Index('idx_category_business_name', "business_details_id", "name"),
         {"schema": PUBLIC_SCHEMA}
     )
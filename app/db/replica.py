@@ -0,0 +1,110 @@
+"""
+Read-replica routing.
+
+Reads that tolerate a few seconds of staleness (dashboard polling of upload
+sessions, dry-run lookups) go to the streaming replica in DATABASE_URL_REPLICA
+when one is configured. A lag guard measures how far the replica's replay is
+behind, at most once per REPLICA_LAG_CHECK_SECONDS per process, and sends those
+reads back to the primary while the lag exceeds REPLICA_MAX_LAG_SECONDS or the
+replica cannot be reached. Writes, and reads that must see a write just made
+(loaders, resume), always use the primary.
+"""
+import logging
+import time
+from typing import AsyncIterator, Callable, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.async_connection import get_async_engine, get_async_sessionmaker
+from app.db.connection import get_engine
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DB_KEY = "REPLICA"
+
+# Seconds of WAL the replica has yet to replay. A replica that has replayed all
+# it received is current however old its last transaction is (idle primary).
+REPLICA_LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaLagGuard:
+    """Whether the replica is fresh enough, from a lag measurement trusted for ``check_interval`` seconds."""
+
+    def __init__(self, max_lag: float, check_interval: float, clock: Callable[[], float] = time.monotonic):
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.clock = clock
+        self.healthy = False
+        self._checked_at: Optional[float] = None
+
+    def due(self) -> bool:
+        return self._checked_at is None or self.clock() - self._checked_at >= self.check_interval
+
+    def record(self, lag: Optional[float]) -> bool:
+        """Store a measurement (None: the replica could not be reached) and return the verdict."""
+        healthy = lag is not None and lag <= self.max_lag
+        if healthy != self.healthy:
+            if healthy:
+                logger.info("Replica lag %.1fs is within %.1fs; routing reads to the replica.", lag, self.max_lag)
+            else:
+                logger.warning("Replica lag %s exceeds %.1fs or is unknown; routing reads to the primary.", lag, self.max_lag)
+        self.healthy = healthy
+        self._checked_at = self.clock()
+        return healthy
+
+
+_guard: Optional[ReplicaLagGuard] = None
+
+
+def _lag_guard() -> ReplicaLagGuard:
+    global _guard
+    if _guard is None:
+        _guard = ReplicaLagGuard(settings.REPLICA_MAX_LAG_SECONDS, settings.REPLICA_LAG_CHECK_SECONDS)
+    return _guard
+
+
+def read_db_key() -> Optional[str]:
+    """The db_key for a staleness-tolerant read: "REPLICA" if configured and fresh, else None (the primary)."""
+    if settings.DATABASE_URL_REPLICA is None:
+        return None
+    guard = _lag_guard()
+    if guard.due():
+        try:
+            with get_engine(REPLICA_DB_KEY).connect() as conn:
+                lag = conn.execute(REPLICA_LAG_SQL).scalar()
+        except Exception:
+            logger.exception("Replica lag check failed.")
+            lag = None
+        guard.record(None if lag is None else float(lag))
+    return REPLICA_DB_KEY if guard.healthy else None
+
+
+async def async_read_db_key() -> Optional[str]:
+    """read_db_key for the async engines."""
+    if settings.DATABASE_URL_REPLICA is None:
+        return None
+    guard = _lag_guard()
+    if guard.due():
+        try:
+            async with get_async_engine(REPLICA_DB_KEY).connect() as conn:
+                lag = (await conn.execute(REPLICA_LAG_SQL)).scalar()
+        except Exception:
+            logger.exception("Replica lag check failed.")
+            lag = None
+        guard.record(None if lag is None else float(lag))
+    return REPLICA_DB_KEY if guard.healthy else None
+
+
+def is_replica_session(db) -> bool:
+    return db.info.get("db_key") == REPLICA_DB_KEY
+
+
+async def get_async_read_db() -> AsyncIterator[AsyncSession]:
+    """FastAPI dependency like get_async_db, on the replica while it passes the lag guard."""
+    async with get_async_sessionmaker(await async_read_db_key())() as session:
+        yield session
@@ -0,0 +1,47 @@
+"""
+Set-based ``INSERT ... ON CONFLICT DO UPDATE ... RETURNING`` for PostgreSQL.
+
+One statement writes a whole batch of rows keyed by a natural-key unique
+constraint (or unique index), so loaders need no "query existing, then add or
+mutate" round trip and concurrent uploads of the same business cannot race each
+other into duplicates. Each returned row carries ``inserted`` (``xmax = 0``),
+telling rows that were created from rows that already existed.
+"""
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+
+
+def upsert_returning(
+    db: Session,
+    model: type,
+    rows: Iterable[Dict[str, Any]],
+    index_elements: Sequence[str],
+    set_: Callable[[Any], Dict[str, Any]],
+    returning: Sequence[Any],
+    index_where: Optional[Any] = None,
+    batch_size: Optional[int] = None,
+) -> List[Row]:
+    """
+    Upsert ``rows`` (which must share keys and be unique on ``index_elements``)
+    in batches of UPSERT_BATCH_SIZE. ``set_`` maps the statement's ``excluded``
+    row to the columns to update on conflict. Returns the ``returning`` columns
+    plus ``inserted`` for every row. Does not commit.
+    """
+    rows = list(rows)
+    batch_size = batch_size or settings.UPSERT_BATCH_SIZE
+    returned: List[Row] = []
+    for start in range(0, len(rows), batch_size):
+        stmt = pg_insert(model).values(rows[start:start + batch_size])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(index_elements),
+            index_where=index_where,
+            set_=set_(stmt.excluded),
+        ).returning(*returning, literal_column("xmax = 0").label("inserted"))
+        returned.extend(db.execute(stmt).all())
+    return returned
@@ -1,11 +1,13 @@
 
 # Remove Optional, Request, Depends if not used by other parts of main after GQL removal
 # Keep FastAPI and logging
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 import logging
 from app.services.storage import upload_file as upload_to_wasabi
 
 from app.core.config import settings
+from app.db.async_connection import dispose_async_engines
+from app.services.metrics import render_prometheus, PROMETHEUS_CONTENT_TYPE
 # Removed GraphQL specific imports: strawberry, GraphQLRouter, Query, get_current_user (if only for GQL context)
 # from app.dependencies.auth import get_current_user # This is used by REST routes via Depends, so it's still needed at a higher level but not directly in main.py for GQL
 
@@ -67,9 +69,20 @@ app.include_router(status_api_router, prefix="/api/v1/status", tags=["Status"])
 app.include_router(token_api_router, prefix="/api/auth", tags=["Authentication"]) # This one has /api/auth, might be intentional
 
 
+@app.on_event("shutdown")
+async def close_async_db_pools():
+    await dispose_async_engines()
+
+
 @app.get("/", tags=["Root"])
 async def read_root():
     logger.info("Root path '/' accessed.")
     return {"message": "Welcome to the Catalog Data Load Service REST API."} # Updated message
 
+
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+def metrics():
+    """Upload throughput and per-phase timings in Prometheus text format."""
+    return Response(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 logger.info("Application setup complete. REST API is active.") # Updated message
@@ -1,7 +1,7 @@
 # app/models/__init__.py
 
 from .enums import UploadJobStatus
-from .schemas import ErrorDetailModel, ErrorType # Import new Pydantic models
+from .schemas import ErrorDetailModel, ErrorType, LoaderResult # Import new Pydantic models
 
 # Import other enums or core model-related utilities if any
 
@@ -10,4 +10,5 @@ __all__ = [
     "UploadJobStatus",
     "ErrorDetailModel",
     "ErrorType",
+    "LoaderResult",
 ]
@@ -24,11 +24,14 @@ class UploadJobStatus(str, Enum):
     COMPLETED_WITH_ERRORS = "completed_with_errors" # Some records processed successfully, but some errors occurred.
     COMPLETED_NO_CHANGES = "completed_no_changes" # File processed, but no actual changes/updates were made to the DB.
     COMPLETED_EMPTY_FILE = "completed_empty_file" # File was empty (or only had headers).
+    DRY_RUN_PASSED = "dry_run_passed"     # Validate-only upload found no errors; nothing was written.
+    DRY_RUN_FAILED = "dry_run_failed"     # Validate-only upload found errors (see details); nothing was written.
 
     FAILED_VALIDATION = "failed_validation" # Validation (schema or data) failed critically for too many rows or a fatal file error.
     FAILED_DB_PROCESSING = "failed_db_processing" # Critical error during database interaction for many/all records.
     FAILED_WASABI_UPLOAD = "failed_wasabi_upload" # Initial upload to Wasabi from API failed (set by API, not Celery task).
     FAILED_UNHANDLED_EXCEPTION = "failed_unhandled_exception" # An unexpected error occurred in the Celery task.
+    SKIPPED_DEPENDENCY_FAILED = "skipped_dependency_failed" # Bundle member never started because a file it depends on failed.
 
     # Could add more specific failure reasons if needed, e.g., FAILED_FILE_DOWNLOAD, FAILED_CLEANUP
 
@@ -38,10 +41,13 @@ class UploadJobStatus(str, Enum):
             UploadJobStatus.COMPLETED_WITH_ERRORS,
             UploadJobStatus.COMPLETED_NO_CHANGES,
             UploadJobStatus.COMPLETED_EMPTY_FILE,
+            UploadJobStatus.DRY_RUN_PASSED,
+            UploadJobStatus.DRY_RUN_FAILED,
             UploadJobStatus.FAILED_VALIDATION,
             UploadJobStatus.FAILED_DB_PROCESSING,
             UploadJobStatus.FAILED_WASABI_UPLOAD, # Though usually set before task starts
             UploadJobStatus.FAILED_UNHANDLED_EXCEPTION,
+            UploadJobStatus.SKIPPED_DEPENDENCY_FAILED,
         ]
 
     def is_success(self) -> bool:
@@ -58,6 +64,7 @@ class UploadJobStatus(str, Enum):
             UploadJobStatus.FAILED_DB_PROCESSING,
             UploadJobStatus.FAILED_WASABI_UPLOAD,
             UploadJobStatus.FAILED_UNHANDLED_EXCEPTION,
+            UploadJobStatus.SKIPPED_DEPENDENCY_FAILED,
         ]
 
 # Example of another Enum if needed for Error Types, etc.
@@ -273,6 +273,19 @@ class ErrorDetailModel(BaseModel):
         use_enum_values = True
         from_attributes = True # Used for ORM mode (SQLAlchemy to Pydantic)
 
+class LoaderResult(BaseModel):
+    """Outcome of loading one batch of validated CSV records (see app.services.loader_registry)."""
+    inserted: int = 0
+    updated: int = 0
+    errors: List[ErrorDetailModel] = []
+    # Number of failed rows when a loader reports more failures than detailed errors
+    # (e.g. one batch-level summary entry); defaults to len(errors).
+    error_count: Optional[int] = None
+
+    @property
+    def failed_rows(self) -> int:
+        return len(self.errors) if self.error_count is None else self.error_count
+
 # --- API Response Schemas ---
 
 class UserResponseSchema(BaseModel):
@@ -286,26 +299,58 @@ class UserResponseSchema(BaseModel):
     class Config:
         from_attributes = True
 
-class SessionResponseSchema(BaseModel):
-    """Pydantic model for individual upload session response."""
+class SessionSummarySchema(BaseModel):
+    """An upload session as listed: every field except the potentially large ``details``."""
     session_id: str # UUID as string
     business_details_id: int # Renamed from business_id for clarity if it maps to ORM's business_details_id
     load_type: str
     original_filename: Optional[str] = None
     wasabi_path: Optional[str] = None
     status: str
-    details: Optional[str] = None
     record_count: Optional[int] = None
     error_count: Optional[int] = None
+    last_committed_row: Optional[int] = None
+    inserted_count: Optional[int] = None
+    updated_count: Optional[int] = None
+    unchanged_count: Optional[int] = None  # rows skipped by a delta upload
+    bundle_id: Optional[str] = None  # aggregate session of a bundle upload
+    metrics: Optional[str] = None  # JSON LoadMetrics summary, set when the load finishes
     created_at: datetime
     updated_at: datetime
 
     class Config:
         from_attributes = True
 
+class SessionResponseSchema(SessionSummarySchema):
+    """Pydantic model for individual upload session response."""
+    details: Optional[str] = None
+
+class SessionProgressSchema(BaseModel):
+    """Live progress of an upload session, as published by the worker."""
+    session_id: str
+    status: Optional[str] = None
+    record_count: Optional[int] = None
+    error_count: Optional[int] = None
+    updated_at: Optional[datetime] = None
+    live: bool = False # True when served from the Redis progress channel rather than Postgres
+
 class SessionListResponseSchema(BaseModel):
-    """Pydantic model for a list of upload sessions with total count for pagination."""
-    items: List[SessionResponseSchema]
+    """
+    One page of upload sessions, newest first. Pass ``next_cursor`` back as
+    ``cursor`` for the following page; it is None on the last one. ``total`` is
+    exact, the planner's estimate (``total_is_estimate``) or None, as requested.
+    """
+    items: List[SessionSummarySchema]
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+class SessionErrorListResponseSchema(BaseModel):
+    """One page of an upload session's row errors, in CSV line order, with the total count."""
+    items: List[ErrorDetailModel]
     total: int
 
     class Config:
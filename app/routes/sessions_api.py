@@ -1,56 +1,175 @@
 # session_api.py
+import base64
 import json
+from datetime import datetime
 from uuid import UUID
 from fastapi import APIRouter, Depends, HTTPException, Query as FastAPIQuery
-from typing import List, Optional
-from sqlalchemy.orm import Session as SQLAlchemySession
+from typing import List, Literal, Optional, Tuple
+from sqlalchemy import Row, Select, func, select, text, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.concurrency import run_in_threadpool
 
 from app.dependencies.auth import get_current_user
-from app.models.schemas import SessionResponseSchema, SessionListResponseSchema
+from app.models.enums import UploadJobStatus
+from app.models.schemas import (
+    SessionResponseSchema,
+    SessionSummarySchema,
+    SessionListResponseSchema,
+    SessionProgressSchema,
+    SessionErrorListResponseSchema,
+)
 from app.db.models import UploadSessionOrm
-from app.db.connection import get_session as get_sync_db_session
+from app.db.async_connection import get_async_db, get_async_sessionmaker
+from app.db.replica import get_async_read_db, is_replica_session
+from app.services.progress import read_progress
+from app.services.session_errors import session_errors_queries
 
 router = APIRouter(
     prefix="/sessions",
     tags=["Sessions"]
 )
 
-def _get_session_by_id_sync(
-    db: SQLAlchemySession,
+async def _get_session_by_id(
+    db: AsyncSession,
     session_id_str: str,
     user_business_id: int
 ) -> Optional[UploadSessionOrm]:
-    return (
-        db.query(UploadSessionOrm)
-          .filter(
-              UploadSessionOrm.session_id == session_id_str,
-              UploadSessionOrm.business_details_id == user_business_id
-          )
-          .first()
+    result = await db.execute(
+        select(UploadSessionOrm).where(
+            UploadSessionOrm.session_id == session_id_str,
+            UploadSessionOrm.business_details_id == user_business_id
+        )
     )
+    return result.scalars().first()
+
+async def _get_session_for_read(
+    db: AsyncSession,
+    session_id_str: str,
+    user_business_id: int
+) -> Optional[UploadSessionOrm]:
+    """
+    _get_session_by_id on a read session. A miss on the replica is retried on the
+    primary: a session created moments ago may not have been replayed there yet.
+    """
+    session_orm = await _get_session_by_id(db, session_id_str, user_business_id)
+    if session_orm is None and is_replica_session(db):
+        async with get_async_sessionmaker()() as primary:
+            session_orm = await _get_session_by_id(primary, session_id_str, user_business_id)
+    return session_orm
+
+# Listing projection: every column but the potentially large details text.
+SESSION_LIST_COLUMNS = [c for c in UploadSessionOrm.__table__.columns if c.key != "details"]
+
+def _encode_cursor(created_at: datetime, row_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{row_id}".encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, row_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
 
-def _list_sessions_sync(
-    db: SQLAlchemySession,
+async def _estimated_count(db: AsyncSession, stmt: Select) -> int:
+    """The planner's row estimate for stmt: EXPLAIN only, nothing is scanned."""
+    compiled = stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    plan = await db.scalar(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+async def _list_sessions(
+    db: AsyncSession,
     user_business_id: int,
     skip: int,
     limit: int,
-    status: Optional[str]
-) -> (List[UploadSessionOrm], int):
-    query = db.query(UploadSessionOrm).filter(
-        UploadSessionOrm.business_details_id == user_business_id
-    )
+    status: Optional[str],
+    after: Optional[Tuple[datetime, int]] = None,
+    count: str = "exact"
+) -> Tuple[List[Row], Optional[int]]:
+    """
+    One page of the business's sessions (SESSION_LIST_COLUMNS), newest first.
+    With ``after`` (created_at, id) of the previous page's last row, the page is
+    found by a keyset seek on idx_upload_session_business_created_at instead of
+    skipping rows. ``count`` is "exact", "estimated" or "none" (total is None).
+    """
+    criteria = [UploadSessionOrm.business_details_id == user_business_id]
     if status:
-        query = query.filter(UploadSessionOrm.status == status)
-
-    total_count = query.count()
-    sessions = (
-        query.order_by(UploadSessionOrm.created_at.desc())
-             .offset(skip)
-             .limit(limit)
-             .all()
+        criteria.append(UploadSessionOrm.status == status)
+
+    page = select(*SESSION_LIST_COLUMNS).where(*criteria)
+    if after is not None:
+        created_at, row_id = after
+        page = page.where(
+            UploadSessionOrm.created_at <= created_at,  # index range; the tuple breaks created_at ties
+            tuple_(UploadSessionOrm.created_at, UploadSessionOrm.id) < tuple_(created_at, row_id)
+        )
+    else:
+        page = page.offset(skip)
+    result = await db.execute(
+        page.order_by(UploadSessionOrm.created_at.desc(), UploadSessionOrm.id.desc()).limit(limit)
     )
-    return sessions, total_count
+    rows = result.all()
+
+    total = None
+    if count == "exact":
+        total = await db.scalar(select(func.count()).select_from(UploadSessionOrm).where(*criteria))
+    elif count == "estimated":
+        total = await _estimated_count(db, select(UploadSessionOrm.id).where(*criteria))
+    return rows, total
+
+async def _list_session_errors(
+    db: AsyncSession,
+    session_id_str: str,
+    user_business_id: int,
+    skip: int,
+    limit: int
+) -> Optional[SessionErrorListResponseSchema]:
+    """One page of the session's errors, or None if the session does not belong to the business."""
+    if await _get_session_by_id(db, session_id_str, user_business_id) is None:
+        if not is_replica_session(db):
+            return None
+        # Not replayed on the replica yet: read the session and its errors from the primary.
+        async with get_async_sessionmaker()() as primary:
+            return await _list_session_errors(primary, session_id_str, user_business_id, skip, limit)
+    page, total = session_errors_queries(session_id_str, skip, limit)
+    errors = (await db.execute(page)).scalars().all()
+    return SessionErrorListResponseSchema(items=errors, total=await db.scalar(total))
+
+# Sessions whose load died mid-way; their checkpoint lets the task continue where it stopped.
+RESUMABLE_STATUSES = {
+    UploadJobStatus.FAILED_DB_PROCESSING.value,
+    UploadJobStatus.FAILED_UNHANDLED_EXCEPTION.value,
+}
+
+async def _queue_session_for_resume(
+    db: AsyncSession,
+    session_id_str: str,
+    user_business_id: int
+) -> Optional[UploadSessionOrm]:
+    """
+    Flip a resumable session back to QUEUED. The status check and the update are a
+    single UPDATE so two concurrent resume calls cannot both queue the task.
+    Returns None if the session does not exist, raises 409 if it cannot be resumed.
+    """
+    result = await db.execute(
+        update(UploadSessionOrm)
+        .where(
+            UploadSessionOrm.session_id == session_id_str,
+            UploadSessionOrm.business_details_id == user_business_id,
+            UploadSessionOrm.status.in_(RESUMABLE_STATUSES)
+        )
+        .values(status=UploadJobStatus.QUEUED.value)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    session_orm = await _get_session_by_id(db, session_id_str, user_business_id)
+    if session_orm is not None and not result.rowcount:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Upload session in status '{session_orm.status}' cannot be resumed."
+        )
+    return session_orm
 
 def _orm_to_response(session: UploadSessionOrm) -> SessionResponseSchema:
     data = session.__dict__.copy()
@@ -68,21 +187,11 @@ def _orm_to_response(session: UploadSessionOrm) -> SessionResponseSchema:
 @router.get("/{session_id}", response_model=SessionResponseSchema)
 async def get_upload_session_by_id(
     session_id: UUID,                         # ← parse input as UUID
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     user_business_id = current_user["business_id"]
-    db_sync = get_sync_db_session(business_id=user_business_id)
-
-    try:
-        session_orm = await run_in_threadpool(
-            _get_session_by_id_sync,
-            db_sync,
-            str(session_id),                  # ← lookup via str(UUID)
-            user_business_id
-        )
-    finally:
-        if db_sync:
-            await run_in_threadpool(db_sync.close)
+    session_orm = await _get_session_for_read(db, str(session_id), user_business_id)  # ← lookup via str(UUID)
 
     if not session_orm:
         raise HTTPException(
@@ -93,34 +202,139 @@ async def get_upload_session_by_id(
     # ← return a SessionResponseSchema built from plain types
     return _orm_to_response(session_orm)
 
+@router.get("/{session_id}/progress", response_model=SessionProgressSchema)
+async def get_upload_session_progress(
+    session_id: UUID,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Live progress for pollers. Served from the Redis progress hash the worker
+    publishes to; falls back to the upload_sessions row when Redis has nothing.
+    """
+    user_business_id = current_user["business_id"]
+    live = await run_in_threadpool(read_progress, str(session_id))
+    if live is not None:
+        if str(live.get("business_details_id")) != str(user_business_id):
+            raise HTTPException(
+                status_code=404,
+                detail="Upload session not found or not authorized for this business."
+            )
+        return SessionProgressSchema(
+            session_id=str(session_id),
+            status=live.get("status"),
+            record_count=live.get("record_count"),
+            error_count=live.get("error_count"),
+            updated_at=live.get("updated_at"),
+            live=True,
+        )
+
+    session_orm = await _get_session_for_read(db, str(session_id), user_business_id)
+
+    if not session_orm:
+        raise HTTPException(
+            status_code=404,
+            detail="Upload session not found or not authorized for this business."
+        )
+    return SessionProgressSchema(
+        session_id=str(session_orm.session_id),
+        status=session_orm.status,
+        record_count=session_orm.record_count,
+        error_count=session_orm.error_count,
+        updated_at=session_orm.updated_at,
+        live=False,
+    )
+
+@router.get("/{session_id}/errors", response_model=SessionErrorListResponseSchema)
+async def list_upload_session_errors(
+    session_id: UUID,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
+    skip: int = 0,
+    limit: int = FastAPIQuery(100, le=1000)
+):
+    """Row errors of an upload session, a page at a time, in CSV line order."""
+    if skip < 0:
+        raise HTTPException(status_code=400, detail="Skip parameter cannot be negative.")
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="Limit parameter must be at least 1.")
+
+    page = await _list_session_errors(db, str(session_id), current_user["business_id"], skip, limit)
+
+    if page is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Upload session not found or not authorized for this business."
+        )
+    return page
+
 @router.get("/", response_model=SessionListResponseSchema)
 async def list_upload_sessions(
     current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_read_db),
     skip: int = 0,
     limit: int = 100,
-    status: Optional[str] = FastAPIQuery(None, description="Filter sessions by status")
+    status: Optional[str] = FastAPIQuery(None, description="Filter sessions by status"),
+    cursor: Optional[str] = FastAPIQuery(None, description="next_cursor of the previous page"),
+    count: Literal["exact", "estimated", "none"] = FastAPIQuery(
+        "exact", description="How to compute total: exact count, planner estimate, or not at all"
+    )
 ):
     if skip < 0:
         raise HTTPException(status_code=400, detail="Skip parameter cannot be negative.")
     if limit < 1:
         raise HTTPException(status_code=400, detail="Limit parameter must be at least 1.")
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either skip or cursor, not both.")
+
+    after = _decode_cursor(cursor) if cursor else None
+    rows, total_count = await _list_sessions(
+        db, current_user["business_id"], skip, limit, status, after=after, count=count
+    )
+
+    items = [SessionSummarySchema.model_validate(row) for row in rows]
+    next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id) if len(rows) == limit else None
+    return SessionListResponseSchema(
+        items=items,
+        total=total_count,
+        total_is_estimate=count == "estimated",
+        next_cursor=next_cursor,
+    )
+
+@router.post("/{session_id}/resume", response_model=SessionResponseSchema, status_code=202)
+async def resume_upload_session(
+    session_id: UUID,
+    current_user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Re-queue a failed load with the delta and shards options it was uploaded with.
+    The task continues after the session's last committed row (see
+    last_committed_row), or for a sharded upload after each shard's last
+    committed chunk, instead of reloading the whole file.
+    """
+    # Imported here: app.routes.upload pulls in the Celery task modules.
+    from app.routes.upload import CELERY_TASK_MAP
 
     user_business_id = current_user["business_id"]
-    db_sync = get_sync_db_session(business_id=user_business_id)
+    session_orm = await _queue_session_for_resume(db, str(session_id), user_business_id)
 
-    try:
-        sessions_orm_list, total_count = await run_in_threadpool(
-            _list_sessions_sync,
-            db_sync,
-            user_business_id,
-            skip,
-            limit,
-            status
+    if not session_orm:
+        raise HTTPException(
+            status_code=404,
+            detail="Upload session not found or not authorized for this business."
         )
-    finally:
-        if db_sync:
-            await run_in_threadpool(db_sync.close)
 
-    # map each ORM → Pydantic model (with session_id as str)
-    items = [ _orm_to_response(s) for s in sessions_orm_list ]
-    return SessionListResponseSchema(items=items, total=total_count)
+    task_kwargs = dict(
+        business_id=str(user_business_id),
+        session_id=session_orm.session_id,
+        wasabi_file_path=session_orm.wasabi_path,
+        original_filename=session_orm.original_filename,
+        user_id=current_user["user_id"],
+    )
+    if session_orm.shards and session_orm.shards > 1:
+        task_kwargs["shards"] = session_orm.shards
+    if session_orm.delta:
+        task_kwargs["delta"] = True
+    CELERY_TASK_MAP[session_orm.load_type].delay(**task_kwargs)
+    return _orm_to_response(session_orm)
@@ -1,42 +1,30 @@
 import logging
+import os
 import uuid
 import json
+import zipfile
 from datetime import datetime
-from io import BytesIO
-from typing import Optional
+from io import BytesIO, StringIO
+from typing import Dict, List, Optional, Tuple, Union
 
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Response
 from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.dependencies.auth import get_current_user
 from app.db.models import UploadSessionOrm
-from app.db.connection import get_session
-from app.models import ErrorDetailModel, ErrorType
+from app.db.async_connection import get_async_db
+from app.models import ErrorDetailModel, ErrorType, UploadJobStatus
+from app.services.bundles import BUNDLE_LOAD_TYPE, UPLOAD_SEQUENCE_DEPENDENCIES
+from app.services.dry_run import DryRunReport, dry_run_csv
 from app.services.storage import upload_file as local_upload_file
-from app.tasks.load_jobs import (
-    process_brands_file,
-    process_attributes_file,
-    process_return_policies_file,
-    process_products_file,
-    process_product_items_file,
-    process_product_prices_file,
-    process_meta_tags_file,
-    process_categories_file,
-)
+from app.tasks.load_jobs import LOAD_TASKS, advance_bundle, dry_run_csv_task
 from pydantic import BaseModel
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
-UPLOAD_SEQUENCE_DEPENDENCIES = {
-    "products": ["brands", "return_policies"],
-    "product_items": ["products"],
-    "product_prices": ["products"],
-    "meta_tags": ["products"],
-    "categories": ["products"],
-}
-
 ROLE_PERMISSIONS = {
     "ROLE_ADMIN": {
         "brands", "attributes", "return_policies", "products",
@@ -55,16 +43,7 @@ ROLE_PERMISSIONS = {
     "viewer": set(),
 }
 
-CELERY_TASK_MAP = {
-    "brands": process_brands_file,
-    "attributes": process_attributes_file,
-    "return_policies": process_return_policies_file,
-    "products": process_products_file,
-    "product_items": process_product_items_file,
-    "product_prices": process_product_prices_file,
-    "meta_tags": process_meta_tags_file,
-    "categories": process_categories_file,
-}
+CELERY_TASK_MAP = LOAD_TASKS
 
 
 class UploadResponseModel(BaseModel):
@@ -77,16 +56,34 @@ class UploadResponseModel(BaseModel):
     tracking_id: Optional[str] = None
 
 
-def create_upload_session_in_db_sync(
+class BundleResponseModel(BaseModel):
+    message: str
+    session_id: str  # aggregate session to poll for the whole bundle
+    status: str
+    members: Dict[str, str]  # load_type -> session_id of that file
+    task_id: Optional[str] = None
+
+
+class DryRunResponseModel(BaseModel):
+    message: str
+    load_type: str
+    status: str
+    record_count: int
+    error_count: int
+    errors: List[ErrorDetailModel]
+
+
+async def create_upload_session_in_db(
+    db: AsyncSession,
     session_id_str: str,
     user_business_id: int,
     load_type_str: str,
     original_filename_str: str,
     storage_path_str: str,
+    delta: bool = False,
+    shards: Optional[int] = None,
 ) -> UploadSessionOrm:
-    db = None
     try:
-        db = get_session(business_id=user_business_id)
         new_session_orm = UploadSessionOrm(
             session_id=session_id_str,
             business_details_id=user_business_id,
@@ -94,33 +91,59 @@ def create_upload_session_in_db_sync(
             original_filename=original_filename_str,
             wasabi_path=storage_path_str,
             status="pending",
+            delta=delta,
+            shards=shards,
         )
         db.add(new_session_orm)
-        db.commit()
-        db.refresh(new_session_orm)
+        await db.commit()
+        await db.refresh(new_session_orm)
         logger.info(f"Upload session record created for session_id: {session_id_str}")
         return new_session_orm
     except Exception as e_db:
         logger.error("DB Error creating upload session: %s", e_db, exc_info=True)
-        if db:
-            db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e_db))
-    finally:
-        if db:
-            db.close()
+
+
+def run_inline_dry_run(business_id: int, load_type: str, file_bytes: bytes) -> DryRunReport:
+    """Dry-run a small upload in the request: no session, no stored file, no Celery task."""
+    try:
+        csv_file = StringIO(file_bytes.decode("utf-8-sig"), newline="")
+    except UnicodeDecodeError as e:
+        return DryRunReport(errors=[ErrorDetailModel(error_message=f"File is not valid UTF-8: {e}", error_type=ErrorType.FILE_FORMAT)])
+    return dry_run_csv(business_id, load_type, csv_file, session_id=f"dry-run-{uuid.uuid4()}")
 
 
 @router.post(
     "/api/v1/business/{business_id}/upload/{load_type}",
     summary="Upload catalog file to local storage, create DB session, and queue processing",
     status_code=202,
-    response_model=UploadResponseModel,
+    response_model=Union[UploadResponseModel, DryRunResponseModel],
 )
 async def upload_file_and_queue_for_processing(
     business_id: str,
     load_type: str,
+    response: Response,
     file: UploadFile = File(...),
     user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    dry_run: bool = Query(
+        False,
+        description=(
+            "Only validate the file (headers, rows and references) and report errors; nothing is written. "
+            "Small files are checked in the request (200), larger ones by a worker (202, see the session)."
+        ),
+    ),
+    shards: Optional[int] = Query(
+        None,
+        ge=1,
+        le=settings.CSV_MAX_SHARDS,
+        description="Split the file into this many row ranges processed by parallel workers.",
+    ),
+    delta: bool = Query(
+        False,
+        description="Skip rows unchanged since their last successful load; they are reported as unchanged.",
+    ),
 ):
     # 1) Validate and authorize
     try:
@@ -142,18 +165,27 @@ async def upload_file_and_queue_for_processing(
     file_bytes = await file.read()
     if not file_bytes:
         raise HTTPException(400, "Empty file.")
+    if dry_run and len(file_bytes) <= settings.DRY_RUN_INLINE_MAX_BYTES:
+        report = await run_in_threadpool(run_inline_dry_run, biz_id, load_type, file_bytes)
+        status = UploadJobStatus.DRY_RUN_PASSED if report.passed else UploadJobStatus.DRY_RUN_FAILED
+        response.status_code = 200
+        return DryRunResponseModel(
+            message="Dry run complete; nothing was written.",
+            load_type=load_type,
+            status=status.value,
+            record_count=report.record_count,
+            error_count=report.error_count,
+            errors=report.errors,
+        )
+
     file_stream = BytesIO(file_bytes)
 
     # 3) Create an UploadSession record
     session_id = str(uuid.uuid4())
     storage_key = f"uploads/{biz_id}/{session_id}/{load_type}/{file.filename}"
-    session_orm = await run_in_threadpool(
-        create_upload_session_in_db_sync,
-        session_id,
-        biz_id,
-        load_type,
-        file.filename,
-        storage_key,
+    session_orm = await create_upload_session_in_db(
+        db, session_id, biz_id, load_type, file.filename, storage_key,
+        delta=delta and not dry_run, shards=shards if shards and shards > 1 and not dry_run else None,
     )
 
     # 4) Save to local storage
@@ -163,13 +195,36 @@ async def upload_file_and_queue_for_processing(
         )
 
         # 5) Dispatch Celery task (always pass user_id)
-        task = CELERY_TASK_MAP[load_type].delay(
+        if dry_run:
+            task = dry_run_csv_task.delay(
+                business_id=str(biz_id),
+                session_id=session_orm.session_id,
+                wasabi_file_path=session_orm.wasabi_path,
+                load_type=load_type,
+            )
+            logger.info("Queued dry run task %s for session %s", task.id, session_id)
+            return UploadResponseModel(
+                message="File accepted for dry run.",
+                session_id=session_id,
+                load_type=load_type,
+                storage_path=storage_key,
+                status=session_orm.status,
+                task_id=task.id,
+                tracking_id=tracking_id,
+            )
+
+        task_kwargs = dict(
             business_id=str(biz_id),
             session_id=session_orm.session_id,
             wasabi_file_path=session_orm.wasabi_path,
             original_filename=session_orm.original_filename,
             user_id=user["user_id"],
         )
+        if shards and shards > 1:
+            task_kwargs["shards"] = shards
+        if delta:
+            task_kwargs["delta"] = True
+        task = CELERY_TASK_MAP[load_type].delay(**task_kwargs)
         logger.info("Queued Celery task %s for session %s", task.id, session_id)
 
     except Exception as e_loc:
@@ -187,3 +242,145 @@ async def upload_file_and_queue_for_processing(
         task_id=task.id,
         tracking_id=tracking_id,
     )
+
+
+def read_bundle_files(uploads: List[Tuple[str, bytes]]) -> List[Tuple[str, str, bytes]]:
+    """
+    (load_type, filename, content) for every CSV of a bundle, expanding zip archives.
+    Each CSV is named after its load type (brands.csv, product_items.csv, ...).
+    """
+    csv_files: List[Tuple[str, bytes]] = []
+    for filename, content in uploads:
+        name = os.path.basename(filename or "")
+        if name.lower().endswith(".zip"):
+            try:
+                archive = zipfile.ZipFile(BytesIO(content))
+            except zipfile.BadZipFile:
+                raise HTTPException(400, f"{name} is not a valid zip archive.")
+            entries = [
+                info for info in archive.infolist()
+                if not info.is_dir() and info.filename.lower().endswith(".csv")
+                and not os.path.basename(info.filename).startswith((".", "__MACOSX"))
+                and "__MACOSX/" not in info.filename
+            ]
+            if sum(info.file_size for info in entries) > settings.BUNDLE_MAX_UNCOMPRESSED_BYTES:
+                raise HTTPException(400, f"{name} expands beyond the bundle size limit.")
+            csv_files.extend((os.path.basename(info.filename), archive.read(info)) for info in entries)
+        elif name.lower().endswith(".csv"):
+            csv_files.append((name, content))
+        else:
+            raise HTTPException(400, f"Only CSV or zip files allowed in a bundle: {name}")
+
+    files: List[Tuple[str, str, bytes]] = []
+    for name, content in csv_files:
+        load_type = os.path.splitext(name)[0].strip().lower()
+        if load_type not in CELERY_TASK_MAP:
+            raise HTTPException(400, f"Cannot tell the load type of {name}; name each CSV after its load type.")
+        if any(lt == load_type for lt, _, _ in files):
+            raise HTTPException(400, f"Bundle contains more than one {load_type} file.")
+        if not content:
+            raise HTTPException(400, f"Empty file: {name}")
+        files.append((load_type, name, content))
+    if not files:
+        raise HTTPException(400, "Bundle contains no CSV files.")
+    return files
+
+
+async def create_bundle_sessions_in_db(
+    db: AsyncSession,
+    bundle_id: str,
+    user_business_id: int,
+    members: List[Tuple[str, str, str, str]],
+    delta: bool = False,
+) -> None:
+    """Aggregate session plus one pending session per (load_type, filename, storage_path, session_id), in one commit."""
+    try:
+        db.add(UploadSessionOrm(
+            session_id=bundle_id,
+            business_details_id=user_business_id,
+            load_type=BUNDLE_LOAD_TYPE,
+            original_filename=", ".join(filename for _, filename, _, _ in members),
+            wasabi_path=f"uploads/{user_business_id}/{bundle_id}/",
+            status="pending",
+        ))
+        db.add_all([
+            UploadSessionOrm(
+                session_id=session_id,
+                business_details_id=user_business_id,
+                load_type=load_type,
+                original_filename=filename,
+                wasabi_path=storage_path,
+                status="pending",
+                bundle_id=bundle_id,
+                delta=delta,
+            )
+            for load_type, filename, storage_path, session_id in members
+        ])
+        await db.commit()
+        logger.info("Bundle %s created with %d files", bundle_id, len(members))
+    except Exception as e_db:
+        logger.error("DB Error creating bundle sessions: %s", e_db, exc_info=True)
+        await db.rollback()
+        raise HTTPException(status_code=500, detail=str(e_db))
+
+
+@router.post(
+    "/api/v1/business/{business_id}/upload-bundle",
+    summary="Upload several catalog files at once and load them in dependency order",
+    status_code=202,
+    response_model=BundleResponseModel,
+)
+async def upload_bundle_and_queue_for_processing(
+    business_id: str,
+    files: List[UploadFile] = File(..., description="CSV files named after their load type, or zip archives of them."),
+    user: dict = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    delta: bool = Query(
+        False,
+        description="Skip rows unchanged since their last successful load; they are reported as unchanged.",
+    ),
+):
+    """
+    Files with no prerequisite in the bundle (brands, return_policies, attributes,
+    categories) start at once and in parallel; each dependent file starts as soon as
+    the files it depends on have finished (see UPLOAD_SEQUENCE_DEPENDENCIES). Poll
+    the returned session for the whole bundle, or the member sessions per file.
+    """
+    try:
+        biz_id = int(business_id)
+    except ValueError:
+        raise HTTPException(400, "Invalid business_id; must be integer.")
+    if biz_id != user["business_id"]:
+        raise HTTPException(403, "Unauthorized business_id.")
+
+    uploads = [(f.filename, await f.read()) for f in files]
+    bundle_files = await run_in_threadpool(read_bundle_files, uploads)
+
+    role = user.get("roles", ["viewer"])[0]
+    for load_type, _, _ in bundle_files:
+        if role not in ROLE_PERMISSIONS or load_type not in ROLE_PERMISSIONS[role]:
+            raise HTTPException(403, f"Insufficient permissions for {load_type}.")
+
+    bundle_id = str(uuid.uuid4())
+    members = [
+        (load_type, filename, f"uploads/{biz_id}/{bundle_id}/{load_type}/{filename}", str(uuid.uuid4()))
+        for load_type, filename, _ in bundle_files
+    ]
+    await create_bundle_sessions_in_db(db, bundle_id, biz_id, members, delta=delta)
+
+    try:
+        for (_, _, content), (_, _, storage_key, _) in zip(bundle_files, members):
+            await run_in_threadpool(local_upload_file, BytesIO(content), str(biz_id), storage_key)
+        task = advance_bundle.delay(str(biz_id), bundle_id, user["user_id"], delta)
+        logger.info("Queued bundle %s (%d files), task %s", bundle_id, len(members), task.id)
+    except Exception as e_loc:
+        logger.error("Error during bundle storage or dispatch: %s", e_loc, exc_info=True)
+        raise HTTPException(500, "Failed storing files or queueing processing.")
+
+    return BundleResponseModel(
+        message="Bundle accepted.",
+        session_id=bundle_id,
+        status=UploadJobStatus.PENDING.value,
+        members={load_type: session_id for load_type, _, _, session_id in members},
+        task_id=task.id,
+    )
@@ -0,0 +1,127 @@
+"""
+Multi-file bundle uploads.
+
+A bundle is one aggregate upload session (load_type "bundle") plus one member
+session per CSV, linked by ``upload_sessions.bundle_id``. Members start as soon
+as every load type they depend on *within the bundle* has finished, so
+independent files load in parallel and no one waits on a human round trip.
+The scheduling state lives entirely in the member rows; advancing a bundle is
+idempotent and a member is claimed with a conditional UPDATE before it is
+dispatched, so concurrent advances never start the same file twice.
+"""
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.db.models import UploadSessionOrm
+from app.models import UploadJobStatus
+
+logger = logging.getLogger(__name__)
+
+BUNDLE_LOAD_TYPE = "bundle"
+
+# Load types whose rows reference entities created by other load types.
+UPLOAD_SEQUENCE_DEPENDENCIES = {
+    "products": ["brands", "return_policies", "categories"],
+    "product_items": ["products", "attributes"],
+    "product_prices": ["products"],
+    "meta_tags": ["products"],
+}
+
+# Member outcomes that let dependent load types go ahead (row errors included:
+# the rows that did load are there to reference).
+PREREQUISITE_MET_STATUSES = {
+    UploadJobStatus.COMPLETED.value,
+    UploadJobStatus.COMPLETED_WITH_ERRORS.value,
+    UploadJobStatus.COMPLETED_NO_CHANGES.value,
+    UploadJobStatus.COMPLETED_EMPTY_FILE.value,
+}
+TERMINAL_STATUSES = {status.value for status in UploadJobStatus if status.is_terminal()}
+
+
+def bundle_dependencies(load_types: Iterable[str]) -> Dict[str, Set[str]]:
+    """Each load type's prerequisites among ``load_types``."""
+    present = set(load_types)
+    return {lt: set(UPLOAD_SEQUENCE_DEPENDENCIES.get(lt, ())) & present for lt in present}
+
+
+def plan_bundle_step(statuses: Dict[str, str]) -> Tuple[List[str], Dict[str, str]]:
+    """
+    From the members' current statuses (by load type), the pending load types that
+    can start now, and those that never can, mapped to the prerequisite that failed.
+    """
+    dependencies = bundle_dependencies(statuses)
+    to_start, to_skip = [], {}
+    for load_type in sorted(statuses):
+        if statuses[load_type] != UploadJobStatus.PENDING.value:
+            continue
+        failed = sorted(
+            dep for dep in dependencies[load_type]
+            if statuses[dep] in TERMINAL_STATUSES and statuses[dep] not in PREREQUISITE_MET_STATUSES
+        )
+        if failed:
+            to_skip[load_type] = failed[0]
+        elif all(statuses[dep] in PREREQUISITE_MET_STATUSES for dep in dependencies[load_type]):
+            to_start.append(load_type)
+    return to_start, to_skip
+
+
+def rollup_status(statuses: Iterable[str]) -> Optional[UploadJobStatus]:
+    """The bundle's terminal status once every member is terminal, else None."""
+    statuses = list(statuses)
+    if not statuses or any(s not in TERMINAL_STATUSES for s in statuses):
+        return None
+    clean = {
+        UploadJobStatus.COMPLETED.value,
+        UploadJobStatus.COMPLETED_NO_CHANGES.value,
+        UploadJobStatus.COMPLETED_EMPTY_FILE.value,
+    }
+    if all(s in clean for s in statuses):
+        return UploadJobStatus.COMPLETED
+    if any(s in PREREQUISITE_MET_STATUSES for s in statuses):
+        return UploadJobStatus.COMPLETED_WITH_ERRORS
+    return UploadJobStatus.FAILED_DB_PROCESSING
+
+
+def load_bundle_members(db: Session, bundle_id: str) -> List[UploadSessionOrm]:
+    return db.query(UploadSessionOrm).filter(UploadSessionOrm.bundle_id == bundle_id).all()
+
+
+def claim_pending_member(db: Session, session_id: str, status: UploadJobStatus) -> bool:
+    """Move a member out of PENDING; False if another advance got there first. Does not commit."""
+    updated = (
+        db.query(UploadSessionOrm)
+          .filter(
+              UploadSessionOrm.session_id == session_id,
+              UploadSessionOrm.status == UploadJobStatus.PENDING.value,
+          )
+          .update({UploadSessionOrm.status: status.value}, synchronize_session=False)
+    )
+    return bool(updated)
+
+
+BUNDLE_COUNT_COLUMNS = ("record_count", "error_count", "inserted_count", "updated_count", "unchanged_count")
+
+
+def bundle_totals(members: Iterable[UploadSessionOrm]) -> Dict[str, int]:
+    """The members' counts summed for the aggregate session."""
+    members = list(members)
+    return {column: sum(getattr(m, column) or 0 for m in members) for column in BUNDLE_COUNT_COLUMNS}
+
+
+def write_bundle_progress(db: Session, bundle_id: str, totals: Dict[str, int]) -> None:
+    """
+    Stage running totals on the aggregate session. Never overwrites a terminal
+    status, which a concurrent advance may already have written. Does not commit.
+    """
+    db.execute(
+        update(UploadSessionOrm)
+        .where(
+            UploadSessionOrm.session_id == bundle_id,
+            UploadSessionOrm.status.notin_(TERMINAL_STATUSES),
+        )
+        .values(status=UploadJobStatus.DB_PROCESSING_STARTED.value, **totals)
+        .execution_options(synchronize_session=False)
+    )
@@ -10,10 +10,13 @@ These loader functions are intended to be called by the generic `process_csv_tas
 in `app.tasks.load_jobs.py` after CSV data validation and basic processing.
 """
 import logging
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError, DataError # Added DataError
 from app.utils.date_utils import ServerDateTime
+from app.db.bulk_copy import copy_rows
+from app.db.upsert import upsert_returning
 from app.db.models import (
     CategoryOrm,
     BrandOrm,
@@ -30,12 +33,141 @@ from app.dataload.models.price_csv import PriceCsv, PriceTypeEnum as PriceCsvTyp
 from app.utils.slug import generate_slug
 from app.utils.redis_utils import add_to_id_map, get_from_id_map, DB_PK_MAP_SUFFIX
 from app.exceptions import DataLoaderError
-from app.models.schemas import ErrorType
+from app.models.schemas import ErrorType, ErrorDetailModel, LoaderResult
+from app.services.metrics import phase
 # Removed unused import: from app.dataload.product_loader import load_product_record_to_db
 from app.dataload.models.product_csv import ProductCsvModel
 
 logger = logging.getLogger(__name__)
 
+def _category_fields(record_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract & normalize the CSV fields of one category record."""
+    def _bool(val: Any) -> bool:
+        return str(val or "").strip().lower() in ("true", "1", "yes")
+    def _active(val: Any) -> str:
+        return "INACTIVE" if isinstance(val, str) and val.strip().lower()=="inactive" else "ACTIVE"
+
+    order_type_raw = record_data.get("order_type")   # may be absent
+    shipping_raw   = record_data.get("shipping_type")
+    return {
+        "name":             record_data["name"].strip(),
+        "description":      record_data.get("description"),
+        "enabled":          _bool(record_data.get("enabled", True)),
+        "image_name":       record_data.get("image_name"),
+        "long_description": record_data.get("long_description"),
+        "order_type":       order_type_raw.strip() if order_type_raw is not None and order_type_raw.strip() else None,
+        "shipping_type":    shipping_raw.strip() if shipping_raw is not None and shipping_raw.strip() else None,
+        "active":           _active(record_data.get("active")),
+        "seo_description":  record_data.get("seo_description"),
+        "seo_keywords":     record_data.get("seo_keywords"),
+        "seo_title":        record_data.get("seo_title"),
+        "position_on_site": record_data.get("position_on_site"),
+        "url":              record_data.get("url") or f"/{ServerDateTime.now_epoch_ms()}",  # fallback, but CSV-model should fill
+    }
+
+
+def _apply_category_leaf_update(cat: CategoryOrm, fields: Dict[str, Any], record_data: Dict[str, Any], user_id: Optional[int]) -> None:
+    """Update only leaf-level metadata of an existing category."""
+    cat.description      = fields["description"]      or cat.description
+    cat.enabled          = fields["enabled"]
+    cat.image_name       = fields["image_name"]       or cat.image_name
+    cat.long_description = fields["long_description"] or cat.long_description
+    if "order_type" in record_data:
+        cat.order_type    = fields["order_type"]
+    if "shipping_type" in record_data:
+        cat.shipping_type = fields["shipping_type"]
+    cat.active           = fields["active"]
+    cat.seo_description  = fields["seo_description"]  or cat.seo_description
+    cat.seo_keywords     = fields["seo_keywords"]     or cat.seo_keywords
+    cat.seo_title        = fields["seo_title"]        or cat.seo_title
+    cat.url              = fields["url"]              or cat.url
+    cat.position_on_site = fields["position_on_site"] or cat.position_on_site
+    cat.updated_by       = user_id
+    cat.updated_date     = ServerDateTime.now_epoch_ms()
+
+
+def _new_category_values(business_details_id: int, parent_id: Optional[int], orm_name: str, seg: str,
+                         fields: Dict[str, Any], is_leaf: bool, user_id: Optional[int]) -> Dict[str, Any]:
+    now = ServerDateTime.now_epoch_ms()
+    payload: Dict[str, Any] = {
+        "business_details_id": business_details_id,
+        "parent_id": parent_id,
+        "name": orm_name,
+        "created_by": user_id,
+        "created_date": now,
+        "updated_by": user_id,
+        "updated_date": now,
+        "enabled": fields["enabled"] if is_leaf else True,
+        "active": fields["active"],
+        "description": fields["description"] if is_leaf else seg,
+        "url": fields["url"],
+    }
+    if is_leaf:
+        payload.update({
+            key: fields[key]
+            for key in ("image_name", "long_description", "order_type", "shipping_type",
+                        "seo_description", "seo_keywords", "seo_title", "position_on_site")
+        })
+    return payload
+
+
+def _new_category(business_details_id: int, parent_id: Optional[int], orm_name: str, seg: str,
+                  fields: Dict[str, Any], is_leaf: bool, user_id: Optional[int]) -> CategoryOrm:
+    return CategoryOrm(**_new_category_values(business_details_id, parent_id, orm_name, seg, fields, is_leaf, user_id))
+
+
+def _keep_existing_if_blank(excluded, column: str):
+    current = CategoryOrm.__table__.c[column]
+    return func.coalesce(func.nullif(excluded[column], ""), current)
+
+
+def _category_leaf_set(optional_columns: Tuple[str, ...]):
+    """ON CONFLICT update of an existing leaf, with the rules of _apply_category_leaf_update."""
+    def set_(excluded) -> Dict[str, Any]:
+        values = {
+            column: _keep_existing_if_blank(excluded, column)
+            for column in ("description", "image_name", "long_description", "seo_description",
+                           "seo_keywords", "seo_title", "url")
+        }
+        values.update({
+            "enabled": excluded.enabled,
+            "active": excluded.active,
+            "position_on_site": func.coalesce(excluded.position_on_site, CategoryOrm.__table__.c.position_on_site),
+            "updated_by": excluded.updated_by,
+            "updated_date": excluded.updated_date,
+        })
+        # order_type/shipping_type are only overwritten when the CSV has the column.
+        values.update({column: excluded[column] for column in optional_columns})
+        return values
+    return set_
+
+
+def _category_branch_set(excluded) -> Dict[str, Any]:
+    # Intermediate path nodes are never modified; the no-op update makes RETURNING yield existing rows too.
+    return {"name": excluded.name}
+
+
+def _upsert_category_level(
+    db_session: Session, rows: List[Dict[str, Any]], set_
+) -> Dict[Tuple[Optional[int], str], Tuple[int, bool]]:
+    """Upsert categories of one tree depth; (parent_id, name) -> (id, inserted)."""
+    returning = (CategoryOrm.id, CategoryOrm.parent_id, CategoryOrm.name)
+    roots = [r for r in rows if r["parent_id"] is None]
+    children = [r for r in rows if r["parent_id"] is not None]
+    returned = []
+    if roots:
+        # Root names are unique through a partial index: NULL parent_ids never conflict in the constraint.
+        returned += upsert_returning(
+            db_session, CategoryOrm, roots, ["business_details_id", "name"], set_, returning,
+            index_where=CategoryOrm.parent_id.is_(None),
+        )
+    if children:
+        returned += upsert_returning(
+            db_session, CategoryOrm, children, ["business_details_id", "name", "parent_id"], set_, returning,
+        )
+    return {(r.parent_id, r.name): (r.id, r.inserted) for r in returned}
+
+
 def load_category_to_db(
     db_session,
     business_details_id: int,
@@ -59,28 +191,8 @@ def load_category_to_db(
             field_name="category_path"
         )
 
-    # helpers
-    def _bool(val: Any) -> bool:
-        return str(val or "").strip().lower() in ("true", "1", "yes")
-    def _active(val: Any) -> str:
-        return "INACTIVE" if isinstance(val, str) and val.strip().lower()=="inactive" else "ACTIVE"
-
-    # extract & normalize CSV fields
-    name             = record_data["name"].strip()
-    description      = record_data.get("description")
-    enabled          = _bool(record_data.get("enabled", True))
-    image_name       = record_data.get("image_name")
-    long_description = record_data.get("long_description")
-    order_type_raw   = record_data.get("order_type")   # may be absent
-    order_type       = order_type_raw.strip() if order_type_raw is not None and order_type_raw.strip() else None
-    shipping_raw     = record_data.get("shipping_type")
-    shipping_type    = shipping_raw.strip() if shipping_raw is not None and shipping_raw.strip() else None
-    active_flag      = _active(record_data.get("active"))
-    seo_description  = record_data.get("seo_description")
-    seo_keywords     = record_data.get("seo_keywords")
-    seo_title        = record_data.get("seo_title")
-    position         = record_data.get("position_on_site")
-    url              = record_data.get("url") or f"/{ServerDateTime.now_epoch_ms()}"  # fallback, but CSV-model should fill
+    fields = _category_fields(record_data)
+    name   = fields["name"]
 
     segments = [seg.strip() for seg in path.split("/") if seg.strip()]
     parent_id: Optional[int] = None
@@ -108,52 +220,12 @@ def load_category_to_db(
                 # update only leaf‐level metadata
                 if is_leaf:
                     logger.info(f"Updating category '{full_path}' (ID={cat.id})")
-                    cat.description      = description      or cat.description
-                    cat.enabled          = enabled
-                    cat.image_name       = image_name       or cat.image_name
-                    cat.long_description = long_description or cat.long_description
-                    if "order_type" in record_data:
-                        cat.order_type    = order_type
-                    if "shipping_type" in record_data:
-                        cat.shipping_type = shipping_type
-                    cat.active           = active_flag
-                    cat.seo_description  = seo_description  or cat.seo_description
-                    cat.seo_keywords     = seo_keywords     or cat.seo_keywords
-                    cat.seo_title        = seo_title        or cat.seo_title
-                    cat.url              = url              or cat.url
-                    cat.position_on_site = position or cat.position_on_site
-                    cat.updated_by       = user_id
-                    cat.updated_date     = ServerDateTime.now_epoch_ms()
+                    _apply_category_leaf_update(cat, fields, record_data, user_id)
                 final_id = cat.id
 
             else:
                 # create new
-                now = ServerDateTime.now_epoch_ms()
-                payload: Dict[str, Any] = {
-                    "business_details_id": business_details_id,
-                    "parent_id": parent_id,
-                    "name": orm_name,
-                    "created_by": user_id,
-                    "created_date": now,
-                    "updated_by": user_id,
-                    "updated_date": now,
-                    "enabled": enabled if is_leaf else True,
-                    "active": active_flag,
-                    "description": description if is_leaf else seg,
-                    "url": url,
-                }
-                if is_leaf:
-                    payload.update({
-                        "image_name":       image_name,
-                        "long_description": long_description,
-                        "order_type":       order_type,
-                        "shipping_type":    shipping_type,
-                        "seo_description":  seo_description,
-                        "seo_keywords":     seo_keywords,
-                        "seo_title":        seo_title,
-                        "position_on_site": position,
-                    })
-                new_cat = CategoryOrm(**payload)
+                new_cat = _new_category(business_details_id, parent_id, orm_name, seg, fields, is_leaf, user_id)
                 db_session.add(new_cat)
                 db_session.flush()
                 final_id = new_cat.id
@@ -201,6 +273,102 @@ def load_category_to_db(
             original_exception=e
         )
              
+def load_categories_batch(
+    db_session: Session,
+    business_details_id: int,
+    records_data: List[Dict[str, Any]],
+    session_id: str,
+    row_numbers: List[int],
+    db_pk_redis_pipeline: Any = None,
+    user_id: int = None
+) -> LoaderResult:
+    """
+    Set-at-a-time counterpart of load_category_to_db.
+    Each tree depth is written with INSERT ... ON CONFLICT DO UPDATE ... RETURNING id
+    (parents get IDs before their children), with no lookup queries. Leaf create/update
+    rules are the same as for a single row; intermediate nodes are only created.
+    """
+    result = LoaderResult()
+    rows = []
+    for row_number, record in zip(row_numbers, records_data):
+        path = (record.get("category_path") or "").strip()
+        segments = [seg.strip() for seg in path.split("/") if seg.strip()]
+        if not segments:
+            result.errors.append(ErrorDetailModel(
+                row_number=row_number,
+                field_name="category_path",
+                error_message="Missing or empty 'category_path'",
+                error_type=ErrorType.VALIDATION,
+            ))
+            continue
+        rows.append((record, _category_fields(record), segments))
+    if not rows:
+        return result
+
+    try:
+        parent_ids: List[Optional[int]] = [None] * len(rows)
+        cached_paths: Dict[str, int] = {}
+        counted_leaves = set()
+        with phase("categories.write"):
+            for depth in range(max(len(segments) for _, _, segments in rows)):
+                leaves: Dict[Tuple[Optional[int], str], Tuple[Dict[str, Any], Dict[str, Any]]] = {}
+                branches: Dict[Tuple[Optional[int], str], Dict[str, Any]] = {}
+                level = []
+                for i, (record, fields, segments) in enumerate(rows):
+                    if depth >= len(segments):
+                        continue
+                    seg = segments[depth]
+                    is_leaf = depth == len(segments) - 1
+                    orm_name = fields["name"] if is_leaf else seg
+                    key = (parent_ids[i], orm_name)
+                    values = _new_category_values(business_details_id, parent_ids[i], orm_name, seg, fields, is_leaf, user_id)
+                    if is_leaf:
+                        leaves[key] = (values, record)  # a repeated leaf: the last row wins
+                    else:
+                        branches.setdefault(key, values)
+                    level.append((i, "/".join(segments[:depth + 1]), key, is_leaf))
+
+                ids = _upsert_category_level(
+                    db_session, [v for k, v in branches.items() if k not in leaves], _category_branch_set
+                )
+                by_optional_columns: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+                for values, record in leaves.values():
+                    optional = tuple(c for c in ("order_type", "shipping_type") if c in record)
+                    by_optional_columns.setdefault(optional, []).append(values)
+                for optional, leaf_rows in by_optional_columns.items():
+                    ids.update(_upsert_category_level(db_session, leaf_rows, _category_leaf_set(optional)))
+
+                for i, full_path, key, is_leaf in level:
+                    category_id, inserted = ids[key]
+                    parent_ids[i] = category_id
+                    cached_paths[full_path] = category_id
+                    if is_leaf:
+                        if inserted and key not in counted_leaves:
+                            result.inserted += 1
+                        else:
+                            result.updated += 1
+                        counted_leaves.add(key)
+
+        for full_path, category_id in cached_paths.items():
+            add_to_id_map(
+                session_id,
+                f"categories{DB_PK_MAP_SUFFIX}",
+                full_path,
+                category_id,
+                pipeline=db_pk_redis_pipeline
+            )
+    except (IntegrityError, DataError) as e:
+        logger.error(f"DB error loading categories for business {business_details_id}: {e.orig}")
+        raise DataLoaderError(
+            message=f"Database error for categories: {e.orig}",
+            error_type=ErrorType.DATABASE,
+            original_exception=e
+        )
+
+    logger.info(f"Loaded {len(rows)} categories for business {business_details_id}: {result.inserted} inserted, {result.updated} updated.")
+    return result
+
+
 def load_brand_to_db(
     db_session: Session,
     business_details_id: int,
@@ -209,80 +377,60 @@ def load_brand_to_db(
     db_pk_redis_pipeline: Any = None,
     user_id: int = None
 ) -> Dict[str, int]:
+    """
+    Upsert brands by (business_details_id, name) with INSERT ... ON CONFLICT DO UPDATE.
+    Existing brands get logo, supplier_id, active and updated_* from the CSV; a name
+    repeated in the batch is written once, from its last row.
+    """
     if not records_data:
         return {"inserted": 0, "updated": 0, "errors": 0}
 
     summary = {"inserted": 0, "updated": 0, "errors": 0}
     ts_now = ServerDateTime.now_epoch_ms()
 
-    # normalize flags and attach business_details_id
-    for rec in records_data:
-        rec["business_details_id"] = business_details_id
-        flag = str(rec.get("active", "")).strip().upper()
-        rec["active"] = "ACTIVE" if flag in ("TRUE", "1", "ACTIVE") else "INACTIVE"
-
-    # fetch existing by name
-    names = [r["name"] for r in records_data if r.get("name")]
-    existing = db_session.query(BrandOrm).filter(
-        BrandOrm.business_details_id == business_details_id,
-        BrandOrm.name.in_(names)
-    ).all()
-    existing_map = {b.name: b for b in existing}
-
-    to_insert, to_update = [], []
-
+    latest: Dict[str, Dict[str, Any]] = {}
     for rec in records_data:
         name = rec.get("name")
         if not name:
             summary["errors"] += 1
             continue
-
-        if name in existing_map:
-            # update only updated_* fields
-            upd = {
-                "id": existing_map[name].id,
-                "updated_by": user_id,
-                "updated_date": ts_now,
-                # any other columns from CSV to update:
-                "logo": rec.get("logo"),
-                "supplier_id": rec.get("supplier_id"),
-                "active": rec["active"],
-            }
-            to_update.append(upd)
+        flag = str(rec.get("active", "")).strip().upper()
+        if name in latest:
             summary["updated"] += 1
-        else:
-            # insert with both created_* and updated_*
-            ins = {
-                "business_details_id": business_details_id,
-                "name": name,
-                "logo": rec.get("logo"),
-                "supplier_id": rec.get("supplier_id"),
-                "active": rec["active"],
-                "created_by": user_id,
-                "created_date": ts_now,
-                "updated_by": user_id,
-                "updated_date": ts_now,
-            }
-            to_insert.append(ins)
-            summary["inserted"] += 1
+        latest[name] = {
+            "business_details_id": business_details_id,
+            "name": name,
+            "logo": rec.get("logo"),
+            "supplier_id": rec.get("supplier_id"),
+            "active": "ACTIVE" if flag in ("TRUE", "1", "ACTIVE") else "INACTIVE",
+            "created_by": user_id,
+            "created_date": ts_now,
+            "updated_by": user_id,
+            "updated_date": ts_now,
+        }
 
     try:
-        if to_update:
-            db_session.bulk_update_mappings(BrandOrm, to_update)
-        if to_insert:
-            db_session.bulk_insert_mappings(BrandOrm, to_insert)
-            db_session.flush()
-            # register new IDs in Redis
-            for ins in to_insert:
-                bid = ins.get("id")
-                if bid:
-                    add_to_id_map(
-                        session_id,
-                        f"brands{DB_PK_MAP_SUFFIX}",
-                        ins["name"],
-                        bid,
-                        pipeline=db_pk_redis_pipeline
-                    )
+        with phase("brands.write"):
+            returned = upsert_returning(
+                db_session, BrandOrm, latest.values(), ["business_details_id", "name"],
+                lambda excluded: {
+                    "logo": excluded.logo,
+                    "supplier_id": excluded.supplier_id,
+                    "active": excluded.active,
+                    "updated_by": excluded.updated_by,
+                    "updated_date": excluded.updated_date,
+                },
+                returning=(BrandOrm.id, BrandOrm.name),
+            )
+        for row in returned:
+            summary["inserted" if row.inserted else "updated"] += 1
+            add_to_id_map(
+                session_id,
+                f"brands{DB_PK_MAP_SUFFIX}",
+                row.name,
+                row.id,
+                pipeline=db_pk_redis_pipeline
+            )
     except IntegrityError as e:
         raise DataLoaderError(
             message=f"Database integrity error for brands: {e.orig}",
@@ -292,6 +440,55 @@ def load_brand_to_db(
 
     return summary
 
+def _parse_attribute_values(record_data: Dict[str, Any], attribute_name: str, is_color: bool) -> List[Dict[str, Any]]:
+    """Split the pipe-separated value columns of an attribute row into one dict per value."""
+    names =   (record_data.get("values_name")   or "").split("|")
+    vals  =   (record_data.get("value_value")   or "").split("|")
+    imgs  =   (record_data.get("img_url")       or "").split("|")
+    acts  = [s.strip().upper() for s in (record_data.get("values_active") or "").split("|")]
+
+    parsed = []
+    max_len = max(len(names), len(vals))
+    for i in range(max_len):
+        disp    = names[i].strip() if i < len(names) and names[i].strip() else (vals[i].strip() if i < len(vals) else None)
+        actual  = vals[i].strip() if i < len(vals) and vals[i].strip() else disp
+        url     = imgs[i].strip() if i < len(imgs) and imgs[i].strip() else None
+        status  = acts[i] if i < len(acts) and acts[i] in ("ACTIVE","INACTIVE") else "INACTIVE"
+        if not disp:
+            logger.warning(f"Skipping empty attribute-value at index {i} for '{attribute_name}'")
+            continue
+        parsed.append({
+            "name": disp,
+            # choose stored value
+            "value": actual if is_color and actual else disp,
+            "attribute_image_url": url,
+            "active": status,
+        })
+    return parsed
+
+
+def _apply_attribute_value_update(val_orm: AttributeValueOrm, val: Dict[str, Any], user_id: Optional[int], now: int) -> None:
+    val_orm.value               = val["value"]
+    val_orm.attribute_image_url = val["attribute_image_url"] or val_orm.attribute_image_url
+    val_orm.active              = val["active"]
+    val_orm.updated_by          = user_id
+    val_orm.updated_date        = now
+
+
+def _new_attribute_value(attribute_id: int, val: Dict[str, Any], user_id: Optional[int], now: int) -> AttributeValueOrm:
+    return AttributeValueOrm(
+        attribute_id        = attribute_id,
+        name                = val["name"],
+        value               = val["value"],
+        attribute_image_url = val["attribute_image_url"],
+        active              = val["active"],
+        created_by          = user_id,
+        created_date        = now,
+        updated_by          = user_id,
+        updated_date        = now,
+    )
+
+
 def load_attribute_to_db(
     db_session: Session,
     business_details_id: int,
@@ -367,51 +564,18 @@ def load_attribute_to_db(
         )
 
         # --- ATTRIBUTE VALUES UPSERT ---
-        names =   (record_data.get("values_name")   or "").split("|")
-        vals  =   (record_data.get("value_value")   or "").split("|")
-        imgs  =   (record_data.get("img_url")       or "").split("|")
-        acts  = [s.strip().upper() for s in (record_data.get("values_active") or "").split("|")]
-
-        max_len = max(len(names), len(vals))
-        for i in range(max_len):
-            disp    = names[i].strip() if i < len(names) and names[i].strip() else (vals[i].strip() if i < len(vals) else None)
-            actual  = vals[i].strip() if i < len(vals) and vals[i].strip() else disp
-            url     = imgs[i].strip() if i < len(imgs) and imgs[i].strip() else None
-            status  = acts[i] if i < len(acts) and acts[i] in ("ACTIVE","INACTIVE") else "INACTIVE"
-            if not disp:
-                logger.warning(f"Skipping empty attribute-value at index {i} for '{name}'")
-                continue
-
-            # choose stored value
-            store_val = actual if parent.is_color and actual else disp
-
+        for val in _parse_attribute_values(record_data, name, parent.is_color):
             val_orm = (
                 db_session.query(AttributeValueOrm)
-                          .filter_by(attribute_id=attribute_db_id, name=disp)
+                          .filter_by(attribute_id=attribute_db_id, name=val["name"])
                           .first()
             )
             if val_orm:
-                logger.debug(f"Updating value '{disp}' for attribute ID {attribute_db_id}")
-                val_orm.value            = store_val
-                val_orm.attribute_image_url = url or val_orm.attribute_image_url
-                val_orm.active           = status
-                val_orm.updated_by       = user_id
-                val_orm.updated_date     = now
-
+                logger.debug(f"Updating value '{val['name']}' for attribute ID {attribute_db_id}")
+                _apply_attribute_value_update(val_orm, val, user_id, now)
             else:
-                logger.debug(f"Creating value '{disp}' for attribute ID {attribute_db_id}")
-                new_val = AttributeValueOrm(
-                    attribute_id        = attribute_db_id,
-                    name                = disp,
-                    value               = store_val,
-                    attribute_image_url = url,
-                    active              = status,
-                    created_by          = user_id,
-                    created_date        = now,
-                    updated_by          = user_id,
-                    updated_date        = now,
-                )
-                db_session.add(new_val)
+                logger.debug(f"Creating value '{val['name']}' for attribute ID {attribute_db_id}")
+                db_session.add(_new_attribute_value(attribute_db_id, val, user_id, now))
 
         return attribute_db_id
 
@@ -449,6 +613,120 @@ def load_attribute_to_db(
             original_exception=e
         )
 
+def load_attributes_batch(
+    db_session: Session,
+    business_details_id: int,
+    records_data: List[Dict[str, Any]],
+    session_id: str,
+    row_numbers: List[int],
+    db_pk_redis_pipeline: Any = None,
+    user_id: int = None
+) -> LoaderResult:
+    """
+    Set-at-a-time counterpart of load_attribute_to_db.
+    Attributes, then their values, are each written with INSERT ... ON CONFLICT DO
+    UPDATE ... RETURNING id, keyed by (business_details_id, name) and (attribute_id, name).
+    """
+    result = LoaderResult()
+    rows = []
+    for row_number, record in zip(row_numbers, records_data):
+        if not record.get("attribute_name"):
+            result.errors.append(ErrorDetailModel(
+                row_number=row_number,
+                field_name="attribute_name",
+                error_message="Missing 'attribute_name'",
+                error_type=ErrorType.VALIDATION,
+            ))
+            continue
+        rows.append(record)
+    if not rows:
+        return result
+
+    now = ServerDateTime.now_epoch_ms()
+    try:
+        # --- PARENT ATTRIBUTES ---
+        latest: Dict[str, Dict[str, Any]] = {}
+        for record in rows:
+            name = record["attribute_name"]
+            if name in latest:
+                result.updated += 1
+            latest[name] = {
+                "business_details_id": business_details_id,
+                "name": name,
+                "is_color": bool(record.get("is_color", False)),
+                "active": record.get("attribute_active"),
+                "created_by": user_id,
+                "created_date": now,
+                "updated_by": user_id,
+                "updated_date": now,
+            }
+        with phase("attributes.write"):
+            attributes = upsert_returning(
+                db_session, AttributeOrm, latest.values(), ["business_details_id", "name"],
+                lambda excluded: {
+                    "is_color": excluded.is_color,
+                    "active": func.coalesce(func.nullif(excluded.active, ""), AttributeOrm.__table__.c.active),
+                    "updated_by": excluded.updated_by,
+                    "updated_date": excluded.updated_date,
+                },
+                returning=(AttributeOrm.id, AttributeOrm.name, AttributeOrm.is_color),
+            )
+        by_name = {attr.name: attr for attr in attributes}
+        for attr in attributes:
+            if attr.inserted:
+                result.inserted += 1
+            else:
+                result.updated += 1
+            add_to_id_map(
+                session_id,
+                f"attributes{DB_PK_MAP_SUFFIX}",
+                attr.name,
+                attr.id,
+                pipeline=db_pk_redis_pipeline
+            )
+
+        # --- ATTRIBUTE VALUES ---
+        values: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        for record in rows:
+            attr = by_name[record["attribute_name"]]
+            for val in _parse_attribute_values(record, attr.name, attr.is_color):
+                values[(attr.id, val["name"])] = {
+                    "attribute_id": attr.id,
+                    "name": val["name"],
+                    "value": val["value"],
+                    "attribute_image_url": val["attribute_image_url"],
+                    "active": val["active"],
+                    "created_by": user_id,
+                    "created_date": now,
+                    "updated_by": user_id,
+                    "updated_date": now,
+                }
+        if values:
+            with phase("attributes.write"):
+                upsert_returning(
+                    db_session, AttributeValueOrm, values.values(), ["attribute_id", "name"],
+                    lambda excluded: {
+                        "value": excluded.value,
+                        "attribute_image_url": func.coalesce(
+                            excluded.attribute_image_url, AttributeValueOrm.__table__.c.attribute_image_url
+                        ),
+                        "active": excluded.active,
+                        "updated_by": excluded.updated_by,
+                        "updated_date": excluded.updated_date,
+                    },
+                    returning=(AttributeValueOrm.id,),
+                )
+    except (IntegrityError, DataError) as e:
+        logger.error(f"DB error loading attributes for business {business_details_id}: {e.orig}")
+        raise DataLoaderError(
+            message=f"Database error for attributes: {e.orig}",
+            error_type=ErrorType.DATABASE,
+            original_exception=e
+        )
+
+    return result
+
+
 def load_return_policy_to_db(
     db_session: Session,
     business_details_id: int,
@@ -527,15 +805,16 @@ def load_return_policy_to_db(
                     if 'id' in insert_data: del insert_data['id']
                     inserts_list_of_dicts.append(insert_data)
 
-        if updates_list_of_dicts:
-            logger.info(f"Bulk updating {len(updates_list_of_dicts)} return policies for business {business_details_id}.")
-            db_session.bulk_update_mappings(ReturnPolicyOrm, updates_list_of_dicts)
-            summary["updated"] = len(updates_list_of_dicts)
+        with phase("return_policies.write"):
+            if updates_list_of_dicts:
+                logger.info(f"Bulk updating {len(updates_list_of_dicts)} return policies for business {business_details_id}.")
+                db_session.bulk_update_mappings(ReturnPolicyOrm, updates_list_of_dicts)
+                summary["updated"] = len(updates_list_of_dicts)
 
-        if inserts_list_of_dicts:
-            logger.info(f"Bulk inserting {len(inserts_list_of_dicts)} new return policies for business {business_details_id}.")
-            db_session.bulk_insert_mappings(ReturnPolicyOrm, inserts_list_of_dicts)
-            summary["inserted"] = len(inserts_list_of_dicts)
+            if inserts_list_of_dicts:
+                logger.info(f"Bulk inserting {len(inserts_list_of_dicts)} new return policies for business {business_details_id}.")
+                db_session.bulk_insert_mappings(ReturnPolicyOrm, inserts_list_of_dicts)
+                summary["inserted"] = len(inserts_list_of_dicts)
 
         return summary
 
@@ -551,7 +830,8 @@ def load_price_to_db(
     business_details_id: int,
     records_data: List[Dict[str, Any]],
     session_id: str,
-    db_pk_redis_pipeline: Any
+    db_pk_redis_pipeline: Any,
+    row_numbers: Optional[List[int]] = None, # CSV line of each record; data rows from line 2 by default
 ) -> Dict[str, Any]: # Returns a summary like {"inserted": count, "updated": count, "error_details": List[ErrorDetailModel]}
     if not records_data:
         return {"inserted": 0, "updated": 0, "errors_list": []} # Changed "errors" to "errors_list"
@@ -559,12 +839,14 @@ def load_price_to_db(
     summary = {"inserted": 0, "updated": 0} # errors will be the list of ErrorDetailModel
     error_details_list: List[ErrorDetailModel] = []
 
+    if row_numbers is None:
+        row_numbers = [i + 2 for i in range(len(records_data))] # CSV row 2 is the first data row
+    # (CSV line, record) of the PRODUCT and of the SKU prices
     product_price_records_data = []
     sku_price_records_data = []
 
     # Initial pass to categorize and validate price_type, and ensure target_id presence
-    for i, record in enumerate(records_data):
-        row_num_for_error = i + 2 # Assuming CSV row 2 is the first data row
+    for row_num_for_error, record in zip(row_numbers, records_data):
         try:
             price_type_str = record.get("price_type")
             if not price_type_str:
@@ -574,11 +856,11 @@ def load_price_to_db(
             if price_type == PriceCsvTypeEnum.PRODUCT:
                 if not record.get("product_id"):
                     raise ValueError("product_id is required for PRODUCT price type.")
-                product_price_records_data.append(record)
+                product_price_records_data.append((row_num_for_error, record))
             elif price_type == PriceCsvTypeEnum.SKU:
                 if not record.get("sku_id"):
                     raise ValueError("sku_id is required for SKU price type.")
-                sku_price_records_data.append(record)
+                sku_price_records_data.append((row_num_for_error, record))
         except ValueError as ve:
             logger.warning(f"Skipping price record (row approx {row_num_for_error}) due to validation error: {ve}. Record: {record}")
             error_details_list.append(ErrorDetailModel(
@@ -596,7 +878,7 @@ def load_price_to_db(
     try:
         # Process Product Prices
         if product_price_records_data:
-            product_ids_from_csv = {int(r['product_id']) for r in product_price_records_data if r.get('product_id') and r['product_id'].isdigit()}
+            product_ids_from_csv = {int(r['product_id']) for _, r in product_price_records_data if r.get('product_id') and r['product_id'].isdigit()}
 
             valid_db_product_ids = {
                 pid[0] for pid in db_session.query(ProductOrm.id).filter(
@@ -612,8 +894,7 @@ def load_price_to_db(
                 ).all()
             }
 
-            for i, record in enumerate(product_price_records_data): # Use original index for row number if needed
-                row_num_for_error = records_data.index(record) + 2 if record in records_data else None # Approx row num
+            for row_num_for_error, record in product_price_records_data:
                 try:
                     product_id_str = record['product_id']
                     product_id = int(product_id_str)
@@ -642,7 +923,7 @@ def load_price_to_db(
 
         # Process SKU Prices
         if sku_price_records_data:
-            sku_ids_from_csv = {int(r['sku_id']) for r in sku_price_records_data if r.get('sku_id') and r['sku_id'].isdigit()}
+            sku_ids_from_csv = {int(r['sku_id']) for _, r in sku_price_records_data if r.get('sku_id') and r['sku_id'].isdigit()}
             valid_db_sku_ids = {
                 sid[0] for sid in db_session.query(ProductItemOrm.id).filter(
                     ProductItemOrm.business_details_id == business_details_id,
@@ -655,8 +936,7 @@ def load_price_to_db(
                     PriceOrm.sku_id.in_(valid_db_sku_ids)
                 ).all()
             }
-            for i, record in enumerate(sku_price_records_data):
-                row_num_for_error = records_data.index(record) + 2 if record in records_data else None
+            for row_num_for_error, record in sku_price_records_data:
                 try:
                     sku_id_str = record['sku_id']
                     sku_id = int(sku_id_str)
@@ -682,15 +962,16 @@ def load_price_to_db(
                     logger.warning(f"{msg} Skipping: {record}")
                     error_details_list.append(ErrorDetailModel(row_number=row_num_for_error, field_name="sku_id", error_message=msg, error_type=ErrorType.VALIDATION, offending_value=record.get('sku_id')))
 
-        if all_updates:
-            logger.info(f"Bulk updating {len(all_updates)} prices for business {business_details_id}.")
-            db_session.bulk_update_mappings(PriceOrm, all_updates)
-            summary["updated"] = len(all_updates)
+        with phase("prices.write"):
+            if all_updates:
+                logger.info(f"Bulk updating {len(all_updates)} prices for business {business_details_id}.")
+                db_session.bulk_update_mappings(PriceOrm, all_updates)
+                summary["updated"] = len(all_updates)
 
-        if all_inserts:
-            logger.info(f"Bulk inserting {len(all_inserts)} new prices for business {business_details_id}.")
-            db_session.bulk_insert_mappings(PriceOrm, all_inserts)
-            summary["inserted"] = len(all_inserts)
+            if all_inserts:
+                logger.info(f"Bulk inserting {len(all_inserts)} new prices for business {business_details_id}.")
+                copy_rows(db_session, PriceOrm, all_inserts)
+                summary["inserted"] = len(all_inserts)
 
         summary["errors_list"] = error_details_list # Attach collected pre-check errors
         return summary
@@ -0,0 +1,280 @@
+"""
+Validate-only ("dry run") processing of an upload.
+
+A dry run goes through the same checks a real load would hit before writing:
+the CSV header against the load type's model, ``validate_csv`` row validation,
+and the lookups a loader would otherwise fail on (brands, category paths,
+return policies, products, attributes and their values). Lookups are bulk
+``IN`` queries per chunk inside read-only transactions that are always rolled
+back, so a dry run never writes and never holds locks.
+"""
+import csv
+import itertools
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, TextIO
+
+from pydantic import BaseModel
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.connection import get_session
+from app.db.replica import read_db_key
+from app.db.models import (
+    AttributeOrm,
+    AttributeValueOrm,
+    BrandOrm,
+    CategoryOrm,
+    ProductOrm,
+    ReturnPolicyOrm,
+)
+from app.dataload.parsers.item_parser import (
+    ItemParserError,
+    parse_attribute_combination_string,
+    parse_attributes_string,
+)
+from app.models.schemas import ErrorDetailModel, ErrorType
+from app.services.validator import MODEL_MAP, WHOLE_FILE_LOAD_TYPES, validate_csv, validation_errors_to_details
+
+logger = logging.getLogger(__name__)
+
+
+class DryRunReport(BaseModel):
+    record_count: int = 0
+    errors: List[ErrorDetailModel] = []
+
+    @property
+    def error_count(self) -> int:
+        return len(self.errors)
+
+    @property
+    def passed(self) -> bool:
+        return not self.errors
+
+
+class ReadOnlySessions:
+    """
+    Lazily opened read-only sessions per db_key, rolled back and closed together.
+    Lookups against the primary are served by the read replica while it passes
+    the lag guard (see app.db.replica).
+    """
+
+    def __init__(self, business_id: int, session_factory: Callable[..., Session] = get_session):
+        self.business_id = business_id
+        self.session_factory = session_factory
+        self._sessions: Dict[Optional[str], Session] = {}
+
+    def __call__(self, db_key: Optional[str] = None) -> Session:
+        if db_key not in self._sessions:
+            db = self.session_factory(business_id=self.business_id, db_key=db_key or read_db_key())
+            db.execute(text("SET TRANSACTION READ ONLY"))
+            self._sessions[db_key] = db
+        return self._sessions[db_key]
+
+    def close(self) -> None:
+        for db in self._sessions.values():
+            try:
+                db.rollback()
+            finally:
+                db.close()
+        self._sessions.clear()
+
+
+def check_headers(load_type: str, fieldnames: Optional[Iterable[str]]) -> List[ErrorDetailModel]:
+    """Missing required columns, and unknown columns for models that forbid extras."""
+    Model = MODEL_MAP.get(load_type)
+    if Model is None:
+        return [ErrorDetailModel(error_message=f"Unsupported load type: {load_type}", error_type=ErrorType.CONFIGURATION)]
+    header = [f.strip() for f in (fieldnames or []) if f and f.strip()]
+    if not header:
+        return [ErrorDetailModel(row_number=1, error_message="CSV header row is missing.", error_type=ErrorType.FILE_FORMAT)]
+
+    errors = [
+        ErrorDetailModel(row_number=1, field_name=name, error_message=f"Required column '{name}' is missing.", error_type=ErrorType.FILE_FORMAT)
+        for name, field in Model.model_fields.items()
+        if field.is_required() and name not in header
+    ]
+    if Model.model_config.get("extra") == "forbid":
+        errors.extend(
+            ErrorDetailModel(row_number=1, field_name=name, error_message=f"Unknown column '{name}'.", error_type=ErrorType.FILE_FORMAT)
+            for name in header if name not in Model.model_fields
+        )
+    return errors
+
+
+# --- Referential checks ---
+
+def _existing(db: Session, column, values: Set[str], *criteria) -> Set[str]:
+    """The subset of ``values`` present in ``column`` (one IN query)."""
+    if not values:
+        return set()
+    return {value for (value,) in db.query(column).filter(column.in_(values), *criteria).all()}
+
+
+def _missing_reference_errors(
+    records: List[Dict], row_numbers: List[int], field: str, found: Set[str], label: str
+) -> List[ErrorDetailModel]:
+    errors = []
+    for row_number, record in zip(row_numbers, records):
+        value = record.get(field)
+        if value and value not in found:
+            errors.append(ErrorDetailModel(
+                row_number=row_number,
+                field_name=field,
+                error_message=f"{label} '{value}' not found.",
+                error_type=ErrorType.LOOKUP,
+                offending_value=str(value),
+            ))
+    return errors
+
+
+def _check_product_names(db_for, business_id: int, records: List[Dict], row_numbers: List[int]) -> List[ErrorDetailModel]:
+    names = {r["product_name"] for r in records if r.get("product_name")}
+    found = _existing(db_for(), ProductOrm.name, names, ProductOrm.business_details_id == business_id)
+    return _missing_reference_errors(records, row_numbers, "product_name", found, "Product")
+
+
+def _resolve_category_paths(db: Session, business_id: int, paths: Set[str]) -> Set[str]:
+    """Paths whose every segment exists under its parent (one query for all segments)."""
+    segments = {seg for path in paths for seg in path.split("/") if seg}
+    if not segments:
+        return set()
+    nodes = {
+        (parent_id, name): cat_id
+        for cat_id, parent_id, name in db.query(CategoryOrm.id, CategoryOrm.parent_id, CategoryOrm.name).filter(
+            CategoryOrm.business_details_id == business_id,
+            CategoryOrm.name.in_(segments),
+        ).all()
+    }
+    resolved = set()
+    for path in paths:
+        parent_id = None
+        for seg in (s for s in path.split("/") if s):
+            parent_id = nodes.get((parent_id, seg))
+            if parent_id is None:
+                break
+        else:
+            resolved.add(path)
+    return resolved
+
+
+def _check_products(db_for, business_id: int, records: List[Dict], row_numbers: List[int]) -> List[ErrorDetailModel]:
+    db = db_for()
+    brands = _existing(db, BrandOrm.name, {r["brand_name"] for r in records if r.get("brand_name")},
+                       BrandOrm.business_details_id == business_id)
+    paths = _resolve_category_paths(db, business_id, {r["category_path"] for r in records if r.get("category_path")})
+    policy_names = {r["return_policy"] for r in records if r.get("return_policy")}
+    policies = _existing(
+        db_for(settings.LOADTYPE_DB_MAP.get("return_policies")), ReturnPolicyOrm.policy_name, policy_names,
+        ReturnPolicyOrm.business_details_id == business_id,
+    ) if policy_names else set()
+    errors = _missing_reference_errors(records, row_numbers, "brand_name", brands, "Brand")
+    errors += _missing_reference_errors(records, row_numbers, "category_path", paths, "Category path")
+    errors += _missing_reference_errors(records, row_numbers, "return_policy", policies, "Return policy")
+    return errors
+
+
+def _check_product_items(db_for, business_id: int, records: List[Dict], row_numbers: List[int]) -> List[ErrorDetailModel]:
+    errors = _check_product_names(db_for, business_id, records, row_numbers)
+
+    # Attribute names and values are matched case-insensitively, as item_loader does.
+    parsed_rows = []
+    for row_number, record in zip(row_numbers, records):
+        try:
+            attributes = parse_attributes_string(record.get("attributes") or "")
+            values = parse_attribute_combination_string(record.get("attribute_combination") or "", attributes)
+        except ItemParserError as e:
+            errors.append(ErrorDetailModel(
+                row_number=row_number, field_name="attribute_combination", error_message=str(e), error_type=ErrorType.VALIDATION,
+            ))
+            continue
+        pairs = {(attr["name"], v["value"]) for attr, group in zip(attributes, values) for v in group}
+        parsed_rows.append((row_number, sorted(pairs)))
+
+    db = db_for()
+    attr_names = {name.lower() for _, pairs in parsed_rows for name, _ in pairs}
+    attr_ids: Dict[str, int] = {}
+    if attr_names:
+        attr_ids = {
+            name.lower(): attr_id
+            for attr_id, name in db.query(AttributeOrm.id, AttributeOrm.name).filter(
+                AttributeOrm.business_details_id == business_id,
+                func.lower(AttributeOrm.name).in_(attr_names),
+            ).all()
+        }
+    value_names = {value.lower() for _, pairs in parsed_rows for name, value in pairs if name.lower() in attr_ids}
+    known_values = set()
+    if value_names:
+        known_values = {
+            (attr_id, name.lower())
+            for attr_id, name in db.query(AttributeValueOrm.attribute_id, AttributeValueOrm.name).filter(
+                AttributeValueOrm.attribute_id.in_(set(attr_ids.values())),
+                func.lower(AttributeValueOrm.name).in_(value_names),
+            ).all()
+        }
+
+    for row_number, pairs in parsed_rows:
+        for name, value in pairs:
+            if name.lower() not in attr_ids:
+                message, offending = f"Attribute '{name}' not found.", name
+            elif (attr_ids[name.lower()], value.lower()) not in known_values:
+                message, offending = f"Attribute value '{value}' not found for attribute '{name}'.", value
+            else:
+                continue
+            errors.append(ErrorDetailModel(
+                row_number=row_number, field_name="attribute_combination", error_message=message,
+                error_type=ErrorType.LOOKUP, offending_value=offending,
+            ))
+    return errors
+
+
+REFERENCE_CHECKS = {
+    "products": _check_products,
+    "product_items": _check_product_items,
+    "product_prices": _check_product_names,
+    "meta_tags": _check_product_names,
+}
+
+
+def dry_run_csv(
+    business_id: int,
+    load_type: str,
+    csv_file: TextIO,
+    session_id: str,
+    chunk_size: Optional[int] = None,
+    session_factory: Callable[..., Session] = get_session,
+) -> DryRunReport:
+    """
+    Check an upload without loading it. The file is read in chunks of
+    CSV_CHUNK_SIZE rows, except for WHOLE_FILE_LOAD_TYPES, which are validated
+    in one piece as a real load does; errors carry CSV line numbers as in a
+    real load.
+    """
+    # islice(reader, None) takes the rest of the file.
+    chunk_size = None if load_type in WHOLE_FILE_LOAD_TYPES else chunk_size or settings.CSV_CHUNK_SIZE
+    reader = csv.DictReader(csv_file)
+    report = DryRunReport(errors=check_headers(load_type, reader.fieldnames))
+    if report.errors:
+        return report
+
+    check_references = REFERENCE_CHECKS.get(load_type)
+    db_for = ReadOnlySessions(business_id, session_factory)
+    try:
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                break
+            rows_before = report.record_count
+            row_errors, validated = validate_csv(load_type, chunk, session_id)
+            invalid_rows = {err.get("row") for err in row_errors}
+            row_numbers = [rows_before + i + 2 for i in range(len(chunk)) if (i + 1) not in invalid_rows]
+            report.errors.extend(validation_errors_to_details(row_errors, rows_before))
+            if check_references and validated:
+                report.errors.extend(check_references(db_for, business_id, validated, row_numbers))
+            report.record_count += len(chunk)
+    finally:
+        db_for.close()
+
+    report.errors.sort(key=lambda e: (e.row_number is None, e.row_number or 0))
+    logger.info("Dry run of %s for business %s: %d rows, %d errors", load_type, business_id, report.record_count, report.error_count)
+    return report
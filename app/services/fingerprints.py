@@ -0,0 +1,178 @@
+"""
+Row fingerprints for delta uploads.
+
+For every row a load writes successfully, row_fingerprints keeps a hash of the
+validated (normalized) row under its natural key, per business and load type.
+A delta upload compares each incoming row with the stored hash and skips the
+unchanged ones before they reach a loader, so DB work follows the real churn
+rather than the file size. Delta loads refresh the fingerprints of the rows they
+write. A full (non-delta) load does not pay for hashing and upserting every row:
+it only forgets the fingerprints of the keys it loads (forget_fingerprints), so
+the store never vouches for a row the full load may have changed. With
+settings.DELTA_FINGERPRINT_FULL_LOADS, full loads refresh fingerprints too.
+
+Rows without a natural key, and keys repeated within a batch, are always loaded
+and have their fingerprint dropped: which of the repeated rows won is not
+known, so none of them may be skipped next time.
+"""
+import hashlib
+import json
+import logging
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import delete, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.db.models import RowFingerprintOrm
+
+logger = logging.getLogger(__name__)
+
+# Bump to invalidate every stored fingerprint, e.g. when a loader starts writing
+# something new from the same row.
+FINGERPRINT_VERSION = 1
+
+# CSV columns identifying the catalog entity a row writes, per load type.
+NATURAL_KEYS = {
+    "brands": ("name",),
+    "attributes": ("attribute_name",),
+    "return_policies": ("policy_name",),
+    "categories": ("category_path",),
+    "products": ("product_name",),
+    # One row carries all SKUs of a product; its attribute list is the SKU signature.
+    "product_items": ("product_name", "attributes"),
+    "product_prices": ("product_name",),
+    "meta_tags": ("product_name",),
+}
+
+_KEY_SEPARATOR = "\x1f"
+
+
+def natural_key(load_type: str, record: Dict[str, Any]) -> Optional[str]:
+    """The row's natural key, or None if the load type has none or a key column is blank."""
+    fields = NATURAL_KEYS.get(load_type)
+    if not fields:
+        return None
+    values = [record.get(field) for field in fields]
+    if any(value is None or str(value).strip() == "" for value in values):
+        return None
+    return _KEY_SEPARATOR.join(str(value) for value in values)
+
+
+def row_fingerprint(record: Dict[str, Any]) -> str:
+    payload = json.dumps([FINGERPRINT_VERSION, record], sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class DeltaBatch:
+    """The rows of one batch that still need loading, and what to record once they are loaded."""
+
+    def __init__(self):
+        self.records: List[Dict[str, Any]] = []
+        self.row_numbers: List[int] = []
+        self.unchanged = 0
+        self._pending: Dict[int, Tuple[str, str]] = {}  # row_number -> (natural key, fingerprint)
+        self._stale_keys: Set[str] = set()
+
+    def outcome(self, row_errors: Iterable[Any]) -> Tuple[Dict[str, str], Set[str]]:
+        """
+        (fingerprints to store, keys whose fingerprint must go) after the loader
+        reported ``row_errors``. Failed rows are not fingerprinted; a batch-level
+        error (no row number) means no row of the batch can be trusted.
+        """
+        failed_rows = {e.row_number for e in row_errors}
+        if None in failed_rows:
+            return {}, self._stale_keys | {key for key, _ in self._pending.values()}
+        fingerprints = {}
+        stale_keys = set(self._stale_keys)
+        for row_number, (key, fingerprint) in self._pending.items():
+            if row_number in failed_rows:
+                stale_keys.add(key)
+            else:
+                fingerprints[key] = fingerprint
+        return fingerprints, stale_keys
+
+
+def _stored_fingerprints(db: Session, business_id: int, load_type: str, keys: Set[str]) -> Dict[str, str]:
+    if not keys:
+        return {}
+    return dict(
+        db.query(RowFingerprintOrm.natural_key, RowFingerprintOrm.fingerprint).filter(
+            RowFingerprintOrm.business_details_id == business_id,
+            RowFingerprintOrm.load_type == load_type,
+            RowFingerprintOrm.natural_key.in_(keys),
+        ).all()
+    )
+
+
+def split_unchanged(
+    db: Session,
+    business_id: int,
+    load_type: str,
+    records: List[Dict[str, Any]],
+    row_numbers: List[int],
+    skip_unchanged: bool = True,
+) -> DeltaBatch:
+    """
+    Fingerprint a batch of validated records and, with ``skip_unchanged``, drop
+    those matching their stored fingerprint (one IN query for the batch).
+    """
+    keyed = []
+    for record, row_number in zip(records, row_numbers):
+        key = natural_key(load_type, record)
+        keyed.append((record, row_number, key, row_fingerprint(record) if key else None))
+    key_counts = Counter(key for _, _, key, _ in keyed if key)
+
+    stored = (
+        _stored_fingerprints(db, business_id, load_type, {k for k, n in key_counts.items() if n == 1})
+        if skip_unchanged else {}
+    )
+    batch = DeltaBatch()
+    for record, row_number, key, fingerprint in keyed:
+        if key and key_counts[key] > 1:
+            batch._stale_keys.add(key)
+        elif key:
+            if stored.get(key) == fingerprint:
+                batch.unchanged += 1
+                continue
+            batch._pending[row_number] = (key, fingerprint)
+        batch.records.append(record)
+        batch.row_numbers.append(row_number)
+    return batch
+
+
+def save_fingerprints(
+    db: Session,
+    business_id: int,
+    load_type: str,
+    fingerprints: Dict[str, str],
+    stale_keys: Iterable[str] = (),
+) -> None:
+    """Upsert ``fingerprints`` and delete ``stale_keys`` in one statement each. Does not commit."""
+    stale_keys = set(stale_keys)
+    if stale_keys:
+        db.execute(
+            delete(RowFingerprintOrm).where(
+                RowFingerprintOrm.business_details_id == business_id,
+                RowFingerprintOrm.load_type == load_type,
+                RowFingerprintOrm.natural_key.in_(stale_keys),
+            ).execution_options(synchronize_session=False)
+        )
+    if not fingerprints:
+        return
+    stmt = pg_insert(RowFingerprintOrm).values([
+        {"business_details_id": business_id, "load_type": load_type, "natural_key": key, "fingerprint": fingerprint}
+        for key, fingerprint in fingerprints.items()
+    ])
+    db.execute(stmt.on_conflict_do_update(
+        constraint="uq_row_fingerprint_business_type_key",
+        set_={"fingerprint": stmt.excluded.fingerprint, "updated_at": func.now()},
+    ))
+
+
+def forget_fingerprints(db: Session, business_id: int, load_type: str, records: Iterable[Dict[str, Any]]) -> None:
+    """Delete the stored fingerprints of the records' natural keys in one statement. Does not commit."""
+    keys = {natural_key(load_type, record) for record in records}
+    keys.discard(None)
+    save_fingerprints(db, business_id, load_type, {}, keys)
@@ -0,0 +1,105 @@
+"""
+Batch loaders for each upload map_type, behind one calling convention.
+
+Every registered loader is called as::
+
+    loader(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult
+
+``records`` are rows already accepted by ``validate_csv`` and ``row_numbers`` gives the
+CSV line of each, so row errors point at the right line when a file arrives in chunks.
+Loaders resolve and write the whole batch set-at-a-time and never commit; the calling
+task owns the transaction. Register a new map_type with ``@register_loader("name")``.
+"""
+import logging
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from app.dataload.item_loader import load_items_to_db
+from app.dataload.meta_tags_loader import load_meta_tags_batch
+from app.dataload.product_loader import load_products_to_db
+from app.models.schemas import LoaderResult
+from app.services.db_loaders import (
+    load_attributes_batch,
+    load_brand_to_db,
+    load_categories_batch,
+    load_price_to_db,
+    load_return_policy_to_db,
+)
+
+logger = logging.getLogger(__name__)
+
+BatchLoader = Callable[[Session, int, List[Dict[str, Any]], str, int, List[int]], LoaderResult]
+
+LOADERS: Dict[str, BatchLoader] = {}
+
+
+def register_loader(map_type: str) -> Callable[[BatchLoader], BatchLoader]:
+    def decorator(loader: BatchLoader) -> BatchLoader:
+        LOADERS[map_type] = loader
+        return loader
+    return decorator
+
+
+def get_loader(map_type: str) -> Optional[BatchLoader]:
+    return LOADERS.get(map_type)
+
+
+@register_loader("brands")
+def _load_brands(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    summary = load_brand_to_db(db, business_details_id, records, session_id, None, user_id)
+    return LoaderResult(inserted=summary.get("inserted", 0), updated=summary.get("updated", 0))
+
+
+@register_loader("return_policies")
+def _load_return_policies(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    summary = load_return_policy_to_db(db, business_details_id, records, session_id, None)
+    return LoaderResult(inserted=summary.get("inserted", 0), updated=summary.get("updated", 0))
+
+
+@register_loader("product_prices")
+def _load_prices(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    summary = load_price_to_db(db, business_details_id, records, session_id, None, row_numbers)
+    return LoaderResult(
+        inserted=summary.get("inserted", 0),
+        updated=summary.get("updated", 0),
+        errors=summary.get("errors_list") or [],
+    )
+
+
+@register_loader("products")
+def _load_products(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    summary = load_products_to_db(db, business_details_id, records, session_id, None, user_id, row_numbers)
+    return LoaderResult(
+        inserted=summary.get("inserted", 0),
+        updated=summary.get("updated", 0),
+        errors=summary.get("errors_list") or [],
+        error_count=summary.get("errors", 0),
+    )
+
+
+@register_loader("product_items")
+def _load_items(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    summary = load_items_to_db(db, business_details_id, records, session_id, user_id, row_numbers)
+    # One CSV row can create many SKUs, so counts are in CSV rows, with one error per failed row.
+    error_count = summary.get("csv_rows_with_errors", 0)
+    return LoaderResult(
+        inserted=summary.get("csv_rows_processed", 0) - error_count,
+        errors=summary.get("errors_list") or [],
+        error_count=error_count,
+    )
+
+
+@register_loader("attributes")
+def _load_attributes(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    return load_attributes_batch(db, business_details_id, records, session_id, row_numbers, None, user_id)
+
+
+@register_loader("categories")
+def _load_categories(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    return load_categories_batch(db, business_details_id, records, session_id, row_numbers, None, user_id)
+
+
+@register_loader("meta_tags")
+def _load_meta_tags(db, business_details_id, records, session_id, user_id, row_numbers) -> LoaderResult:
+    return load_meta_tags_batch(db, business_details_id, records, session_id, row_numbers)
@@ -0,0 +1,258 @@
+"""
+Per-phase timing and throughput metrics for upload sessions.
+
+process_csv_task opens a LoadMetrics collector for the duration of a load. Code
+running inside it (the task itself and the loaders it calls) marks phases with
+``phase("name")``; outside a collector ``phase`` is a no-op. Every SQL statement
+sent while a collector is active is counted as one DB round trip and timed, per
+normalized statement, by app.services.query_stats; statements repeated past
+QUERY_REPEAT_THRESHOLD are listed in the summary and logged as likely N+1s.
+
+The per-session summary is stored on ``upload_sessions.metrics``. Totals across all
+sessions are accumulated in Redis so any API process or worker can render them in
+Prometheus text format (``render_prometheus``).
+"""
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+from app.services.query_stats import QueryStats, collect_query_stats
+from app.utils.redis_utils import redis_client_instance
+
+logger = logging.getLogger(__name__)
+
+METRICS_REDIS_KEY = "metrics:dataload"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current_metrics: ContextVar[Optional["LoadMetrics"]] = ContextVar("load_metrics", default=None)
+
+
+class LoadMetrics:
+    """Wall-clock/CPU time per phase, rows handled and SQL statements (QueryStats) for one load."""
+
+    def __init__(self, load_type: str):
+        self.load_type = load_type
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.rows = 0
+        self.queries = QueryStats()
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self._started: Optional[tuple] = None
+
+    def start(self) -> None:
+        self._started = (time.perf_counter(), time.process_time())
+
+    def stop(self) -> None:
+        if self._started is not None:
+            self.wall_seconds, self.cpu_seconds = self._elapsed()
+            self._started = None
+
+    def _elapsed(self) -> tuple:
+        """(wall, cpu) seconds so far, including a load that is still running."""
+        if self._started is None:
+            return self.wall_seconds, self.cpu_seconds
+        return (
+            self.wall_seconds + time.perf_counter() - self._started[0],
+            self.cpu_seconds + time.process_time() - self._started[1],
+        )
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            stats = self.phases.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "calls": 0})
+            stats["wall_seconds"] += time.perf_counter() - wall_start
+            stats["cpu_seconds"] += time.process_time() - cpu_start
+            stats["calls"] += 1
+
+    def add_rows(self, count: int) -> None:
+        self.rows += count
+
+    @property
+    def db_round_trips(self) -> int:
+        return self.queries.statements
+
+    def as_dict(self) -> Dict[str, Any]:
+        wall_seconds, cpu_seconds = self._elapsed()
+        return {
+            "load_type": self.load_type,
+            "rows": self.rows,
+            "wall_seconds": round(wall_seconds, 6),
+            "cpu_seconds": round(cpu_seconds, 6),
+            "rows_per_second": round(self.rows / wall_seconds, 2) if wall_seconds > 0 else None,
+            "db_round_trips": self.db_round_trips,
+            "db_seconds": round(self.queries.db_seconds, 6),
+            "db_copied_rows": self.queries.copied_rows,
+            "repeated_statements": self.queries.repeated(),
+            "phases": {
+                name: {
+                    "wall_seconds": round(stats["wall_seconds"], 6),
+                    "cpu_seconds": round(stats["cpu_seconds"], 6),
+                    "calls": stats["calls"],
+                }
+                for name, stats in self.phases.items()
+            },
+        }
+
+    @classmethod
+    def merged(cls, load_type: str, summaries: Iterable[Dict[str, Any]]) -> "LoadMetrics":
+        """
+        Combine as_dict() summaries of loads that ran in parallel (e.g. shards).
+        Times are summed, so wall_seconds is total worker time, not elapsed time.
+        """
+        merged = cls(load_type)
+        for summary in summaries:
+            if not summary:
+                continue
+            merged.rows += summary.get("rows", 0)
+            merged.queries.merge({
+                "statements": summary.get("db_round_trips", 0),
+                "db_seconds": summary.get("db_seconds", 0.0),
+                "copied_rows": summary.get("db_copied_rows", 0),
+                "repeated": summary.get("repeated_statements", []),
+            })
+            merged.wall_seconds += summary.get("wall_seconds", 0.0)
+            merged.cpu_seconds += summary.get("cpu_seconds", 0.0)
+            for name, stats in summary.get("phases", {}).items():
+                target = merged.phases.setdefault(name, {"wall_seconds": 0.0, "cpu_seconds": 0.0, "calls": 0})
+                for key in target:
+                    target[key] += stats.get(key, 0)
+        return merged
+
+
+@contextmanager
+def collect_load_metrics(load_type: str) -> Iterator[LoadMetrics]:
+    """Make a new LoadMetrics the active collector for the enclosed block."""
+    metrics = LoadMetrics(load_type)
+    token = _current_metrics.set(metrics)
+    metrics.start()
+    try:
+        with collect_query_stats(metrics.queries):
+            yield metrics
+    finally:
+        metrics.stop()
+        _current_metrics.reset(token)
+        for item in metrics.queries.repeated():
+            logger.warning(
+                "Possible N+1 in %s load: statement sent %d times (%.3fs): %s",
+                load_type, item["count"], item["seconds"], item["statement"][:300],
+            )
+
+
+def current_metrics() -> Optional[LoadMetrics]:
+    return _current_metrics.get()
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time the enclosed block as ``name`` on the active collector, if any."""
+    metrics = _current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    with metrics.phase(name):
+        yield
+
+
+def add_rows(count: int) -> None:
+    """Count ``count`` CSV rows on the active collector, if any."""
+    metrics = _current_metrics.get()
+    if metrics is not None:
+        metrics.add_rows(count)
+
+
+def _field(metric: str, **labels) -> str:
+    return metric + "|" + ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+
+
+def record_session_metrics(summary: Dict[str, Any], status: str, client=None) -> None:
+    """Add one finished session's summary to the cluster-wide totals in Redis."""
+    client = client if client is not None else redis_client_instance
+    if not client:
+        return
+    load_type = summary.get("load_type", "unknown")
+    try:
+        pipe = client.pipeline()
+        pipe.hincrby(METRICS_REDIS_KEY, _field("dataload_sessions_total", load_type=load_type, status=status), 1)
+        pipe.hincrby(METRICS_REDIS_KEY, _field("dataload_rows_total", load_type=load_type), summary.get("rows", 0))
+        pipe.hincrby(METRICS_REDIS_KEY, _field("dataload_db_round_trips_total", load_type=load_type), summary.get("db_round_trips", 0))
+        pipe.hincrbyfloat(METRICS_REDIS_KEY, _field("dataload_db_seconds_total", load_type=load_type), summary.get("db_seconds", 0.0))
+        pipe.hincrbyfloat(METRICS_REDIS_KEY, _field("dataload_session_seconds_total", load_type=load_type, clock="wall"), summary.get("wall_seconds", 0.0))
+        pipe.hincrbyfloat(METRICS_REDIS_KEY, _field("dataload_session_seconds_total", load_type=load_type, clock="cpu"), summary.get("cpu_seconds", 0.0))
+        for name, stats in summary.get("phases", {}).items():
+            pipe.hincrbyfloat(METRICS_REDIS_KEY, _field("dataload_phase_seconds_total", load_type=load_type, phase=name, clock="wall"), stats["wall_seconds"])
+            pipe.hincrbyfloat(METRICS_REDIS_KEY, _field("dataload_phase_seconds_total", load_type=load_type, phase=name, clock="cpu"), stats["cpu_seconds"])
+        if summary.get("rows_per_second") is not None:
+            pipe.hset(METRICS_REDIS_KEY, _field("dataload_last_rows_per_second", load_type=load_type), summary["rows_per_second"])
+        pipe.execute()
+    except Exception as e:
+        # Metrics are best-effort; never fail a load because Redis is unavailable.
+        logger.warning("Failed to record metrics for %s load: %s", load_type, e)
+
+
+_METRIC_HELP = {
+    "dataload_sessions_total": ("counter", "Upload sessions finished, by load type and final status."),
+    "dataload_rows_total": ("counter", "CSV data rows processed."),
+    "dataload_db_round_trips_total": ("counter", "SQL statements sent to the database during loads."),
+    "dataload_db_seconds_total": ("counter", "Time spent waiting on SQL statements during loads."),
+    "dataload_session_seconds_total": ("counter", "Time spent in upload processing, wall-clock or CPU."),
+    "dataload_phase_seconds_total": ("counter", "Time spent per processing phase, wall-clock or CPU. Loader phases nest inside 'load'."),
+    "dataload_last_rows_per_second": ("gauge", "Throughput of the most recent upload session per load type."),
+}
+
+
+def render_prometheus(client=None) -> str:
+    """Render the Redis totals in Prometheus text exposition format."""
+    client = client if client is not None else redis_client_instance
+    raw: Dict[str, str] = {}
+    if client:
+        try:
+            raw = client.hgetall(METRICS_REDIS_KEY) or {}
+        except Exception as e:
+            logger.warning("Failed to read metrics from Redis: %s", e)
+
+    samples: Dict[str, list] = {}
+    for field, value in raw.items():
+        metric, _, label_str = field.partition("|")
+        labels = ",".join(
+            f'{k}="{v}"' for k, v in (pair.split("=", 1) for pair in label_str.split(",") if pair)
+        )
+        samples.setdefault(metric, []).append((labels, value))
+
+    lines = []
+    for metric, (metric_type, help_text) in _METRIC_HELP.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {metric_type}")
+        for labels, value in sorted(samples.get(metric, [])):
+            lines.append(f"{metric}{{{labels}}} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", PROMETHEUS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("metrics endpoint: " + format, *args)
+
+
+def start_metrics_http_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` from a daemon thread (used by Celery workers)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    logger.info("Serving Prometheus metrics on %s:%d/metrics", host, port)
+    return server
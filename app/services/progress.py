@@ -0,0 +1,187 @@
+import json
+import time
+import logging
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.db.connection import get_session
+from app.db.models import UploadSessionOrm
+from app.models import UploadJobStatus
+from app.utils.redis_utils import redis_client_instance
+from app.services.metrics import LoadMetrics, record_session_metrics
+from app.services.session_errors import write_session_errors
+
+logger = logging.getLogger(__name__)
+
+
+def get_progress_key(session_id: str) -> str:
+    return f"progress:session:{session_id}"
+
+
+def _normalize_details(details) -> Optional[str]:
+    if details is None:
+        return None
+    if isinstance(details, str):
+        return details
+    return json.dumps([d.model_dump() if hasattr(d, "model_dump") else d for d in details])
+
+
+def write_session_row(db, session_id: str, values: Dict[str, Any]) -> int:
+    """
+    Apply ``values`` to the upload_sessions row with a single
+    ``UPDATE ... WHERE session_id = :id`` (no SELECT first). Does not commit.
+    Returns the number of rows matched.
+    """
+    values = dict(values)
+    if isinstance(values.get("status"), UploadJobStatus):
+        values["status"] = values["status"].value
+    if "details" in values:
+        values["details"] = _normalize_details(values["details"])
+    values["updated_at"] = datetime.utcnow()
+    result = db.execute(
+        update(UploadSessionOrm)
+        .where(UploadSessionOrm.session_id == session_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def read_progress(session_id: str, client=None) -> Optional[Dict[str, str]]:
+    """Latest live progress published for ``session_id``, or None if Redis has none."""
+    client = client if client is not None else redis_client_instance
+    if not client:
+        return None
+    try:
+        data = client.hgetall(get_progress_key(session_id))
+    except Exception as e:
+        logger.warning("Redis progress read failed for session %s: %s", session_id, e)
+        return None
+    return data or None
+
+
+class SessionProgressReporter:
+    """
+    Write-behind status channel for one upload session.
+
+    publish() only updates the Redis hash/channel that pollers read.
+    update() also stages the values for Postgres, but writes them at most once every
+    PROGRESS_FLUSH_INTERVAL_SECONDS. finish() is the authoritative terminal write
+    and always reaches Postgres, with any errors it is given appended to
+    upload_session_errors in the same transaction; when a LoadMetrics collector is
+    attached, its summary is stored with it and added to the cluster-wide metrics.
+    Database writes use a short-lived session of their own, so they never commit
+    (or wait on) the loader's data transaction.
+    """
+
+    def __init__(
+        self,
+        business_id,
+        session_id: str,
+        redis_client=None,
+        min_interval: Optional[float] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        metrics: Optional[LoadMetrics] = None,
+    ):
+        self.business_id = int(business_id)
+        self.session_id = session_id
+        self.redis_client = redis_client if redis_client is not None else redis_client_instance
+        self.min_interval = settings.PROGRESS_FLUSH_INTERVAL_SECONDS if min_interval is None else min_interval
+        self.session_factory = session_factory or (lambda: get_session(business_id=self.business_id))
+        self.clock = clock
+        self.metrics = metrics
+        self._pending: Dict[str, Any] = {}
+        self._last_flush: Optional[float] = None
+
+    def publish(self, status: Optional[UploadJobStatus] = None, **counters) -> None:
+        """Push live progress to Redis only."""
+        if not self.redis_client:
+            return
+        fields = {k: str(v) for k, v in counters.items() if v is not None}
+        if status is not None:
+            fields["status"] = status.value
+        fields["business_details_id"] = str(self.business_id)
+        fields["updated_at"] = datetime.utcnow().isoformat()
+        key = get_progress_key(self.session_id)
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.hset(key, mapping=fields)
+            pipe.expire(key, settings.REDIS_SESSION_TTL_SECONDS)
+            pipe.publish(key, json.dumps(fields))
+            pipe.execute()
+        except Exception as e:
+            # Live progress is best-effort; Postgres stays the source of truth.
+            logger.warning("Redis progress publish failed for session %s: %s", self.session_id, e)
+
+    def update(
+        self,
+        status: Optional[UploadJobStatus] = None,
+        record_count: Optional[int] = None,
+        error_count: Optional[int] = None,
+    ) -> None:
+        """Publish progress and stage it for a coalesced Postgres write."""
+        self.publish(status, record_count=record_count, error_count=error_count)
+        if status is not None:
+            self._pending["status"] = status
+        if record_count is not None:
+            self._pending["record_count"] = record_count
+        if error_count is not None:
+            self._pending["error_count"] = error_count
+        now = self.clock()
+        if self._last_flush is None or now - self._last_flush >= self.min_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write any staged values to Postgres now."""
+        if not self._pending:
+            return
+        values, self._pending = self._pending, {}
+        self._write(values)
+        self._last_flush = self.clock()
+
+    def finish(
+        self,
+        status: UploadJobStatus,
+        details=None,
+        record_count: Optional[int] = None,
+        error_count: Optional[int] = None,
+        **extra_columns,
+    ) -> None:
+        """
+        Authoritative terminal write: folds in anything still staged and commits it.
+        ``details`` are errors not yet written to upload_session_errors.
+        """
+        values = self._pending
+        self._pending = {}
+        values["status"] = status
+        if record_count is not None:
+            values["record_count"] = record_count
+        if error_count is not None:
+            values["error_count"] = error_count
+        values.update(extra_columns)
+        metrics_summary = self.metrics.as_dict() if self.metrics is not None else None
+        if metrics_summary is not None:
+            values["metrics"] = json.dumps(metrics_summary)
+        self._write(values, errors=details)
+        self._last_flush = self.clock()
+        if metrics_summary is not None:
+            record_session_metrics(metrics_summary, status.value, client=self.redis_client)
+        self.publish(status, record_count=values.get("record_count"), error_count=values.get("error_count"))
+
+    def _write(self, values: Dict[str, Any], errors=None) -> None:
+        db = self.session_factory()
+        try:
+            if errors:
+                write_session_errors(db, self.session_id, errors)
+            if not write_session_row(db, self.session_id, values):
+                logger.error("Session %s not found for status update", self.session_id)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
@@ -0,0 +1,146 @@
+"""
+SQL statement counts and DB time, grouped by normalized statement text.
+
+While a ``collect_query_stats`` block is active, every statement any engine
+sends is recorded on its QueryStats: how many were sent, the time spent in the
+driver, and the same per statement with literals and bind parameters masked, so
+``WHERE id = 1`` and ``WHERE id = 2`` count as one statement. A statement sent
+more than QUERY_REPEAT_THRESHOLD times in one task is the signature of an N+1
+pattern (a lookup per row or per path segment instead of one per batch) and is
+listed under ``repeated``. Blocks nest: an outer collector (e.g. the
+``query_stats`` test fixture) also sees the statements of inner ones.
+
+Statements sent on the raw DBAPI connection bypass SQLAlchemy's cursor events;
+code that does so (``copy_rows``' COPY) reports them with ``record_statement``,
+along with the rows they copied.
+"""
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+_active: ContextVar[Tuple["QueryStats", ...]] = ContextVar("query_stats", default=())
+_listeners_installed = False
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_BIND_PARAMETER = re.compile(r"%\(\w+\)s|%s|\$\d+|(?<!:):\w+|\?")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_statement(statement: str) -> str:
+    """``statement`` with literals and bind parameters as ``?`` and IN lists as one ``?``."""
+    statement = _STRING_LITERAL.sub("?", statement)
+    statement = _BIND_PARAMETER.sub("?", statement)
+    statement = _NUMBER.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("?", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+class QueryStats:
+    """Statement count and driver time, in total and per normalized statement."""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.copied_rows = 0  # rows sent by COPY statements
+        self.by_statement: Dict[str, List[float]] = {}  # normalized text -> [count, seconds]
+
+    def record(self, statement: str, seconds: float, copied_rows: int = 0) -> None:
+        self.statements += 1
+        self.db_seconds += seconds
+        self.copied_rows += copied_rows
+        stats = self.by_statement.setdefault(normalize_statement(statement), [0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+
+    def count(self, fragment: str = "") -> int:
+        """Statements sent whose normalized text contains ``fragment`` (all of them by default)."""
+        if not fragment:
+            return self.statements
+        return sum(int(count) for text, (count, _) in self.by_statement.items() if fragment in text)
+
+    def repeated(self, threshold: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Statements sent more than ``threshold`` times (QUERY_REPEAT_THRESHOLD), most frequent first."""
+        threshold = settings.QUERY_REPEAT_THRESHOLD if threshold is None else threshold
+        return [
+            {"statement": text, "count": int(count), "seconds": round(seconds, 6)}
+            for text, (count, seconds) in sorted(self.by_statement.items(), key=lambda item: -item[1][0])
+            if count > threshold
+        ]
+
+    def merge(self, summary: Optional[Dict[str, Any]]) -> None:
+        """Add an as_dict() summary (e.g. from a shard); only its repeated statements are itemized."""
+        if not summary:
+            return
+        self.statements += summary.get("statements", 0)
+        self.db_seconds += summary.get("db_seconds", 0.0)
+        self.copied_rows += summary.get("copied_rows", 0)
+        for item in summary.get("repeated", []):
+            stats = self.by_statement.setdefault(item["statement"], [0, 0.0])
+            stats[0] += item["count"]
+            stats[1] += item["seconds"]
+
+    def as_dict(self, threshold: Optional[int] = None) -> Dict[str, Any]:
+        return {
+            "statements": self.statements,
+            "db_seconds": round(self.db_seconds, 6),
+            "copied_rows": self.copied_rows,
+            "repeated": self.repeated(threshold),
+        }
+
+
+def record_statement(statement: str, seconds: float, copied_rows: int = 0) -> None:
+    """Record a statement sent without SQLAlchemy's cursor events on the active collectors."""
+    for stats in _active.get():
+        stats.record(statement, seconds, copied_rows)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active.get():
+        conn.info.setdefault("query_stats_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    collectors = _active.get()
+    started = conn.info.get("query_stats_started")
+    if not collectors or not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    for stats in collectors:
+        stats.record(statement, seconds)
+
+
+def _handle_error(exception_context):
+    """A failed statement was still sent: record it like a completed one."""
+    conn = exception_context.connection
+    if conn is not None and exception_context.cursor is not None:
+        _after_cursor_execute(conn, exception_context.cursor, exception_context.statement, None, None, False)
+
+
+def _install_listeners() -> None:
+    global _listeners_installed
+    if not _listeners_installed:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(Engine, "handle_error", _handle_error)
+        _listeners_installed = True
+
+
+@contextmanager
+def collect_query_stats(stats: Optional[QueryStats] = None) -> Iterator[QueryStats]:
+    """Record the statements sent in the enclosed block on ``stats`` (a new QueryStats by default)."""
+    _install_listeners()
+    stats = stats if stats is not None else QueryStats()
+    token = _active.set(_active.get() + (stats,))
+    try:
+        yield stats
+    finally:
+        _active.reset(token)
@@ -0,0 +1,150 @@
+"""
+Retention for upload sessions.
+
+Terminal sessions not updated for SESSION_RETENTION_DAYS are either moved to
+upload_sessions_archive (mode "archive": summary columns plus the full row and
+its errors as one zlib-compressed JSON payload) or trimmed in place (mode
+"trim": details cleared, upload_session_errors rows deleted and trimmed_at
+set, the summary row kept; trimmed sessions are not claimed again). Sessions are walked oldest first on (updated_at, id) in batches of
+SESSION_RETENTION_BATCH_SIZE, one short transaction each, and rows another
+transaction has locked are skipped until the next run, so the job never waits
+on or holds long locks. A run stops after SESSION_RETENTION_MAX_BATCHES.
+"""
+import json
+import logging
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import UploadSessionArchiveOrm, UploadSessionErrorOrm, UploadSessionOrm
+from app.models import UploadJobStatus
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = [status.value for status in UploadJobStatus if status.is_terminal()]
+ARCHIVE_SUMMARY_COLUMNS = (
+    "id", "session_id", "business_details_id", "load_type", "status",
+    "record_count", "error_count", "created_at", "updated_at",
+)
+
+
+def archive_payload(session: Dict[str, Any], errors: List[Dict[str, Any]]) -> bytes:
+    return zlib.compress(json.dumps({"session": session, "errors": errors}, default=str).encode("utf-8"))
+
+
+def read_archive_payload(payload: bytes) -> Dict[str, Any]:
+    """The {"session": ..., "errors": [...]} an archived session was stored with."""
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+def _claim_batch(
+    db: Session,
+    cutoff: datetime,
+    after: Optional[Tuple[datetime, int]],
+    batch_size: int,
+    untrimmed_only: bool = False,
+) -> List[Dict[str, Any]]:
+    """The next sessions past retention, oldest first, locked; rows locked elsewhere are skipped."""
+    stmt = select(UploadSessionOrm.__table__).where(
+        UploadSessionOrm.updated_at < cutoff,
+        UploadSessionOrm.status.in_(TERMINAL_STATUSES),
+    )
+    if untrimmed_only:
+        stmt = stmt.where(UploadSessionOrm.trimmed_at.is_(None))
+    if after is not None:
+        stmt = stmt.where(tuple_(UploadSessionOrm.updated_at, UploadSessionOrm.id) > tuple_(*after))
+    stmt = (
+        stmt.order_by(UploadSessionOrm.updated_at, UploadSessionOrm.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return [dict(row) for row in db.execute(stmt).mappings()]
+
+
+def _session_errors(db: Session, session_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    columns = [c for c in UploadSessionErrorOrm.__table__.columns if c.key != "session_id"]
+    stmt = (
+        select(UploadSessionErrorOrm.session_id, *columns)
+        .where(UploadSessionErrorOrm.session_id.in_(session_ids))
+        .order_by(UploadSessionErrorOrm.session_id, UploadSessionErrorOrm.id)
+    )
+    errors: Dict[str, List[Dict[str, Any]]] = {}
+    for row in db.execute(stmt).mappings():
+        row = dict(row)
+        errors.setdefault(row.pop("session_id"), []).append(row)
+    return errors
+
+
+def _archive(db: Session, sessions: List[Dict[str, Any]]) -> None:
+    session_ids = [s["session_id"] for s in sessions]
+    errors = _session_errors(db, session_ids)
+    db.execute(insert(UploadSessionArchiveOrm), [
+        {
+            **{column: s[column] for column in ARCHIVE_SUMMARY_COLUMNS},
+            "payload": archive_payload(s, errors.get(s["session_id"], [])),
+        }
+        for s in sessions
+    ])
+    db.execute(delete(UploadSessionErrorOrm).where(UploadSessionErrorOrm.session_id.in_(session_ids)))
+    db.execute(delete(UploadSessionOrm).where(UploadSessionOrm.id.in_([s["id"] for s in sessions])))
+
+
+def _trim(db: Session, sessions: List[Dict[str, Any]]) -> None:
+    session_ids = [s["session_id"] for s in sessions]
+    db.execute(delete(UploadSessionErrorOrm).where(UploadSessionErrorOrm.session_id.in_(session_ids)))
+    db.execute(
+        update(UploadSessionOrm)
+        .where(UploadSessionOrm.id.in_([s["id"] for s in sessions]))
+        # Keep updated_at: it records when the load finished, not when it was trimmed.
+        .values(details=None, trimmed_at=func.now(), updated_at=UploadSessionOrm.updated_at)
+    )
+
+
+def apply_retention(
+    session_factory: Callable[[], Session],
+    now: Optional[datetime] = None,
+    days: Optional[int] = None,
+    mode: Optional[str] = None,
+    batch_size: Optional[int] = None,
+    max_batches: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Archive or trim terminal sessions older than ``days`` (settings by default),
+    committing per batch. Returns {"mode", "sessions", "batches"}.
+    """
+    days = settings.SESSION_RETENTION_DAYS if days is None else days
+    mode = mode or settings.SESSION_RETENTION_MODE
+    batch_size = batch_size or settings.SESSION_RETENTION_BATCH_SIZE
+    max_batches = max_batches or settings.SESSION_RETENTION_MAX_BATCHES
+    if mode not in ("archive", "trim"):
+        raise ValueError(f"Unknown session retention mode: {mode}")
+    summary = {"mode": mode, "sessions": 0, "batches": 0}
+    if days <= 0:
+        return summary
+
+    cutoff = (now or datetime.utcnow()) - timedelta(days=days)
+    retain = _archive if mode == "archive" else _trim
+    after = None
+    db = session_factory()
+    try:
+        while summary["batches"] < max_batches:
+            sessions = _claim_batch(db, cutoff, after, batch_size, untrimmed_only=mode == "trim")
+            if not sessions:
+                break
+            retain(db, sessions)
+            db.commit()
+            summary["sessions"] += len(sessions)
+            summary["batches"] += 1
+            after = (sessions[-1]["updated_at"], sessions[-1]["id"])
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    logger.info("Session retention (%s, older than %s): %d sessions in %d batches",
+                mode, cutoff, summary["sessions"], summary["batches"])
+    return summary
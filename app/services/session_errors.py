@@ -0,0 +1,93 @@
+"""
+Row errors of upload sessions, stored in upload_session_errors.
+
+Errors are appended in multi-row INSERT batches as a load produces them, in the
+caller's transaction, so a chunk's errors commit together with the chunk. The
+upload_sessions row only carries error_count; the errors themselves are read
+back a page at a time (GET /sessions/{id}/errors).
+"""
+import itertools
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import Select, delete, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.db.models import UploadSessionErrorOrm
+from app.models.schemas import ErrorDetailModel, ErrorType
+
+logger = logging.getLogger(__name__)
+
+
+def _as_error_detail(error: Any) -> ErrorDetailModel:
+    if isinstance(error, ErrorDetailModel):
+        return error
+    if "error_message" in error:
+        return ErrorDetailModel(**error)
+    # Ad-hoc failure entries: {"row": ..., "field": ..., "error": ...}
+    return ErrorDetailModel(row_number=error.get("row"), field_name=error.get("field"), error_message=str(error.get("error")))
+
+
+def error_rows(session_id: str, errors: Iterable[Any]) -> List[Dict[str, Any]]:
+    """Column dicts for upload_session_errors from ErrorDetailModels or error dicts."""
+    rows = []
+    for error in errors:
+        detail = _as_error_detail(error)
+        error_type = detail.error_type
+        rows.append({
+            "session_id": session_id,
+            "row_number": detail.row_number,
+            "field_name": detail.field_name,
+            "error_message": detail.error_message,
+            "error_type": error_type.value if isinstance(error_type, ErrorType) else error_type,
+            "offending_value": detail.offending_value,
+        })
+    return rows
+
+
+def write_session_errors(db: Session, session_id: str, errors: Iterable[Any], batch_size: Optional[int] = None) -> int:
+    """
+    Append ``errors`` to the session with one executemany INSERT per batch.
+    Does not commit. Returns the number of rows written.
+    """
+    batch_size = batch_size or settings.SESSION_ERRORS_INSERT_BATCH_SIZE
+    rows = iter(error_rows(session_id, errors))
+    written = 0
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return written
+        db.execute(insert(UploadSessionErrorOrm), batch)
+        written += len(batch)
+
+
+def delete_session_errors(db: Session, session_id: str, error_type: Optional[ErrorType] = None) -> int:
+    """Remove the session's errors (only those of ``error_type`` if given). Does not commit."""
+    stmt = delete(UploadSessionErrorOrm).where(UploadSessionErrorOrm.session_id == session_id)
+    if error_type is not None:
+        stmt = stmt.where(UploadSessionErrorOrm.error_type == error_type.value)
+    return db.execute(stmt.execution_options(synchronize_session=False)).rowcount
+
+
+def session_errors_queries(session_id: str, skip: int, limit: int) -> Tuple[Select, Select]:
+    """
+    Statements for one page of the session's errors in CSV line order (file-level
+    errors last) and for their total, usable from sync and async sessions alike.
+    """
+    belongs = UploadSessionErrorOrm.session_id == session_id
+    page = (
+        select(UploadSessionErrorOrm)
+        .where(belongs)
+        .order_by(UploadSessionErrorOrm.row_number, UploadSessionErrorOrm.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    total = select(func.count()).select_from(UploadSessionErrorOrm).where(belongs)
+    return page, total
+
+
+def list_session_errors(db: Session, session_id: str, skip: int, limit: int) -> Tuple[List[UploadSessionErrorOrm], int]:
+    """One page of the session's errors, and the total."""
+    page, total = session_errors_queries(session_id, skip, limit)
+    return db.execute(page).scalars().all(), db.execute(total).scalar_one()
@@ -25,6 +25,10 @@ MODEL_MAP = {
     "categories":       CategoryCsvModel
 }
 
+# Load types whose validation needs the whole file at once (category hierarchy,
+# file-level attribute uniqueness). These are never validated chunk by chunk.
+WHOLE_FILE_LOAD_TYPES = {"categories", "attributes"}
+
 
 def generate_slug(input_string: str) -> str:
     slug = input_string.lower().strip()
@@ -115,6 +119,24 @@ def validate_csv(load_type: str, records: List[Dict], session_id: str) -> (List[
     return errors, valid_rows
 
 
+def validation_errors_to_details(errors: List[Dict], rows_before: int = 0) -> List[ErrorDetailModel]:
+    """
+    Convert validate_csv error dicts into ErrorDetailModels numbered by CSV line,
+    for a batch whose first row is data row ``rows_before + 1``.
+    """
+    details = []
+    for err in errors:
+        row = err.get("row")
+        details.append(ErrorDetailModel(
+            row_number=rows_before + row + 1 if row is not None else None,
+            field_name=err.get("field"),
+            error_message=str(err.get("error")),
+            error_type=ErrorType.VALIDATION,
+            offending_value=str(err["value"]) if err.get("value") is not None else None,
+        ))
+    return details
+
+
 def check_file_uniqueness(records: List[Dict], unique_key: str) -> List[Dict]:
     errors = []
     key_counts = defaultdict(list)
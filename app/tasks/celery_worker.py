@@ -1,14 +1,39 @@
 # app/tasks/celery_worker.py  (or whatever module you use to start Celery)
 from celery import Celery
+from celery.signals import worker_process_init, worker_ready
 from app.core.config import settings
+from app.db.connection import dispose_engines
+from app.services.metrics import start_metrics_http_server
 
 celery_app = Celery(
     'dataload_service',
     broker=str(settings.CELERY_BROKER_URL),
     backend=str(settings.CELERY_RESULT_BACKEND_URL),
-    include=['app.tasks.load_jobs']   # make sure your tasks module is imported
+    include=['app.tasks.load_jobs', 'app.tasks.maintenance']   # make sure your tasks module is imported
 )
 
 # now load any additional Celery config (if you still need it)
 celery_app.config_from_object('celeryconfig', namespace='CELERY')
 celery_app.autodiscover_tasks(['app.tasks'])
+
+# Periodic jobs; run a beat process (`celery ... beat`) next to the workers.
+if settings.SESSION_RETENTION_DAYS > 0:
+    celery_app.conf.beat_schedule = {
+        "apply-session-retention": {
+            "task": "app.tasks.maintenance.apply_session_retention",
+            "schedule": settings.SESSION_RETENTION_INTERVAL_SECONDS,
+        },
+    }
+
+
+@worker_ready.connect
+def start_metrics_server(**kwargs):
+    """Serve /metrics from the worker too, so it can be scraped without the API."""
+    if settings.WORKER_METRICS_PORT:
+        start_metrics_http_server(settings.WORKER_METRICS_PORT)
+
+
+@worker_process_init.connect
+def reset_db_pools(**kwargs):
+    """Prefork children must not share the parent's pooled DB connections."""
+    dispose_engines()
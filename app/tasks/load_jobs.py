@@ -1,8 +1,9 @@
 import os
+import itertools
 import logging
 import json
-from datetime import datetime
-from celery import shared_task
+from celery import shared_task, chord
+from sqlalchemy import delete, select
 from sqlalchemy.exc import (
     OperationalError as SQLAlchemyOperationalError,
     TimeoutError as SQLAlchemyTimeoutError,
@@ -16,27 +17,33 @@ from redis.exceptions import (
     TimeoutError as RedisTimeoutError,
     BusyLoadingError as RedisBusyLoadingError,
 )
-from app.dataload.product_loader import load_products_to_db
 from app.core.config import settings
 from app.db.connection import get_session
-from app.db.models import UploadSessionOrm
+from app.db.models import UploadSessionOrm, UploadSessionShardOrm
 from app.utils.redis_utils import get_from_id_map, redis_client_instance
-from app.services.validator import validate_csv
-from app.services.db_loaders import (
-    load_brand_to_db,
-    load_attribute_to_db,
-    load_return_policy_to_db,
-    load_category_to_db,
-    load_price_to_db,
+from app.services.validator import WHOLE_FILE_LOAD_TYPES, validate_csv, validation_errors_to_details
+from app.services.progress import SessionProgressReporter, write_session_row
+from app.services.metrics import LoadMetrics, collect_load_metrics, current_metrics, phase, add_rows
+from app.services.loader_registry import get_loader
+from app.services.dry_run import DryRunReport, dry_run_csv
+from app.services.session_errors import delete_session_errors, write_session_errors
+from app.services.fingerprints import forget_fingerprints, save_fingerprints, split_unchanged
+from app.services.bundles import (
+    bundle_totals,
+    claim_pending_member,
+    load_bundle_members,
+    plan_bundle_step,
+    rollup_status,
+    write_bundle_progress,
 )
-from app.dataload.item_loader import load_items_to_db # Added for item/variant loading
-# from app.dataload.product_loader import load_product_record_to_db # Unused and causes ImportError
-from app.dataload.meta_tags_loader import load_meta_tags_from_csv
 from app.models import UploadJobStatus, ErrorDetailModel, ErrorType
 import csv
 from app.dataload.models.product_csv import ProductCsvModel
 logger = logging.getLogger(__name__)
 STORAGE_ROOT = settings.LOCAL_STORAGE_PATH
+# Every read of an uploaded CSV (loads, shard planning, dry runs) decodes it the same
+# way as the upload route's header check: UTF-8, dropping a BOM (Excel's "CSV UTF-8").
+CSV_ENCODING = "utf-8-sig"
 
 RETRYABLE_EXCEPTIONS = (
     SQLAlchemyOperationalError,
@@ -49,34 +56,145 @@ RETRYABLE_EXCEPTIONS = (
 )
 COMMON_RETRY_KWARGS = {"max_retries": 3, "default_retry_delay": 60}
 
+# Column whose consecutive equal values must land in the same shard when a file is
+# sharded, so rows of one product are never loaded by two workers at once.
+SHARD_KEYS = {
+    "products": "product_name",
+    "product_items": "product_name",
+    "product_prices": "product_name",
+    "meta_tags": "product_name",
+}
 
-def _update_session_status(
-    db,
+
+def _dispatch_to_loader(
+    data_db,
+    map_type: str,
+    business_id: str,
+    validated: list,
     session_id: str,
-    status: UploadJobStatus,
-    details=None,
-    record_count=None,
-    error_count=None,
+    user_id: int,
+    row_numbers: list | None = None,
 ):
-    sess = db.query(UploadSessionOrm).filter_by(session_id=session_id).first()
-    if not sess:
-        logger.error("Session %s not found for status update", session_id)
-        return
-    sess.status = status.value
-    sess.updated_at = datetime.utcnow()
+    """
+    Hand a list of validated records to the batch loader registered for ``map_type``
+    (see app.services.loader_registry).
+    ``row_numbers`` gives the CSV line number of each record (defaults to 2, 3, ...)
+    so per-record errors point at the right line when records arrive in chunks.
+    Returns (counts, row_errors, error_count) where counts holds "inserted" and "updated".
+    """
+    if row_numbers is None:
+        row_numbers = list(range(2, len(validated) + 2))
+
+    loader = get_loader(map_type)
+    if loader is None:
+        logger.warning(f"No batch loader registered for map_type '{map_type}'.")
+        return {"inserted": 0, "updated": 0}, [ErrorDetailModel(
+            row_number=None,
+            error_message=f"Unhandled map_type: {map_type}",
+            error_type=ErrorType.UNEXPECTED_ROW_ERROR,
+        )], 1
+
+    result = loader(data_db, int(business_id), validated, session_id, user_id, row_numbers)
+    return {"inserted": result.inserted, "updated": result.updated}, list(result.errors), result.failed_rows
+
+
+def _load_batch(
+    data_db,
+    meta_db,
+    map_type: str,
+    business_id: str,
+    validated: list,
+    row_numbers: list,
+    session_id: str,
+    user_id: int,
+    delta: bool,
+):
+    """
+    Load one batch of validated records. With ``delta``, rows unchanged since their
+    last successful load are skipped (see app.services.fingerprints) and the
+    fingerprints of the rows loaded are staged on meta_db, to commit after the data.
+    Without it, only the stored fingerprints of the batch's keys are dropped, unless
+    settings.DELTA_FINGERPRINT_FULL_LOADS asks for them to be refreshed as well.
+    Returns (counts, row_errors, error_count) like _dispatch_to_loader, with the
+    skipped rows in counts["unchanged"].
+    """
+    if not (delta or settings.DELTA_FINGERPRINT_FULL_LOADS):
+        counts, row_errors, error_count = _dispatch_to_loader(
+            data_db, map_type, business_id, validated, session_id, user_id, row_numbers
+        )
+        with phase("delta"):
+            forget_fingerprints(meta_db, int(business_id), map_type, validated)
+        counts["unchanged"] = 0
+        return counts, row_errors, error_count
+
+    with phase("delta"):
+        batch = split_unchanged(meta_db, int(business_id), map_type, validated, row_numbers, skip_unchanged=delta)
+    counts, row_errors, error_count = {"inserted": 0, "updated": 0}, [], 0
+    if batch.records:
+        counts, row_errors, error_count = _dispatch_to_loader(
+            data_db, map_type, business_id, batch.records, session_id, user_id, batch.row_numbers
+        )
+    with phase("delta"):
+        fingerprints, stale_keys = batch.outcome(row_errors)
+        save_fingerprints(meta_db, int(business_id), map_type, fingerprints, stale_keys)
+    counts["unchanged"] = batch.unchanged
+    return counts, row_errors, error_count
+
+
+def _iter_csv_chunks(abs_path: str, chunk_size: int, skip_rows: int = 0, max_rows: int | None = None):
+    """
+    Yield lists of at most ``chunk_size`` raw CSV rows from ``abs_path``,
+    so only one chunk of the file is held in memory at a time.
+    The first ``skip_rows`` data rows are read past without being yielded, and at
+    most ``max_rows`` rows are yielded in total.
+    """
+    with open(abs_path, newline="", encoding=CSV_ENCODING) as f:
+        reader = csv.DictReader(f)
+        if skip_rows:
+            for _ in itertools.islice(reader, skip_rows):
+                pass
+        if max_rows is not None:
+            reader = itertools.islice(reader, max_rows)
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+
+def _close_sessions(meta_db, data_db):
+    meta_db.close()
+    if data_db is not meta_db:
+        data_db.close()
 
-    if details is not None:
-        normalized = []
-        for d in details:
-            normalized.append(d.model_dump() if hasattr(d, "model_dump") else d)
-        sess.details = json.dumps(normalized)
 
-    if record_count is not None:
-        sess.record_count = record_count
-    if error_count is not None:
-        sess.error_count = error_count
+def _rollback_sessions(meta_db, data_db):
+    try:
+        meta_db.rollback()
+    except Exception: pass
+    if data_db is not meta_db:
+        try:
+            data_db.rollback()
+        except Exception: pass
+
 
-    db.commit()
+def _fail_session(meta_db, data_db, progress, status, detail_list, rec_count=None, err_count=None):
+    # Roll back first so no half-loaded data is left pending on the worker's sessions.
+    _rollback_sessions(meta_db, data_db)
+    _close_sessions(meta_db, data_db)
+    progress.finish(status, details=detail_list, record_count=rec_count, error_count=err_count)
+
+
+def _clear_session_errors(db, session_id: str, error_type: ErrorType | None = None) -> int:
+    """
+    Drop errors an earlier attempt left in upload_session_errors (only those of
+    ``error_type`` if given), committing straight away so a failing rerun cannot
+    leave both sets behind. Returns the number of errors removed.
+    """
+    removed = delete_session_errors(db, session_id, error_type)
+    if removed:
+        db.commit()
+    return removed
 
 
 def process_csv_task(
@@ -89,72 +207,131 @@ def process_csv_task(
     map_type: str,
     user_id: int,
     db_key: str | None = None,
+    chunk_size: int | None = None,
+    shards: int | None = None,
+    delta: bool = False,
 ):
     """
     Generic CSV processing pipeline.
-    - meta_db: always the default DB, used only to update upload_sessions (status/details).
+    - meta_db: always the default DB, used for the upload_sessions checkpoint.
     - data_db: either meta_db or the alternate (DB2) if db_key="DB2", used for actual row upserts.
+    - progress: SessionProgressReporter carrying status transitions off the loaders'
+      transaction (coalesced Postgres writes, live progress in Redis).
+    Load types in WHOLE_FILE_LOAD_TYPES (or everything, when CSV_STREAMING_ENABLED is off)
+    read, validate and load the whole file in one transaction; all others stream the file
+    through validate_csv and the loaders in chunks of ``chunk_size`` rows (see
+    _process_csv_streaming). With ``shards`` > 1, streamable load types are split
+    into row ranges loaded in parallel by process_csv_shard (see _fan_out_shards).
+    With ``delta``, rows unchanged since their last successful load are skipped and
+    counted as unchanged (see _load_batch).
     Any unexpected exception in:
       • file read   → FAILED_VALIDATION
       • schema valid → FAILED_VALIDATION
-      • DB load     → FAILED_PROCESSING
+      • DB load     → FAILED_DB_PROCESSING
     will be caught, the session status updated, and both sessions closed.
+    Timing per phase (read/validate/load/commit plus loader sub-phases), rows/sec
+    and DB round trips are collected for the whole run and stored with the final status;
+    the statement counts (with statements repeated past QUERY_REPEAT_THRESHOLD) are
+    also returned under "queries", except by a sharded fan-out whose shards report their own.
     """
+    with collect_load_metrics(map_type) as metrics:
+        result = _run_csv_pipeline(
+            business_id,
+            session_id,
+            wasabi_file_path,
+            map_type,
+            user_id,
+            db_key,
+            chunk_size,
+            shards,
+            delta,
+        )
+    if isinstance(result, dict) and result.get("status") != "sharded":
+        result["queries"] = metrics.queries.as_dict()
+    return result
+
+
+def _run_csv_pipeline(
+    business_id: str,
+    session_id: str,
+    wasabi_file_path: str,
+    map_type: str,
+    user_id: int,
+    db_key: str | None,
+    chunk_size: int | None,
+    shards: int | None,
+    delta: bool,
+):
     # 1) “meta” session for upload_sessions
     meta_db = get_session(business_id=int(business_id), db_key=None)
     # 2) “data” session for actual writes
     data_db = get_session(business_id=int(business_id), db_key=db_key) if db_key else meta_db
 
+    progress = SessionProgressReporter(business_id, session_id, metrics=current_metrics())
+
     # helper to fail early
     def fail(status, detail_list, rec_count=None, err_count=None):
-        _update_session_status(
+        _fail_session(meta_db, data_db, progress, status, detail_list, rec_count, err_count)
+
+    # PHASE 1: DOWNLOAD
+    progress.update(UploadJobStatus.DOWNLOADING_FILE)
+    abs_path = os.path.join(STORAGE_ROOT, business_id, wasabi_file_path)
+
+    if shards and shards > 1 and map_type not in WHOLE_FILE_LOAD_TYPES:
+        fanned_out = _fan_out_shards(
             meta_db,
+            data_db,
+            progress,
+            abs_path,
+            business_id,
             session_id,
-            status,
-            details=detail_list,
-            record_count=rec_count,
-            error_count=err_count,
+            wasabi_file_path,
+            map_type,
+            user_id,
+            db_key,
+            chunk_size or settings.CSV_CHUNK_SIZE,
+            shards,
+            delta,
         )
-        try:
-            meta_db.rollback()
-        except: pass
-        if data_db is not meta_db:
-            try:
-                data_db.rollback()
-            except: pass
-        meta_db.close()
-        if data_db is not meta_db:
-            data_db.close()
+        if fanned_out is not None:
+            return fanned_out
 
-    # PHASE 1: DOWNLOAD
-    _update_session_status(meta_db, session_id, UploadJobStatus.DOWNLOADING_FILE)
+    if settings.CSV_STREAMING_ENABLED and map_type not in WHOLE_FILE_LOAD_TYPES:
+        return _process_csv_streaming(
+            meta_db,
+            data_db,
+            progress,
+            abs_path,
+            business_id,
+            session_id,
+            map_type,
+            user_id,
+            chunk_size or settings.CSV_CHUNK_SIZE,
+            delta,
+        )
+
+    # This path always starts over, so errors of a previous attempt are stale.
+    _clear_session_errors(meta_db, session_id)
 
     # PHASE 2: READ FILE
-    abs_path = os.path.join(STORAGE_ROOT, business_id, wasabi_file_path)
     try:
-        with open(abs_path, newline="", encoding="utf-8") as f:
+        with phase("read"), open(abs_path, newline="", encoding=CSV_ENCODING) as f:
             original_records = list(csv.DictReader(f))
     except Exception as e:
         detail = [{"row": None, "field": None, "error": f"Failed reading file: {e}"}]
         return fail(UploadJobStatus.FAILED_VALIDATION, detail, rec_count=None, err_count=1)
 
+    add_rows(len(original_records))
     if not original_records:
-        _update_session_status(
-            meta_db,
-            session_id,
-            UploadJobStatus.COMPLETED_EMPTY_FILE,
-            record_count=0,
-            error_count=0,
-        )
-        meta_db.close()
-        if data_db is not meta_db:
-            data_db.close()
+        _close_sessions(meta_db, data_db)
+        progress.finish(UploadJobStatus.COMPLETED_EMPTY_FILE, record_count=0, error_count=0)
         return
 
     # PHASE 3: VALIDATE SCHEMA & BUSINESS RULES
-    _update_session_status(meta_db, session_id, UploadJobStatus.VALIDATING_SCHEMA)
+    progress.update(UploadJobStatus.VALIDATING_SCHEMA)
     try:
-        init_errors, validated = validate_csv(map_type, original_records, session_id)
+        with phase("validate"):
+            init_errors, validated = validate_csv(map_type, original_records, session_id)
     except Exception as e:
         detail = [{"row": None, "field": None, "error": f"Schema validator error: {type(e).__name__}: {e}"}]
         return fail(UploadJobStatus.FAILED_VALIDATION, detail, rec_count=len(original_records), err_count=1)
@@ -162,118 +339,44 @@ def process_csv_task(
     if init_errors:
         return fail(
             UploadJobStatus.FAILED_VALIDATION,
-            init_errors,
+            validation_errors_to_details(init_errors),
             rec_count=len(original_records),
             err_count=len(init_errors),
         )
 
     # PHASE 4: START DB PROCESSING
-    _update_session_status(
-        meta_db,
-        session_id,
-        UploadJobStatus.DB_PROCESSING_STARTED,
-        record_count=len(validated),
-    )
+    progress.update(UploadJobStatus.DB_PROCESSING_STARTED, record_count=len(validated))
 
     # PHASE 5: DISPATCH TO LOADERS (and collect per-row errors)
-    processed = 0
-    row_errors: list[ErrorDetailModel] = []
-
     try:
-        if map_type == "brands":
-            summary = load_brand_to_db(data_db, int(business_id), validated, session_id, None, user_id)
-            processed = summary.get("inserted", 0) + summary.get("updated", 0)
-
-        elif map_type == "return_policies":
-            summary = load_return_policy_to_db(data_db, int(business_id), validated, session_id)
-            processed = summary.get("inserted", 0) + summary.get("updated", 0)
-
-        elif map_type == "product_prices":
-            summary = load_price_to_db(data_db, int(business_id), validated, session_id, None)
-            processed = summary.get("inserted", 0) + summary.get("updated", 0)
-            # load_price_to_db might return detailed errors in summary["errors_list"]
-            if "errors_list" in summary and summary["errors_list"]:
-                row_errors.extend(summary["errors_list"])
-
-
-        elif map_type == "products":
-            # Products are processed as a batch by load_products_to_db
-            from app.dataload.product_loader import load_products_to_db
-            # Assuming db_pk_redis_pipeline is not strictly needed here or handled by default None
-            product_summary = load_products_to_db(data_db, int(business_id), validated, session_id, None, user_id)
-            processed = product_summary.get("inserted", 0) + product_summary.get("updated", 0)
-            # load_products_to_db currently returns summary["errors"] as a count.
-            # If it were to return detailed ErrorDetailModel list, we'd append them to row_errors.
-            # For now, this error count will be part of the final _update_session_status.
-            # To make it consistent with other row_errors, we'd need load_products_to_db to collect ErrorDetailModel.
-            # Let's assume for now that if product_summary["errors"] > 0, we create a generic error detail.
-            if product_summary.get("errors", 0) > 0:
-                 pass # The summary["errors"] from load_products_to_db will be used in final_status update
-        
-        elif map_type == "product_items": # New handler for item/variants
-            item_summary = load_items_to_db(
-                data_db, int(business_id), validated, session_id, user_id
+        with phase("load"):
+            counts, row_errors, final_error_count = _load_batch(
+                data_db, meta_db, map_type, business_id, validated, list(range(2, len(validated) + 2)),
+                session_id, user_id, delta,
             )
-            # load_items_to_db returns: 
-            # {"csv_rows_processed": count, "csv_rows_with_errors": count, "total_main_skus_created_or_updated": count}
-            # 'processed' for this task usually means successfully processed input records (CSV rows).
-            # For items, one CSV row can result in many SKUs.
-            # We'll use csv_rows_processed - csv_rows_with_errors for the 'processed' count here.
-            processed = item_summary.get("csv_rows_processed", 0) - item_summary.get("csv_rows_with_errors", 0)
-            # The detailed errors are logged within load_items_to_db.
-            # If load_items_to_db were to return a list of ErrorDetailModel, we would append to row_errors.
-            # For now, item_summary["csv_rows_with_errors"] will be used for the final error count.
-
-        else: # Handles attributes, meta_tags, categories (record by record)
-            for idx, rec in enumerate(validated, start=2):
-                try:
-                    if map_type == "attributes":
-                        load_attribute_to_db(data_db, int(business_id), rec, session_id, None, user_id)
-                    # Removed "products" from here
-                    elif map_type == "meta_tags":
-                        load_meta_tags_from_csv(data_db, int(business_id), rec, session_id, None)
-                    elif map_type == "categories":
-                        load_category_to_db(data_db, int(business_id), rec, session_id, None, user_id)
-                    else:
-                        logger.warning(f"Unhandled map_type '{map_type}' in per-record processing loop.")
-                        # Add a generic error if an unhandled map_type reaches here, though caught by initial checks usually.
-                        row_errors.append(ErrorDetailModel(row_number=idx, error_message=f"Unhandled map_type: {map_type}", error_type=ErrorType.UNEXPECTED_ROW_ERROR))
-                        continue # Skip processed += 1 for this iteration
-                    processed += 1
-                except Exception as e: # Catches errors from load_attribute_to_db, etc.
-                    # Attempt to get offending value if DataLoaderError
-                    offending_val = None
-                    field_name = None
-                    if hasattr(e, 'offending_value'):
-                        offending_val = str(e.offending_value)
-                    if hasattr(e, 'field_name'):
-                        field_name = str(e.field_name)
-                    
-                    row_errors.append(
-                        ErrorDetailModel(
-                            row_number=idx,
-                            field_name=field_name,
-                            error_message=str(e),
-                            error_type=getattr(e, 'error_type', ErrorType.UNEXPECTED_ROW_ERROR),
-                            offending_value=offending_val
-                        )
-                    )
+        processed = counts["inserted"] + counts["updated"]
 
         # PHASE 6: COMMIT BOTH DBs
-        # The final error count for _update_session_status will include errors from product_summary
-        # This commit happens *after* all processing for the given map_type batch
-        meta_db.commit()
-        if data_db is not meta_db:
-            data_db.commit()
+        # This commit happens *after* all processing for the given map_type batch.
+        # Data first: the row fingerprints staged on meta_db must never outlive it.
+        with phase("commit"):
+            if data_db is not meta_db:
+                data_db.commit()
+            meta_db.commit()
 
+    except RETRYABLE_EXCEPTIONS:
+        # Transient DB/Redis errors: leave the session as-is and let Celery autoretry.
+        _rollback_sessions(meta_db, data_db)
+        _close_sessions(meta_db, data_db)
+        raise
     except Exception as e:
-        # Any exception in loader or commit → FAILED_PROCESSING
+        # Any exception in loader or commit → FAILED_DB_PROCESSING
         detail = [{
             "row": None,
             "field": None,
             "error": f"Processing error: {type(e).__name__}: {e}"
         }]
-        return fail(UploadJobStatus.FAILED_PROCESSING, detail, rec_count=len(validated), err_count=1)
+        return fail(UploadJobStatus.FAILED_DB_PROCESSING, detail, rec_count=len(validated), err_count=1)
 
     # PHASE 7: FINALIZE
     final_status = (
@@ -281,39 +384,216 @@ def process_csv_task(
         if not row_errors
         else UploadJobStatus.COMPLETED_WITH_ERRORS
     )
-    final_error_count = len(row_errors) # Default from per-record processing (attributes, categories, etc.)
-    
-    if map_type == "products" and 'product_summary' in locals(): 
-        final_error_count = product_summary.get("errors", 0)
-        if final_error_count > 0 and not row_errors: # If products loader had errors but no detailed row_errors collected here
-            row_errors.append(ErrorDetailModel(
-                row_number=None, 
-                error_message=f"{final_error_count} error(s) occurred during product batch processing.",
-                error_type=ErrorType.BATCH_PROCESSING_ERROR # General error type for batch
-            ))
-    elif map_type == "product_items" and 'item_summary' in locals(): # Handle item_summary
-        final_error_count = item_summary.get("csv_rows_with_errors", 0)
-        if final_error_count > 0 and not row_errors: # If item_loader had errors but no detailed row_errors collected here
-            # Note: load_items_to_db currently logs row errors but doesn't return them as ErrorDetailModel list.
-            # This generic message indicates that some rows failed as per the summary.
-            row_errors.append(ErrorDetailModel(
-                row_number=None, 
-                error_message=f"{final_error_count} CSV row(s) failed during item/variant processing.",
-                error_type=ErrorType.BATCH_PROCESSING_ERROR 
-            ))
-    elif map_type == "product_prices" and "summary" in locals() and "errors_list" in summary:
-        # product_prices already populates row_errors if summary["errors_list"] exists
-        # final_error_count is already len(row_errors) in this case.
+
+    _close_sessions(meta_db, data_db)
+    progress.finish(
+        final_status,
+        details=row_errors or None,
+        record_count=len(validated),
+        error_count=final_error_count,
+        unchanged_count=counts["unchanged"],
+    )
+
+    # CLEANUP
+    try:
+        os.remove(abs_path)
+    except OSError:
         pass
 
+    return {
+        "status": final_status.value,
+        "processed": processed,
+        "unchanged": counts["unchanged"],
+        "error_count": final_error_count,
+    }
 
-    _update_session_status(
-        meta_db,
-        session_id,
+
+def _validate_chunk(map_type: str, chunk: list, session_id: str, rows_before: int):
+    """
+    Run validate_csv on one chunk whose first row is data row ``rows_before + 1``.
+    Returns (validated, row_numbers, row_errors): the valid records, their CSV line
+    numbers, and the invalid rows as ErrorDetailModels.
+    """
+    chunk_errors, validated = validate_csv(map_type, chunk, session_id)
+    invalid_rows = {err.get("row") for err in chunk_errors}
+    row_numbers = [rows_before + i + 2 for i in range(len(chunk)) if (i + 1) not in invalid_rows]
+    return validated, row_numbers, validation_errors_to_details(chunk_errors, rows_before)
+
+
+def _load_checkpoint(db, session_id: str) -> dict:
+    """
+    Read the streaming checkpoint stored on the upload session.
+    A fresh session (or one whose task never committed a chunk) starts at row 0.
+    Row errors of committed chunks stay in upload_session_errors; the failure entry
+    of the attempt being resumed is dropped, as it is not a row error.
+    """
+    sess = db.query(UploadSessionOrm).filter_by(session_id=session_id).first()
+    checkpoint = {"row": 0, "inserted": 0, "updated": 0, "unchanged": 0, "errors": 0}
+    if not sess or not sess.last_committed_row:
+        _clear_session_errors(db, session_id)
+        return checkpoint
+    checkpoint["row"] = sess.last_committed_row
+    checkpoint["inserted"] = sess.inserted_count or 0
+    checkpoint["updated"] = sess.updated_count or 0
+    checkpoint["unchanged"] = sess.unchanged_count or 0
+    dropped = _clear_session_errors(db, session_id, ErrorType.TASK_EXCEPTION)
+    checkpoint["errors"] = max((sess.error_count or 0) - dropped, 0)
+    return checkpoint
+
+
+def _save_checkpoint(
+    db,
+    session_id: str,
+    last_committed_row: int,
+    inserted: int,
+    updated: int,
+    unchanged: int,
+    error_count: int,
+    chunk_row_errors: list,
+):
+    """
+    Stage the checkpoint for the chunk just loaded, and append the chunk's row
+    errors to upload_session_errors. Does not commit: the caller commits it
+    together with the chunk so the two cannot drift apart.
+    """
+    write_session_errors(db, session_id, chunk_row_errors)
+    matched = write_session_row(db, session_id, {
+        "status": UploadJobStatus.DB_PROCESSING_BATCH,
+        "last_committed_row": last_committed_row,
+        "inserted_count": inserted,
+        "updated_count": updated,
+        "unchanged_count": unchanged,
+        "record_count": last_committed_row,
+        "error_count": error_count,
+    })
+    if not matched:
+        logger.error("Session %s not found for checkpoint update", session_id)
+
+
+def _process_csv_streaming(
+    meta_db,
+    data_db,
+    progress: SessionProgressReporter,
+    abs_path: str,
+    business_id: str,
+    session_id: str,
+    map_type: str,
+    user_id: int,
+    chunk_size: int,
+    delta: bool = False,
+):
+    """
+    Streaming variant of process_csv_task: rows flow from the file through
+    validate_csv and the loader ``chunk_size`` rows at a time, with a commit per
+    chunk, so peak memory is bounded by the chunk rather than the file.
+    Unlike the whole-file path, rows failing validation do not abort the upload
+    (earlier chunks are already committed); they are reported as row errors and
+    the session ends COMPLETED_WITH_ERRORS.
+
+    Each chunk commit also records a checkpoint on the upload session
+    (last_committed_row, inserted/updated/unchanged/error counts) and the chunk's
+    row errors.
+    A Celery autoretry or a manual resume picks up after that row instead of
+    reloading the whole file. Retryable errors are re-raised so autoretry fires.
+    Chunk progress goes to Redis only; the checkpoint already carries it to Postgres.
+    """
+    def fail(status, message, row_number=None):
+        # Row errors of committed chunks are already stored; the failure itself is tagged
+        # TASK_EXCEPTION so a resumed run can drop it again (see _load_checkpoint).
+        failure = ErrorDetailModel(row_number=row_number, error_message=message, error_type=ErrorType.TASK_EXCEPTION)
+        _fail_session(meta_db, data_db, progress, status, [failure], rows_read, error_count + 1)
+
+    checkpoint = _load_checkpoint(meta_db, session_id)
+    rows_read = checkpoint["row"]
+    inserted = checkpoint["inserted"]
+    updated = checkpoint["updated"]
+    unchanged = checkpoint["unchanged"]
+    error_count = checkpoint["errors"]
+    if rows_read:
+        logger.info("Session %s: resuming after row %d of the file", session_id, rows_read)
+
+    progress.update(UploadJobStatus.DB_PROCESSING_STARTED, record_count=rows_read, error_count=error_count)
+
+    chunks = _iter_csv_chunks(abs_path, chunk_size, skip_rows=rows_read)
+    while True:
+        # PHASE 2: READ NEXT CHUNK
+        try:
+            with phase("read"):
+                chunk = next(chunks, None)
+        except Exception as e:
+            return fail(UploadJobStatus.FAILED_VALIDATION, f"Failed reading file: {e}", row_number=rows_read + 2)
+        if chunk is None:
+            break
+        add_rows(len(chunk))
+
+        # PHASE 3: VALIDATE CHUNK
+        try:
+            with phase("validate"):
+                validated, row_numbers, chunk_row_errors = _validate_chunk(map_type, chunk, session_id, rows_read)
+        except Exception as e:
+            return fail(UploadJobStatus.FAILED_VALIDATION, f"Schema validator error: {type(e).__name__}: {e}")
+        chunk_error_count = len(chunk_row_errors)
+        chunk_counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        # PHASE 5: LOAD + CHECKPOINT + COMMIT CHUNK
+        try:
+            if validated:
+                with phase("load"):
+                    chunk_counts, loader_row_errors, loader_error_count = _load_batch(
+                        data_db, meta_db, map_type, business_id, validated, row_numbers, session_id, user_id, delta
+                    )
+                chunk_row_errors.extend(loader_row_errors)
+                chunk_error_count += loader_error_count
+            with phase("commit"):
+                _save_checkpoint(
+                    meta_db,
+                    session_id,
+                    rows_read + len(chunk),
+                    inserted + chunk_counts["inserted"],
+                    updated + chunk_counts["updated"],
+                    unchanged + chunk_counts["unchanged"],
+                    error_count + chunk_error_count,
+                    chunk_row_errors,
+                )
+                if data_db is not meta_db:
+                    data_db.commit()
+                meta_db.commit()
+        except RETRYABLE_EXCEPTIONS:
+            # Leave the session at its last checkpoint and let Celery retry the task.
+            _rollback_sessions(meta_db, data_db)
+            _close_sessions(meta_db, data_db)
+            logger.warning("Session %s: retryable error after row %d, task will be retried", session_id, rows_read, exc_info=True)
+            raise
+        except Exception as e:
+            return fail(
+                UploadJobStatus.FAILED_DB_PROCESSING,
+                f"Processing error in rows {rows_read + 2}-{rows_read + len(chunk) + 1}: {type(e).__name__}: {e}",
+            )
+
+        rows_read += len(chunk)
+        inserted += chunk_counts["inserted"]
+        updated += chunk_counts["updated"]
+        unchanged += chunk_counts["unchanged"]
+        error_count += chunk_error_count
+        progress.publish(UploadJobStatus.DB_PROCESSING_BATCH, record_count=rows_read, error_count=error_count)
+        logger.info("Session %s: committed chunk, %d rows read so far", session_id, rows_read)
+
+    _close_sessions(meta_db, data_db)
+
+    if rows_read == 0:
+        progress.finish(UploadJobStatus.COMPLETED_EMPTY_FILE, record_count=0, error_count=0)
+        return
+
+    # PHASE 7: FINALIZE
+    final_status = (
+        UploadJobStatus.COMPLETED
+        if not error_count
+        else UploadJobStatus.COMPLETED_WITH_ERRORS
+    )
+    progress.finish(
         final_status,
-        details=[e.model_dump() for e in row_errors] if row_errors else None,
-        record_count=len(validated),
-        error_count=final_error_count, # Use the potentially adjusted error count
+        record_count=rows_read,
+        error_count=error_count,
     )
 
     # CLEANUP
@@ -322,22 +602,466 @@ def process_csv_task(
     except OSError:
         pass
 
-    meta_db.close()
-    if data_db is not meta_db:
-        data_db.close()
+    return {
+        "status": final_status.value,
+        "processed": inserted + updated,
+        "unchanged": unchanged,
+        "error_count": error_count,
+    }
+
+
+def _plan_shards(abs_path: str, shard_count: int, shard_key: str | None = None) -> list[tuple[int, int]]:
+    """
+    Split the data rows of ``abs_path`` into at most ``shard_count`` contiguous
+    [start, end) row ranges of roughly equal size. With ``shard_key``, a boundary is
+    pushed forward past any run of rows sharing the same key value.
+    Reads the file twice but holds only one row in memory.
+    """
+    with open(abs_path, newline="", encoding=CSV_ENCODING) as f:
+        total = sum(1 for _ in csv.DictReader(f))
+    if total == 0:
+        return []
+
+    shard_count = max(1, min(shard_count, total))
+    targets = [total * i // shard_count for i in range(1, shard_count)]
+    boundaries = [0]
+    if shard_key is None:
+        boundaries.extend(targets)
+    else:
+        with open(abs_path, newline="", encoding=CSV_ENCODING) as f:
+            prev_key = None
+            t = 0
+            for idx, row in enumerate(csv.DictReader(f)):
+                if t >= len(targets):
+                    break
+                key = row.get(shard_key)
+                if idx >= targets[t] and key != prev_key:
+                    boundaries.append(idx)
+                    # A long same-key run may have carried us past several targets.
+                    while t < len(targets) and targets[t] <= idx:
+                        t += 1
+                prev_key = key
+    boundaries.append(total)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if end > start]
+
+
+def _fan_out_shards(
+    meta_db,
+    data_db,
+    progress: SessionProgressReporter,
+    abs_path: str,
+    business_id: str,
+    session_id: str,
+    wasabi_file_path: str,
+    map_type: str,
+    user_id: int,
+    db_key: str | None,
+    chunk_size: int,
+    shards: int,
+    delta: bool = False,
+):
+    """
+    Dispatch one process_csv_shard task per row range as a chord whose callback,
+    finalize_sharded_upload, merges the shard summaries into the upload session.
+    Returns None when the file yields fewer than two shards, in which case the
+    caller processes it in-line.
+    """
+    try:
+        plan = _plan_shards(abs_path, shards, SHARD_KEYS.get(map_type))
+    except Exception as e:
+        detail = [{"row": None, "field": None, "error": f"Failed reading file: {e}"}]
+        _fail_session(meta_db, data_db, progress, UploadJobStatus.FAILED_VALIDATION, detail, None, 1)
+        return {"status": UploadJobStatus.FAILED_VALIDATION.value, "processed": 0, "errors": detail}
+    if len(plan) < 2:
+        return None
+
+    # Shards write their row errors and checkpoints as they go. A resumed upload whose
+    # checkpoints fit the plan keeps both, dropping only the failure entries of the
+    # previous run (see _load_checkpoint); any other rerun starts both over.
+    if _shard_checkpoints_fit(meta_db, session_id, plan):
+        logger.info("Session %s: resuming shards from their checkpoints", session_id)
+        _clear_session_errors(meta_db, session_id, ErrorType.TASK_EXCEPTION)
+    else:
+        _clear_session_errors(meta_db, session_id)
+        _clear_shard_checkpoints(meta_db, session_id)
+    _close_sessions(meta_db, data_db)
+    progress.update(UploadJobStatus.DB_PROCESSING_STARTED, record_count=plan[-1][1])
+    progress.flush()
+
+    header = [
+        process_csv_shard.s(business_id, session_id, wasabi_file_path, map_type, user_id, db_key, start, end, chunk_size, delta)
+        for start, end in plan
+    ]
+    callback = finalize_sharded_upload.s(business_id, session_id, wasabi_file_path).on_error(
+        fail_sharded_upload.s(business_id, session_id)
+    )
+    chord(header)(callback)
+    logger.info("Session %s: dispatched %d shards for %s", session_id, len(plan), map_type)
+    return {"status": "sharded", "shards": len(plan)}
+
+
+@shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
+def process_csv_shard(
+    self,
+    business_id: str,
+    session_id: str,
+    wasabi_file_path: str,
+    map_type: str,
+    user_id: int,
+    db_key: str | None,
+    start_row: int,
+    end_row: int,
+    chunk_size: int,
+    delta: bool = False,
+):
+    """
+    Load data rows [start_row, end_row) of a sharded upload, committing per chunk.
+    Row errors go to upload_session_errors with each chunk, together with the shard's
+    checkpoint in upload_session_shards, so a Celery autoretry continues after the
+    last committed chunk instead of reloading (and re-reporting) the whole shard.
+    The upload session row is left alone and the counts returned here are merged by finalize_sharded_upload. A non-retryable failure stops the shard and is
+    reported in the summary rather than raised, so the chord still completes.
+    """
+    with collect_load_metrics(map_type) as metrics:
+        summary = _load_shard_rows(
+            business_id, session_id, wasabi_file_path, map_type, user_id, db_key, start_row, end_row, chunk_size, delta
+        )
+    summary["metrics"] = metrics.as_dict()
+    return summary
+
+
+def _clear_shard_checkpoints(db, session_id: str) -> None:
+    """Drop the shard checkpoints an earlier run of the session left, committing straight away."""
+    removed = db.execute(
+        delete(UploadSessionShardOrm)
+        .where(UploadSessionShardOrm.session_id == session_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if removed:
+        db.commit()
+
+
+def _shard_checkpoints_fit(db, session_id: str, plan: list[tuple[int, int]]) -> bool:
+    """Whether the session has shard checkpoints, all of them for shards of ``plan``."""
+    starts = set(db.scalars(
+        select(UploadSessionShardOrm.start_row).where(UploadSessionShardOrm.session_id == session_id)
+    ))
+    return bool(starts) and starts <= {start for start, _ in plan}
+
+
+def _load_shard_checkpoint(db, session_id: str, start_row: int) -> dict:
+    """
+    Read the checkpoint of the shard starting at ``start_row``. A shard that never
+    committed a chunk starts at its first row with zero counts.
+    """
+    shard = db.get(UploadSessionShardOrm, (session_id, start_row))
+    if shard is None:
+        return {"row": start_row, "inserted": 0, "updated": 0, "unchanged": 0, "errors": 0}
+    return {
+        "row": shard.last_committed_row,
+        "inserted": shard.inserted_count,
+        "updated": shard.updated_count,
+        "unchanged": shard.unchanged_count,
+        "errors": shard.error_count,
+    }
+
+
+def _save_shard_checkpoint(db, session_id: str, start_row: int, last_committed_row: int, summary: dict):
+    """
+    Stage the shard's checkpoint after the chunk just loaded. Does not commit: the
+    caller commits it together with the chunk and its row errors.
+    """
+    shard = db.get(UploadSessionShardOrm, (session_id, start_row))
+    if shard is None:
+        shard = UploadSessionShardOrm(session_id=session_id, start_row=start_row)
+        db.add(shard)
+    shard.last_committed_row = last_committed_row
+    shard.inserted_count = summary["inserted"]
+    shard.updated_count = summary["updated"]
+    shard.unchanged_count = summary["unchanged"]
+    shard.error_count = summary["error_count"]
+
+
+def _load_shard_rows(
+    business_id: str,
+    session_id: str,
+    wasabi_file_path: str,
+    map_type: str,
+    user_id: int,
+    db_key: str | None,
+    start_row: int,
+    end_row: int,
+    chunk_size: int,
+    delta: bool,
+):
+    # upload_session_errors lives in the default DB, next to upload_sessions.
+    meta_db = get_session(business_id=int(business_id), db_key=None)
+    data_db = get_session(business_id=int(business_id), db_key=db_key) if db_key else meta_db
+    abs_path = os.path.join(STORAGE_ROOT, business_id, wasabi_file_path)
+    summary = {
+        "start_row": start_row,
+        "rows": 0,
+        "inserted": 0,
+        "updated": 0,
+        "unchanged": 0,
+        "error_count": 0,
+        "failed": False,
+    }
+    rows_read = start_row
+    try:
+        checkpoint = _load_shard_checkpoint(meta_db, session_id, start_row)
+        rows_read = checkpoint["row"]
+        summary["rows"] = rows_read - start_row
+        summary["inserted"] = checkpoint["inserted"]
+        summary["updated"] = checkpoint["updated"]
+        summary["unchanged"] = checkpoint["unchanged"]
+        summary["error_count"] = checkpoint["errors"]
+        if rows_read > start_row:
+            logger.info("Session %s: shard [%d, %d) resuming after row %d", session_id, start_row, end_row, rows_read)
+
+        chunks = _iter_csv_chunks(abs_path, chunk_size, skip_rows=rows_read, max_rows=end_row - rows_read)
+        while True:
+            with phase("read"):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            add_rows(len(chunk))
+            with phase("validate"):
+                validated, row_numbers, chunk_row_errors = _validate_chunk(map_type, chunk, session_id, rows_read)
+            chunk_error_count = len(chunk_row_errors)
+            counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+            if validated:
+                with phase("load"):
+                    counts, loader_row_errors, loader_error_count = _load_batch(
+                        data_db, meta_db, map_type, business_id, validated, row_numbers, session_id, user_id, delta
+                    )
+                chunk_row_errors.extend(loader_row_errors)
+                chunk_error_count += loader_error_count
+            committed = {
+                "inserted": summary["inserted"] + counts["inserted"],
+                "updated": summary["updated"] + counts["updated"],
+                "unchanged": summary["unchanged"] + counts["unchanged"],
+                "error_count": summary["error_count"] + chunk_error_count,
+            }
+            with phase("commit"):
+                write_session_errors(meta_db, session_id, chunk_row_errors)
+                _save_shard_checkpoint(meta_db, session_id, start_row, rows_read + len(chunk), committed)
+                if data_db is not meta_db:
+                    data_db.commit()
+                meta_db.commit()
+            rows_read += len(chunk)
+            summary.update(committed)
+            summary["rows"] = rows_read - start_row
+    except RETRYABLE_EXCEPTIONS:
+        _rollback_sessions(meta_db, data_db)
+        _close_sessions(meta_db, data_db)
+        raise
+    except Exception as e:
+        _rollback_sessions(meta_db, data_db)
+        logger.error("Session %s: shard [%d, %d) failed at row %d: %s", session_id, start_row, end_row, rows_read + 2, e, exc_info=True)
+        summary["failed"] = True
+        summary["error_count"] += 1
+        failure = ErrorDetailModel(
+            row_number=rows_read + 2,
+            error_message=f"Processing error in shard rows {start_row + 2}-{end_row + 1}: {type(e).__name__}: {e}",
+            error_type=ErrorType.TASK_EXCEPTION,
+        )
+        try:
+            write_session_errors(meta_db, session_id, [failure])
+            meta_db.commit()
+        except Exception:
+            meta_db.rollback()
+            logger.error("Session %s: could not record shard failure", session_id, exc_info=True)
+    finally:
+        _close_sessions(meta_db, data_db)
+    return summary
+
+
+@shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
+def finalize_sharded_upload(self, shard_summaries, business_id: str, session_id: str, wasabi_file_path: str):
+    """
+    Chord callback: merge the per-shard summaries into the single upload session.
+    The shards already stored their row errors; only the counts are merged here,
+    and the shards' metrics are summed into one summary for the session.
+    """
+    shard_summaries = sorted(shard_summaries, key=lambda s: s["start_row"])
+    record_count = sum(s["rows"] for s in shard_summaries)
+    inserted = sum(s["inserted"] for s in shard_summaries)
+    updated = sum(s["updated"] for s in shard_summaries)
+    unchanged = sum(s.get("unchanged", 0) for s in shard_summaries)
+    error_count = sum(s["error_count"] for s in shard_summaries)
+
+    if any(s["failed"] for s in shard_summaries):
+        final_status = UploadJobStatus.FAILED_DB_PROCESSING
+    elif error_count:
+        final_status = UploadJobStatus.COMPLETED_WITH_ERRORS
+    else:
+        final_status = UploadJobStatus.COMPLETED
+
+    shard_metrics = [s["metrics"] for s in shard_summaries if s.get("metrics")]
+    metrics = (
+        LoadMetrics.merged(shard_metrics[0]["load_type"], shard_metrics) if shard_metrics else None
+    )
+
+    SessionProgressReporter(business_id, session_id, metrics=metrics).finish(
+        final_status,
+        record_count=record_count,
+        error_count=error_count,
+        inserted_count=inserted,
+        updated_count=updated,
+        unchanged_count=unchanged,
+    )
+
+    if final_status != UploadJobStatus.FAILED_DB_PROCESSING:
+        try:
+            os.remove(os.path.join(STORAGE_ROOT, business_id, wasabi_file_path))
+        except OSError:
+            pass
 
     return {
         "status": final_status.value,
-        "processed": processed,
-        "errors": [e.model_dump() for e in row_errors],
+        "processed": inserted + updated,
+        "unchanged": unchanged,
+        "error_count": error_count,
     }
 
+
+@shared_task
+def fail_sharded_upload(request, exc, traceback, business_id: str, session_id: str):
+    """Chord error callback: a shard exhausted its retries, so the merge never ran."""
+    logger.error("Session %s: sharded upload failed: %s", session_id, exc)
+    failure = ErrorDetailModel(
+        error_message=f"Shard task failed: {type(exc).__name__}: {exc}", error_type=ErrorType.TASK_EXCEPTION
+    )
+    SessionProgressReporter(business_id, session_id).finish(UploadJobStatus.FAILED_DB_PROCESSING, details=[failure])
+
+
+@shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
+def dry_run_csv_task(self, business_id: str, session_id: str, wasabi_file_path: str, load_type: str):
+    """
+    Validate-only processing of an upload too large to check inline.
+    The report lands on the upload session as DRY_RUN_PASSED / DRY_RUN_FAILED with
+    the errors in upload_session_errors; nothing is written to the catalog and the
+    file is removed.
+    """
+    progress = SessionProgressReporter(business_id, session_id)
+    progress.update(UploadJobStatus.VALIDATING_DATA)
+    abs_path = os.path.join(STORAGE_ROOT, business_id, wasabi_file_path)
+    try:
+        with open(abs_path, newline="", encoding=CSV_ENCODING) as f:
+            report = dry_run_csv(int(business_id), load_type, f, session_id)
+    except RETRYABLE_EXCEPTIONS:
+        raise
+    except Exception as e:
+        logger.error("Session %s: dry run failed: %s", session_id, e, exc_info=True)
+        report = DryRunReport(errors=[ErrorDetailModel(
+            error_message=f"Dry run failed: {type(e).__name__}: {e}",
+            error_type=ErrorType.TASK_EXCEPTION,
+        )])
+
+    status = UploadJobStatus.DRY_RUN_PASSED if report.passed else UploadJobStatus.DRY_RUN_FAILED
+    progress.finish(status, details=report.errors or None, record_count=report.record_count, error_count=report.error_count)
+    try:
+        os.remove(abs_path)
+    except OSError:
+        pass
+    return {"status": status.value, "record_count": report.record_count, "error_count": report.error_count}
+
+
+# -----------------------------------------------------------------------------
+# Bundle uploads
+# -----------------------------------------------------------------------------
+
+def _dispatch_bundle_member(member: UploadSessionOrm, business_id: str, bundle_id: str, user_id: int, delta: bool):
+    task_kwargs = dict(
+        business_id=business_id,
+        session_id=member.session_id,
+        wasabi_file_path=member.wasabi_path,
+        original_filename=member.original_filename,
+        user_id=user_id,
+    )
+    if delta:
+        task_kwargs["delta"] = True
+    LOAD_TASKS[member.load_type].apply_async(
+        kwargs=task_kwargs,
+        link=advance_bundle.si(business_id, bundle_id, user_id, delta),
+        link_error=bundle_member_failed.s(business_id, bundle_id, member.session_id, user_id, delta),
+    )
+    logger.info("Bundle %s: started %s (session %s)", bundle_id, member.load_type, member.session_id)
+
+
+@shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
+def advance_bundle(self, business_id: str, bundle_id: str, user_id: int, delta: bool = False):
+    """
+    Move a bundle upload forward: start every pending member whose prerequisites
+    have finished, skip the ones behind a failed file, and roll the members' counts
+    up into the aggregate session, finishing it once every member is terminal.
+    Queued when the bundle is created and linked to each member task, so it runs
+    again as soon as any file finishes (see app.services.bundles).
+    """
+    db = get_session(business_id=int(business_id))
+    dispatched = []
+    try:
+        while True:
+            members = {m.load_type: m for m in load_bundle_members(db, bundle_id)}
+            to_start, to_skip = plan_bundle_step({lt: m.status for lt, m in members.items()})
+            skipped = [
+                lt for lt in to_skip
+                if claim_pending_member(db, members[lt].session_id, UploadJobStatus.SKIPPED_DEPENDENCY_FAILED)
+            ]
+            for lt in skipped:
+                write_session_errors(db, members[lt].session_id, [ErrorDetailModel(
+                    error_message=f"Not loaded: the {to_skip[lt]} file of this bundle failed.",
+                    error_type=ErrorType.TASK_EXCEPTION,
+                )])
+                write_session_row(db, members[lt].session_id, {"error_count": 1})
+            started = [lt for lt in to_start if claim_pending_member(db, members[lt].session_id, UploadJobStatus.QUEUED)]
+            db.commit()
+            for lt in started:
+                _dispatch_bundle_member(members[lt], business_id, bundle_id, user_id, delta)
+            dispatched.extend(started)
+            # A skipped file may leave its own dependents unable to start; a started one
+            # changes nothing until it finishes and advances the bundle again.
+            if not skipped:
+                break
+
+        members = load_bundle_members(db, bundle_id)
+        totals = bundle_totals(members)
+        final_status = rollup_status(m.status for m in members)
+        if final_status is None:
+            write_bundle_progress(db, bundle_id, totals)
+            db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+    if final_status is not None:
+        record_count, error_count = totals.pop("record_count"), totals.pop("error_count")
+        SessionProgressReporter(business_id, bundle_id).finish(
+            final_status, record_count=record_count, error_count=error_count, **totals
+        )
+        logger.info("Bundle %s finished: %s", bundle_id, final_status.value)
+    return {"status": final_status.value if final_status else "in_progress", "started": dispatched}
+
+
+@shared_task
+def bundle_member_failed(request, exc, traceback, business_id: str, bundle_id: str, session_id: str, user_id: int, delta: bool = False):
+    """link_error of a bundle member: its task gave up, so record the failure and move the bundle on."""
+    logger.error("Bundle %s: member session %s failed: %s", bundle_id, session_id, exc)
+    SessionProgressReporter(business_id, session_id).finish(
+        UploadJobStatus.FAILED_UNHANDLED_EXCEPTION,
+        details=[{"row": None, "field": None, "error": f"Task failed: {type(exc).__name__}: {exc}"}],
+    )
+    advance_bundle.delay(business_id, bundle_id, user_id, delta)
+
 # -----------------------------------------------------------------------------
-# Celery wrapper tasks (unchanged)
+# Celery wrapper tasks
 # -----------------------------------------------------------------------------
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_brands_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_brands_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -347,6 +1071,8 @@ def process_brands_file(self, business_id, session_id, wasabi_file_path, origina
         "brand",
         "brands",
         user_id,
+        shards=shards,
+        delta=delta,
     )
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
@@ -356,7 +1082,9 @@ def process_return_policies_file(
     session_id: str,
     wasabi_file_path: str,
     original_filename: str,
-    user_id: int
+    user_id: int,
+    shards: int | None = None,
+    delta: bool = False,
 ):
     db_key = settings.LOADTYPE_DB_MAP.get("return_policies")
     return process_csv_task(
@@ -369,9 +1097,11 @@ def process_return_policies_file(
         "return_policies",
         user_id,
         db_key=db_key,
+        shards=shards,
+        delta=delta,
     )
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_attributes_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_attributes_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -381,11 +1111,13 @@ def process_attributes_file(self, business_id, session_id, wasabi_file_path, ori
         "attr",
         "attributes",
         user_id,
+        shards=shards,
+        delta=delta,
     )
 
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_products_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_products_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -395,11 +1127,13 @@ def process_products_file(self, business_id, session_id, wasabi_file_path, origi
         "prod",
         "products",
         user_id,
+        shards=shards,
+        delta=delta,
     )
 
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_product_items_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_product_items_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -409,11 +1143,13 @@ def process_product_items_file(self, business_id, session_id, wasabi_file_path,
         "item",
         "product_items",
         user_id,
+        shards=shards,
+        delta=delta,
     )
 
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_product_prices_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_product_prices_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -423,11 +1159,13 @@ def process_product_prices_file(self, business_id, session_id, wasabi_file_path,
         "price",
         "product_prices",
         user_id,
+        shards=shards,
+        delta=delta,
     )
 
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_meta_tags_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_meta_tags_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -437,11 +1175,13 @@ def process_meta_tags_file(self, business_id, session_id, wasabi_file_path, orig
         "meta",
         "meta_tags",
         user_id,
+        shards=shards,
+        delta=delta,
     )
 
 
 @shared_task(bind=True, autoretry_for=RETRYABLE_EXCEPTIONS, **COMMON_RETRY_KWARGS)
-def process_categories_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id):
+def process_categories_file(self, business_id, session_id, wasabi_file_path, original_filename, user_id, shards=None, delta=False):
     return process_csv_task(
         business_id,
         session_id,
@@ -451,4 +1191,19 @@ def process_categories_file(self, business_id, session_id, wasabi_file_path, ori
         "cat",
         "categories",
         user_id,
+        shards=shards,
+        delta=delta,
     )
+
+
+# Celery task per load type, for callers that dispatch by load_type (upload routes, bundles).
+LOAD_TASKS = {
+    "brands": process_brands_file,
+    "attributes": process_attributes_file,
+    "return_policies": process_return_policies_file,
+    "products": process_products_file,
+    "product_items": process_product_items_file,
+    "product_prices": process_product_prices_file,
+    "meta_tags": process_meta_tags_file,
+    "categories": process_categories_file,
+}
@@ -0,0 +1,15 @@
+"""Periodic housekeeping tasks, scheduled by Celery beat (see celery_worker.beat_schedule)."""
+import logging
+
+from celery import shared_task
+
+from app.db.connection import get_sessionmaker
+from app.services.retention import apply_retention
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def apply_session_retention():
+    """Archive or trim upload sessions past SESSION_RETENTION_DAYS (see app.services.retention)."""
+    return apply_retention(get_sessionmaker())
@@ -0,0 +1,10 @@
+import pytest
+
+from app.services.query_stats import collect_query_stats
+
+
+@pytest.fixture
+def query_stats():
+    """QueryStats of every SQL statement the test sends, e.g. ``assert query_stats.count("FROM brands") == 1``."""
+    with collect_query_stats() as stats:
+        yield stats
@@ -4,10 +4,13 @@ from unittest.mock import MagicMock, patch, call, ANY
 from typing import List, Dict, Any, Optional
 
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from pydantic import ValidationError
 
 from app.dataload.models.item_csv import ItemCsvModel
 from app.dataload.item_loader import (
+    AttributeMaps,
+    _lookup_attribute_ids,
     load_item_record_to_db,
     load_items_to_db,
     # _lookup_attribute_ids, # Tested via load_item_record_to_db
@@ -18,6 +21,7 @@ from app.db.models import (
     AttributeOrm, AttributeValueOrm, BusinessDetailsOrm # Added BusinessDetailsOrm for completeness if needed
 )
 from app.dataload.parsers.item_parser import ItemParserError # Imported directly
+from app.db.bulk_update import BulkUpdates
 from app.exceptions import DataLoaderError
 from app.models.schemas import ErrorType
 
@@ -83,18 +87,10 @@ def mock_all_sku_variants() -> List[List[Dict[str, Any]]]:
         [{'attribute_name': 'color', 'value': 'White', 'is_default_sku_value': False}, {'attribute_name': 'size', 'value': 'M'}],
     ]
 
-# Mocks for data extractors, applied via autouse=True for convenience in this test file
+# Image parsing mock (per-combination fields are read from the real CSV strings), applied via autouse=True
 @pytest.fixture(autouse=True)
 def mock_all_data_extractors(mocker):
     # Using mocker.patch correctly
-    mocker.patch('app.dataload.item_loader.get_price_for_combination', side_effect=lambda price_str, *args: float(price_str.split(':')[0].split('|')[0])) # Simplified mock
-    mocker.patch('app.dataload.item_loader.get_quantity_for_combination', side_effect=lambda qty_str, *args: int(qty_str.split(':')[0].split('|')[0]))
-    mocker.patch('app.dataload.item_loader.get_status_for_combination', return_value="ACTIVE") # Default to ACTIVE for tests
-    mocker.patch('app.dataload.item_loader.get_order_limit_for_combination', return_value=5)
-    mocker.patch('app.dataload.item_loader.get_package_size_length_for_combination', return_value=10.0)
-    mocker.patch('app.dataload.item_loader.get_package_size_width_for_combination', return_value=10.0)
-    mocker.patch('app.dataload.item_loader.get_package_size_height_for_combination', return_value=10.0)
-    mocker.patch('app.dataload.item_loader.get_package_weight_for_combination', return_value=0.5)
     mocker.patch('app.dataload.item_loader.parse_product_level_images', return_value=[
         {'url': 'http://example.com/img1.jpg', 'main_image': True}
     ]) # Mock for image parsing utility
@@ -120,71 +116,86 @@ def test_load_item_record_db_success_path(
     mock_parse_combo.return_value = mock_parsed_attr_values_by_type
     mock_gen_variants.return_value = mock_all_sku_variants
     
-    # Mock ProductOrm query to return an object with an 'id' attribute
+    # Mock the product id lookup to return a row with an 'id' attribute
     mock_product_orm_instance = MagicMock()
     mock_product_orm_instance.id = 1 # Product ID
-    mock_db_session.query(ProductOrm.id).filter().one_or_none.return_value = mock_product_orm_instance
+    mock_db_session.execute.return_value.one_or_none.return_value = mock_product_orm_instance
     
     mock_lookup_attr_ids.return_value = {'color': 10, 'size': 20}
     mock_lookup_val_ids.return_value = {
         ('color', 'Black'): 101, ('color', 'White'): 102,
         ('size', 'S'): 201, ('size', 'M'): 202
     }
-    mock_barcode_helper_module.generate_barcode_image.return_value = b"barcode_bytes"
-    mock_barcode_helper_module.encode_barcode_to_base64.return_value = "base64string"
-
-    mock_id_counter = itertools.count(start=1001)
-    
-    # Capture added instances to inspect them
-    added_instances_capture = []
-    def assign_id_and_capture(instance):
-        instance.id = next(mock_id_counter)
-        added_instances_capture.append(instance)
+    # Existing SKUs of the product by attribute value signature: (sku_id, main_sku_id)
+    sku_index = {
+        frozenset({101, 201}): (2001, 1001), frozenset({101, 202}): (2002, 1002),
+        frozenset({102, 201}): (2003, 1003), frozenset({102, 202}): (2004, 1004),
+    }
+    mock_db_session.execute.return_value.scalars.return_value = [1001]  # the default MainSKU
+    sku_updates = BulkUpdates()
 
-    mock_db_session.add.side_effect = assign_id_and_capture
-    
-    created_main_sku_ids = load_item_record_to_db(mock_db_session, 1, sample_item_csv_model, 99)
+    processed_main_sku_ids = load_item_record_to_db(
+        mock_db_session, 1, sample_item_csv_model, 99, sku_index=sku_index, sku_updates=sku_updates
+    )
 
-    assert mock_db_session.query(ProductOrm.id).filter().one_or_none.call_count == 1
+    assert mock_db_session.execute.return_value.one_or_none.call_count == 1
     mock_parse_attrs.assert_called_once_with(sample_item_csv_model.attributes)
     mock_parse_combo.assert_called_once_with(sample_item_csv_model.attribute_combination, mock_parsed_attributes)
     mock_gen_variants.assert_called_once_with(mock_parsed_attr_values_by_type, mock_parsed_attributes)
-    
-    assert len(created_main_sku_ids) == 4 
 
-    # Expected adds: 4 MainSku, 4 Sku, 8 ProductVariant, 1 ProductImage
-    assert mock_db_session.add.call_count == 17 
-    assert mock_db_session.flush.call_count == (4 + 4 + 8) # After each MainSku, Sku, ProductVariant
+    assert processed_main_sku_ids == [1001, 1002, 1003, 1004]
+    # MainSku/Sku changes are handed to the batch's bulk updates, not made on loaded ORM objects.
+    main_sku_rows = sku_updates.rows(MainSkuOrm)
+    assert [r["id"] for r in main_sku_rows] == [1001, 1002, 1003, 1004]
+    assert [r["id"] for r in sku_updates.rows(SkuOrm)] == [2001, 2002, 2003, 2004]
+    assert main_sku_rows[0] == {
+        "id": 1001, "price": 10.0, "discount_price": None, "quantity": 100, "active": "ACTIVE",
+        "order_limit": 10, "package_size_length": 30.0, "package_size_width": 20.0, "package_size_height": 10.0,
+        "package_weight": 0.5, "updated_by": 99, "updated_date": 1234567890000,
+    }
+    # Per main attribute value: White's status and order limit
+    assert (main_sku_rows[3]["price"], main_sku_rows[3]["active"], main_sku_rows[3]["order_limit"]) == (22.0, "INACTIVE", 5)
+    mock_db_session.flush.assert_not_called()
 
-    assert mock_barcode_helper_module.generate_barcode_image.call_count == 8 
-    assert mock_barcode_helper_module.encode_barcode_to_base64.call_count == 8
-    
-    # Check first_main_sku_id_for_images (Black,S is the first default variant)
-    # The MainSku for (Black,S) should be the first MainSkuOrm created.
-    # Its ID will be 1001 if it's the first object to get an ID from mock_id_counter.
-    # We need to ensure MainSkuOrm instances are created before SkuOrm or ProductVariantOrm in the loop for this to hold.
-    # Based on current load_item_record_to_db, MainSkuOrm is created first in the loop.
-    first_main_sku_instance = next(inst for inst in added_instances_capture if isinstance(inst, MainSkuOrm) and inst.is_default)
-    
-    image_orm_instance = next(inst for inst in added_instances_capture if isinstance(inst, ProductImageOrm))
-    assert image_orm_instance.main_sku_id == first_main_sku_instance.id
+    # Images go to the first default MainSKU
+    (image_orm_instance,) = [c.args[0] for c in mock_db_session.add.call_args_list]
+    assert isinstance(image_orm_instance, ProductImageOrm)
+    assert image_orm_instance.main_sku_id == 1001
 
 
 def test_load_item_record_db_product_not_found(mock_db_session, sample_item_csv_model, mock_all_data_extractors):
-    mock_db_session.query(ProductOrm.id).filter().one_or_none.return_value = None
+    mock_db_session.execute.return_value.one_or_none.return_value = None
     with pytest.raises(DataLoaderError, match="Product 'Test Product Alpha' not found"):
         load_item_record_to_db(mock_db_session, 1, sample_item_csv_model, 99)
 
+def test_load_item_record_db_uses_the_batch_product_ids(mock_db_session, sample_item_csv_model, mock_all_data_extractors):
+    with pytest.raises(DataLoaderError, match="Product 'Test Product Alpha' not found"):
+        load_item_record_to_db(mock_db_session, 1, sample_item_csv_model, 99, product_ids_by_name={"Other": 3})
+    # The batch already resolved its product names; no per-row product query.
+    mock_db_session.execute.assert_not_called()
+
 @patch('app.dataload.item_loader.parse_attributes_string', side_effect=ItemParserError("Test parse error"))
 def test_load_item_record_db_parser_error(mock_parse_attrs_func, mock_db_session, sample_item_csv_model, mock_all_data_extractors):
-    # Mock ProductOrm query to return an object with an 'id' attribute
+    # Mock the product id lookup to return a row with an 'id' attribute
     mock_product_orm_instance = MagicMock()
     mock_product_orm_instance.id = 1 # Product ID
-    mock_db_session.query(ProductOrm.id).filter().one_or_none.return_value = mock_product_orm_instance
+    mock_db_session.execute.return_value.one_or_none.return_value = mock_product_orm_instance
     
     with pytest.raises(DataLoaderError, match="Error parsing item CSV structure.*Test parse error"):
         load_item_record_to_db(mock_db_session, 1, sample_item_csv_model, 99)
 
+def test_lookup_attribute_ids_reports_missing_names_from_shared_maps(mock_db_session):
+    color_row = MagicMock()
+    color_row.id, color_row.name_key = 10, 'color'
+    mock_db_session.execute.return_value = [color_row]
+    maps = AttributeMaps().load_attributes(mock_db_session, 1, ['color', 'Weight'])
+    mock_db_session.execute.reset_mock()
+
+    assert _lookup_attribute_ids(mock_db_session, 1, ['Color'], maps) == {'Color': 10}
+    with pytest.raises(DataLoaderError, match="Attributes not found for business 1: weight"):
+        _lookup_attribute_ids(mock_db_session, 1, ['color', 'weight'], maps)
+    mock_db_session.execute.assert_not_called()
+
 # --- Tests for load_items_to_db (Batch loader) ---
 
 @patch('app.dataload.item_loader.load_item_record_to_db')
@@ -198,27 +209,68 @@ def test_load_items_to_db_success(mock_load_record_func, mock_db_session, sample
     assert summary["csv_rows_with_errors"] == 0
     assert summary["total_main_skus_created_or_updated"] == 4 
     assert mock_load_record_func.call_count == 2
-    assert mock_db_session.begin_nested.call_count == 2
+    assert mock_db_session.begin_nested.call_count == 1 # One savepoint for the whole batch, not one per row
     # Access the savepoint mock object returned by begin_nested() to check its methods
-    mock_db_session.begin_nested().commit.assert_called_with() # Check commit on the savepoint object
-    assert mock_db_session.begin_nested().commit.call_count == 2 
+    mock_db_session.begin_nested().commit.assert_called_once_with() # Check commit on the savepoint object
     assert mock_db_session.begin_nested().rollback.call_count == 0
 
 
 @patch('app.dataload.item_loader.load_item_record_to_db')
 def test_load_items_to_db_partial_failure(mock_load_record_func, mock_db_session, sample_item_csv_row_dict, mock_all_data_extractors):
-    mock_load_record_func.side_effect = [[101, 102], DataLoaderError("Simulated error", ErrorType.VALIDATION)]
+    error = DataLoaderError("Simulated error", ErrorType.LOOKUP, field_name="product_name", offending_value="X")
+    # A lookup failure skips its row without failing the batch's savepoint.
+    mock_load_record_func.side_effect = [[101, 102], error]
     item_records = [sample_item_csv_row_dict, sample_item_csv_row_dict]
     
-    summary = load_items_to_db(mock_db_session, 1, item_records, "test_session_02", 99)
+    summary = load_items_to_db(mock_db_session, 1, item_records, "test_session_02", 99, row_numbers=[41, 42])
 
     assert summary["csv_rows_processed"] == 2
     assert summary["csv_rows_with_errors"] == 1
+    (row_error,) = summary["errors_list"]
+    assert (row_error.row_number, row_error.field_name, row_error.error_message, row_error.error_type, row_error.offending_value) == (
+        42, "product_name", "Simulated error", ErrorType.LOOKUP.value, "X"
+    )
     assert summary["total_main_skus_created_or_updated"] == 2 
     assert mock_load_record_func.call_count == 2
-    assert mock_db_session.begin_nested.call_count == 2
-    mock_db_session.begin_nested().commit.assert_called_once() 
-    mock_db_session.begin_nested().rollback.assert_called_once()
+    mock_db_session.begin_nested.assert_called_once()
+    mock_db_session.begin_nested().commit.assert_called_once()
+    mock_db_session.begin_nested().rollback.assert_not_called()
+
+
+@patch('app.dataload.item_loader.load_item_record_to_db')
+def test_load_items_to_db_bisects_database_failures(mock_load_record_func, mock_db_session, sample_item_csv_row_dict, mock_all_data_extractors):
+    error = IntegrityError("UPDATE main_sku", {}, Exception("duplicate key"))
+    # The batch fails at row 2, then the halves are retried: row 1 alone succeeds, row 2 alone fails.
+    mock_load_record_func.side_effect = [[101, 102], error, [101, 102], error]
+    item_records = [sample_item_csv_row_dict, sample_item_csv_row_dict]
+
+    summary = load_items_to_db(mock_db_session, 1, item_records, "test_session_05", 99, row_numbers=[41, 42])
+
+    assert summary["csv_rows_with_errors"] == 1
+    (row_error,) = summary["errors_list"]
+    assert (row_error.row_number, row_error.error_type) == (42, ErrorType.DATABASE.value)
+    assert summary["total_main_skus_created_or_updated"] == 2
+    assert mock_load_record_func.call_count == 4
+    assert mock_db_session.begin_nested.call_count == 3
+    assert mock_db_session.begin_nested().rollback.call_count == 2
+
+
+@patch('app.dataload.item_loader.load_sku_signature_index')
+@patch('app.dataload.item_loader.load_item_record_to_db')
+def test_load_items_to_db_loads_sku_indexes_once_per_batch(mock_load_record_func, mock_load_index, mock_db_session, sample_item_csv_row_dict, mock_all_data_extractors):
+    mock_load_record_func.return_value = [101]
+    product_row = MagicMock()
+    product_row.name, product_row.id = sample_item_csv_row_dict['product_name'], 1
+    mock_db_session.execute.return_value = [product_row]
+    sku_index = {frozenset({101, 201}): (5, 6)}
+    mock_load_index.return_value = {1: sku_index}
+
+    load_items_to_db(mock_db_session, 1, [sample_item_csv_row_dict, sample_item_csv_row_dict], "test_session_04", 99)
+
+    mock_load_index.assert_called_once()
+    assert list(mock_load_index.call_args.args[1]) == [1]
+    assert [c.kwargs['sku_index'] for c in mock_load_record_func.call_args_list] == [sku_index, sku_index]
+    assert mock_load_record_func.call_args.kwargs['product_ids_by_name'] == {sample_item_csv_row_dict['product_name']: 1}
 
 
 def test_load_items_to_db_pydantic_validation_error(mock_db_session, sample_item_csv_row_dict, mock_all_data_extractors):
@@ -231,5 +283,7 @@ def test_load_items_to_db_pydantic_validation_error(mock_db_session, sample_item
     assert summary["csv_rows_processed"] == 1
     assert summary["csv_rows_with_errors"] == 1
     assert summary["total_main_skus_created_or_updated"] == 0
+    (row_error,) = summary["errors_list"]
+    assert (row_error.row_number, row_error.field_name, row_error.error_type) == (2, "product_name", ErrorType.VALIDATION.value)
     # begin_nested should not be called if pydantic validation fails for the row itself
     assert mock_db_session.begin_nested.call_count == 0
@@ -7,7 +7,8 @@ from app.dataload.product_loader import (
     load_product_record_to_db_refactored, # Target function for new tests
     parse_images, 
     parse_specifications,
-    get_category_by_full_path_from_db # Might need to mock or use for setup
+    get_category_by_full_path_from_db, # Might need to mock or use for setup
+    get_return_policies_by_name_from_db2,
 )
 from app.db.models import (
     ProductOrm, BrandOrm, CategoryOrm, ReturnPolicyOrm, ShoppingCategoryOrm,
@@ -429,8 +430,8 @@ def test_load_product_refactored_new_product_creation_scenarios( # Renamed for c
     # 1. Brand lookup: Assume brand exists
     mock_brand = BrandOrm(id=1, name=mock_product_csv_model.brand_name, business_details_id=business_details_id)
     # How queries are mocked depends on mock_db_session_for_loader setup
-    # If filter_by returns the query object, then one_or_none is on that:
-    mock_db_session_for_loader.query(BrandOrm).filter_by().one_or_none.return_value = mock_brand
+    # Brand and product lookups run prebuilt statements through db.execute, in that order.
+    mock_db_session_for_loader.execute.return_value.scalar_one_or_none.side_effect = [mock_brand, None]
     
     # 2. Category is pre-resolved (mock_pre_resolved_category)
     #    Leaf node check for category: Assume it's a leaf node
@@ -461,12 +462,8 @@ def test_load_product_refactored_new_product_creation_scenarios( # Renamed for c
     with patch('app.dataload.product_loader.get_session') as mock_get_db2_session:
         mock_get_db2_session.return_value = mock_db2_session
 
-        # 5. Product lookup (for upsert): Assume product does not exist (is_new = True)
-        # Lookup is by name and business_details_id
-        mock_db_session_for_loader.query(ProductOrm).filter_by(
-            name=mock_product_csv_model.product_name, # Changed to name
-            business_details_id=business_details_id
-        ).one_or_none.return_value = None
+        # 5. Product lookup (for upsert): Assume product does not exist (is_new = True);
+        #    the second scalar_one_or_none result set up with the brand above.
 
         # --- Mocking ID generation on flush ---
         # ProductOrm instance will be created. Mock 'add' to capture it.
@@ -498,7 +495,8 @@ def test_load_product_refactored_new_product_creation_scenarios( # Renamed for c
             product_data=mock_product_csv_model,
             session_id="test_session_123", # session_id is not used by this specific function for core logic
             user_id=user_id,
-            pre_resolved_category=mock_pre_resolved_category
+            pre_resolved_category=mock_pre_resolved_category,
+            pre_resolved_return_policy=mock_db2_query_obj.one_or_none.return_value
         )
 
     # --- Assertions ---
@@ -661,7 +659,7 @@ def test_load_product_refactored_update_product_no_id_change(
 
     # Mock DB Lookups
     mock_brand = BrandOrm(id=1, name="OmegaBrand", business_details_id=business_details_id)
-    mock_db_session_for_loader.query(BrandOrm).filter_by().one_or_none.return_value = mock_brand
+    mock_db_session_for_loader.execute.return_value.scalar_one_or_none.side_effect = [mock_brand, existing_product_orm]
     mock_db_session_for_loader.query(CategoryOrm.id).filter().first.return_value = None 
     mock_db_session_for_loader.query(ShoppingCategoryOrm).filter_by().one_or_none.return_value = None
         
@@ -672,11 +670,6 @@ def test_load_product_refactored_update_product_no_id_change(
     mock_db2_query_obj.filter.return_value.one_or_none.return_value = mock_rp
     mock_get_db2_session.return_value = mock_db2_session
 
-    mock_db_session_for_loader.query(ProductOrm).filter_by(
-        name=original_product_name, 
-        business_details_id=business_details_id
-    ).one_or_none.return_value = existing_product_orm
-
     update_csv_data_dict = get_valid_product_csv_data_for_update_test(
         product_name=original_product_name, 
         description="Updated fantastic omega product.",
@@ -696,7 +689,8 @@ def test_load_product_refactored_update_product_no_id_change(
         product_data=product_csv_model_for_update,
         session_id="test_session_update_123",
         user_id=user_id, 
-        pre_resolved_category=mock_pre_resolved_category
+        pre_resolved_category=mock_pre_resolved_category,
+        pre_resolved_return_policy=mock_rp
     )
 
     assert updated_product_id == original_product_id 
@@ -727,3 +721,25 @@ def test_load_product_refactored_update_product_no_id_change(
         assert history_entry.sale_price == product_csv_model_for_update.sale_price # new sale price (None in this case)
         
     mock_db_session_for_loader.flush.assert_called()
+
+
+# --- Batch return policy resolution (DB2) ---
+
+@patch('app.dataload.product_loader.get_session')
+def test_return_policies_resolved_with_one_db2_query(mock_get_session):
+    mock_db2_session = mock_get_session.return_value
+    found = ReturnPolicyOrm(id=7, policy_name="Standard 30 Day", business_details_id=1)
+    mock_db2_session.query.return_value.filter.return_value.all.return_value = [found]
+
+    resolved = get_return_policies_by_name_from_db2(1, {"Standard 30 Day", "Unknown"})
+
+    assert resolved == {"Standard 30 Day": found}
+    mock_get_session.assert_called_once_with(business_id=1, db_key="DB2")
+    mock_db2_session.query.return_value.filter.return_value.all.assert_called_once()
+    mock_db2_session.close.assert_called_once()
+
+
+@patch('app.dataload.product_loader.get_session')
+def test_no_db2_session_without_return_policies(mock_get_session):
+    assert get_return_policies_by_name_from_db2(1, set()) == {}
+    mock_get_session.assert_not_called()
@@ -0,0 +1,28 @@
+from unittest.mock import patch
+
+import pytest
+
+from app.db import async_connection
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(async_connection, "_async_engines", {})
+    monkeypatch.setattr(async_connection, "_async_session_factories", {})
+
+
+def test_async_engine_uses_asyncpg_pool_settings_and_startup_search_path(monkeypatch):
+    monkeypatch.setattr(async_connection.settings, "DATABASE_URL", "postgresql://u:p@h/db")
+
+    with patch("app.db.async_connection.create_async_engine") as create_async_engine:
+        first = async_connection.get_async_engine()
+        second = async_connection.get_async_engine("default")
+
+    create_async_engine.assert_called_once()
+    assert first is second
+    url = create_async_engine.call_args.args[0]
+    kwargs = create_async_engine.call_args.kwargs
+    assert url.drivername == "postgresql+asyncpg"
+    assert url.database == "db"
+    assert kwargs["pool_size"] == async_connection.settings.DB_POOL_SIZE
+    assert kwargs["connect_args"]["server_settings"]["search_path"].endswith("public")
@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.orm import Session
+
+from app.db.batch_isolation import load_isolating_failures
+
+metadata = MetaData()
+names = Table("names", metadata, Column("id", Integer, primary_key=True), Column("name", String, unique=True))
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(names), [{"id": 1, "name": "taken"}])
+        yield session
+
+
+def _write(db, segments):
+    def write(rows, reject):
+        segments.append(list(rows))
+        written = 0
+        for index, row in enumerate(rows):
+            if row == "bad":  # fails its lookup, before anything is written for it
+                reject(index, ValueError("bad row"))
+                continue
+            db.execute(insert(names).values(name=row))
+            written += 1
+        return written
+    return write
+
+
+def test_clean_batch_is_written_in_one_attempt(db):
+    segments = []
+
+    results, failures = load_isolating_failures(db, ["a", "b", "c"], _write(db, segments))
+
+    assert (results, failures, segments) == ([3], [], [["a", "b", "c"]])
+
+
+def test_rejected_rows_do_not_fail_the_batch(db):
+    segments = []
+
+    results, failures = load_isolating_failures(db, ["bad", "a", "bad", "b"], _write(db, segments))
+
+    assert [(index, str(exc)) for index, exc in failures] == [(0, "bad row"), (2, "bad row")]
+    assert results == [2]
+    assert segments == [["bad", "a", "bad", "b"]]
+
+
+def test_failing_rows_are_isolated_and_the_rest_written(db):
+    rows = ["a", "bad", "c", "d", "taken", "f"]
+
+    results, failures = load_isolating_failures(db, rows, _write(db, []))
+
+    assert [(index, type(exc).__name__) for index, exc in failures] == [(1, "ValueError"), (4, "IntegrityError")]
+    assert sum(results) == 4
+    assert db.scalars(select(names.c.name).order_by(names.c.id)).all() == ["taken", "a", "c", "d", "f"]
@@ -0,0 +1,107 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, select, text
+from sqlalchemy.orm import Session
+
+from app.db.bulk_copy import BulkRows, _CopyStream, copy_rows, copy_text_value, create_staging_table
+from app.db.models import PriceOrm
+from app.services.query_stats import collect_query_stats
+
+metadata = MetaData()
+widgets = Table(
+    "widgets", metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("name", String),
+    Column("colour", String, server_default=text("'grey'")),
+)
+
+
+def _sqlite_session():
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    return Session(engine)
+
+
+def test_copy_text_escapes_and_nulls():
+    assert copy_text_value(None) == "\\N"
+    assert copy_text_value(True) == "t"
+    assert copy_text_value("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
+
+
+def test_copy_stream_reads_lines_lazily_in_chunks():
+    lines = iter(["ab\n", "cd\n", "ef\n"])
+    stream = _CopyStream(lines)
+
+    assert stream.read(4) == "ab\nc"
+    assert next(lines) == "ef\n"  # the third line has not been pulled yet
+    assert stream.read(10) == "d\n"
+    assert stream.read(10) == ""
+
+
+def _postgres_session():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+    db.get_bind.return_value.dialect.driver = "psycopg2"
+    db.get_bind.return_value.dialect.identifier_preparer.format_table.return_value = "catalog.prices"
+    db.get_bind.return_value.dialect.identifier_preparer.quote.side_effect = lambda name: name
+    return db
+
+
+def test_postgres_rows_go_through_one_copy():
+    db = _postgres_session()
+    cursor = db.connection.return_value.connection.driver_connection.cursor.return_value.__enter__.return_value
+    payloads = []
+    cursor.copy_expert.side_effect = lambda sql, stream: payloads.append(stream.read())
+
+    written = copy_rows(db, PriceOrm, [
+        {"business_details_id": 1, "product_id": 5, "price": 9.5, "currency": "USD"},
+        {"business_details_id": 1, "product_id": 6, "price": 3.0, "currency": None},
+    ])
+
+    assert written == 2
+    db.flush.assert_called_once()
+    sql = cursor.copy_expert.call_args.args[0]
+    assert sql == "COPY catalog.prices (business_details_id, product_id, price, currency) FROM STDIN"
+    assert payloads == ["1\t5\t9.5\tUSD\n1\t6\t3.0\t\\N\n"]
+    db.execute.assert_not_called()
+
+
+def test_copy_is_counted_in_query_stats():
+    db = _postgres_session()
+
+    with collect_query_stats() as stats:
+        copy_rows(db, PriceOrm, [{"business_details_id": 1, "product_id": 5}, {"business_details_id": 1, "product_id": 6}])
+
+    assert stats.count("COPY catalog.prices") == 1
+    assert stats.copied_rows == 2
+
+
+def test_other_drivers_fall_back_to_executemany_and_keep_server_defaults():
+    db = _sqlite_session()
+
+    assert copy_rows(db, widgets, [{"name": "a"}, {"name": "b"}]) == 2
+
+    assert db.execute(select(widgets.c.name, widgets.c.colour).order_by(widgets.c.id)).all() == [("a", "grey"), ("b", "grey")]
+
+
+def test_staging_table_takes_copied_rows():
+    db = _sqlite_session()
+
+    staging = create_staging_table(db, widgets, "sess-1", columns=["id", "name"])
+    copy_rows(db, staging, [{"id": 1, "name": "a"}])
+
+    assert staging.name == "stg_widgets_sess1"
+    assert db.execute(select(staging)).all() == [(1, "a")]
+
+
+def test_bulk_rows_discard_and_flush_per_target():
+    db = _sqlite_session()
+    rows = BulkRows()
+    rows.add(widgets, name="old", colour="red")
+    rows.add(widgets, name="keep", colour="blue")
+    rows.discard(widgets, colour="red")
+
+    assert len(rows) == 1
+    assert rows.flush(db) == 1
+    assert len(rows) == 0
+    assert db.execute(select(widgets.c.name)).scalars().all() == ["keep"]
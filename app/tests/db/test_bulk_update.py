@@ -0,0 +1,42 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from app.db.bulk_update import BulkUpdates, update_rows
+from app.db.models import SkuOrm
+
+
+def test_update_rows_updates_by_primary_key_without_loading_objects():
+    engine = create_engine("sqlite://").execution_options(schema_translate_map={"public": None})
+    SkuOrm.__table__.create(engine)
+    with Session(engine) as db:
+        db.execute(insert(SkuOrm), [
+            {"id": 1, "product_id": 5, "main_sku_id": 1, "price": 1.0, "quantity": 1},
+            {"id": 2, "product_id": 5, "main_sku_id": 2, "price": 2.0, "quantity": 2},
+            {"id": 3, "product_id": 5, "main_sku_id": 3, "price": 3.0, "quantity": 3},
+        ])
+        updates = BulkUpdates()
+        updates.add(SkuOrm, 1, price=9.0, quantity=None)
+        updates.add(SkuOrm, 3, price=5.0, quantity=30)
+        updates.add(SkuOrm, 3, price=7.0, quantity=70)  # a later update of the same row wins
+
+        assert updates.flush(db) == 2
+        assert len(db.identity_map) == 0
+        rows = db.execute(select(SkuOrm.id, SkuOrm.price, SkuOrm.quantity).order_by(SkuOrm.id)).all()
+
+    assert [tuple(r) for r in rows] == [(1, 9.0, None), (2, 2.0, 2), (3, 7.0, 70)]
+
+
+def test_update_rows_joins_a_values_list_on_postgresql():
+    db = MagicMock()
+    db.get_bind.return_value.dialect.name = "postgresql"
+
+    update_rows(db, SkuOrm, [{"id": 1, "price": 9.0, "quantity": None}, {"id": 2, "price": 8.0, "quantity": None}])
+
+    (stmt,) = db.execute.call_args.args
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "UPDATE public.sku SET price=CAST(v.price AS FLOAT), quantity=CAST(v.quantity AS INTEGER)" in sql
+    assert "FROM (VALUES" in sql and "AS v (id, price, quantity)" in sql
+    assert "WHERE public.sku.id = CAST(v.id AS BIGINT)" in sql
@@ -0,0 +1,58 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.db import connection
+
+
+@pytest.fixture(autouse=True)
+def empty_caches(monkeypatch):
+    monkeypatch.setattr(connection, "_engines", {})
+    monkeypatch.setattr(connection, "_session_factories", {})
+
+
+def test_engines_use_pool_settings_with_per_engine_overrides(monkeypatch):
+    monkeypatch.setattr(connection.settings, "DATABASE_URL_DB2", "postgresql://u:p@h/db2")
+    monkeypatch.setattr(connection.settings, "DB_POOL_OVERRIDES", {"DB2": {"pool_size": 2}})
+
+    with patch("app.db.connection.create_engine") as create_engine, patch("app.db.connection.event.listen") as listen:
+        connection.get_engine()
+        connection.get_engine("DB2")
+        connection.get_engine("default")
+
+    assert create_engine.call_count == 2
+    default_kwargs, db2_kwargs = (c.kwargs for c in create_engine.call_args_list)
+    assert default_kwargs["pool_size"] == connection.settings.DB_POOL_SIZE
+    assert db2_kwargs["pool_size"] == 2
+    assert db2_kwargs["max_overflow"] == connection.settings.DB_MAX_OVERFLOW
+    assert [c.args[1] for c in listen.call_args_list] == ["connect", "connect"]
+
+
+def test_sessions_come_from_one_cached_factory_without_a_round_trip():
+    with patch("app.db.connection.create_engine"), patch("app.db.connection.event.listen"), \
+         patch("app.db.connection.sessionmaker") as sessionmaker:
+        first = connection.get_session(1)
+        second = connection.get_session(2, db_key="default")
+
+    sessionmaker.assert_called_once()
+    assert first is second is sessionmaker.return_value.return_value
+    first.execute.assert_not_called()
+
+
+def test_search_path_is_set_once_per_connection_in_autocommit():
+    dbapi_connection = MagicMock(autocommit=False)
+
+    connection._set_search_path(dbapi_connection, None)
+
+    sql = dbapi_connection.cursor.return_value.execute.call_args.args[0]
+    assert sql.startswith("SET SESSION search_path TO ") and sql.endswith("public")
+    assert dbapi_connection.autocommit is False
+
+
+def test_dispose_engines_keeps_the_parents_connections_open():
+    engine = MagicMock()
+    connection._engines["default"] = engine
+
+    connection.dispose_engines()
+
+    engine.dispose.assert_called_once_with(close=False)
@@ -0,0 +1,133 @@
+import os
+import time
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.orm import Session
+
+from app.dataload.item_loader import AttributeMaps, load_sku_signature_index
+from app.db.lookups import PRODUCT_ID_BY_NAME
+from app.db.models import AttributeOrm, AttributeValueOrm, ProductOrm, ProductVariantOrm, SkuOrm
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://").execution_options(
+        schema_translate_map={"public": None, "catalog_management": None}
+    )
+    for model in (ProductOrm, AttributeOrm, AttributeValueOrm, SkuOrm, ProductVariantOrm):
+        model.__table__.create(engine)
+    with engine.begin() as conn:
+        conn.execute(insert(ProductOrm), [{
+            "id": 5, "business_details_id": 7, "name": "Tee", "barcode": "b", "description": "d",
+            "self_gen_product_id": "000000005", "category_id": 1,
+        }])
+        conn.execute(insert(AttributeOrm), [
+            {"id": 1, "business_details_id": 7, "name": "Color", "is_color": True},
+            {"id": 2, "business_details_id": 7, "name": "Size", "is_color": False},
+        ])
+        conn.execute(insert(AttributeValueOrm), [
+            {"id": 11, "attribute_id": 1, "value": "black", "name": "Black"},
+            {"id": 21, "attribute_id": 2, "value": "s", "name": "S"},
+            {"id": 22, "attribute_id": 2, "value": "m", "name": "M"},
+        ])
+        conn.execute(insert(SkuOrm), [
+            {"id": 100, "product_id": 5, "main_sku_id": 100},  # Black + S
+            {"id": 101, "product_id": 5, "main_sku_id": 101},  # Black + M
+            {"id": 102, "product_id": 5, "main_sku_id": 102},  # Black only
+        ])
+        conn.execute(insert(ProductVariantOrm), [
+            {"id": 1, "sku_id": 100, "main_sku_id": 100, "attribute_id": 1, "attribute_value_id": 11},
+            {"id": 2, "sku_id": 100, "main_sku_id": 100, "attribute_id": 2, "attribute_value_id": 21},
+            {"id": 3, "sku_id": 101, "main_sku_id": 101, "attribute_id": 1, "attribute_value_id": 11},
+            {"id": 4, "sku_id": 101, "main_sku_id": 101, "attribute_id": 2, "attribute_value_id": 22},
+            {"id": 5, "sku_id": 102, "main_sku_id": 102, "attribute_id": 1, "attribute_value_id": 11},
+        ])
+    return engine
+
+
+def _cache_hits(engine):
+    hits = []
+    event.listen(engine, "after_cursor_execute",
+                 lambda conn, cursor, statement, params, context, many: hits.append(context.cache_hit == CACHE_HIT))
+    return hits
+
+
+def test_product_lookup_reuses_the_compiled_statement(engine):
+    hits = _cache_hits(engine)
+    with Session(engine) as db:
+        db.connection()  # the session's connection setup stays out of the cache count below
+        cache = engine._compiled_cache
+        entries_before = len(cache)
+        ids = [db.execute(PRODUCT_ID_BY_NAME, {"name": name, "business_details_id": 7}).scalar()
+               for name in ("Tee", "Tee", "Hat")]
+
+    assert ids == [5, 5, None]
+    assert hits[1:] == [True, True]
+    # One compiled form serves every parameter value.
+    assert len(cache) == entries_before + 1
+
+
+def test_attribute_maps_resolve_names_in_sets_and_remember_misses(engine, query_stats):
+    with Session(engine) as db:
+        maps = AttributeMaps().load_attributes(db, 7, ["color", "SIZE", "Weight"])
+        maps.load_values(db, [(1, "black"), (2, "m"), (2, "XL")])
+        maps.load_attributes(db, 7, ["Color", "weight"])
+        maps.load_values(db, [(2, "M"), (2, "xl")])
+
+    assert [maps.attribute_id(name) for name in ("Color", "size", "weight")] == [1, 2, None]
+    assert maps.value_ids(1, "Black") == [11]
+    assert maps.value_ids(2, "M") == [22]
+    assert maps.value_ids(2, "XL") == []
+    assert query_stats.count() == 2
+
+
+def test_sku_signature_index_keys_each_sku_by_its_exact_attribute_values(engine):
+    with Session(engine) as db:
+        indexes = load_sku_signature_index(db, [5, 6])
+
+    assert indexes == {
+        5: {
+            frozenset({11, 21}): (100, 100),
+            frozenset({11, 22}): (101, 101),
+            frozenset({11}): (102, 102),
+        },
+        6: {},
+    }
+    assert frozenset({21}) not in indexes[5]
+
+
+
+def _best_per_call(run, calls=200, repeats=5):
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in range(calls):
+            run()
+        best = min(best, time.perf_counter() - started)
+    return best / calls
+
+
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="microbenchmark; set RUN_BENCHMARKS=1 to run it")
+def test_product_lookup_per_call_overhead(engine, record_property):
+    """
+    Microbenchmark: the per-row ``db.query(...).filter(...)`` the loaders used vs. the
+    prebuilt statement. Reports both per-call times (JUnit properties) and asserts
+    nothing about them; test_product_lookup_reuses_the_compiled_statement gates CI.
+    """
+    with Session(engine) as db:
+        def ad_hoc():
+            return db.query(ProductOrm.id).filter(
+                ProductOrm.name == "Tee",
+                ProductOrm.business_details_id == 7,
+            ).one_or_none()
+
+        def prebuilt():
+            return db.execute(PRODUCT_ID_BY_NAME, {"name": "Tee", "business_details_id": 7}).one_or_none()
+
+        assert ad_hoc()[0] == prebuilt()[0] == 5  # also warms both compiled-cache entries
+        before, after = _best_per_call(ad_hoc), _best_per_call(prebuilt)
+
+    record_property("ad_hoc_query_us_per_call", round(before * 1e6, 1))
+    record_property("prebuilt_statement_us_per_call", round(after * 1e6, 1))
@@ -0,0 +1,62 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from app.db import replica
+
+
+@pytest.fixture(autouse=True)
+def fresh_guard(monkeypatch):
+    monkeypatch.setattr(replica, "_guard", None)
+    monkeypatch.setattr(replica.settings, "DATABASE_URL_REPLICA", "postgresql://u:p@replica/db")
+    monkeypatch.setattr(replica.settings, "REPLICA_MAX_LAG_SECONDS", 5.0)
+
+
+def _replica_engine(*lags):
+    engine = MagicMock()
+    conn = engine.connect.return_value.__enter__.return_value
+    conn.execute.return_value.scalar.side_effect = lags
+    return engine
+
+
+def test_reads_use_the_primary_when_no_replica_is_configured(monkeypatch):
+    monkeypatch.setattr(replica.settings, "DATABASE_URL_REPLICA", None)
+
+    with patch("app.db.replica.get_engine") as get_engine:
+        assert replica.read_db_key() is None
+
+    get_engine.assert_not_called()
+
+
+def test_lag_is_measured_once_per_check_interval(monkeypatch):
+    monkeypatch.setattr(replica.settings, "REPLICA_LAG_CHECK_SECONDS", 60.0)
+    engine = _replica_engine(0.5)
+
+    with patch("app.db.replica.get_engine", return_value=engine):
+        assert replica.read_db_key() == "REPLICA"
+        assert replica.read_db_key() == "REPLICA"
+
+    engine.connect.assert_called_once()
+
+
+def test_lagging_or_unreachable_replica_sends_reads_to_the_primary(monkeypatch):
+    monkeypatch.setattr(replica.settings, "REPLICA_LAG_CHECK_SECONDS", 0.0)
+    engine = _replica_engine(30.0, 1.0)
+
+    with patch("app.db.replica.get_engine", return_value=engine):
+        assert replica.read_db_key() is None
+        assert replica.read_db_key() == "REPLICA"
+        engine.connect.side_effect = OSError("replica down")
+        assert replica.read_db_key() is None
+
+
+def test_guard_trusts_a_measurement_for_the_check_interval():
+    now = [100.0]
+    guard = replica.ReplicaLagGuard(max_lag=5.0, check_interval=10.0, clock=lambda: now[0])
+
+    assert guard.due()
+    assert guard.record(2.0) is True
+    now[0] = 109.0
+    assert not guard.due()
+    now[0] = 110.0
+    assert guard.due()
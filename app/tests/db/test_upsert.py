@@ -0,0 +1,26 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.db.models import CategoryOrm
+from app.db.upsert import upsert_returning
+
+
+def test_upsert_batches_rows_into_on_conflict_statements():
+    db = MagicMock()
+    db.execute.return_value.all.return_value = ["row"]
+    rows = [{"business_details_id": 1, "parent_id": None, "name": f"c{i}", "description": "d"} for i in range(3)]
+
+    returned = upsert_returning(
+        db, CategoryOrm, rows, ["business_details_id", "name"],
+        lambda excluded: {"description": excluded.description},
+        returning=(CategoryOrm.id,),
+        index_where=CategoryOrm.parent_id.is_(None),
+        batch_size=2,
+    )
+
+    assert returned == ["row", "row"]
+    first, second = (str(c.args[0].compile(dialect=postgresql.dialect())) for c in db.execute.call_args_list)
+    assert "ON CONFLICT (business_details_id, name) WHERE parent_id IS NULL DO UPDATE SET description = excluded.description" in first
+    assert first.endswith("RETURNING public.categories.id, xmax = 0 AS inserted")
+    assert first.count("%(name_m") == 2 and second.count("%(name_m") == 1
@@ -1,6 +1,7 @@
+import asyncio
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 from typing import Generator, Any, List
 import uuid
 from datetime import datetime
@@ -8,6 +9,8 @@ from datetime import datetime
 from app.main import app # Import the FastAPI app instance
 from app.dependencies.auth import get_current_user # Import the actual dependency
 from app.db.models import UploadSessionOrm
+from app.db.async_connection import get_async_db
+from app.db.replica import get_async_read_db
 
 # Mock user data
 MOCK_USER_BUSINESS_ID_SESSIONS = 789
@@ -31,10 +34,22 @@ def client() -> Generator[TestClient, Any, None]:
         yield c
 
 @pytest.fixture
-def mock_db_session_for_sessions(mocker: MagicMock) -> MagicMock:
-    mock_db = MagicMock()
-    mocker.patch("app.db.connection.get_session", return_value=mock_db)
-    return mock_db
+def mock_db_session_for_sessions() -> Generator[AsyncMock, Any, None]:
+    mock_db = AsyncMock()
+    mock_db.info = {"db_key": "default"}
+
+    async def override_get_async_db():
+        yield mock_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    app.dependency_overrides[get_async_read_db] = override_get_async_db
+    yield mock_db
+    app.dependency_overrides.pop(get_async_db, None)
+    app.dependency_overrides.pop(get_async_read_db, None)
+
+@pytest.fixture(autouse=True)
+def _async_db(mock_db_session_for_sessions: AsyncMock) -> AsyncMock:
+    return mock_db_session_for_sessions
 
 # --- Tests for GET /api/v1/sessions/{session_id} ---
 
@@ -58,9 +73,9 @@ def test_get_session_by_id_success(client: TestClient, mock_db_session_for_sessi
     )
 
     # Mock the internal synchronous helper function's DB interaction part
-    # The helper _get_session_by_id_sync is called via run_in_threadpool
+    # The helper _get_session_by_id is called via run_in_threadpool
     # So we mock what the helper returns after it uses the db session
-    mocker.patch("app.routes.sessions_api._get_session_by_id_sync", return_value=mock_session_orm)
+    mocker.patch("app.routes.sessions_api._get_session_by_id", return_value=mock_session_orm)
 
     response = client.get(f"/api/v1/sessions/{test_session_id}")
 
@@ -77,7 +92,7 @@ def test_get_session_by_id_not_found(client: TestClient, mock_db_session_for_ses
     app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
 
     test_session_id = str(uuid.uuid4())
-    mocker.patch("app.routes.sessions_api._get_session_by_id_sync", return_value=None) # Simulate not found
+    mocker.patch("app.routes.sessions_api._get_session_by_id", return_value=None) # Simulate not found
 
     response = client.get(f"/api/v1/sessions/{test_session_id}")
 
@@ -97,7 +112,7 @@ def test_list_sessions_success(client: TestClient, mock_db_session_for_sessions:
     ]
     mock_total_count = len(mock_sessions_list)
 
-    mocker.patch("app.routes.sessions_api._list_sessions_sync", return_value=(mock_sessions_list, mock_total_count))
+    mocker.patch("app.routes.sessions_api._list_sessions", return_value=(mock_sessions_list, mock_total_count))
 
     response = client.get("/api/v1/sessions?limit=5&skip=0")
 
@@ -113,7 +128,7 @@ def test_list_sessions_success(client: TestClient, mock_db_session_for_sessions:
 def test_list_sessions_with_status_filter(client: TestClient, mock_db_session_for_sessions: MagicMock, mocker: MagicMock):
     app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
 
-    # Simulate that the _list_sessions_sync function handles the status filter correctly
+    # Simulate that the _list_sessions function handles the status filter correctly
     # For this test, we just care that the 'status' param is passed down.
     # The mock will simulate a filtered result.
     mock_filtered_list = [
@@ -122,7 +137,7 @@ def test_list_sessions_with_status_filter(client: TestClient, mock_db_session_fo
     mock_filtered_count = 1
 
     # We need to capture args passed to the mocked sync function
-    sync_list_mock = mocker.patch("app.routes.sessions_api._list_sessions_sync", return_value=(mock_filtered_list, mock_filtered_count))
+    sync_list_mock = mocker.patch("app.routes.sessions_api._list_sessions", return_value=(mock_filtered_list, mock_filtered_count))
 
     response = client.get("/api/v1/sessions?status=pending")
 
@@ -136,14 +151,14 @@ def test_list_sessions_with_status_filter(client: TestClient, mock_db_session_fo
     # Check if the status was passed to the sync function
     sync_list_mock.assert_called_once()
     call_args = sync_list_mock.call_args[0] # Positional arguments
-    assert call_args[4] == "pending" # status is the 5th arg (0-indexed) to _list_sessions_sync
+    assert call_args[4] == "pending" # status is the 5th arg (0-indexed) to _list_sessions
 
     del app.dependency_overrides[get_current_user]
 
 def test_list_sessions_empty(client: TestClient, mock_db_session_for_sessions: MagicMock, mocker: MagicMock):
     app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
 
-    mocker.patch("app.routes.sessions_api._list_sessions_sync", return_value=([], 0)) # Simulate empty result
+    mocker.patch("app.routes.sessions_api._list_sessions", return_value=([], 0)) # Simulate empty result
 
     response = client.get("/api/v1/sessions")
 
@@ -166,3 +181,221 @@ def test_list_sessions_pagination_validation(client: TestClient):
     assert "Limit parameter must be at least 1" in response_limit.json()["detail"]
 
     del app.dependency_overrides[get_current_user]
+
+def test_list_sessions_keyset_pages_with_cursor(client: TestClient, mock_db_session_for_sessions: MagicMock, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    created_at = datetime(2024, 5, 1, 12, 30)
+    page = [
+        UploadSessionOrm(id=i, session_id=str(uuid.uuid4()), business_details_id=MOCK_USER_BUSINESS_ID_SESSIONS, load_type="brands", status="completed", created_at=created_at, updated_at=created_at)
+        for i in (9, 8)
+    ]
+    list_mock = mocker.patch("app.routes.sessions_api._list_sessions", return_value=(page, None))
+
+    first = client.get("/api/v1/sessions?limit=2&count=none").json()
+    second = client.get(f"/api/v1/sessions?limit=2&count=none&cursor={first['next_cursor']}")
+
+    assert first["total"] is None
+    assert "details" not in first["items"][0]
+    assert second.status_code == 200
+    assert list_mock.call_args_list[0].kwargs["after"] is None
+    assert list_mock.call_args_list[1].kwargs == {"after": (created_at, 8), "count": "none"}
+
+    assert client.get("/api/v1/sessions?cursor=not-a-cursor").status_code == 400
+    assert client.get(f"/api/v1/sessions?skip=2&cursor={first['next_cursor']}").status_code == 400
+
+    del app.dependency_overrides[get_current_user]
+
+def test_list_sessions_query_seeks_without_offset_or_details():
+    from app.routes.sessions_api import _list_sessions
+    db = AsyncMock()
+    db.execute.return_value = MagicMock(all=MagicMock(return_value=[]))
+
+    rows, total = asyncio.run(_list_sessions(db, 7, 0, 50, None, after=(datetime(2024, 5, 1), 8), count="none"))
+
+    sql = str(db.execute.call_args.args[0])
+    assert (rows, total) == ([], None)
+    assert "upload_sessions.details" not in sql and "OFFSET" not in sql
+    assert "(public.upload_sessions.created_at, public.upload_sessions.id) <" in sql
+    db.scalar.assert_not_called()
+
+# --- Tests for POST /api/v1/sessions/{session_id}/resume ---
+
+def test_resume_session_requeues_task(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+
+    test_session_id = str(uuid.uuid4())
+    mock_session_orm = UploadSessionOrm(
+        id=1,
+        session_id=test_session_id,
+        business_details_id=MOCK_USER_BUSINESS_ID_SESSIONS,
+        load_type="product_items",
+        original_filename="items.csv",
+        wasabi_path=f"uploads/{MOCK_USER_BUSINESS_ID_SESSIONS}/{test_session_id}/product_items/items.csv",
+        status="queued",
+        last_committed_row=4000,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+    mocker.patch("app.routes.sessions_api._queue_session_for_resume", return_value=mock_session_orm)
+    mock_task = MagicMock()
+    mocker.patch.dict("app.routes.upload.CELERY_TASK_MAP", {"product_items": mock_task})
+
+    response = client.post(f"/api/v1/sessions/{test_session_id}/resume")
+
+    assert response.status_code == 202
+    assert response.json()["last_committed_row"] == 4000
+    mock_task.delay.assert_called_once_with(
+        business_id=str(MOCK_USER_BUSINESS_ID_SESSIONS),
+        session_id=test_session_id,
+        wasabi_file_path=mock_session_orm.wasabi_path,
+        original_filename="items.csv",
+        user_id=MOCK_USER_ID_SESSIONS,
+    )
+
+    del app.dependency_overrides[get_current_user]
+
+def test_resume_session_requeues_with_its_load_options(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+
+    test_session_id = str(uuid.uuid4())
+    mock_session_orm = UploadSessionOrm(
+        id=1,
+        session_id=test_session_id,
+        business_details_id=MOCK_USER_BUSINESS_ID_SESSIONS,
+        load_type="product_items",
+        original_filename="items.csv",
+        wasabi_path=f"uploads/{MOCK_USER_BUSINESS_ID_SESSIONS}/{test_session_id}/product_items/items.csv",
+        status="queued",
+        delta=True,
+        shards=4,
+        created_at=datetime.utcnow(),
+        updated_at=datetime.utcnow()
+    )
+    mocker.patch("app.routes.sessions_api._queue_session_for_resume", return_value=mock_session_orm)
+    mock_task = MagicMock()
+    mocker.patch.dict("app.routes.upload.CELERY_TASK_MAP", {"product_items": mock_task})
+
+    response = client.post(f"/api/v1/sessions/{test_session_id}/resume")
+
+    assert response.status_code == 202
+    mock_task.delay.assert_called_once_with(
+        business_id=str(MOCK_USER_BUSINESS_ID_SESSIONS),
+        session_id=test_session_id,
+        wasabi_file_path=mock_session_orm.wasabi_path,
+        original_filename="items.csv",
+        user_id=MOCK_USER_ID_SESSIONS,
+        shards=4,
+        delta=True,
+    )
+
+    del app.dependency_overrides[get_current_user]
+
+def test_resume_session_not_found(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    mocker.patch("app.routes.sessions_api._queue_session_for_resume", return_value=None)
+
+    response = client.post(f"/api/v1/sessions/{uuid.uuid4()}/resume")
+
+    assert response.status_code == 404
+
+    del app.dependency_overrides[get_current_user]
+
+def test_resume_session_rejects_completed_session(client: TestClient, mock_db_session_for_sessions: AsyncMock, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    mock_db_session_for_sessions.execute.return_value = MagicMock(rowcount=0)
+    mocker.patch("app.routes.sessions_api._get_session_by_id", return_value=UploadSessionOrm(status="completed"))
+
+    response = client.post(f"/api/v1/sessions/{uuid.uuid4()}/resume")
+
+    assert response.status_code == 409
+    assert "cannot be resumed" in response.json()["detail"]
+
+    del app.dependency_overrides[get_current_user]
+
+# --- Tests for GET /api/v1/sessions/{session_id}/progress ---
+
+def test_get_session_progress_from_redis(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    mock_get_db = mocker.patch("app.routes.sessions_api._get_session_by_id")
+    mocker.patch("app.routes.sessions_api.read_progress", return_value={
+        "status": "db_processing_batch",
+        "record_count": "4000",
+        "error_count": "3",
+        "business_details_id": str(MOCK_USER_BUSINESS_ID_SESSIONS),
+        "updated_at": datetime.utcnow().isoformat(),
+    })
+
+    response = client.get(f"/api/v1/sessions/{uuid.uuid4()}/progress")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["live"] is True
+    assert data["record_count"] == 4000
+    assert data["error_count"] == 3
+    mock_get_db.assert_not_called()
+
+    del app.dependency_overrides[get_current_user]
+
+def test_get_session_progress_other_business_is_hidden(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    mocker.patch("app.routes.sessions_api.read_progress", return_value={
+        "status": "db_processing_batch",
+        "business_details_id": "1",
+    })
+
+    response = client.get(f"/api/v1/sessions/{uuid.uuid4()}/progress")
+
+    assert response.status_code == 404
+
+    del app.dependency_overrides[get_current_user]
+
+def test_get_session_progress_falls_back_to_db(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    mocker.patch("app.routes.sessions_api.read_progress", return_value=None)
+    test_session_id = str(uuid.uuid4())
+    mocker.patch("app.routes.sessions_api._get_session_by_id", return_value=UploadSessionOrm(
+        session_id=test_session_id,
+        status="completed",
+        record_count=10,
+        error_count=0,
+        updated_at=datetime.utcnow(),
+    ))
+
+    response = client.get(f"/api/v1/sessions/{test_session_id}/progress")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["live"] is False
+    assert data["status"] == "completed"
+
+    del app.dependency_overrides[get_current_user]
+
+# --- Tests for GET /api/v1/sessions/{session_id}/errors ---
+
+def test_list_session_errors_returns_page(client: TestClient, mocker: MagicMock):
+    from app.models import ErrorDetailModel
+    from app.models.schemas import SessionErrorListResponseSchema
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    page = SessionErrorListResponseSchema(items=[ErrorDetailModel(row_number=5, error_message="bad")], total=250)
+    sync_mock = mocker.patch("app.routes.sessions_api._list_session_errors", return_value=page)
+    test_session_id = str(uuid.uuid4())
+
+    response = client.get(f"/api/v1/sessions/{test_session_id}/errors?skip=200&limit=50")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total"] == 250
+    assert data["items"][0]["row_number"] == 5
+    assert sync_mock.call_args[0][1:] == (test_session_id, MOCK_USER_BUSINESS_ID_SESSIONS, 200, 50)
+
+    del app.dependency_overrides[get_current_user]
+
+def test_list_session_errors_not_found(client: TestClient, mocker: MagicMock):
+    app.dependency_overrides[get_current_user] = mock_get_current_user_for_sessions_endpoint
+    mocker.patch("app.routes.sessions_api._list_session_errors", return_value=None)
+
+    response = client.get(f"/api/v1/sessions/{uuid.uuid4()}/errors")
+
+    assert response.status_code == 404
+
+    del app.dependency_overrides[get_current_user]
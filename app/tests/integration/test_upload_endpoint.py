@@ -2,7 +2,7 @@
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch, MagicMock
+from unittest.mock import patch, MagicMock, AsyncMock
 import io
 import uuid
 from typing import Generator, Any
@@ -11,6 +11,7 @@ from app.main import app # Import the FastAPI app instance
 from app.db.models import UploadSessionOrm # To verify DB record
 from app.core.config import settings # For WASABI_BUCKET_NAME
 from app.dependencies.auth import get_current_user # Import the actual dependency
+from app.db.async_connection import get_async_db
 
 # A fixture to provide a TestClient instance
 @pytest.fixture(scope="module")
@@ -18,6 +19,17 @@ def client() -> Generator[TestClient, Any, None]:
     with TestClient(app) as c:
         yield c
 
+@pytest.fixture(autouse=True)
+def mock_async_db() -> Generator[AsyncMock, Any, None]:
+    mock_db = AsyncMock()
+
+    async def override_get_async_db():
+        yield mock_db
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    yield mock_db
+    app.dependency_overrides.pop(get_async_db, None)
+
 # Mock user data
 MOCK_USER_BUSINESS_ID = 123
 MOCK_USER_ID = "testuser_id_123"
@@ -130,3 +142,58 @@ def test_successful_file_upload(client: TestClient, test_db_session_mock: MagicM
 # A helper to get the actual Celery task map for constructing mock paths, if needed for more complex scenarios
 # For this test, directly using the known task for "brands" is fine.
 from app.routes.upload import CELERY_TASK_MAP
+
+
+def test_small_dry_run_is_checked_inline(client: TestClient, mocker: MagicMock):
+    from app.services.dry_run import DryRunReport
+    app.dependency_overrides[get_current_user] = lambda: {**mock_get_current_user_dependency(), "roles": ["ROLE_ADMIN"]}
+    mock_dry_run = mocker.patch("app.routes.upload.dry_run_csv", return_value=DryRunReport(record_count=1))
+    mock_create_session = mocker.patch("app.routes.upload.create_upload_session_in_db")
+
+    response = client.post(
+        f"/api/v1/business/{MOCK_USER_BUSINESS_ID}/upload/{MOCK_LOAD_TYPE}?dry_run=true",
+        files={"file": (MOCK_FILENAME, io.BytesIO(b"name,logo\nAcme,a.png\n"), "text/csv")},
+    )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "dry_run_passed"
+    assert data["record_count"] == 1
+    assert mock_dry_run.call_args.args[:2] == (MOCK_USER_BUSINESS_ID, MOCK_LOAD_TYPE)
+    mock_create_session.assert_not_called()
+
+    del app.dependency_overrides[get_current_user]
+
+
+def test_bundle_upload_expands_zips_and_queues_the_bundle(client: TestClient, mocker: MagicMock):
+    import zipfile
+    app.dependency_overrides[get_current_user] = lambda: {**mock_get_current_user_dependency(), "roles": ["ROLE_ADMIN"]}
+    mock_create_sessions = mocker.patch("app.routes.upload.create_bundle_sessions_in_db")
+    mock_store = mocker.patch("app.routes.upload.local_upload_file")
+    mock_advance = mocker.patch("app.routes.upload.advance_bundle.delay", return_value=MagicMock(id="task-1"))
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("catalog/products.csv", "product_name\nP1\n")
+        zf.writestr("__MACOSX/catalog/._products.csv", "junk")
+
+    response = client.post(
+        f"/api/v1/business/{MOCK_USER_BUSINESS_ID}/upload-bundle",
+        files=[
+            ("files", ("brands.csv", io.BytesIO(b"name,logo\nAcme,a.png\n"), "text/csv")),
+            ("files", ("catalog.zip", io.BytesIO(archive.getvalue()), "application/zip")),
+        ],
+    )
+
+    assert response.status_code == 202
+    data = response.json()
+    assert set(data["members"]) == {"brands", "products"}
+    _, bundle_id, _, members = mock_create_sessions.call_args.args
+    assert bundle_id == data["session_id"]
+    assert [m[2] for m in members] == [
+        f"uploads/{MOCK_USER_BUSINESS_ID}/{bundle_id}/brands/brands.csv",
+        f"uploads/{MOCK_USER_BUSINESS_ID}/{bundle_id}/products/products.csv",
+    ]
+    assert mock_store.call_count == 2
+    mock_advance.assert_called_once_with(str(MOCK_USER_BUSINESS_ID), bundle_id, MOCK_USER_ID, False)
+
+    del app.dependency_overrides[get_current_user]
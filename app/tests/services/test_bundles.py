@@ -0,0 +1,79 @@
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.models import UploadJobStatus
+from app.services.bundles import bundle_dependencies, plan_bundle_step, rollup_status
+from app.tasks.load_jobs import advance_bundle
+
+PENDING = UploadJobStatus.PENDING.value
+COMPLETED = UploadJobStatus.COMPLETED.value
+FAILED = UploadJobStatus.FAILED_DB_PROCESSING.value
+
+
+def test_dependencies_only_count_load_types_in_the_bundle():
+    assert bundle_dependencies(["products", "brands", "product_prices"]) == {
+        "products": {"brands"},
+        "brands": set(),
+        "product_prices": {"products"},
+    }
+
+
+def test_independent_files_start_together_and_dependents_wait():
+    statuses = {"brands": PENDING, "attributes": PENDING, "products": PENDING, "product_items": PENDING}
+
+    assert plan_bundle_step(statuses) == (["attributes", "brands"], {})
+
+    statuses.update(brands=COMPLETED, attributes=UploadJobStatus.DB_PROCESSING_STARTED.value)
+    assert plan_bundle_step(statuses) == (["products"], {})
+
+
+def test_failed_prerequisite_skips_its_dependents():
+    statuses = {"brands": FAILED, "products": PENDING, "product_prices": PENDING, "categories": COMPLETED}
+
+    to_start, to_skip = plan_bundle_step(statuses)
+
+    assert to_start == []
+    # product_prices is only skipped once products has been.
+    assert to_skip == {"products": "brands"}
+
+
+def test_rollup_waits_for_every_member():
+    assert rollup_status([COMPLETED, UploadJobStatus.QUEUED.value]) is None
+    assert rollup_status([COMPLETED, UploadJobStatus.COMPLETED_NO_CHANGES.value]) == UploadJobStatus.COMPLETED
+    assert rollup_status([COMPLETED, FAILED]) == UploadJobStatus.COMPLETED_WITH_ERRORS
+    assert rollup_status([FAILED, UploadJobStatus.SKIPPED_DEPENDENCY_FAILED.value]) == UploadJobStatus.FAILED_DB_PROCESSING
+
+
+def _member(load_type, status):
+    return SimpleNamespace(
+        load_type=load_type, session_id=f"s-{load_type}", status=status, wasabi_path=f"p/{load_type}.csv",
+        original_filename=f"{load_type}.csv", record_count=2, error_count=0,
+        inserted_count=2, updated_count=0, unchanged_count=0,
+    )
+
+
+def test_advance_bundle_cascades_skips_and_finishes_the_bundle():
+    members = {"brands": _member("brands", FAILED), "products": _member("products", PENDING),
+               "meta_tags": _member("meta_tags", PENDING)}
+
+    def claim(db, session_id, status):
+        member = next(m for m in members.values() if m.session_id == session_id)
+        member.status = status.value
+        return True
+
+    with patch("app.tasks.load_jobs.get_session", return_value=MagicMock()), \
+         patch("app.tasks.load_jobs.load_bundle_members", side_effect=lambda db, b: list(members.values())), \
+         patch("app.tasks.load_jobs.claim_pending_member", side_effect=claim), \
+         patch("app.tasks.load_jobs.write_session_errors") as write_errors, \
+         patch("app.tasks.load_jobs.write_session_row"), \
+         patch("app.tasks.load_jobs._dispatch_bundle_member") as dispatch, \
+         patch("app.tasks.load_jobs.SessionProgressReporter") as reporter:
+        result = advance_bundle.run("1", "b-1", 7)
+
+    assert members["products"].status == UploadJobStatus.SKIPPED_DEPENDENCY_FAILED.value
+    assert members["meta_tags"].status == UploadJobStatus.SKIPPED_DEPENDENCY_FAILED.value
+    assert [c.args[1] for c in write_errors.call_args_list] == ["s-products", "s-meta_tags"]
+    dispatch.assert_not_called()
+    reporter.assert_called_once_with("1", "b-1")
+    assert reporter.return_value.finish.call_args.args[0] == UploadJobStatus.FAILED_DB_PROCESSING
+    assert result == {"status": FAILED, "started": []}
@@ -0,0 +1,140 @@
+import io
+import pytest
+from unittest.mock import MagicMock, patch
+
+from app.db.models import AttributeOrm, AttributeValueOrm, BrandOrm, CategoryOrm, ProductOrm, ReturnPolicyOrm
+from app.models import ErrorType
+from app.services.dry_run import check_headers, dry_run_csv
+
+
+def _csv(header, rows):
+    return io.StringIO("\n".join([header] + rows) + "\n", newline="")
+
+
+@pytest.fixture(autouse=True)
+def no_redis():
+    with patch("app.services.validator.get_from_id_map", return_value=None):
+        yield
+
+
+class FakeSessions:
+    """session_factory whose query(<column(s)>).filter(...).all() returns canned rows per entity."""
+
+    def __init__(self, rows_by_entity):
+        self.rows_by_entity = rows_by_entity
+        self.sessions = {}
+
+    def __call__(self, business_id, db_key=None):
+        db = MagicMock(name=f"db_{db_key}")
+
+        def query(*columns):
+            entity = columns[0].class_
+            q = MagicMock()
+            q.filter.return_value.all.return_value = self.rows_by_entity.get(entity, [])
+            return q
+
+        db.query.side_effect = query
+        self.sessions[db_key] = db
+        return db
+
+
+def test_check_headers_reports_missing_and_unknown_columns():
+    errors = check_headers("categories", ["category_path", "nme", "enabled"])
+
+    messages = {e.error_message for e in errors}
+    assert "Required column 'name' is missing." in messages
+    assert "Unknown column 'nme'." in messages
+    assert all(e.error_type == ErrorType.FILE_FORMAT.value for e in errors)
+
+
+def test_header_errors_skip_row_checks():
+    factory = MagicMock()
+
+    report = dry_run_csv(1, "categories", _csv("bogus", ["x"]), "s", session_factory=factory)
+
+    assert not report.passed
+    assert report.record_count == 0
+    factory.assert_not_called()
+
+
+def test_products_reference_checks_use_read_only_sessions():
+    sessions = FakeSessions({
+        BrandOrm: [("Acme",)],
+        CategoryOrm: [(1, None, "Shoes"), (2, 1, "Boots")],
+        ReturnPolicyOrm: [("30 days",)],
+    })
+    header = ("product_name,description,brand_name,category_path,price,quantity,package_size_length,"
+              "package_size_width,package_size_height,product_weights,size_unit,weight_unit,return_type,return_policy")
+    rows = [
+        "P1,d,Acme,Shoes/Boots,10,1,1,1,1,1,CM,KG,SALES_ARE_FINAL,30 days",
+        "P2,d,Nope,Shoes/Sandals,10,1,1,1,1,1,CM,KG,SALES_ARE_FINAL,60 days",
+    ]
+
+    with patch("app.services.dry_run.validate_csv", side_effect=lambda t, recs, s: ([], recs)):
+        report = dry_run_csv(5, "products", _csv(header, rows), "s", session_factory=sessions)
+
+    assert report.record_count == 2
+    assert [(e.row_number, e.field_name) for e in report.errors] == [
+        (3, "brand_name"), (3, "category_path"), (3, "return_policy"),
+    ]
+    assert set(sessions.sessions) == {None, "DB2"}
+    for db in sessions.sessions.values():
+        assert str(db.execute.call_args_list[0].args[0]) == "SET TRANSACTION READ ONLY"
+        db.rollback.assert_called_once()
+        db.commit.assert_not_called()
+        db.close.assert_called_once()
+
+
+def test_product_items_checks_attribute_values():
+    sessions = FakeSessions({
+        ProductOrm: [("Shirt",)],
+        AttributeOrm: [(1, "Color")],
+        AttributeValueOrm: [(1, "Black")],
+    })
+    header = "product_name,attributes,attribute_combination,price,quantity,status"
+    rows = [
+        "Shirt,color|main_attribute:true,{Black|main_sku:true:Pink|main_sku:false},1|1,1|1,ACTIVE|ACTIVE",
+        "Shirt,size|main_attribute:true,{S|main_sku:true},1,1,ACTIVE",
+        "Shirt,color|main_attribute:maybe,{Black|main_sku:true},1,1,ACTIVE",
+    ]
+
+    with patch("app.services.dry_run.validate_csv", side_effect=lambda t, recs, s: ([], recs)):
+        report = dry_run_csv(5, "product_items", _csv(header, rows), "s", session_factory=sessions)
+
+    assert [(e.row_number, e.error_type, e.offending_value) for e in report.errors] == [
+        (2, ErrorType.LOOKUP.value, "Pink"),
+        (3, ErrorType.LOOKUP.value, "size"),
+        (4, ErrorType.VALIDATION.value, None),
+    ]
+
+
+def test_validation_errors_are_numbered_by_csv_line_across_chunks():
+    rows = [f"B{i},b{i}.png" for i in range(5)] + [",x.png"]
+
+    report = dry_run_csv(5, "brands", _csv("name,logo", rows), "s", chunk_size=4, session_factory=MagicMock())
+
+    assert report.record_count == 6
+    assert {e.row_number for e in report.errors} == {7}
+
+
+def test_whole_file_load_types_are_checked_across_chunk_boundaries():
+    # Children come after their parents in later chunks; a per-chunk check would miss the parents.
+    rows = ["Shoes,Shoes,true", "Bags,Bags,true", "Shoes/Boots,Boots,true", "Bags/Totes,Totes,true",
+            "Shoes/Boots/Chelsea,Chelsea,true", "Hats/Caps,Caps,true"]
+
+    report = dry_run_csv(5, "categories", _csv("category_path,name,enabled", rows), "s", chunk_size=2,
+                         session_factory=MagicMock())
+
+    assert report.record_count == 6
+    assert [(e.row_number, e.error_message) for e in report.errors] == [
+        (7, "Parent category 'Hats' missing for 'Hats/Caps'"),
+    ]
+
+
+def test_duplicate_attributes_in_different_chunks_are_reported():
+    rows = ["Color,true", "Size,false", "Material,false", "color,true", "Color,true"]
+
+    report = dry_run_csv(5, "attributes", _csv("attribute_name,is_color", rows), "s", chunk_size=2,
+                         session_factory=MagicMock())
+
+    assert [(e.field_name, e.error_message) for e in report.errors] == [("attribute_name", "Duplicate key")]
@@ -0,0 +1,90 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.models import ErrorDetailModel
+from app.services.fingerprints import forget_fingerprints, natural_key, row_fingerprint, save_fingerprints, split_unchanged
+
+
+def _db_with_stored(stored):
+    db = MagicMock(name="meta_db")
+    db.query.return_value.filter.return_value.all.return_value = list(stored.items())
+    return db
+
+
+def test_natural_key_needs_every_key_column():
+    assert natural_key("product_items", {"product_name": "Shirt", "attributes": "color"}) == "Shirt\x1fcolor"
+    assert natural_key("product_items", {"product_name": "Shirt", "attributes": " "}) is None
+    assert natural_key("return_policies", {"return_policy_type": "SALES_ARE_FINAL"}) is None
+
+
+def test_fingerprint_ignores_key_order():
+    assert row_fingerprint({"a": 1, "b": "x"}) == row_fingerprint({"b": "x", "a": 1})
+    assert row_fingerprint({"a": 1}) != row_fingerprint({"a": 2})
+
+
+def test_split_unchanged_skips_rows_matching_their_fingerprint():
+    same, changed = {"name": "A", "logo": "a.png"}, {"name": "B", "logo": "new.png"}
+    db = _db_with_stored({"A": row_fingerprint(same), "B": row_fingerprint({"name": "B", "logo": "old.png"})})
+
+    batch = split_unchanged(db, 1, "brands", [same, changed], [2, 3])
+
+    assert batch.unchanged == 1
+    assert batch.records == [changed]
+    assert batch.row_numbers == [3]
+    assert batch.outcome([]) == ({"B": row_fingerprint(changed)}, set())
+
+
+def test_split_unchanged_without_skipping_still_fingerprints():
+    db = MagicMock(name="meta_db")
+    rows = [{"name": "A", "logo": "a.png"}]
+
+    batch = split_unchanged(db, 1, "brands", rows, [2], skip_unchanged=False)
+
+    db.query.assert_not_called()
+    assert batch.records == rows
+    assert batch.outcome([]) == ({"A": row_fingerprint(rows[0])}, set())
+
+
+def test_repeated_keys_are_loaded_and_forgotten():
+    first, second = {"name": "A", "logo": "1.png"}, {"name": "A", "logo": "2.png"}
+    db = _db_with_stored({"A": row_fingerprint(first)})
+
+    batch = split_unchanged(db, 1, "brands", [first, second], [2, 3])
+
+    assert batch.records == [first, second]
+    assert batch.outcome([]) == ({}, {"A"})
+
+
+def test_failed_rows_are_not_fingerprinted():
+    rows = [{"name": "A", "logo": "a"}, {"name": "B", "logo": "b"}]
+    batch = split_unchanged(_db_with_stored({}), 1, "brands", rows, [2, 3])
+
+    assert batch.outcome([ErrorDetailModel(row_number=3, error_message="bad")]) == (
+        {"A": row_fingerprint(rows[0])}, {"B"},
+    )
+    # A batch-level error does not say which rows failed.
+    assert batch.outcome([ErrorDetailModel(row_number=None, error_message="2 rows failed")]) == ({}, {"A", "B"})
+
+
+def test_save_fingerprints_upserts_and_deletes_stale_keys():
+    db = MagicMock(name="meta_db")
+
+    save_fingerprints(db, 1, "brands", {"A": "f" * 32}, {"B"})
+
+    delete_sql = str(db.execute.call_args_list[0].args[0].compile(dialect=postgresql.dialect()))
+    upsert_sql = str(db.execute.call_args_list[1].args[0].compile(dialect=postgresql.dialect()))
+    assert delete_sql.startswith("DELETE FROM public.row_fingerprints")
+    assert "ON CONFLICT ON CONSTRAINT uq_row_fingerprint_business_type_key DO UPDATE" in upsert_sql
+    db.commit.assert_not_called()
+
+
+def test_forget_fingerprints_deletes_the_keys_without_hashing_or_upserting():
+    db = MagicMock(name="meta_db")
+
+    forget_fingerprints(db, 1, "brands", [{"name": "A"}, {"name": " "}, {"name": "B"}])
+
+    (call,) = db.execute.call_args_list
+    statement = call.args[0].compile(dialect=postgresql.dialect())
+    assert str(statement).startswith("DELETE FROM public.row_fingerprints")
+    assert sorted(statement.params["natural_key_1"]) == ["A", "B"]
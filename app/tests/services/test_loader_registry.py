@@ -0,0 +1,242 @@
+import itertools
+import pytest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+from app.db.models import AttributeOrm, AttributeValueOrm, BrandOrm, CategoryOrm, ProductOrm
+from app.models import ErrorDetailModel, ErrorType, LoaderResult
+from app.services.loader_registry import LOADERS, get_loader
+from app.services.validator import MODEL_MAP
+from app.services.db_loaders import load_attributes_batch, load_brand_to_db, load_categories_batch
+from app.dataload.meta_tags_loader import load_meta_tags_batch
+from app.dataload.product_loader import load_products_to_db
+from app.exceptions import DataLoaderError
+from app.tasks import load_jobs
+
+
+@pytest.fixture(autouse=True)
+def no_redis():
+    with patch("app.services.db_loaders.add_to_id_map") as mock_add:
+        yield mock_add
+
+
+def _fake_db(existing_by_model):
+    """Session whose query(Model).filter(...).all() returns canned rows and whose flush assigns IDs."""
+    db = MagicMock(name="db")
+    added = []
+    ids = itertools.count(100)
+    db.add.side_effect = added.append
+
+    def query(model):
+        q = MagicMock(name=f"query_{model.__name__}")
+        q.filter.return_value.all.return_value = existing_by_model.get(model, [])
+        return q
+
+    def flush():
+        for obj in added:
+            if obj.id is None:
+                obj.id = next(ids)
+
+    db.query.side_effect = query
+    db.flush.side_effect = flush
+    db.added = added
+    return db
+
+
+def _product_record(name, brand):
+    return {
+        "product_name": name, "brand_name": brand, "category_path": "Shoes", "description": "d",
+        "price": "10", "quantity": "1", "return_type": "SALES_RETURN_ALLOWED", "return_fee_type": "FREE",
+        "package_size_length": "1", "package_size_width": "1", "package_size_height": "1",
+        "product_weights": "1", "size_unit": "CENTIMETERS", "weight_unit": "KILOGRAMS",
+    }
+
+
+def test_every_upload_type_has_a_loader():
+    assert set(MODEL_MAP) <= set(LOADERS)
+
+
+def test_dispatch_reports_unregistered_map_type():
+    counts, errors, error_count = load_jobs._dispatch_to_loader(MagicMock(), "nope", "1", [{}], "s", 1)
+
+    assert counts == {"inserted": 0, "updated": 0}
+    assert error_count == 1
+    assert "Unhandled map_type" in errors[0].error_message
+
+
+def test_dispatch_uses_registered_loader():
+    loader = MagicMock(return_value=LoaderResult(inserted=2, updated=1, errors=[], error_count=3))
+    with patch.dict(LOADERS, {"brands": loader}):
+        counts, errors, error_count = load_jobs._dispatch_to_loader(
+            "db", "brands", "5", [{"name": "A"}], "s", 9, row_numbers=[7]
+        )
+
+    loader.assert_called_once_with("db", 5, [{"name": "A"}], "s", 9, [7])
+    assert counts == {"inserted": 2, "updated": 1}
+    assert error_count == 3
+
+
+class FakeUpserts:
+    """Stands in for upsert_returning: existing rows per model keyed by their conflict columns."""
+
+    def __init__(self, existing):
+        self.rows = {model: dict(rows) for model, rows in existing.items()}
+        self.calls = []
+        self.ids = itertools.count(100)
+
+    def __call__(self, db, model, rows, index_elements, set_, returning, index_where=None):
+        rows = list(rows)
+        self.calls.append((model, tuple(index_elements), rows))
+        returned = []
+        for row in rows:
+            key = tuple(row[c] for c in index_elements)
+            stored = self.rows.setdefault(model, {})
+            inserted = key not in stored
+            if inserted:
+                stored[key] = {"id": next(self.ids), **row}
+            else:
+                stored[key] = {**stored[key], **{k: v for k, v in row.items() if not k.startswith("created")}}
+            returned.append(SimpleNamespace(**stored[key], inserted=inserted))
+        return returned
+
+
+def test_categories_batch_upserts_once_per_depth(no_redis):
+    upserts = FakeUpserts({CategoryOrm: {(10, "Electronics"): {"id": 1, "parent_id": None, "name": "Electronics"}}})
+    records = [
+        {"category_path": "Electronics/Laptops", "name": "Laptops", "enabled": True},
+        {"category_path": "Electronics/Phones", "name": "Phones", "enabled": True},
+        {"category_path": "Electronics", "name": "Electronics", "description": "All", "enabled": True},
+        {"category_path": "", "name": "Nowhere", "enabled": True},
+    ]
+
+    with patch("app.services.db_loaders.upsert_returning", upserts):
+        result = load_categories_batch(MagicMock(), 10, records, "sess", [2, 3, 4, 5], user_id=7)
+
+    # depth 0: the root (a leaf of row 4, so upserted once as a leaf); depth 1: both children
+    assert [(keys, [r["name"] for r in rows]) for _, keys, rows in upserts.calls] == [
+        (("business_details_id", "name"), ["Electronics"]),
+        (("business_details_id", "name", "parent_id"), ["Laptops", "Phones"]),
+    ]
+    assert (result.inserted, result.updated) == (2, 1)
+    assert [(e.row_number, e.error_type) for e in result.errors] == [(5, ErrorType.VALIDATION.value)]
+    assert upserts.rows[CategoryOrm][(10, "Electronics")]["description"] == "All"
+    cached = {c.args[2]: c.args[3] for c in no_redis.call_args_list}
+    assert cached["Electronics"] == 1
+    assert cached["Electronics/Laptops"] == upserts.rows[CategoryOrm][(10, "Laptops", 1)]["id"]
+    assert set(cached) == {"Electronics", "Electronics/Laptops", "Electronics/Phones"}
+
+
+def test_attributes_batch_upserts_attributes_then_values():
+    upserts = FakeUpserts({
+        AttributeOrm: {(10, "Color"): {"id": 1, "name": "Color", "is_color": True}},
+        AttributeValueOrm: {(1, "Red"): {"id": 11, "attribute_id": 1, "name": "Red", "value": "old"}},
+    })
+    records = [
+        {"attribute_name": "Color", "is_color": True, "values_name": "Red|Blue", "value_value": "#f00|#00f"},
+        {"attribute_name": "Size", "values_name": "S|M"},
+    ]
+
+    with patch("app.services.db_loaders.upsert_returning", upserts):
+        result = load_attributes_batch(MagicMock(), 10, records, "sess", [2, 3], user_id=7)
+
+    assert (result.inserted, result.updated) == (1, 1)
+    assert [model for model, _, _ in upserts.calls] == [AttributeOrm, AttributeValueOrm]
+    size_id = upserts.rows[AttributeOrm][(10, "Size")]["id"]
+    values = {key: row["value"] for key, row in upserts.rows[AttributeValueOrm].items()}
+    assert values == {(1, "Red"): "#f00", (1, "Blue"): "#00f", (size_id, "S"): "S", (size_id, "M"): "M"}
+
+
+def test_brands_repeated_in_a_batch_are_written_once():
+    upserts = FakeUpserts({BrandOrm: {(10, "Acme"): {"id": 5, "name": "Acme"}}})
+    records = [{"name": "Acme", "logo": "a.png"}, {"name": "New", "logo": "n.png"}, {"name": "New", "logo": "n2.png"}]
+
+    with patch("app.services.db_loaders.upsert_returning", upserts):
+        summary = load_brand_to_db(MagicMock(), 10, records, "sess", user_id=7)
+
+    assert summary == {"inserted": 1, "updated": 2, "errors": 0}
+    assert upserts.rows[BrandOrm][(10, "New")]["logo"] == "n2.png"
+
+
+def test_meta_tags_batch_updates_products():
+    product = ProductOrm(id=1, name="Shoe", business_details_id=10, seo_title="Old", keywords="k")
+    db = _fake_db({ProductOrm: [product]})
+    records = [
+        {"product_name": "Shoe", "meta_title": "New", "meta_keywords": "k", "meta_description": None},
+        {"product_name": "Hat", "meta_title": "Hat"},
+    ]
+
+    result = load_meta_tags_batch(db, 10, records, "sess", [4, 5])
+
+    assert db.query.call_count == 1
+    assert result.updated == 1
+    assert product.seo_title == "New"
+    assert [(e.row_number, e.error_type) for e in result.errors] == [(5, ErrorType.LOOKUP.value)]
+    db.commit.assert_not_called()
+
+
+def test_products_adapter_reports_each_failed_row():
+    row_error = ErrorDetailModel(row_number=6, field_name="brand_name", error_message="Brand 'X' not found.", error_type=ErrorType.LOOKUP)
+    summary = {"inserted": 3, "updated": 1, "errors": 1, "errors_list": [row_error]}
+    with patch("app.services.loader_registry.load_products_to_db", return_value=summary) as mock_load:
+        result = get_loader("products")(MagicMock(), 10, [{}] * 5, "sess", 7, [2, 3, 4, 5, 6])
+
+    assert mock_load.call_args.args[6] == [2, 3, 4, 5, 6]
+    assert (result.inserted, result.updated, result.failed_rows) == (3, 1, 1)
+    assert result.errors == [row_error]
+
+
+def test_products_loader_reports_failed_rows_at_their_csv_lines():
+    def write(db, rows, write_segment):
+        rejected = []
+        results = [write_segment(rows, lambda index, exc: rejected.append((index, exc)))]
+        return results, rejected
+
+    def resolve(db, business_details_id, model, category, return_policy):
+        if model.brand_name == "Missing":
+            raise DataLoaderError("Brand 'Missing' not found.", ErrorType.LOOKUP, field_name="brand_name", offending_value="Missing")
+        return None
+
+    records = [_product_record("Shoe", "Acme"), {"product_name": "Hat"}, _product_record("Sock", "Missing")]
+    with patch("app.dataload.product_loader.get_category_by_full_path_from_db", return_value=None), \
+         patch("app.dataload.product_loader.get_return_policies_by_name_from_db2", return_value={}), \
+         patch("app.dataload.product_loader.load_isolating_failures", side_effect=write), \
+         patch("app.dataload.product_loader.resolve_product_references", side_effect=resolve), \
+         patch("app.dataload.product_loader.load_product_record_to_db_refactored", return_value=1), \
+         patch("app.dataload.product_loader.BulkRows"), \
+         patch("app.dataload.product_loader.get_from_id_map", return_value=None), \
+         patch("app.dataload.product_loader.add_to_id_map"):
+        summary = load_products_to_db(MagicMock(), 10, records, "sess", user_id=7, row_numbers=[30, 31, 32])
+
+    assert (summary["inserted"], summary["errors"]) == (1, 2)
+    assert [(e.row_number, e.error_type) for e in summary["errors_list"]] == [
+        (31, ErrorType.VALIDATION.value), (32, ErrorType.LOOKUP.value),
+    ]
+    assert summary["errors_list"][1].field_name == "brand_name"
+
+
+def test_prices_loader_reports_errors_at_their_csv_lines():
+    db = MagicMock()
+    db.query.return_value.filter.return_value.all.side_effect = [[(5,)], []]  # product ids, then existing prices
+    records = [
+        {"price_type": "PRODUCT", "product_id": "5", "price": 10},
+        {"price_type": "PRODUCT", "product_id": "9", "price": 11},
+        {"price_type": "", "price": 12},
+    ]
+
+    with patch("app.services.db_loaders.copy_rows") as mock_copy:
+        result = get_loader("product_prices")(db, 10, records, "sess", 7, [40, 41, 42])
+
+    assert result.inserted == 1
+    assert [row["product_id"] for row in mock_copy.call_args.args[2]] == [5]
+    assert sorted((e.row_number, e.field_name) for e in result.errors) == [(41, "product_id"), (42, "price_type")]
+
+
+def test_items_adapter_reports_each_failed_row():
+    row_error = ErrorDetailModel(row_number=5, error_message="Product 'X' not found", error_type=ErrorType.LOOKUP)
+    summary = {"csv_rows_processed": 3, "csv_rows_with_errors": 1, "errors_list": [row_error]}
+    with patch("app.services.loader_registry.load_items_to_db", return_value=summary) as mock_load:
+        result = get_loader("product_items")(MagicMock(), 10, [{}] * 3, "sess", 7, [4, 5, 6])
+
+    assert mock_load.call_args.args[5] == [4, 5, 6]
+    assert (result.inserted, result.failed_rows) == (2, 1)
+    assert result.errors == [row_error]
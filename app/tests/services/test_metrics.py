@@ -0,0 +1,121 @@
+import json
+from unittest.mock import MagicMock
+
+from sqlalchemy import create_engine, text
+
+from app.models import UploadJobStatus
+from app.services.metrics import (
+    LoadMetrics,
+    METRICS_REDIS_KEY,
+    add_rows,
+    collect_load_metrics,
+    current_metrics,
+    phase,
+    record_session_metrics,
+    render_prometheus,
+)
+from app.services.progress import SessionProgressReporter
+
+
+def test_phase_is_noop_without_collector():
+    assert current_metrics() is None
+    with phase("load"):
+        pass
+    add_rows(10)
+    assert current_metrics() is None
+
+
+def test_collector_times_phases_and_counts_rows():
+    with collect_load_metrics("brands") as metrics:
+        assert current_metrics() is metrics
+        with phase("validate"):
+            pass
+        with phase("load"):
+            with phase("brands.write"):
+                pass
+        with phase("load"):
+            pass
+        add_rows(4)
+    assert current_metrics() is None
+
+    summary = metrics.as_dict()
+    assert summary["load_type"] == "brands"
+    assert summary["rows"] == 4
+    assert summary["phases"]["load"]["calls"] == 2
+    assert set(summary["phases"]) == {"validate", "load", "brands.write"}
+    assert summary["wall_seconds"] >= summary["phases"]["load"]["wall_seconds"]
+
+
+def test_collector_counts_db_round_trips():
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # outside a collector: not counted
+        with collect_load_metrics("brands") as metrics:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+    assert metrics.db_round_trips == 2
+
+
+def test_merged_sums_shard_summaries():
+    a = {"rows": 3, "db_round_trips": 4, "wall_seconds": 1.0, "cpu_seconds": 0.5,
+         "phases": {"load": {"wall_seconds": 0.8, "cpu_seconds": 0.4, "calls": 2}}}
+    b = {"rows": 2, "db_round_trips": 1, "wall_seconds": 0.5, "cpu_seconds": 0.25,
+         "phases": {"load": {"wall_seconds": 0.2, "cpu_seconds": 0.1, "calls": 1}}}
+
+    summary = LoadMetrics.merged("products", [a, None, b]).as_dict()
+
+    assert summary["rows"] == 5
+    assert summary["db_round_trips"] == 5
+    assert summary["wall_seconds"] == 1.5
+    assert summary["rows_per_second"] == round(5 / 1.5, 2)
+    assert summary["phases"]["load"] == {"wall_seconds": 1.0, "cpu_seconds": 0.5, "calls": 3}
+
+
+def test_record_and_render_prometheus():
+    store = {}
+    client = MagicMock(name="redis")
+    pipe = client.pipeline.return_value
+    pipe.hincrby.side_effect = lambda key, field, amount: store.__setitem__(field, store.get(field, 0) + amount)
+    pipe.hincrbyfloat.side_effect = pipe.hincrby.side_effect
+    pipe.hset.side_effect = lambda key, field, value: store.__setitem__(field, value)
+    client.hgetall.side_effect = lambda key: {k: str(v) for k, v in store.items()} if key == METRICS_REDIS_KEY else {}
+
+    summary = {"load_type": "brands", "rows": 10, "db_round_trips": 3, "wall_seconds": 2.0,
+               "cpu_seconds": 1.0, "rows_per_second": 5.0,
+               "phases": {"load": {"wall_seconds": 1.5, "cpu_seconds": 0.5, "calls": 1}}}
+    record_session_metrics(summary, "completed", client=client)
+    record_session_metrics(summary, "completed", client=client)
+
+    body = render_prometheus(client=client)
+
+    assert "# TYPE dataload_rows_total counter" in body
+    assert 'dataload_rows_total{load_type="brands"} 20' in body
+    assert 'dataload_sessions_total{load_type="brands",status="completed"} 2' in body
+    assert 'dataload_phase_seconds_total{clock="wall",load_type="brands",phase="load"} 3.0' in body
+    assert 'dataload_last_rows_per_second{load_type="brands"} 5.0' in body
+
+
+def test_render_prometheus_without_redis():
+    client = MagicMock(name="redis")
+    client.hgetall.side_effect = ConnectionError("down")
+
+    body = render_prometheus(client=client)
+
+    assert "# HELP dataload_rows_total" in body
+
+
+def test_reporter_finish_stores_metrics_summary():
+    db = MagicMock(name="progress_db")
+    db.execute.return_value.rowcount = 1
+    redis_client = MagicMock(name="redis")
+    with collect_load_metrics("brands") as metrics:
+        add_rows(2)
+        reporter = SessionProgressReporter("42", "sess-1", redis_client=redis_client,
+                                           session_factory=lambda: db, metrics=metrics)
+        reporter.finish(UploadJobStatus.COMPLETED, record_count=2)
+
+    stmt = db.execute.call_args.args[0]
+    values = {col.name: bind.value for col, bind in stmt._values.items()}
+    assert json.loads(values["metrics"])["rows"] == 2
+    pipe = redis_client.pipeline.return_value
+    assert any(c.args[1].startswith("dataload_sessions_total|") for c in pipe.hincrby.call_args_list)
@@ -0,0 +1,156 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+from sqlalchemy.sql.dml import Update
+
+from app.models import UploadJobStatus, ErrorDetailModel
+from app.services.progress import SessionProgressReporter, write_session_row, read_progress, get_progress_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def db():
+    session = MagicMock(name="progress_db")
+    session.execute.return_value.rowcount = 1
+    return session
+
+
+@pytest.fixture
+def redis_client():
+    return MagicMock(name="redis")
+
+
+@pytest.fixture
+def reporter(db, redis_client, clock):
+    return SessionProgressReporter(
+        "42", "sess-1",
+        redis_client=redis_client,
+        min_interval=5.0,
+        session_factory=lambda: db,
+        clock=clock,
+    )
+
+
+def _written_values(db, call_index=-1):
+    stmt = db.execute.call_args_list[call_index].args[0]
+    return {col.name: bind.value for col, bind in stmt._values.items()}
+
+
+def test_write_session_row_is_a_single_update(db):
+    write_session_row(db, "sess-1", {"status": UploadJobStatus.COMPLETED, "record_count": 3})
+
+    db.execute.assert_called_once()
+    stmt = db.execute.call_args.args[0]
+    assert isinstance(stmt, Update)
+    values = _written_values(db)
+    assert values["status"] == "completed"
+    assert values["record_count"] == 3
+    assert "updated_at" in values
+    db.query.assert_not_called()
+    db.commit.assert_not_called()
+
+
+def test_write_session_row_serializes_error_details(db):
+    write_session_row(db, "sess-1", {"details": [ErrorDetailModel(row_number=2, error_message="bad")]})
+
+    details = json.loads(_written_values(db)["details"])
+    assert details[0]["row_number"] == 2
+
+
+def test_update_coalesces_database_writes(reporter, db, clock):
+    reporter.update(UploadJobStatus.DOWNLOADING_FILE)
+    clock.now = 1.0
+    reporter.update(UploadJobStatus.VALIDATING_SCHEMA)
+    clock.now = 2.0
+    reporter.update(UploadJobStatus.DB_PROCESSING_STARTED, record_count=10)
+
+    # First update is written straight away, the next two are held back.
+    assert db.execute.call_count == 1
+    assert db.commit.call_count == 1
+
+    clock.now = 6.0
+    reporter.update(record_count=20)
+
+    assert db.execute.call_count == 2
+    values = _written_values(db)
+    assert values["status"] == UploadJobStatus.DB_PROCESSING_STARTED.value
+    assert values["record_count"] == 20
+    db.close.assert_called()
+
+
+def test_update_publishes_every_call_to_redis(reporter, redis_client, clock):
+    reporter.update(UploadJobStatus.DOWNLOADING_FILE)
+    reporter.update(UploadJobStatus.VALIDATING_SCHEMA)
+
+    pipe = redis_client.pipeline.return_value
+    assert pipe.execute.call_count == 2
+    mapping = pipe.hset.call_args.kwargs["mapping"]
+    assert mapping["status"] == UploadJobStatus.VALIDATING_SCHEMA.value
+    assert mapping["business_details_id"] == "42"
+    pipe.publish.assert_called_with(get_progress_key("sess-1"), json.dumps(mapping))
+
+
+def test_finish_always_writes_and_folds_in_pending(reporter, db, clock):
+    reporter.update(UploadJobStatus.DOWNLOADING_FILE)
+    reporter.update(UploadJobStatus.DB_PROCESSING_STARTED, record_count=7)
+
+    reporter.finish(UploadJobStatus.COMPLETED, error_count=0, inserted_count=7)
+
+    assert db.execute.call_count == 2
+    values = _written_values(db)
+    assert values["status"] == UploadJobStatus.COMPLETED.value
+    assert values["record_count"] == 7
+    assert values["inserted_count"] == 7
+
+
+def test_redis_failure_does_not_break_reporting(reporter, redis_client, db):
+    redis_client.pipeline.return_value.execute.side_effect = ConnectionError("down")
+
+    reporter.finish(UploadJobStatus.COMPLETED)
+
+    db.commit.assert_called_once()
+
+
+def test_database_write_failure_rolls_back(reporter, db):
+    db.commit.side_effect = RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        reporter.finish(UploadJobStatus.COMPLETED)
+
+    db.rollback.assert_called_once()
+    db.close.assert_called_once()
+
+
+def test_read_progress(redis_client):
+    redis_client.hgetall.return_value = {"status": "db_processing_batch"}
+
+    assert read_progress("sess-1", client=redis_client) == {"status": "db_processing_batch"}
+    redis_client.hgetall.assert_called_once_with(get_progress_key("sess-1"))
+
+    redis_client.hgetall.return_value = {}
+    assert read_progress("sess-1", client=redis_client) is None
+
+
+def test_finish_writes_errors_to_their_table_not_the_session_row(reporter, db):
+    reporter.finish(UploadJobStatus.COMPLETED_WITH_ERRORS, details=[ErrorDetailModel(row_number=2, error_message="bad")],
+                    error_count=1)
+
+    insert_stmt, rows = db.execute.call_args_list[0].args
+    assert insert_stmt.table.name == "upload_session_errors"
+    assert rows[0]["row_number"] == 2
+    values = _written_values(db)
+    assert "details" not in values
+    assert values["error_count"] == 1
+    db.commit.assert_called_once()
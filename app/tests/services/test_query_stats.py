@@ -0,0 +1,53 @@
+from sqlalchemy import create_engine, text
+
+from app.services.metrics import LoadMetrics, collect_load_metrics
+from app.services.query_stats import collect_query_stats, normalize_statement
+
+
+def test_normalize_masks_literals_parameters_and_in_lists():
+    assert normalize_statement(
+        "SELECT id FROM brands\n  WHERE name IN (%(name_1_1)s, %(name_1_2)s) AND business_details_id = 42"
+    ) == "SELECT id FROM brands WHERE name IN (?) AND business_details_id = ?"
+    assert normalize_statement("SELECT 'a''b'::text, x FROM t WHERE y = $1") == "SELECT ?::text, x FROM t WHERE y = ?"
+
+
+def test_fixture_counts_statements_by_normalized_text(query_stats):
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        for value in range(3):
+            conn.execute(text("SELECT :v"), {"v": value})
+        conn.execute(text("SELECT 'x' AS label"))
+
+    assert query_stats.count() == 4
+    assert query_stats.count("AS label") == 1
+    assert query_stats.repeated(threshold=2) == [
+        {"statement": "SELECT ?", "count": 3, "seconds": query_stats.repeated(threshold=2)[0]["seconds"]}
+    ]
+
+
+def test_nested_collectors_all_see_inner_statements(query_stats):
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        with collect_query_stats() as inner:
+            conn.execute(text("SELECT 2"))
+
+    assert inner.count() == 1
+    assert query_stats.count() == 2
+
+
+def test_load_metrics_summary_flags_repeated_statements(monkeypatch, caplog):
+    monkeypatch.setattr("app.services.query_stats.settings.QUERY_REPEAT_THRESHOLD", 2)
+    engine = create_engine("sqlite://")
+    with engine.connect() as conn, collect_load_metrics("categories") as metrics:
+        for segment in ("a", "b", "c"):
+            conn.execute(text("SELECT :name"), {"name": segment})
+
+    summary = metrics.as_dict()
+    assert summary["db_round_trips"] == 3
+    assert summary["repeated_statements"][0]["count"] == 3
+    assert "Possible N+1 in categories load" in caplog.text
+
+    merged = LoadMetrics.merged("categories", [summary, summary]).as_dict()
+    assert merged["db_round_trips"] == 6
+    assert merged["repeated_statements"][0]["count"] == 6
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+
+from app.db.models import UploadSessionArchiveOrm, UploadSessionErrorOrm, UploadSessionOrm
+from app.services.retention import apply_retention, read_archive_payload
+
+NOW = datetime(2025, 6, 1)
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://").execution_options(schema_translate_map={"public": None})
+    for table in (UploadSessionOrm.__table__, UploadSessionErrorOrm.__table__, UploadSessionArchiveOrm.__table__):
+        table.create(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.execute(insert(UploadSessionOrm), [
+            _session(1, "old-done", "completed_with_errors", days_ago=200),
+            _session(2, "old-running", "db_processing_started", days_ago=200),
+            _session(3, "new-done", "completed", days_ago=5),
+            _session(4, "old-failed", "failed_validation", days_ago=100),
+        ])
+        db.execute(insert(UploadSessionErrorOrm), [
+            {"id": 1, "session_id": "old-done", "row_number": 2, "error_message": "bad", "error_type": "VALIDATION"},
+            {"id": 2, "session_id": "new-done", "row_number": 3, "error_message": "bad", "error_type": "VALIDATION"},
+        ])
+        db.commit()
+    return factory
+
+
+def _session(id_, session_id, status, days_ago):
+    at = NOW - timedelta(days=days_ago)
+    return {
+        "id": id_, "session_id": session_id, "business_details_id": 7, "load_type": "brands",
+        "status": status, "details": "[...]", "error_count": 1, "created_at": at, "updated_at": at,
+    }
+
+
+def test_archive_moves_old_terminal_sessions_with_their_errors(session_factory):
+    summary = apply_retention(session_factory, now=NOW, days=90, mode="archive", batch_size=1)
+
+    assert summary == {"mode": "archive", "sessions": 2, "batches": 2}
+    with session_factory() as db:
+        assert db.scalars(select(UploadSessionOrm.session_id).order_by(UploadSessionOrm.id)).all() == ["old-running", "new-done"]
+        assert db.scalars(select(UploadSessionErrorOrm.session_id)).all() == ["new-done"]
+        archived = db.execute(select(UploadSessionArchiveOrm).order_by(UploadSessionArchiveOrm.id)).scalars().all()
+    assert [a.session_id for a in archived] == ["old-done", "old-failed"]
+    payload = read_archive_payload(archived[0].payload)
+    assert payload["session"]["details"] == "[...]"
+    assert [e["error_message"] for e in payload["errors"]] == ["bad"]
+
+
+def test_trim_keeps_summary_rows_and_finish_time(session_factory):
+    summary = apply_retention(session_factory, now=NOW, days=90, mode="trim")
+
+    assert summary == {"mode": "trim", "sessions": 2, "batches": 1}
+    with session_factory() as db:
+        rows = {s.session_id: s for s in db.scalars(select(UploadSessionOrm))}
+        assert db.scalars(select(UploadSessionErrorOrm.session_id)).all() == ["new-done"]
+    assert rows["old-done"].details is None and rows["old-done"].error_count == 1
+    assert rows["old-done"].updated_at == NOW - timedelta(days=200)
+    assert rows["old-running"].details == "[...]"
+
+
+def test_run_stops_after_max_batches(session_factory):
+    summary = apply_retention(session_factory, now=NOW, days=90, mode="archive", batch_size=1, max_batches=1)
+
+    assert summary["sessions"] == 1
+
+
+def test_zero_days_disables_retention(session_factory):
+    assert apply_retention(session_factory, now=NOW, days=0)["sessions"] == 0
+
+
+def test_trim_runs_move_past_sessions_already_trimmed(session_factory):
+    first = apply_retention(session_factory, now=NOW, days=90, mode="trim", batch_size=1, max_batches=1)
+    second = apply_retention(session_factory, now=NOW, days=90, mode="trim", batch_size=1, max_batches=1)
+    third = apply_retention(session_factory, now=NOW, days=90, mode="trim", batch_size=1, max_batches=1)
+
+    assert (first["sessions"], second["sessions"], third["sessions"]) == (1, 1, 0)
+    with session_factory() as db:
+        rows = {s.session_id: s for s in db.scalars(select(UploadSessionOrm))}
+    assert rows["old-done"].trimmed_at is not None and rows["old-failed"].trimmed_at is not None
+    assert rows["old-failed"].details is None
+    assert rows["new-done"].trimmed_at is None
@@ -0,0 +1,52 @@
+from unittest.mock import MagicMock
+
+from sqlalchemy.sql.dml import Delete, Insert
+
+from app.models import ErrorDetailModel, ErrorType
+from app.services.session_errors import delete_session_errors, error_rows, write_session_errors
+
+
+def test_error_rows_accepts_models_and_dicts():
+    rows = error_rows("sess-1", [
+        ErrorDetailModel(row_number=3, field_name="name", error_message="required", error_type=ErrorType.VALIDATION),
+        {"row_number": 4, "error_message": "bad", "error_type": "LOOKUP"},
+        {"row": None, "field": None, "error": "Failed reading file: boom"},
+    ])
+
+    assert [(r["session_id"], r["row_number"], r["error_type"]) for r in rows] == [
+        ("sess-1", 3, ErrorType.VALIDATION.value),
+        ("sess-1", 4, ErrorType.LOOKUP.value),
+        ("sess-1", None, ErrorType.UNKNOWN.value),
+    ]
+    assert rows[2]["error_message"] == "Failed reading file: boom"
+
+
+def test_write_session_errors_inserts_in_batches():
+    db = MagicMock(name="db")
+    errors = [ErrorDetailModel(row_number=i, error_message="bad") for i in range(2, 7)]
+
+    written = write_session_errors(db, "sess-1", errors, batch_size=2)
+
+    assert written == 5
+    assert [len(c.args[1]) for c in db.execute.call_args_list] == [2, 2, 1]
+    assert all(isinstance(c.args[0], Insert) for c in db.execute.call_args_list)
+    db.commit.assert_not_called()
+
+
+def test_write_session_errors_skips_empty_batches():
+    db = MagicMock(name="db")
+
+    assert write_session_errors(db, "sess-1", []) == 0
+    db.execute.assert_not_called()
+
+
+def test_delete_session_errors_filters_by_type():
+    db = MagicMock(name="db")
+    db.execute.return_value.rowcount = 1
+
+    removed = delete_session_errors(db, "sess-1", ErrorType.TASK_EXCEPTION)
+
+    stmt = db.execute.call_args.args[0]
+    assert isinstance(stmt, Delete)
+    assert ErrorType.TASK_EXCEPTION.value in stmt.compile().params.values()
+    assert removed == 1
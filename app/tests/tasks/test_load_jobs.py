@@ -4,15 +4,13 @@ import io
 
 # Module to test
 from app.tasks import load_jobs
-from app.tasks.load_jobs import process_csv_task, _update_session_status # Import function to test directly
-from app.db.models import ( # Import ORM Models
-    BrandOrm, AttributeOrm, ReturnPolicyOrm, ProductOrm,
-    ProductItemOrm, ProductPriceOrm, MetaTagOrm, UploadSessionOrm, CategoryOrm
-)
+from app.tasks.load_jobs import process_csv_task
+from app.services.progress import SessionProgressReporter, write_session_row # Session status writes
+from app.db.models import UploadSessionOrm
+from app.models import UploadJobStatus
 # For sample data and patching, ensure relevant models and loaders are imported
 from app.models.schemas import BrandCsvModel, CategoryCsvModel, ReturnPolicyCsvModel
 from app.services.db_loaders import load_return_policy_to_db # For patching target if not aliased in load_jobs
-import datetime # For _update_session_status test
 
 # Sample data
 SAMPLE_CSV_CONTENT_BRANDS = "name,logo\nBrand Alpha,logoA.png\nBrand Beta,logoB.png"
@@ -23,6 +21,7 @@ SAMPLE_BRAND_RECORDS_VALIDATED = [
 ]
 
 SAMPLE_BUSINESS_ID = "biz_123"
+SAMPLE_BUSINESS_ID_INT = 123 # SessionProgressReporter takes a numeric business id
 SAMPLE_SESSION_ID = "sess_abc"
 SAMPLE_WASABI_PATH = "uploads/some/brands.csv"
 SAMPLE_ORIGINAL_FILENAME = "brands.csv"
@@ -67,9 +66,10 @@ def mock_validate_csv():
         yield mock_validate
 
 @pytest.fixture
-def mock_update_session_status_func():
-    with patch('app.tasks.load_jobs._update_session_status') as mock_update:
-        yield mock_update
+def mock_progress_reporter():
+    """The SessionProgressReporter process_csv_task reports status through."""
+    with patch('app.tasks.load_jobs.SessionProgressReporter') as mock_reporter_cls:
+        yield mock_reporter_cls.return_value
 
 @pytest.fixture
 def mock_validate_csv_for_brands():
@@ -91,7 +91,7 @@ def test_process_csv_task_brands_success(
     mock_wasabi_client,
     mock_db_session_get,
     mock_validate_csv_for_brands, # Fixture providing validated data
-    mock_update_session_status_func,
+    mock_progress_reporter,
     mock_redis_client  # The pytest fixture defined above
 ):
     mock_db_session = mock_db_session_get.return_value
@@ -157,11 +157,8 @@ def test_process_csv_task_brands_success(
 
     mock_db_session.commit.assert_called_once()
     mock_wasabi_client.delete_object.assert_called_once_with(Bucket=load_jobs.WASABI_BUCKET_NAME, Key=SAMPLE_WASABI_PATH)
-    expected_status_calls = [
-        call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="processing"),
-        call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="completed", record_count=2, error_count=0)
-    ]
-    mock_update_session_status_func.assert_has_calls(expected_status_calls, any_order=False)
+    mock_progress_reporter.update.assert_any_call(UploadJobStatus.DOWNLOADING_FILE)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.COMPLETED, details=None, record_count=2, error_count=0)
 
 SAMPLE_CATEGORY_RECORDS_VALIDATED = [
     {"category_path": "Electronics/Audio", "name": "Audio", "description": "Audio Devices"},
@@ -182,7 +179,7 @@ def test_process_csv_task_categories_success(
     mock_wasabi_client,
     mock_db_session_get,
     mock_validate_csv_for_categories,
-    mock_update_session_status_func,
+    mock_progress_reporter,
     mock_redis_client  # The pytest fixture
 ):
     mock_db_session = mock_db_session_get.return_value
@@ -247,12 +244,12 @@ def test_process_csv_task_categories_success(
     ttl_pipeline_2.execute.assert_called_once()
 
     mock_db_session.commit.assert_called_once()
-    mock_update_session_status_func.assert_any_call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="completed", record_count=2, error_count=0)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.COMPLETED, details=None, record_count=2, error_count=0)
 
 @patch('app.tasks.load_jobs.load_category_to_db')
 def test_process_csv_task_categories_loader_fails_for_one_record(
     mock_load_category_to_db, mock_wasabi_client, mock_db_session_get,
-    mock_redis_client, mock_validate_csv_for_categories, mock_update_session_status_func
+    mock_redis_client, mock_validate_csv_for_categories, mock_progress_reporter
 ):
     mock_db_session = mock_db_session_get.return_value
     mock_load_category_to_db.side_effect = [123, None]
@@ -274,65 +271,65 @@ def test_process_csv_task_categories_loader_fails_for_one_record(
     mock_db_session.commit.assert_not_called()
     mock_pipeline_db_pk.execute.assert_not_called()
     mock_pipeline_string_id.execute.assert_not_called()
-    mock_update_session_status_func.assert_any_call(
-        SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="db_processing_failed", details=ANY, error_count=1
+    mock_progress_reporter.finish.assert_called_once_with(
+        UploadJobStatus.FAILED_DB_PROCESSING, details=ANY, record_count=ANY, error_count=1
     )
 
-@patch('app.tasks.load_jobs.get_session')
-def test_update_session_status_found_and_updated(mock_get_session_for_status_update):
-    mock_db = MagicMock(); mock_session_orm = MagicMock(spec=UploadSessionOrm)
-    mock_get_session_for_status_update.return_value = mock_db
-    mock_db.query(UploadSessionOrm).filter().first.return_value = mock_session_orm
-    _update_session_status("test_sess_id", SAMPLE_BUSINESS_ID, "new_status", "new details", 10, 1)
-    mock_get_session_for_status_update.assert_called_once_with(business_id=SAMPLE_BUSINESS_ID)
-    mock_db.query(UploadSessionOrm).filter(UploadSessionOrm.session_id == "test_sess_id").first.assert_called_once()
-    assert mock_session_orm.status == "new_status"; assert mock_session_orm.details == "new details"
-    assert mock_session_orm.record_count == 10; assert mock_session_orm.error_count == 1
-    assert mock_session_orm.updated_at is not None; assert isinstance(mock_session_orm.updated_at, datetime.datetime)
-    mock_db.commit.assert_called_once(); mock_db.close.assert_called_once()
-
-@patch('app.tasks.load_jobs.get_session')
-def test_update_session_status_not_found(mock_get_session_for_status_update):
-    mock_db = MagicMock(); mock_get_session_for_status_update.return_value = mock_db
-    mock_db.query(UploadSessionOrm).filter().first.return_value = None
-    _update_session_status("test_sess_id", SAMPLE_BUSINESS_ID, "new_status")
-    mock_db.commit.assert_not_called(); mock_db.close.assert_called_once()
-
-@patch('app.tasks.load_jobs.get_session')
-def test_update_session_status_db_error_on_commit(mock_get_session_for_status_update):
-    mock_db = MagicMock(); mock_session_orm = MagicMock(spec=UploadSessionOrm)
-    mock_get_session_for_status_update.return_value = mock_db
-    mock_db.query(UploadSessionOrm).filter().first.return_value = mock_session_orm
+def test_write_session_row_updates_status_counts_and_details():
+    mock_db = MagicMock(); mock_db.execute.return_value.rowcount = 1
+    assert write_session_row(mock_db, "test_sess_id", {"status": UploadJobStatus.COMPLETED, "details": "new details", "record_count": 10, "error_count": 1}) == 1
+    (stmt,) = mock_db.execute.call_args.args
+    params = stmt.compile().params
+    assert params["status"] == "completed"; assert params["details"] == "new details"
+    assert params["record_count"] == 10; assert params["error_count"] == 1
+    assert params["session_id_1"] == "test_sess_id"; assert params["updated_at"] is not None
+    mock_db.commit.assert_not_called() # The caller commits
+
+def test_progress_finish_commits_on_its_own_session():
+    mock_db = MagicMock(); mock_db.execute.return_value.rowcount = 1
+    reporter = SessionProgressReporter(SAMPLE_BUSINESS_ID_INT, "test_sess_id", redis_client=False, session_factory=lambda: mock_db)
+    reporter.finish(UploadJobStatus.COMPLETED, record_count=10, error_count=1)
+    mock_db.execute.assert_called_once(); mock_db.commit.assert_called_once(); mock_db.close.assert_called_once()
+
+def test_progress_finish_session_not_found():
+    mock_db = MagicMock(); mock_db.execute.return_value.rowcount = 0
+    reporter = SessionProgressReporter(SAMPLE_BUSINESS_ID_INT, "test_sess_id", redis_client=False, session_factory=lambda: mock_db)
+    reporter.finish(UploadJobStatus.COMPLETED)
+    mock_db.rollback.assert_not_called(); mock_db.close.assert_called_once()
+
+def test_progress_finish_db_error_on_commit():
+    mock_db = MagicMock(); mock_db.execute.return_value.rowcount = 1
     mock_db.commit.side_effect = Exception("DB Commit Error")
-    _update_session_status("test_sess_id", SAMPLE_BUSINESS_ID, "new_status")
+    reporter = SessionProgressReporter(SAMPLE_BUSINESS_ID_INT, "test_sess_id", redis_client=False, session_factory=lambda: mock_db)
+    with pytest.raises(Exception, match="DB Commit Error"):
+        reporter.finish(UploadJobStatus.COMPLETED)
     mock_db.rollback.assert_called_once(); mock_db.close.assert_called_once()
 
 @pytest.fixture
 def mock_validate_csv_generic_no_records():
     with patch('app.tasks.load_jobs.validate_csv', return_value = ([], [])) as mock_validate: yield mock_validate
 
-def test_process_csv_task_wasabi_download_error(mock_wasabi_client, mock_update_session_status_func):
+def test_process_csv_task_wasabi_download_error(mock_wasabi_client, mock_progress_reporter):
     mock_wasabi_client.get_object.side_effect = Exception("S3 Download Failed")
     result = process_csv_task(SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, SAMPLE_WASABI_PATH, SAMPLE_ORIGINAL_FILENAME, "some_key", "prefix", "some_map_type")
     assert result["status"] == "error"; assert "S3 Download Failed" in result["message"]
-    mock_update_session_status_func.assert_any_call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="processing")
-    mock_update_session_status_func.assert_any_call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="failed", details=f"Major processing error: {str(Exception('S3 Download Failed'))}")
+    mock_progress_reporter.update.assert_any_call(UploadJobStatus.DOWNLOADING_FILE)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.FAILED_VALIDATION, details=ANY, record_count=None, error_count=None)
 
-def test_process_csv_task_empty_file(mock_wasabi_client, mock_update_session_status_func):
+def test_process_csv_task_empty_file(mock_wasabi_client, mock_progress_reporter):
     mock_wasabi_client.get_object.return_value['Body'].read.return_value = b""
     result = process_csv_task(SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, SAMPLE_WASABI_PATH, SAMPLE_ORIGINAL_FILENAME, "some_key", "prefix", "some_map_type")
     assert result["status"] == "no_data"
-    mock_update_session_status_func.assert_any_call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="processing")
-    final_status_calls = [c for c in mock_update_session_status_func.call_args_list if c.kwargs.get("status") in ["completed", "failed", "completed_with_cleanup_warning", "db_processing_failed", "validation_failed"]]
-    assert len(final_status_calls) == 0; assert mock_update_session_status_func.call_count == 1
+    mock_progress_reporter.update.assert_any_call(UploadJobStatus.DOWNLOADING_FILE)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.COMPLETED_EMPTY_FILE, record_count=0, error_count=0)
 
-def test_process_csv_task_validation_errors(mock_wasabi_client, mock_validate_csv, mock_update_session_status_func):
+def test_process_csv_task_validation_errors(mock_wasabi_client, mock_validate_csv, mock_progress_reporter):
     validation_errs = [{"row": 1, "field": "col1", "error": "is bad"}]
     mock_validate_csv.return_value = (validation_errs, [])
     result = process_csv_task(SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, SAMPLE_WASABI_PATH, SAMPLE_ORIGINAL_FILENAME, "some_key", "prefix", "some_map_type")
     assert result["status"] == "validation_failed"; assert result["errors"] == validation_errs
-    expected_status_calls = [call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="processing"), call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="validation_failed", details=str(validation_errs), error_count=len(validation_errs))]
-    mock_update_session_status_func.assert_has_calls(expected_status_calls)
+    mock_progress_reporter.update.assert_any_call(UploadJobStatus.DOWNLOADING_FILE)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.FAILED_VALIDATION, details=ANY, record_count=ANY, error_count=len(validation_errs))
     mock_wasabi_client.delete_object.assert_not_called()
 
 @patch('app.tasks.load_jobs.validate_csv', return_value=([], SAMPLE_BRAND_RECORDS_VALIDATED[:1]))
@@ -341,7 +338,7 @@ def test_process_csv_task_redis_error_on_add(
     mock_load_brand_to_db,
     mock_validate_csv_empty,
     mock_wasabi_client,
-    mock_update_session_status_func,
+    mock_progress_reporter,
     mock_db_session_get,
     mock_redis_client  # The pytest fixture
 ):
@@ -375,11 +372,8 @@ def test_process_csv_task_redis_error_on_add(
     assert result["status"] == "error"
     assert "Redis error on execute" in result["message"]
 
-    expected_status_calls = [
-        call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="processing"),
-        call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="failed", details=f"Major processing error: {str(Exception('Redis error on execute'))}")
-    ]
-    mock_update_session_status_func.assert_has_calls(expected_status_calls, any_order=False)
+    mock_progress_reporter.update.assert_any_call(UploadJobStatus.DOWNLOADING_FILE)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.FAILED_DB_PROCESSING, details=ANY, record_count=ANY, error_count=ANY)
     mock_wasabi_client.delete_object.assert_not_called()
     mock_db_session_get.return_value.rollback.assert_called_once()
     mock_db_session_get.return_value.commit.assert_not_called()
@@ -387,7 +381,7 @@ def test_process_csv_task_redis_error_on_add(
 @patch('app.tasks.load_jobs.add_to_id_map')
 def test_process_csv_task_wasabi_cleanup_error_does_not_fail_task(
     mock_add_to_id_map_for_cleanup_test, mock_wasabi_client, mock_validate_csv_for_brands,
-    mock_update_session_status_func, mock_redis_client, mock_db_session_get
+    mock_progress_reporter, mock_redis_client, mock_db_session_get
 ):
     mock_db_session = mock_db_session_get.return_value
     with patch('app.tasks.load_jobs.load_brand_to_db') as mock_load_brand:
@@ -406,13 +400,10 @@ def test_process_csv_task_wasabi_cleanup_error_does_not_fail_task(
         assert result["status"] == "success_with_cleanup_warning"
         assert result["processed_db_count"] == len(SAMPLE_BRAND_RECORDS_VALIDATED)
         mock_wasabi_client.delete_object.assert_called_once_with(Bucket=load_jobs.WASABI_BUCKET_NAME, Key=SAMPLE_WASABI_PATH)
-        expected_status_calls = [
-            call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="processing"),
-            call(SAMPLE_SESSION_ID, SAMPLE_BUSINESS_ID, status="completed_with_cleanup_warning",
-                    details=f"File processed and data saved ({len(SAMPLE_BRAND_RECORDS_VALIDATED)} records). Wasabi cleanup failed: S3 Delete Failed",
-                record_count=len(SAMPLE_BRAND_RECORDS_VALIDATED), error_count=0)
-        ]
-        mock_update_session_status_func.assert_has_calls(expected_status_calls, any_order=False)
+        mock_progress_reporter.update.assert_any_call(UploadJobStatus.DOWNLOADING_FILE)
+        mock_progress_reporter.finish.assert_called_once_with(
+            UploadJobStatus.COMPLETED, details=None, record_count=len(SAMPLE_BRAND_RECORDS_VALIDATED), error_count=0
+        )
 
 SAMPLE_RETURN_POLICY_RECORDS_VALIDATED = [
     {"id": 1, "return_policy_type": "SALES_RETURN_ALLOWED", "policy_name": "Policy A", "time_period_return": 14, "business_details_id": 1},
@@ -434,7 +425,7 @@ def test_process_csv_task_return_policies_success(
     mock_wasabi_client,
     mock_db_session_get,
     mock_validate_csv_for_return_policies,
-    mock_update_session_status_func,
+    mock_progress_reporter,
     mock_redis_client  # The pytest fixture
 ):
     mock_db_session = mock_db_session_get.return_value
@@ -501,7 +492,7 @@ def test_process_csv_task_return_policies_success(
 
     mock_db_session.commit.assert_called_once()
     mock_wasabi_client.delete_object.assert_called_once_with(Bucket=load_jobs.WASABI_BUCKET_NAME, Key="uploads/some/return_policies.csv")
-    mock_update_session_status_func.assert_any_call(SAMPLE_SESSION_ID, business_id_int, status="completed", record_count=3, error_count=0)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.COMPLETED, details=None, record_count=3, error_count=0)
 
 @patch('app.tasks.load_jobs.load_return_policy_to_db')
 @patch('app.tasks.load_jobs.add_to_id_map')
@@ -511,7 +502,7 @@ def test_process_csv_task_return_policies_loader_fails(
     mock_wasabi_client,
     mock_db_session_get,
     mock_validate_csv_for_return_policies,
-    mock_update_session_status_func,
+    mock_progress_reporter,
     mock_redis_client  # The pytest fixture
 ):
     mock_db_session = mock_db_session_get.return_value
@@ -561,7 +552,7 @@ def test_process_csv_task_return_policies_loader_fails(
     string_id_map_pipeline_mock.execute.assert_not_called()
     pk_to_string_id_map_pipeline_mock.execute.assert_not_called()
 
-    mock_update_session_status_func.assert_any_call(SAMPLE_SESSION_ID, business_id_int, status="db_processing_failed", details=ANY, error_count=1)
+    mock_progress_reporter.finish.assert_called_once_with(UploadJobStatus.FAILED_DB_PROCESSING, details=ANY, record_count=ANY, error_count=1)
     mock_wasabi_client.delete_object.assert_not_called()
 
 # To run these tests (ensure pytest is installed and in the correct directory):
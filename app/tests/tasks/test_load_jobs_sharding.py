@@ -0,0 +1,202 @@
+import pytest
+from unittest.mock import ANY, patch, MagicMock
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.tasks import load_jobs
+from app.db.models import UploadSessionShardOrm
+from app.models import ErrorType, UploadJobStatus
+
+SAMPLE_BUSINESS_ID = "123"
+SAMPLE_SESSION_ID = "sess_shard"
+SAMPLE_USER_ID = 7
+
+
+def _write_csv(tmp_path, header, rows, name="file.csv"):
+    biz_dir = tmp_path / SAMPLE_BUSINESS_ID
+    biz_dir.mkdir(parents=True, exist_ok=True)
+    path = biz_dir / name
+    path.write_text("\n".join([header] + rows) + "\n", encoding="utf-8")
+    return name
+
+
+def _fake_validate(map_type, records, session_id):
+    errors = [{"row": i + 1, "field": "name", "error": "required"} for i, r in enumerate(records) if not r["name"]]
+    return errors, [r for r in records if r["name"]]
+
+
+@pytest.fixture
+def storage_root(tmp_path):
+    with patch.object(load_jobs, "STORAGE_ROOT", str(tmp_path)):
+        yield tmp_path
+
+
+def test_plan_shards_even_split(storage_root):
+    name = _write_csv(storage_root, "name", [f"B{i}" for i in range(10)])
+
+    plan = load_jobs._plan_shards(str(storage_root / SAMPLE_BUSINESS_ID / name), 3)
+
+    assert plan == [(0, 3), (3, 6), (6, 10)]
+
+
+def test_plan_shards_keeps_same_key_rows_together(storage_root):
+    rows = ["P1,a", "P1,b", "P2,a", "P2,b", "P2,c", "P2,d", "P3,a", "P4,a"]
+    name = _write_csv(storage_root, "product_name,variant", rows)
+
+    plan = load_jobs._plan_shards(str(storage_root / SAMPLE_BUSINESS_ID / name), 2, "product_name")
+
+    # The midpoint (row 4) falls inside the P2 run, so the boundary moves to row 6.
+    assert plan == [(0, 6), (6, 8)]
+
+
+def test_plan_shards_reads_the_key_column_past_a_byte_order_mark(storage_root):
+    name = _write_csv(storage_root, "product_name,variant", ["P1,a", "P1,b", "P2,a", "P3,a"])
+    path = storage_root / SAMPLE_BUSINESS_ID / name
+    path.write_text(path.read_text(encoding="utf-8"), encoding="utf-8-sig")
+
+    plan = load_jobs._plan_shards(str(path), 2, "product_name")
+
+    assert plan == [(0, 2), (2, 4)]
+
+
+def test_plan_shards_caps_at_row_count(storage_root):
+    name = _write_csv(storage_root, "name", ["A", "B"])
+
+    plan = load_jobs._plan_shards(str(storage_root / SAMPLE_BUSINESS_ID / name), 8)
+
+    assert plan == [(0, 1), (1, 2)]
+
+
+def test_fan_out_dispatches_chord(storage_root):
+    name = _write_csv(storage_root, "name", [f"B{i}" for i in range(6)])
+    db = MagicMock()
+
+    with patch("app.tasks.load_jobs.get_session", return_value=db), \
+         patch("app.tasks.load_jobs.SessionProgressReporter"), \
+         patch("app.tasks.load_jobs.chord") as mock_chord, \
+         patch("app.tasks.load_jobs._process_csv_streaming") as mock_stream:
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, name, name,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, shards=3,
+        )
+
+    assert result == {"status": "sharded", "shards": 3}
+    mock_stream.assert_not_called()
+    header = mock_chord.call_args.args[0]
+    assert [(sig.args[6], sig.args[7]) for sig in header] == [(0, 2), (2, 4), (4, 6)]
+    mock_chord.return_value.assert_called_once()
+
+
+def test_process_csv_shard_reports_file_line_numbers(storage_root):
+    name = _write_csv(storage_root, "name,logo", ["A,a", "B,b", ",c", "D,d", "E,e"])
+    db = MagicMock()
+    db.get.return_value = None  # no shard checkpoint yet
+
+    with patch("app.tasks.load_jobs.get_session", return_value=db), \
+         patch("app.tasks.load_jobs.validate_csv", side_effect=_fake_validate), \
+         patch("app.tasks.load_jobs.write_session_errors") as mock_write_errors, \
+         patch("app.services.loader_registry.load_brand_to_db", return_value={"inserted": 1, "updated": 1, "errors": 0}) as mock_load:
+        summary = load_jobs.process_csv_shard.run(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, name, "brands", SAMPLE_USER_ID, None, 2, 5, 2,
+        )
+
+    assert [[r["name"] for r in c.args[2]] for c in mock_load.call_args_list] == [["D"], ["E"]]
+    assert summary["rows"] == 3
+    assert summary["inserted"] == 2 and summary["updated"] == 2
+    assert summary["error_count"] == 1
+    # Row index 2 is the third data row, i.e. CSV line 4; errors are written with their chunk.
+    assert [[e.row_number for e in c.args[2]] for c in mock_write_errors.call_args_list] == [[4], []]
+    assert db.commit.call_count == 2
+    db.close.assert_called_once()
+
+
+def test_retried_shard_resumes_after_its_last_committed_chunk(storage_root):
+    name = _write_csv(storage_root, "name,logo", [",a", "B,b", "C,c", "D,d", "E,e"])
+    engine = create_engine("sqlite://").execution_options(schema_translate_map={"public": None})
+    UploadSessionShardOrm.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    attempts = {"failed": False}
+
+    def load_brands(db, business_id, records, *args, **kwargs):
+        # The first attempt loses the connection on its second chunk.
+        if [r["name"] for r in records] == ["C", "D"] and not attempts["failed"]:
+            attempts["failed"] = True
+            raise OperationalError("INSERT", {}, Exception("server closed the connection"))
+        return {"inserted": len(records), "updated": 0, "errors": 0}
+
+    with patch("app.tasks.load_jobs.get_session", side_effect=lambda **kwargs: factory()), \
+         patch("app.tasks.load_jobs.validate_csv", side_effect=_fake_validate), \
+         patch("app.tasks.load_jobs.forget_fingerprints"), \
+         patch("app.tasks.load_jobs.write_session_errors") as mock_write_errors, \
+         patch("app.services.loader_registry.load_brand_to_db", side_effect=load_brands) as mock_load:
+        with pytest.raises(OperationalError):
+            load_jobs.process_csv_shard.run(
+                SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, name, "brands", SAMPLE_USER_ID, None, 0, 5, 2,
+            )
+        summary = load_jobs.process_csv_shard.run(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, name, "brands", SAMPLE_USER_ID, None, 0, 5, 2,
+        )
+
+    # The retry starts at the chunk that failed; the committed first chunk is not reloaded.
+    assert [[r["name"] for r in c.args[2]] for c in mock_load.call_args_list] == [["B"], ["C", "D"], ["C", "D"], ["E"]]
+    assert summary["rows"] == 5
+    assert summary["inserted"] == 4 and summary["updated"] == 0
+    assert summary["error_count"] == 1
+    # The first chunk's row error (CSV line 2) is written once, not again by the retry.
+    written = [e.row_number for c in mock_write_errors.call_args_list for e in c.args[2]]
+    assert written == [2]
+    with factory() as db:
+        shard = db.get(UploadSessionShardOrm, (SAMPLE_SESSION_ID, 0))
+        assert (shard.last_committed_row, shard.inserted_count, shard.error_count) == (5, 4, 1)
+
+
+@pytest.mark.parametrize("checkpoint_start, resumed", [(2, True), (3, False)])
+def test_fan_out_keeps_checkpoints_that_fit_the_plan(storage_root, checkpoint_start, resumed):
+    name = _write_csv(storage_root, "name", [f"B{i}" for i in range(6)])
+    engine = create_engine("sqlite://").execution_options(schema_translate_map={"public": None})
+    UploadSessionShardOrm.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    with factory() as db:
+        db.add(UploadSessionShardOrm(session_id=SAMPLE_SESSION_ID, start_row=checkpoint_start, last_committed_row=3))
+        db.commit()
+
+    with patch("app.tasks.load_jobs.get_session", side_effect=lambda **kwargs: factory()), \
+         patch("app.tasks.load_jobs.SessionProgressReporter"), \
+         patch("app.tasks.load_jobs.chord"), \
+         patch("app.tasks.load_jobs._clear_session_errors") as mock_clear_errors:
+        load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, name, name,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, shards=3,
+        )
+
+    # Plan: (0, 2), (2, 4), (4, 6). A resume keeps the row errors and checkpoints of its shards.
+    with factory() as db:
+        kept = db.get(UploadSessionShardOrm, (SAMPLE_SESSION_ID, checkpoint_start)) is not None
+    assert kept is resumed
+    if resumed:
+        mock_clear_errors.assert_called_once_with(ANY, SAMPLE_SESSION_ID, ErrorType.TASK_EXCEPTION)
+    else:
+        mock_clear_errors.assert_called_once_with(ANY, SAMPLE_SESSION_ID)
+
+
+def test_finalize_sharded_upload_merges_summaries(storage_root):
+    name = _write_csv(storage_root, "name", ["A"])
+    summaries = [
+        {"start_row": 5, "rows": 5, "inserted": 5, "updated": 0, "error_count": 1, "failed": False},
+        {"start_row": 0, "rows": 5, "inserted": 3, "updated": 1, "error_count": 1, "failed": False},
+    ]
+
+    with patch("app.tasks.load_jobs.SessionProgressReporter") as reporter_cls:
+        result = load_jobs.finalize_sharded_upload.run(summaries, SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, name)
+
+    assert result["status"] == UploadJobStatus.COMPLETED_WITH_ERRORS.value
+    assert result["error_count"] == 2
+    reporter_cls.assert_called_once_with(SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, metrics=None)
+    call = reporter_cls.return_value.finish.call_args
+    assert call.args[0] == UploadJobStatus.COMPLETED_WITH_ERRORS
+    assert call.kwargs["record_count"] == 10
+    assert call.kwargs["error_count"] == 2
+    assert call.kwargs["inserted_count"] == 8
+    assert call.kwargs["updated_count"] == 1
+    assert not (storage_root / SAMPLE_BUSINESS_ID / name).exists()
@@ -0,0 +1,296 @@
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+from sqlalchemy.exc import OperationalError
+
+from app.tasks import load_jobs
+from app.db.models import UploadSessionOrm
+from app.models import UploadJobStatus, LoaderResult, ErrorType
+from app.services.fingerprints import row_fingerprint
+
+SAMPLE_BUSINESS_ID = "123"
+SAMPLE_SESSION_ID = "sess_stream"
+SAMPLE_USER_ID = 7
+
+
+def _write_csv(tmp_path, rows):
+    biz_dir = tmp_path / SAMPLE_BUSINESS_ID
+    biz_dir.mkdir(parents=True, exist_ok=True)
+    path = biz_dir / "brands.csv"
+    lines = ["name,logo"] + [f"{name},{name}.png" for name in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return "brands.csv"
+
+
+@pytest.fixture
+def storage_root(tmp_path):
+    with patch.object(load_jobs, "STORAGE_ROOT", str(tmp_path)):
+        yield tmp_path
+
+
+@pytest.fixture
+def upload_session():
+    return UploadSessionOrm(session_id=SAMPLE_SESSION_ID, business_details_id=int(SAMPLE_BUSINESS_ID), load_type="brands")
+
+
+@pytest.fixture
+def mock_db(upload_session):
+    db = MagicMock(name="db_session")
+    db.query.return_value.filter_by.return_value.first.return_value = upload_session
+    db.execute.return_value.rowcount = 0
+
+    def fake_write(db, session_id, values):
+        for column, value in values.items():
+            setattr(upload_session, column, value)
+        return 1
+
+    with patch("app.tasks.load_jobs.get_session", return_value=db), \
+         patch("app.tasks.load_jobs.write_session_row", side_effect=fake_write):
+        yield db
+
+
+@pytest.fixture
+def written_errors():
+    errors = []
+    with patch("app.tasks.load_jobs.write_session_errors",
+               side_effect=lambda db, session_id, chunk_errors: errors.extend(chunk_errors)):
+        yield errors
+
+
+@pytest.fixture
+def mock_status():
+    with patch("app.tasks.load_jobs.SessionProgressReporter") as reporter_cls:
+        yield reporter_cls.return_value
+
+
+def _passthrough_validate(map_type, records, session_id):
+    errors = [
+        {"row": i + 1, "field": "name", "error": "name is required"}
+        for i, r in enumerate(records) if not r["name"]
+    ]
+    return errors, [r for r in records if r["name"]]
+
+
+def test_iter_csv_chunks_yields_bounded_chunks(tmp_path):
+    path = tmp_path / "f.csv"
+    path.write_text("a\n" + "\n".join(str(i) for i in range(5)) + "\n", encoding="utf-8")
+
+    chunks = list(load_jobs._iter_csv_chunks(str(path), 2))
+
+    assert [len(c) for c in chunks] == [2, 2, 1]
+    assert chunks[2][0]["a"] == "4"
+
+
+def test_iter_csv_chunks_skips_committed_rows(tmp_path):
+    path = tmp_path / "f.csv"
+    path.write_text("a\n" + "\n".join(str(i) for i in range(5)) + "\n", encoding="utf-8")
+
+    chunks = list(load_jobs._iter_csv_chunks(str(path), 2, skip_rows=3))
+
+    assert [[r["a"] for r in c] for c in chunks] == [["3", "4"]]
+
+
+def test_iter_csv_chunks_drops_a_byte_order_mark(tmp_path):
+    path = tmp_path / "f.csv"
+    path.write_text("a,b\n1,2\n", encoding="utf-8-sig")
+
+    chunks = list(load_jobs._iter_csv_chunks(str(path), 2))
+
+    assert chunks == [[{"a": "1", "b": "2"}]]
+
+
+def test_streaming_commits_per_chunk(storage_root, mock_db, mock_status, upload_session):
+    filename = _write_csv(storage_root, ["A", "B", "C", "D", "E"])
+    loaded_batches = []
+
+    def fake_load(db, bid, records, session_id, pipeline, user_id):
+        loaded_batches.append([r["name"] for r in records])
+        return {"inserted": len(records), "updated": 0, "errors": 0}
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=_passthrough_validate), \
+         patch("app.services.loader_registry.load_brand_to_db", side_effect=fake_load):
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+        )
+
+    assert loaded_batches == [["A", "B"], ["C", "D"], ["E"]]
+    assert mock_db.commit.call_count == 3
+    assert result["status"] == UploadJobStatus.COMPLETED.value
+    assert result["processed"] == 5
+    assert upload_session.last_committed_row == 5
+    assert upload_session.inserted_count == 5
+    assert not os.path.exists(storage_root / SAMPLE_BUSINESS_ID / filename)
+
+
+def test_streaming_reports_invalid_rows_with_file_line_numbers(storage_root, mock_db, mock_status, written_errors):
+    filename = _write_csv(storage_root, ["A", "B", "C", ""])
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=_passthrough_validate), \
+         patch("app.services.loader_registry.load_brand_to_db", return_value={"inserted": 1, "updated": 0, "errors": 0}):
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+        )
+
+    assert result["status"] == UploadJobStatus.COMPLETED_WITH_ERRORS.value
+    assert result["error_count"] == 1
+    # Header is line 1, so the fourth data row is line 5.
+    assert [e.row_number for e in written_errors] == [5]
+    final_call = mock_status.finish.call_args
+    assert "details" not in final_call.kwargs
+    assert final_call.args[0] == UploadJobStatus.COMPLETED_WITH_ERRORS
+    assert final_call.kwargs["record_count"] == 4
+    assert final_call.kwargs["error_count"] == 1
+
+
+def test_streaming_loader_failure_marks_session_failed(storage_root, mock_db, mock_status):
+    filename = _write_csv(storage_root, ["A", "B", "C"])
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=_passthrough_validate), \
+         patch("app.services.loader_registry.load_brand_to_db", side_effect=[
+             {"inserted": 2, "updated": 0, "errors": 0},
+             RuntimeError("boom"),
+         ]):
+        load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+        )
+
+    final_call = mock_status.finish.call_args
+    assert final_call.args[0] == UploadJobStatus.FAILED_DB_PROCESSING
+    assert "rows 4-4" in final_call.kwargs["details"][-1].error_message
+    mock_db.rollback.assert_called()
+
+
+def test_streaming_resumes_after_checkpoint(storage_root, mock_db, mock_status, upload_session):
+    filename = _write_csv(storage_root, ["A", "B", "C", "D", "E"])
+    upload_session.last_committed_row = 2
+    upload_session.inserted_count = 2
+    upload_session.updated_count = 0
+    upload_session.error_count = 0
+    loaded_batches = []
+
+    def fake_load(db, bid, records, session_id, pipeline, user_id):
+        loaded_batches.append([r["name"] for r in records])
+        return {"inserted": len(records), "updated": 0, "errors": 0}
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=_passthrough_validate), \
+         patch("app.services.loader_registry.load_brand_to_db", side_effect=fake_load):
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+        )
+
+    assert loaded_batches == [["C", "D"], ["E"]]
+    assert result["processed"] == 5
+    assert mock_status.finish.call_args.kwargs["record_count"] == 5
+
+
+def test_streaming_reraises_retryable_errors_at_checkpoint(storage_root, mock_db, mock_status, upload_session):
+    filename = _write_csv(storage_root, ["A", "B", "C"])
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=_passthrough_validate), \
+         patch("app.services.loader_registry.load_brand_to_db", side_effect=[
+             {"inserted": 2, "updated": 0, "errors": 0},
+             OperationalError("UPDATE ...", {}, Exception("server closed the connection")),
+         ]):
+        with pytest.raises(OperationalError):
+            load_jobs.process_csv_task(
+                SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+                "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+            )
+
+    assert upload_session.last_committed_row == 2
+    mock_db.rollback.assert_called()
+    mock_status.finish.assert_not_called()
+    assert os.path.exists(storage_root / SAMPLE_BUSINESS_ID / filename)
+
+
+def test_whole_file_types_bypass_streaming(storage_root, mock_db, mock_status):
+    filename = _write_csv(storage_root, ["A"])
+
+    with patch("app.tasks.load_jobs._process_csv_streaming") as mock_stream, \
+         patch("app.tasks.load_jobs.validate_csv", return_value=([], [{"name": "A"}])), \
+         patch("app.services.loader_registry.load_categories_batch", return_value=LoaderResult(inserted=1)) as mock_load:
+        load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "CAT", "categories", SAMPLE_USER_ID,
+        )
+
+    mock_stream.assert_not_called()
+    mock_load.assert_called_once()
+
+
+def test_empty_file_streaming(storage_root, mock_db, mock_status):
+    filename = _write_csv(storage_root, [])
+
+    with patch("app.tasks.load_jobs.validate_csv") as mock_validate:
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID,
+        )
+
+    assert result is None
+    mock_validate.assert_not_called()
+    assert mock_status.finish.call_args.args[0] == UploadJobStatus.COMPLETED_EMPTY_FILE
+
+
+def test_resume_drops_only_the_previous_failure_entry(storage_root, mock_db, mock_status, upload_session):
+    filename = _write_csv(storage_root, ["A", "B", "C"])
+    upload_session.last_committed_row = 3
+    upload_session.error_count = 2
+
+    with patch("app.tasks.load_jobs.delete_session_errors", return_value=1) as mock_delete:
+        load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+        )
+
+    mock_delete.assert_called_once_with(mock_db, SAMPLE_SESSION_ID, ErrorType.TASK_EXCEPTION)
+    assert mock_status.finish.call_args.kwargs["error_count"] == 1
+    assert mock_status.finish.call_args.args[0] == UploadJobStatus.COMPLETED_WITH_ERRORS
+
+
+def test_delta_upload_skips_unchanged_rows(storage_root, mock_db, mock_status, upload_session):
+    filename = _write_csv(storage_root, ["A", "B", "C"])
+    stored = {name: row_fingerprint({"name": name, "logo": f"{name}.png"}) for name in ("A", "B")}
+    loaded = []
+
+    def fake_load(db, bid, records, session_id, pipeline, user_id):
+        loaded.extend(r["name"] for r in records)
+        return {"inserted": len(records), "updated": 0, "errors": 0}
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=lambda t, recs, s: ([], [dict(r) for r in recs])), \
+         patch("app.services.fingerprints._stored_fingerprints", return_value=stored), \
+         patch("app.tasks.load_jobs.save_fingerprints") as mock_save, \
+         patch("app.services.loader_registry.load_brand_to_db", side_effect=fake_load):
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2, delta=True,
+        )
+
+    assert loaded == ["C"]
+    assert result["unchanged"] == 2
+    assert result["status"] == UploadJobStatus.COMPLETED.value
+    assert upload_session.unchanged_count == 2
+    assert [set(c.args[3]) for c in mock_save.call_args_list] == [set(), {"C"}]
+
+
+def test_full_upload_only_forgets_fingerprints(storage_root, mock_db, mock_status, upload_session):
+    filename = _write_csv(storage_root, ["A", "B", "C"])
+
+    with patch("app.tasks.load_jobs.validate_csv", side_effect=lambda t, recs, s: ([], [dict(r) for r in recs])), \
+         patch("app.tasks.load_jobs.split_unchanged") as mock_split, \
+         patch("app.tasks.load_jobs.save_fingerprints") as mock_save, \
+         patch("app.tasks.load_jobs.forget_fingerprints") as mock_forget, \
+         patch("app.services.loader_registry.load_brand_to_db", return_value={"inserted": 1, "updated": 0, "errors": 0}):
+        result = load_jobs.process_csv_task(
+            SAMPLE_BUSINESS_ID, SAMPLE_SESSION_ID, filename, filename,
+            "name", "BRAND", "brands", SAMPLE_USER_ID, chunk_size=2,
+        )
+
+    assert result["status"] == UploadJobStatus.COMPLETED.value
+    mock_split.assert_not_called()
+    mock_save.assert_not_called()
+    assert [[r["name"] for r in c.args[3]] for c in mock_forget.call_args_list] == [["A", "B"], ["C"]]